@@ -7,15 +7,10 @@ import os
 import csv
 import re
 from collections import Counter, defaultdict
-from dotenv import load_dotenv
-from supabase import create_client
+from pathlib import Path
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from product_records import load_records
 
 CSV_PATH = 'data/truper_catalog_full.csv'
 
@@ -286,6 +281,19 @@ def analyze_patterns(products_without_images, codes_by_code, codes_by_clave, des
     print("✅ ANÁLISIS COMPLETADO")
     print("=" * 60)
 
+def has_valid_images(images) -> bool:
+    """True si alguna imagen es una URL o una ruta local que existe."""
+    for img in images:
+        if img and img.strip():
+            img = img.strip()
+            if img.startswith('http'):
+                return True
+            elif img.startswith('/images/'):
+                local_path = Path('public') / img.lstrip('/')
+                if local_path.exists():
+                    return True
+    return False
+
 def main():
     print("=" * 60)
     print("🔍 ANÁLISIS EXHAUSTIVO DE PRODUCTOS SIN IMÁGENES")
@@ -299,44 +307,11 @@ def main():
     
     # Obtener productos sin imágenes
     print("🔍 Obteniendo productos sin imágenes...")
-    all_products = []
-    offset = 0
-    page_size = 1000
-    
-    while True:
-        response = supabase.table('marketplace_products').select(
-            'id, title, description, images, category_id'
-        ).eq('status', 'active').range(offset, offset + page_size - 1).execute()
-        
-        batch = response.data
-        if not batch:
-            break
-        
-        all_products.extend(batch)
-        offset += page_size
-        
-        if len(batch) < page_size:
-            break
-    
-    # Filtrar productos sin imágenes válidas
-    products_without_images = []
-    for product in all_products:
-        images = product.get('images') or []
-        valid_images = []
-        
-        for img in images:
-            if img and img.strip():
-                img = img.strip()
-                if img.startswith('http'):
-                    valid_images.append(img)
-                elif img.startswith('/images/'):
-                    from pathlib import Path
-                    local_path = Path('public') / img.lstrip('/')
-                    if local_path.exists():
-                        valid_images.append(img)
-        
-        if not valid_images:
-            products_without_images.append(product)
+    # Sólo se guardan (como registros compactos) los productos sin imágenes válidas
+    products_without_images = list(load_records(
+        supabase, 'id, title, description, images, category_id',
+        keep=lambda p: not has_valid_images(p.images),
+    ))
     
     print(f"✅ {len(products_without_images)} productos sin imágenes encontrados\n")
     
@@ -3,18 +3,11 @@ Script mejorado para asignar imágenes locales a productos sin imágenes.
 Usa regex mejorado y búsqueda más inteligente.
 """
 
-import os
 import re
 from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from catalog_plan import PlanWriter, plan_arg
 
 LOCAL_IMAGES_DIR = Path('public/images/marketplace/truper')
 
@@ -99,13 +92,16 @@ def main():
     import sys
     
     dry_run = '--execute' not in sys.argv
+    plan_path = plan_arg()
     
     print("=" * 60)
     print("🖼️  ASIGNAR IMÁGENES LOCALES A PRODUCTOS SIN IMÁGENES")
     print("=" * 60)
     print()
     
-    if dry_run:
+    if plan_path:
+        print("⚠️  MODO PLAN - Los cambios se guardan en un archivo, no en la BD\n")
+    elif dry_run:
         print("⚠️  MODO DRY RUN - No se realizarán cambios\n")
     else:
         print("⚠️  MODO EJECUCIÓN - Se realizarán cambios\n")
@@ -122,7 +118,7 @@ def main():
     
     while True:
         response = supabase.table('marketplace_products').select(
-            'id, title, description, images'
+            'id, title, description, images, updated_at'
         ).eq('status', 'active').range(offset, offset + 1000).execute()
         
         batch = response.data
@@ -179,6 +175,8 @@ def main():
                 'id': product['id'],
                 'title': title[:60],
                 'image': matched_image,
+                'images': product.get('images'),
+                'updated_at': product.get('updated_at'),
             })
             stats['found'] += 1
         else:
@@ -201,8 +199,13 @@ def main():
             print(f"{i}. {item['title']}...")
             print(f"   → {item['image']}")
     
-    # Aplicar cambios
-    if products_to_update and not dry_run:
+    # Guardar el plan o aplicar cambios
+    if plan_path:
+        with PlanWriter(plan_path, 'assign_local_images', **stats) as plan:
+            for item in products_to_update:
+                plan.add(item['id'], 'images', item['images'], [item['image']], item['updated_at'])
+        plan.report()
+    elif products_to_update and not dry_run:
         auto_confirm = '--yes' in sys.argv or '-y' in sys.argv
         if not auto_confirm:
             confirmation = input(f"\n¿Deseas actualizar {len(products_to_update)} productos? (s/N): ").lower()
@@ -236,6 +239,8 @@ def main():
     elif products_to_update and dry_run:
         print("\n💡 Para aplicar los cambios, ejecuta:")
         print("   python3 scripts/assign_local_images.py --execute --yes")
+        print("   o guarda un plan para revisarlo y aplicarlo después:")
+        print("   python3 scripts/assign_local_images.py --plan")
     
     print("\n" + "=" * 60)
     print("✅ PROCESO COMPLETADO")
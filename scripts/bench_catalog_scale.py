@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalabilidad de los scripts del catálogo con datos sintéticos
+
+Para cada escala genera (o reutiliza) un catálogo con synthetic_catalog.py y
+mide tiempo, filas por segundo y pico de memoria (tracemalloc, en una segunda
+pasada para no inflar los tiempos) de las funciones que hacen el trabajo
+pesado en cada script, sin tocar la base de datos:
+
+- dedup_exact     : remove_duplicate_products.find_duplicate_groups
+- dedup_near      : find_near_duplicate_products (MinHash + LSH + clusters)
+- image_matching  : fix_all_products_without_images (lectura del CSV Truper
+                    + find_code_in_title para los productos sin imagen)
+- price_csv       : update_prices_from_csv.parse_csv
+- duplicate_images: clean_duplicate_images.analyze_duplicate_images
+- truper_classify : import_truper_fast (lectura del CSV Truper + categoría y
+                    power_type de cada fila con truper_classifier)
+
+Los resultados se guardan en data/benchmarks/catalog_scale_<fecha>.json;
+con --baseline se compara contra una corrida anterior.
+
+Uso:
+    python3 scripts/bench_catalog_scale.py --scales 1,10
+    python3 scripts/bench_catalog_scale.py --scales 100 --benches dedup_exact,duplicate_images --no-memory
+    python3 scripts/bench_catalog_scale.py --scales 1,10 --baseline data/benchmarks/catalog_scale_<fecha>.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from bench_syscom_sync import BENCH_DIR, PLACEHOLDER_ENV
+from synthetic_catalog import DEFAULT_OUTPUT, DEFAULT_RATES, generate, load_snapshot
+
+for _key, _value in PLACEHOLDER_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+# Importar antes de medir para no contar la carga de supabase/requests en el primer benchmark
+import clean_duplicate_images  # noqa: E402
+import find_near_duplicate_products as near  # noqa: E402
+import fix_all_products_without_images as fix_images  # noqa: E402
+import import_truper_fast  # noqa: E402
+import remove_duplicate_products  # noqa: E402
+import update_prices_from_csv  # noqa: E402
+
+
+def bench_dedup_exact(data: Dict) -> int:
+    remove_duplicate_products.find_duplicate_groups(['sku', 'external_code', 'title'], data['snapshot'])
+    return len(data['snapshot'])
+
+
+def bench_dedup_near(data: Dict) -> int:
+    finder = near.NearDuplicateFinder()
+    for product in data['snapshot']:
+        finder.add(product)
+    near.build_clusters(finder, threshold=0.8, cross_supplier_only=True, max_bucket=100)
+    return len(data['snapshot'])
+
+
+def bench_image_matching(data: Dict) -> int:
+    fix_images.CSV_PATH = str(data['dir'] / 'truper_catalog_full.csv')
+    codes_by_code, codes_by_clave, _ = fix_images.read_csv_codes()
+    without_images = [p for p in data['snapshot'] if not any((img or '').startswith('http') for img in p['images'] or [])]
+    for product in without_images:
+        fix_images.find_code_in_title(product.get('title', ''), codes_by_code, codes_by_clave)
+    return data['manifest']['counts']['truper_rows'] + len(without_images)
+
+
+def bench_price_csv(data: Dict) -> int:
+    return len(update_prices_from_csv.parse_csv(str(data['dir'] / 'precios.csv')))
+
+
+def bench_duplicate_images(data: Dict) -> int:
+    clean_duplicate_images.analyze_duplicate_images(None, products=data['snapshot'])
+    return len(data['snapshot'])
+
+
+def bench_truper_classify(data: Dict) -> int:
+    import_truper_fast.CSV_FILE = data['dir'] / 'truper_catalog_full.csv'
+    importer = import_truper_fast.TruperFastImporter()
+    rows = importer.read_csv()
+    for row in rows:
+        importer.classifier.classify(row.get("Familia", "").strip(), row.get("Descripción Familia", "").strip(),
+                                     row.get("descripción", "").strip(), row.get("clave", "").strip())
+    return len(rows)
+
+
+BENCHES: Dict[str, Callable[[Dict], int]] = {
+    'dedup_exact': bench_dedup_exact,
+    'dedup_near': bench_dedup_near,
+    'image_matching': bench_image_matching,
+    'price_csv': bench_price_csv,
+    'duplicate_images': bench_duplicate_images,
+    'truper_classify': bench_truper_classify,
+}
+
+
+def prepare_scale(scale: float, seed: int, rates: Dict, regenerate: bool) -> Dict:
+    """Genera el catálogo de la escala o reutiliza el existente si coincide"""
+    directory = DEFAULT_OUTPUT / f"x{scale:g}"
+    manifest_file = directory / 'manifest.json'
+    manifest = json.loads(manifest_file.read_text(encoding='utf-8')) if manifest_file.exists() else None
+    if regenerate or not manifest or manifest['seed'] != seed or manifest['rates'] != rates:
+        print(f"🧪 Generando catálogo x{scale:g}...")
+        start = time.perf_counter()
+        manifest = generate(directory, scale, seed, **rates)
+        print(f"   {manifest['counts']['marketplace_rows']:,} productos en {time.perf_counter() - start:.1f} s")
+    else:
+        print(f"♻️  Reutilizando {directory}")
+    start = time.perf_counter()
+    snapshot = load_snapshot(directory / 'marketplace_products.jsonl')
+    print(f"   Instantánea cargada en {time.perf_counter() - start:.1f} s")
+    return {'dir': directory, 'manifest': manifest, 'snapshot': snapshot}
+
+
+def run_bench(func: Callable[[Dict], int], data: Dict, memory: bool, verbose: bool) -> Dict:
+    output = sys.stdout if verbose else io.StringIO()
+    with redirect_stdout(output):
+        start = time.perf_counter()
+        rows = func(data)
+        seconds = time.perf_counter() - start
+    result = {'rows': rows, 'seconds': round(seconds, 3), 'rows_per_s': round(rows / seconds, 1) if seconds else None}
+    if memory:
+        tracemalloc.start()
+        try:
+            with redirect_stdout(output):
+                func(data)
+            result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def load_baseline(path: Optional[str]) -> Dict:
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark de escalabilidad con catálogos sintéticos')
+    parser.add_argument('--scales', default='1,10', help='Escalas separadas por coma (1 = producción)')
+    parser.add_argument('--benches', default=','.join(BENCHES), help=f"Benchmarks: {', '.join(BENCHES)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--regenerate', action='store_true', help='Regenerar aunque exista el catálogo')
+    parser.add_argument('--no-memory', action='store_true', help='No medir pico de memoria (una sola pasada)')
+    parser.add_argument('--baseline', help='Resultados anteriores para comparar')
+    parser.add_argument('--verbose', action='store_true', help='Mostrar la salida de los scripts')
+    for name, value in DEFAULT_RATES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args()
+
+    names = [b.strip() for b in args.benches.split(',') if b.strip()]
+    unknown = [b for b in names if b not in BENCHES]
+    if unknown:
+        print(f"❌ Benchmarks desconocidos: {', '.join(unknown)}")
+        sys.exit(1)
+    scales = [float(s) for s in args.scales.split(',') if s.strip()]
+    rates = {name: getattr(args, name) for name in DEFAULT_RATES}
+    baseline = load_baseline(args.baseline)
+
+    results: Dict[str, Dict[str, Dict]] = {}
+    for scale in scales:
+        print("\n" + "=" * 80)
+        print(f"📏 ESCALA x{scale:g}")
+        print("=" * 80)
+        data = prepare_scale(scale, args.seed, rates, args.regenerate)
+        scale_key = f"x{scale:g}"
+        results[scale_key] = {}
+        for name in names:
+            result = run_bench(BENCHES[name], data, not args.no_memory, args.verbose)
+            results[scale_key][name] = result
+            previous = baseline.get(scale_key, {}).get(name)
+            delta = ''
+            if previous and previous.get('seconds'):
+                delta = f"  ({(result['seconds'] / previous['seconds'] - 1) * 100:+.0f}% vs baseline)"
+            memory = f" | pico {result['peak_mb']:8.1f} MB" if 'peak_mb' in result else ''
+            print(f"   {name:17s} {result['seconds']:8.2f} s | {result['rows_per_s'] or 0:>10,.0f} filas/s{memory}{delta}")
+        del data
+
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    output = BENCH_DIR / f"catalog_scale_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'fecha': datetime.now().isoformat(timespec='seconds'), 'seed': args.seed, 'rates': rates,
+                   'results': results}, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los clientes de Syscom contra el servidor simulado
+
+Levanta scripts/fake_syscom_server.py en un hilo, apunta los scripts a él
+(SYSCOM_API_BASE / SYSCOM_OAUTH_URL) y mide el rendimiento de punta a punta
+de las rutas que hablan con la API, sin credenciales ni cuota real:
+
+- listing : import_all_syscom_products.get_all_products_from_category
+- sync    : fetch_pages + map_pages de sync_syscom_products_improved
+            (hasta el punto de escritura; no toca la BD). Cada categoría
+            se divide en --subcategories hojas que el crawler descarga con
+            --workers hilos
+- detail  : quick_update_prices.get_product_price_from_syscom, producto por producto
+
+El catálogo sintético usa una semilla fija, así que dos corridas con los
+mismos parámetros hacen exactamente los mismos requests. Por defecto el
+servidor no limita y los clientes no esperan entre requests (mide el costo
+propio del código); --realistic usa 60 req/min y la espera de 1.1 s de los
+scripts.
+
+Los resultados se guardan en data/benchmarks/syscom_bench_<fecha>.json.
+
+Uso:
+    python3 scripts/bench_syscom_sync.py
+    python3 scripts/bench_syscom_sync.py --products 5000 --latency 0.1 --error-rate 0.02
+    python3 scripts/bench_syscom_sync.py --scenarios sync --realistic
+    python3 scripts/bench_syscom_sync.py --scenarios sync --latency 0.5 --workers 1
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from fake_syscom_server import FakeSyscomServer, synthetic_catalog
+
+BENCH_DIR = Path(__file__).parent.parent / "data" / "benchmarks"
+SCENARIOS = ('listing', 'sync', 'detail')
+# Variables mínimas para importar los scripts sin .env.local (no se usan para escribir)
+PLACEHOLDER_ENV = {
+    'NEXT_PUBLIC_SUPABASE_URL': 'http://127.0.0.1:54321',
+    'SUPABASE_SERVICE_ROLE_KEY': 'bench.bench.bench',
+    'SYSCOM_CLIENT_ID': 'bench',
+    'SYSCOM_CLIENT_SECRET': 'bench',
+}
+
+
+def configure_env(base_url: str, client_delay: float) -> None:
+    """Apunta los scripts al servidor simulado (antes de importarlos)"""
+    for key, value in PLACEHOLDER_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ['SYSCOM_OAUTH_URL'] = f"{base_url}/oauth/token"
+    os.environ['SYSCOM_API_BASE'] = f"{base_url}/api/v1"
+    os.environ['SYSCOM_RATE_LIMIT_DELAY'] = str(client_delay)
+
+
+def bench_listing(catalog: Dict[str, List[Dict]], args) -> Dict:
+    import import_all_syscom_products as importer
+
+    products = 0
+    for categoria in catalog:
+        products += len(importer.get_all_products_from_category(categoria, f"Categoría {categoria}"))
+    return {'products': products}
+
+
+def bench_sync(catalog: Dict[str, List[Dict]], args) -> Dict:
+    import sync_syscom_products_improved as sync
+
+    token = sync.get_access_token()
+    syscom_map = {categoria: f"bench-{categoria}" for categoria in catalog}
+    subcat_map = {slug: f"00000000-0000-0000-0000-{i:012d}" for i, slug in enumerate(syscom_map.values())}
+    pages_queue: queue.Queue = queue.Queue(maxsize=sync.FETCH_QUEUE_PAGES)
+    write_queue: queue.Queue = queue.Queue(maxsize=sync.WRITE_QUEUE_SIZE)
+    stop = threading.Event()
+    stats = {'skipped': 0}
+
+    fetcher = threading.Thread(target=sync.fetch_pages, daemon=True,
+                               args=({"Authorization": f"Bearer {token}"}, syscom_map, subcat_map,
+                                     args.max_pages, pages_queue, stop),
+                               kwargs={'workers': args.workers, 'refresh_tree': True,
+                                       'tree_cache': BENCH_DIR / 'category_tree.json'})
+    mapper = threading.Thread(target=sync.map_pages, daemon=True,
+                              args=(pages_queue, write_queue, 'bench-sistemas', sync.get_valid_seller_id(), stats))
+    fetcher.start()
+    mapper.start()
+    mapped = 0
+    while write_queue.get() is not sync._DONE:
+        mapped += 1
+    fetcher.join()
+    mapper.join()
+    return {'products': mapped, 'skipped': stats['skipped']}
+
+
+def bench_detail(catalog: Dict[str, List[Dict]], args) -> Dict:
+    import quick_update_prices as prices
+
+    token = prices.get_syscom_token()
+    ids = [p['producto_id'] for products in catalog.values() for p in products][:args.detail_limit]
+    with_price = sum(1 for producto_id in ids if prices.get_product_price_from_syscom(producto_id, token))
+    return {'products': len(ids), 'with_price': with_price}
+
+
+BENCHES: Dict[str, Callable] = {'listing': bench_listing, 'sync': bench_sync, 'detail': bench_detail}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark de clientes Syscom contra el servidor simulado')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Escenarios: {', '.join(SCENARIOS)}")
+    parser.add_argument('--products', type=int, default=1200, help='Productos por categoría')
+    parser.add_argument('--categories', default='22,26,30', help='IDs de categoría a simular')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.02, help='Latencia del servidor por request (s)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de requests con 5xx')
+    parser.add_argument('--rate-limit', type=int, default=0, help='Requests/min del servidor (0 = sin límite)')
+    parser.add_argument('--client-delay', type=float, default=0.0, help='Espera de los scripts entre requests (s)')
+    parser.add_argument('--realistic', action='store_true', help='60 req/min y espera de 1.1 s como la API real')
+    parser.add_argument('--max-pages', type=int, default=1000, help='Máximo de páginas por subcategoría (sync)')
+    parser.add_argument('--subcategories', type=int, default=4, help='Subcategorías hoja por categoría')
+    parser.add_argument('--workers', type=int, default=4, help='Hilos de descarga del crawler (sync)')
+    parser.add_argument('--detail-limit', type=int, default=300, help='Productos a consultar en detail')
+    args = parser.parse_args()
+
+    if args.realistic:
+        args.rate_limit, args.client_delay = 60, 1.1
+    names = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in names if s not in BENCHES]
+    if unknown:
+        print(f"❌ Escenarios desconocidos: {', '.join(unknown)}")
+        sys.exit(1)
+
+    categories = {c.strip(): args.products for c in args.categories.split(',') if c.strip()}
+    catalog = synthetic_catalog(categories, args.seed)
+    try:
+        server = FakeSyscomServer(catalog, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                  rate_limit=args.rate_limit, seed=args.seed, subcategories=args.subcategories)
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    base_url, stop = server.start_in_thread()
+    configure_env(base_url, args.client_delay)
+
+    print("=" * 80)
+    print("🧪 BENCHMARK SYSCOM (servidor simulado)")
+    print("=" * 80)
+    print(f"Servidor: {base_url} | {sum(categories.values())} productos en {len(categories)} categorías")
+    print(f"Latencia: {args.latency * 1000:.0f} ms | errores: {args.error_rate:.1%} | "
+          f"límite: {args.rate_limit or 'sin'} req/min | espera cliente: {args.client_delay} s")
+
+    results = {}
+    try:
+        for name in names:
+            server.stats.clear()
+            print(f"\n▶️  {name}")
+            start = time.perf_counter()
+            result = BENCHES[name](catalog, args)
+            elapsed = time.perf_counter() - start
+            requests_made = sum(server.stats.values())
+            result.update({
+                'seconds': round(elapsed, 3),
+                'products_per_s': round(result['products'] / elapsed, 1) if elapsed else None,
+                'requests': requests_made,
+                'requests_per_s': round(requests_made / elapsed, 1) if elapsed else None,
+                'server': server.stats_dict(),
+            })
+            results[name] = result
+    finally:
+        stop()
+
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    output = BENCH_DIR / f"syscom_bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'fecha': datetime.now().isoformat(timespec='seconds'), 'params': vars(args), 'results': results},
+                  f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 80)
+    print("📊 RESULTADOS")
+    print("=" * 80)
+    print(f"{'escenario':10s} {'productos':>10s} {'segundos':>9s} {'prod/s':>9s} {'requests':>9s} {'req/s':>7s}")
+    for name, r in results.items():
+        print(f"{name:10s} {r['products']:10d} {r['seconds']:9.2f} {r['products_per_s'] or 0:9.1f} "
+              f"{r['requests']:9d} {r['requests_per_s'] or 0:7.1f}")
+    print(f"\n💾 Resultados guardados en: {output}")
+
+
+if __name__ == "__main__":
+    main()
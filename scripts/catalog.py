@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+CLI del catálogo: corre el refresco nocturno como un grafo de etapas
+
+Cada etapa declara de cuáles depende; las que no dependen entre sí se
+ejecutan en paralelo (hilos) y todas comparten una instantánea en memoria de
+los productos. La instantánea se lee al arrancar, sin esperar el reporte de
+Syscom, así que el mantenimiento de imágenes corre mientras tanto; después de
+la importación sólo se vuelven a leer los productos de Syscom. Las etapas que
+modifican productos actualizan también la instantánea, pero sólo con las filas
+que quedaron escritas en la BD, así que las siguientes ven el estado real sin
+volver a consultar la tabla.
+
+    snapshot ──> truper_images ─> clean_images ─┬──────────────> dedup
+                                                └─> broken_images
+    report ─> import ─> syscom_snapshot ─> prices ─────────────> dedup
+
+Al terminar se imprime y guarda (data/catalog_runs/) el tiempo de cada etapa
+y la ruta crítica del grafo.
+
+Uso:
+    python3 scripts/catalog.py graph
+    python3 scripts/catalog.py run                              # dry-run completo
+    python3 scripts/catalog.py run --execute
+    python3 scripts/catalog.py run --skip report,import        # sólo mantenimiento
+    python3 scripts/catalog.py run --stages dedup               # dedup y sus dependencias
+    python3 scripts/catalog.py run --report-file data/syscom_reports/X.html
+"""
+
+import sys
+import json
+import time
+import threading
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+from catalog_config import SUPABASE_VARS, get_supabase, require_env
+from etl_metrics import metrics
+from etl_profile import phase, run_main
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+RUNS_DIR = Path(__file__).parent.parent / "data" / "catalog_runs"
+SNAPSHOT_COLUMNS = 'id,title,description,sku,external_code,price,original_price,images,contact_phone,created_at,status'
+# Campos que la importación de Syscom reescribe (import_all_syscom_products.SYNC_FIELDS)
+SYSCOM_REFRESH_FIELDS = ('title', 'price', 'original_price')
+PAGE_SIZE = 1000
+DEFAULT_WORKERS = 4
+
+
+class Stage:
+    """Etapa del grafo: func(ctx) -> dict con un resumen (o None)"""
+
+    def __init__(self, name: str, func: Callable[["CatalogContext"], Optional[Dict]],
+                 deps: Sequence[str] = (), description: str = ''):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.description = description
+
+
+class CatalogContext:
+    """Estado compartido entre etapas: cliente, opciones, instantánea y resultados"""
+
+    def __init__(self, supabase: 'Client', args: argparse.Namespace):
+        self.supabase = supabase
+        self.args = args
+        self.execute = args.execute
+        self.snapshot: Dict[str, Dict] = {}
+        self.results: Dict[str, Optional[Dict]] = {}
+        self.lock = threading.Lock()
+
+    def products(self) -> List[Dict]:
+        """Productos activos de la instantánea (los dicts son compartidos)"""
+        with self.lock:
+            if not self.snapshot:
+                raise RuntimeError("La instantánea no está cargada (la etapa 'snapshot' no se ejecutó)")
+            return [p for p in self.snapshot.values() if p.get('status') == 'active']
+
+    def update(self, product_id: str, fields: Dict) -> None:
+        """Aplica a la instantánea campos ya escritos en la BD"""
+        with self.lock:
+            product = self.snapshot.get(product_id)
+            if product is not None:
+                product.update(fields)
+
+
+# ---------------------------------------------------------------------------
+# Etapas
+# ---------------------------------------------------------------------------
+
+def stage_report(ctx: CatalogContext) -> Dict:
+    if ctx.args.report_file:
+        return {'html_file': ctx.args.report_file}
+    from syscom_report_poller import fetch_report_sync
+    html_file = fetch_report_sync(ctx.args.max_report_wait)
+    if not html_file:
+        raise RuntimeError("El reporte de Syscom no estuvo disponible")
+    return {'html_file': str(html_file)}
+
+
+def stage_import(ctx: CatalogContext) -> Dict:
+    from import_all_syscom_products import import_from_report
+    html_file = (ctx.results.get('report') or {}).get('html_file') or ctx.args.report_file
+    if not html_file:
+        raise RuntimeError("No hay reporte para importar (usa --report-file o la etapa 'report')")
+    import_from_report(html_file, dry_run=not ctx.execute, enrich_limit=ctx.args.enrich_limit)
+    return {'html_file': html_file}
+
+
+def fetch_active_products(ctx: CatalogContext, syscom_only: bool = False) -> List[Dict]:
+    products = []
+    offset = 0
+    while True:
+        query = ctx.supabase.table('marketplace_products').select(SNAPSHOT_COLUMNS).eq('status', 'active')
+        if syscom_only:
+            query = query.not_.is_('external_code', 'null')
+        response = query.order('id').range(offset, offset + PAGE_SIZE - 1).execute()
+        batch = response.data or []
+        products.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return products
+
+
+def stage_snapshot(ctx: CatalogContext) -> Dict:
+    products = fetch_active_products(ctx)
+    with ctx.lock:
+        for product in products:
+            ctx.snapshot[product['id']] = product
+    return {'products': len(products)}
+
+
+def stage_syscom_snapshot(ctx: CatalogContext) -> Dict:
+    """
+    Vuelve a leer los productos de Syscom después de la importación. Los nuevos
+    se agregan; en los que ya estaban sólo se refrescan los campos que escribe
+    la importación (las etapas de imágenes pueden estar modificando el mismo
+    dict) y de las imágenes sólo se agregan las portadas que faltan, igual que
+    hace import_all_syscom_products.changed_fields.
+    """
+    products = fetch_active_products(ctx, syscom_only=True)
+    added = refreshed = 0
+    with ctx.lock:
+        for product in products:
+            current = ctx.snapshot.get(product['id'])
+            if current is None:
+                ctx.snapshot[product['id']] = product
+                added += 1
+                continue
+            changes = {field: product.get(field) for field in SYSCOM_REFRESH_FIELDS
+                       if current.get(field) != product.get(field)}
+            stored = list(current.get('images') or [])
+            missing = [img for img in (product.get('images') or []) if img not in stored]
+            if missing:
+                changes['images'] = missing + stored
+            if changes:
+                current.update(changes)
+                refreshed += 1
+    return {'products': len(products), 'added': added, 'refreshed': refreshed}
+
+
+def stage_truper_images(ctx: CatalogContext) -> Optional[Dict]:
+    import fetch_truper_images_from_api
+    return fetch_truper_images_from_api.main(ctx.execute, products=ctx.products())
+
+
+def stage_prices(ctx: CatalogContext) -> Optional[Dict]:
+    from quick_update_prices import update_prices_batch
+    return update_prices_batch(limit=ctx.args.price_limit, productos=ctx.products(), dry_run=not ctx.execute)
+
+
+def stage_clean_images(ctx: CatalogContext) -> Dict:
+    from clean_duplicate_images import analyze_duplicate_images, clean_duplicate_images
+    duplicates, stats = analyze_duplicate_images(ctx.supabase, products=ctx.products())
+    cleaned, errors = clean_duplicate_images(ctx.supabase, duplicates, dry_run=not ctx.execute)
+    for product_data in duplicates:
+        if product_data.get('images_written'):
+            ctx.update(product_data['id'], {'images': product_data['cleaned_images']})
+    return {'products_with_duplicates': len(duplicates), 'cleaned': cleaned, 'errors': errors}
+
+
+def stage_dedup(ctx: CatalogContext) -> Dict:
+    from remove_duplicate_products import find_duplicate_groups, remove_duplicates
+    groups = find_duplicate_groups(['sku', 'external_code'], ctx.products())
+    removed = remove_duplicates(groups, ctx.execute) if groups else 0
+    deleted = [product_id for group in groups for product_id in group.get('deleted', [])]
+    for product_id in deleted:
+        ctx.update(product_id, {'status': 'deleted'})
+    return {'groups': len(groups), 'removed': removed, 'deleted': len(deleted)}
+
+
+def stage_broken_images(ctx: CatalogContext) -> Dict:
+    from check_broken_images import check_products_images
+    products = [p for p in ctx.products() if p.get('images')]
+    urls, accessible, broken = check_products_images(products)
+    affected = {product['id'] for item in broken for product in item['products']}
+    return {'urls': len(urls), 'broken_urls': len(broken), 'products_affected': len(affected)}
+
+
+STAGES: Dict[str, Stage] = {stage.name: stage for stage in [
+    Stage('report', stage_report, (), 'Esperar/descargar el reporte por hora de Syscom'),
+    Stage('import', stage_import, ('report',), 'Importar/actualizar Syscom desde el reporte'),
+    Stage('snapshot', stage_snapshot, (), 'Leer una vez los productos activos'),
+    Stage('syscom_snapshot', stage_syscom_snapshot, ('import', 'snapshot'),
+          'Releer los productos de Syscom importados'),
+    Stage('truper_images', stage_truper_images, ('snapshot',), 'Galerías desde la API de Truper'),
+    Stage('prices', stage_prices, ('syscom_snapshot',), 'Precios faltantes desde la API de Syscom'),
+    Stage('clean_images', stage_clean_images, ('truper_images',), 'Quitar imágenes duplicadas'),
+    Stage('dedup', stage_dedup, ('syscom_snapshot', 'prices', 'clean_images'), 'Eliminar productos duplicados'),
+    Stage('broken_images', stage_broken_images, ('clean_images',), 'Reportar URLs de imágenes rotas'),
+]}
+
+
+# ---------------------------------------------------------------------------
+# Ejecución del grafo
+# ---------------------------------------------------------------------------
+
+def resolve_stages(requested: List[str], skipped: List[str]) -> List[str]:
+    """Etapas pedidas más sus dependencias, menos las omitidas, en orden del grafo"""
+    unknown = [name for name in requested + skipped if name not in STAGES]
+    if unknown:
+        raise SystemExit(f"❌ Etapas desconocidas: {', '.join(unknown)} (ver: catalog.py graph)")
+
+    selected = set()
+
+    def visit(name):
+        if name in selected:
+            return
+        selected.add(name)
+        for dep in STAGES[name].deps:
+            visit(dep)
+
+    for name in requested or list(STAGES):
+        visit(name)
+    return [name for name in STAGES if name in selected and name not in skipped]
+
+
+def run_graph(ctx: CatalogContext, names: List[str], workers: int) -> Dict[str, Dict]:
+    """
+    Ejecuta las etapas respetando dependencias; las listas se lanzan en cuanto
+    terminan sus dependencias. Si una etapa falla, sus dependientes se omiten.
+    Las dependencias fuera de `names` (omitidas con --skip) se dan por hechas.
+    """
+    timings: Dict[str, Dict] = {}
+    pending = list(names)
+    done, failed = set(), set()
+    running = {}
+    start = time.perf_counter()
+
+    def execute(stage: Stage):
+        stage_start = time.perf_counter()
+        print(f"\n▶️  [{stage.name}] {stage.description}")
+        try:
+            with phase(stage.name):
+                result = stage.func(ctx)
+            status = 'ok'
+        except BaseException as e:  # incluye SystemExit de scripts importados
+            traceback.print_exc()
+            result, status = {'error': str(e)[:200]}, 'failed'
+        end = time.perf_counter()
+        return stage.name, status, result, stage_start - start, end - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = [d for d in STAGES[name].deps if d in names]
+                if any(d in failed for d in deps):
+                    pending.remove(name)
+                    failed.add(name)
+                    timings[name] = {'status': 'skipped', 'reason': 'dependencia fallida'}
+                    print(f"⏭️  [{name}] omitida: falló una dependencia")
+                elif all(d in done for d in deps):
+                    pending.remove(name)
+                    running[pool.submit(execute, STAGES[name])] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                del running[future]
+                name, status, result, started, ended = future.result()
+                ctx.results[name] = result
+                timings[name] = {
+                    'status': status,
+                    'start_s': round(started, 3),
+                    'end_s': round(ended, 3),
+                    'duration_s': round(ended - started, 3),
+                    'result': result,
+                }
+                (done if status == 'ok' else failed).add(name)
+                metrics.set('stage_duration_seconds', round(ended - started, 3), stage=name, status=status)
+                icon = '✅' if status == 'ok' else '❌'
+                print(f"{icon} [{name}] {status} en {ended - started:.1f} s")
+
+    return timings
+
+
+def critical_path(timings: Dict[str, Dict]) -> List[str]:
+    """Cadena de dependencias que determinó el tiempo total"""
+    finished = {n: t for n, t in timings.items() if 'end_s' in t}
+    if not finished:
+        return []
+    path = [max(finished, key=lambda n: finished[n]['end_s'])]
+    while True:
+        deps = [d for d in STAGES[path[-1]].deps if d in finished]
+        if not deps:
+            break
+        path.append(max(deps, key=lambda d: finished[d]['end_s']))
+    return list(reversed(path))
+
+
+def save_run(timings: Dict[str, Dict], total: float, path: List[str], args: argparse.Namespace) -> Path:
+    RUNS_DIR.mkdir(parents=True, exist_ok=True)
+    run_file = RUNS_DIR / f"catalog_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(run_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'execute': args.execute,
+            'total_s': round(total, 3),
+            'critical_path': path,
+            'stages': timings,
+        }, f, indent=2, ensure_ascii=False, default=str)
+    return run_file
+
+
+def print_graph():
+    print("Etapas del catálogo (en orden):\n")
+    for stage in STAGES.values():
+        deps = ', '.join(stage.deps) or '-'
+        print(f"  {stage.name:15s} <- {deps:38s} {stage.description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresco del catálogo como grafo de etapas')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('graph', help='Mostrar etapas y dependencias')
+
+    run = sub.add_parser('run', help='Ejecutar etapas')
+    run.add_argument('--execute', action='store_true', help='Aplicar cambios (por defecto dry-run)')
+    run.add_argument('--stages', default='', help='Etapas a ejecutar (más sus dependencias), separadas por coma')
+    run.add_argument('--skip', default='', help='Etapas a omitir, separadas por coma')
+    run.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Etapas simultáneas')
+    run.add_argument('--report-file', help='Reporte HTML ya descargado (evita esperar a Syscom)')
+    run.add_argument('--max-report-wait', type=float, default=2 * 3600, help='Segundos máximos esperando el reporte')
+    run.add_argument('--enrich-limit', type=int, default=200, help='Productos nuevos a completar con la API de Syscom')
+    run.add_argument('--price-limit', type=int, default=1000, help='Máximo de productos sin precio a consultar')
+    args = parser.parse_args()
+
+    if args.command == 'graph':
+        print_graph()
+        return
+
+    require_env(*SUPABASE_VARS)
+
+    split = lambda value: [v.strip() for v in value.split(',') if v.strip()]
+    names = resolve_stages(split(args.stages), split(args.skip))
+
+    print("=" * 80)
+    print("🗂️  REFRESCO DEL CATÁLOGO")
+    print("=" * 80)
+    print(f"Modo: {'PRODUCCIÓN' if args.execute else 'DRY RUN (no se guardarán cambios)'}")
+    print(f"Etapas: {' → '.join(names)}")
+
+    ctx = CatalogContext(get_supabase(), args)
+    start = time.perf_counter()
+    timings = run_graph(ctx, names, max(1, args.workers))
+    total = time.perf_counter() - start
+    path = critical_path(timings)
+    run_file = save_run(timings, total, path, args)
+    metrics_file = metrics.export('catalog')
+
+    print("\n" + "=" * 80)
+    print("⏱️  TIEMPOS POR ETAPA")
+    print("=" * 80)
+    for name in names:
+        t = timings.get(name, {})
+        if 'duration_s' in t:
+            print(f"  {name:15s} {t['status']:8s} {t['start_s']:9.1f} s → {t['end_s']:9.1f} s  ({t['duration_s']:.1f} s)")
+        else:
+            print(f"  {name:15s} {t.get('status', '-'):8s}")
+    print(f"\n  Total: {total:.1f} s")
+    print(f"  Ruta crítica: {' → '.join(path) or '-'}")
+    print(f"\n📄 Detalle guardado en: {run_file}")
+    if metrics_file:
+        print(f"📈 Métricas guardadas en: {metrics_file}")
+
+    if any(t.get('status') != 'ok' for t in timings.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Configuración compartida de los scripts del catálogo
+
+Un solo cargador de .env.local (se lee una vez por proceso) y clientes que se
+construyen la primera vez que se usan. Importar un script, pedir --help o
+correr en dry-run ya no importa supabase ni abre conexiones:
+
+    from catalog_config import env, require_env, supabase, syscom
+
+    supabase.table('marketplace_products')...    # el cliente se crea aquí
+    headers = syscom.headers()                   # el token se pide aquí
+
+Las variables ya definidas en el entorno tienen prioridad sobre el archivo
+(igual que load_dotenv), así que SYSCOM_API_BASE=... o ETL_METRICS_DIR=...
+en la línea de comandos siguen funcionando.
+
+Uso:
+    python3 scripts/catalog_config.py           # verificar variables críticas
+"""
+
+import os
+import sys
+import time
+import importlib
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+ROOT = Path(__file__).parent.parent
+ENV_FILE = '.env.local'
+
+SUPABASE_VARS = ('NEXT_PUBLIC_SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY')
+SYSCOM_VARS = ('SYSCOM_CLIENT_ID', 'SYSCOM_CLIENT_SECRET')
+
+DEFAULT_SYSCOM_OAUTH_URL = "https://developers.syscom.mx/oauth/token"
+DEFAULT_SYSCOM_API_BASE = "https://developers.syscom.mx/api/v1"
+DEFAULT_RATE_LIMIT_DELAY = 1.1  # 60 req/min de la API de Syscom
+TOKEN_MARGIN = 300  # Renovar el token 5 minutos antes de que expire
+
+
+def parse_env_file(path: Path) -> Dict[str, str]:
+    """Lee KEY=VALUE ignorando comentarios y quitando comillas"""
+    values = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            key = key.strip()
+            if key.startswith('export '):
+                key = key[len('export '):].strip()
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                value = value[1:-1]
+            values[key] = value
+    return values
+
+
+@lru_cache(maxsize=None)
+def load_env(env_file: str = ENV_FILE, override: bool = False) -> Dict[str, str]:
+    """Carga el archivo de entorno una sola vez; devuelve las variables leídas"""
+    path = Path(env_file)
+    if not path.is_absolute():
+        path = ROOT / env_file
+    if not path.exists():
+        return {}
+    values = parse_env_file(path)
+    for key, value in values.items():
+        if override or key not in os.environ:
+            os.environ[key] = value
+    return values
+
+
+load_env()
+
+
+def env(key: str, default: Optional[str] = None) -> Optional[str]:
+    load_env()
+    return os.environ.get(key, default)
+
+
+def require_env(*keys: str, hint: Optional[str] = None) -> Tuple[str, ...]:
+    """Devuelve los valores o termina con el mismo error que usaban los scripts"""
+    load_env()
+    missing = [key for key in keys if not os.environ.get(key)]
+    if missing:
+        print(f"❌ Error: Variables de entorno no configuradas: {', '.join(missing)}")
+        if hint:
+            print(f"💡 {hint}")
+        sys.exit(1)
+    return tuple(os.environ[key] for key in keys)
+
+
+class LazyClient:
+    """Proxy que construye el cliente con factory en el primer acceso a un atributo"""
+
+    def __init__(self, factory: Callable[[], Any], name: str):
+        self._factory = factory
+        self._name = name
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = 'inicializado' if self.initialized else 'sin inicializar'
+        return f"<LazyClient {self._name} ({state})>"
+
+
+def create_supabase():
+    try:
+        from supabase import create_client
+    except ImportError:
+        print("❌ Error: Se requiere supabase-py (pip install supabase)")
+        sys.exit(1)
+    url, key = require_env(*SUPABASE_VARS)
+    return create_client(url, key)
+
+
+supabase = LazyClient(create_supabase, 'supabase')
+
+
+def get_supabase():
+    """El cliente real, para pasarlo a funciones que reciben un Client"""
+    return supabase.get()
+
+
+def syscom_oauth_url() -> str:
+    return env('SYSCOM_OAUTH_URL', DEFAULT_SYSCOM_OAUTH_URL)
+
+
+def syscom_api_base() -> str:
+    return env('SYSCOM_API_BASE', DEFAULT_SYSCOM_API_BASE)
+
+
+def syscom_rate_limit_delay() -> float:
+    return float(env('SYSCOM_RATE_LIMIT_DELAY', str(DEFAULT_RATE_LIMIT_DELAY)))
+
+
+class SyscomAuth:
+    """Token OAuth de Syscom compartido por el proceso; se pide en el primer uso"""
+
+    def __init__(self):
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def token(self, force: bool = False) -> Optional[str]:
+        """Token vigente, o None si la API lo rechaza (el error ya se imprimió)"""
+        with self._lock:
+            if not force and self._token and time.time() < self._expires_at - TOKEN_MARGIN:
+                return self._token
+
+            import requests
+            from etl_metrics import metrics
+
+            client_id, client_secret = require_env(
+                *SYSCOM_VARS, hint="Obtén tus credenciales en: https://developers.syscom.mx/")
+            start = time.perf_counter()
+            try:
+                response = requests.post(
+                    syscom_oauth_url(),
+                    data={
+                        'grant_type': 'client_credentials',
+                        'client_id': client_id,
+                        'client_secret': client_secret,
+                    },
+                    headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                    timeout=30,
+                )
+            except requests.RequestException as e:
+                metrics.request('syscom', 'token', 'error', time.perf_counter() - start)
+                print(f"❌ Error obteniendo token: {e}")
+                return None
+            metrics.request('syscom', 'token', response.status_code, time.perf_counter() - start)
+
+            if response.status_code != 200:
+                print(f"❌ Error obteniendo token: {response.status_code}")
+                print(f"   Respuesta: {response.text[:200]}")
+                return None
+
+            data = response.json()
+            self._token = data['access_token']
+            self._expires_at = time.time() + float(data.get('expires_in', 3600))
+            return self._token
+
+    def headers(self) -> Dict[str, str]:
+        token = self.token()
+        if not token:
+            sys.exit(1)
+        return {'Authorization': f"Bearer {token}", 'Content-Type': 'application/json'}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+
+syscom = SyscomAuth()
+
+
+@lru_cache(maxsize=None)
+def optional_import(module: str, install_hint: str):
+    """Importa una dependencia pesada u opcional (bs4, playwright, selenium) solo cuando se
+    necesita; devuelve None (avisando una sola vez) si no está instalada"""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        print(f"⚠️  {module} no instalado")
+        print(f"💡 Instalar con: {install_hint}")
+        return None
+
+
+if __name__ == "__main__":
+    loaded = load_env()
+    print(f"✅ Cargadas {len(loaded)} variables desde {ENV_FILE}" if loaded else f"⚠️  {ENV_FILE} no encontrado en {ROOT}")
+    missing = [key for key in SUPABASE_VARS + SYSCOM_VARS if not os.environ.get(key)]
+    if missing:
+        print(f"❌ Variables faltantes: {', '.join(missing)}")
+        sys.exit(1)
+    print("✅ Todas las variables críticas están presentes")
+    print(f"   - SUPABASE_URL: {os.environ['NEXT_PUBLIC_SUPABASE_URL'][:30]}...")
+    print(f"   - SYSCOM_API_BASE: {syscom_api_base()}")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Planes de cambios del catálogo (plan / apply)
+
+Los scripts de limpieza de imágenes hacen el análisis completo y, con
+--plan, en lugar de escribir en la BD guardan los cambios calculados en un
+archivo JSONL compacto:
+
+    {"plan":1,"script":"clean_duplicate_images","created_at":"…",...}   <- encabezado
+    {"id":"…","field":"images","old":[…],"new":[…],"updated_at":"…"}
+    ...
+
+El plan se revisa (es un diff: sólo los productos que cambian) y después se
+aplica sin repetir el análisis, en lotes, con la función RPC
+apply_marketplace_plan (supabase/migrations/20250124_apply_marketplace_plan.sql).
+Cada producto sólo se actualiza si su updated_at sigue siendo el que tenía al
+generar el plan; si alguien lo modificó entretanto se cuenta como conflicto y
+se guarda en <plan>.conflicts.jsonl para volver a planificarlo. El trigger de
+20250129_marketplace_products_updated_at_trigger.sql mueve updated_at en
+cualquier UPDATE, así que también se detectan cambios de otros scripts.
+
+Si la función aún no existe en la BD se usa un update fila por fila con el
+mismo filtro por updated_at.
+
+Uso:
+    python3 scripts/clean_duplicate_images.py --plan data/plans/duplicados.jsonl
+    python3 scripts/catalog_plan.py data/plans/duplicados.jsonl            # resumen
+    python3 scripts/catalog_plan.py data/plans/duplicados.jsonl --execute  # aplicar
+"""
+
+import sys
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from etl_metrics import metrics
+
+ROOT = Path(__file__).parent.parent
+PLAN_DIR = ROOT / "data" / "plans"
+PLAN_FORMAT = 1
+APPLY_RPC = 'apply_marketplace_plan'
+DEFAULT_BATCH_SIZE = 500
+
+
+def plan_arg(argv: Optional[List[str]] = None) -> Optional[Path]:
+    """Ruta de --plan [ARCHIVO] en la línea de comandos (None si no se pidió plan).
+    Sin archivo se usa data/plans/<script>_<fecha>.jsonl"""
+    argv = sys.argv if argv is None else argv
+    if '--plan' not in argv:
+        return None
+    i = argv.index('--plan')
+    if i + 1 < len(argv) and not argv[i + 1].startswith('-'):
+        return Path(argv[i + 1])
+    script = Path(argv[0]).stem or 'plan'
+    return PLAN_DIR / f"{script}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+class PlanWriter:
+    """Escribe un plan JSONL: una línea por cambio (producto, campo)"""
+
+    def __init__(self, path, script: str, **meta):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._products = set()
+        self.mutations = 0
+        header = {'plan': PLAN_FORMAT, 'script': script,
+                  'created_at': datetime.now().isoformat(timespec='seconds'), **meta}
+        self._file.write(_dumps(header) + '\n')
+
+    def __enter__(self) -> "PlanWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def products(self) -> int:
+        return len(self._products)
+
+    def add(self, product_id: str, field: str, old, new, updated_at: Optional[str] = None) -> bool:
+        """Registra un cambio; los que no cambian nada se omiten"""
+        if old == new:
+            return False
+        self._file.write(_dumps({'id': product_id, 'field': field, 'old': old, 'new': new,
+                                 'updated_at': updated_at}) + '\n')
+        self._products.add(product_id)
+        self.mutations += 1
+        return True
+
+    def add_product(self, product: Dict, fields: Dict) -> int:
+        """Registra los cambios de un producto leído de la BD (old y updated_at salen de él)"""
+        return sum(self.add(product['id'], field, product.get(field), new, product.get('updated_at'))
+                   for field, new in fields.items())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def report(self) -> None:
+        print(f"\n💾 Plan guardado en: {self.path}")
+        print(f"   {self.mutations} cambios en {self.products} productos")
+        print(f"💡 Revisar:  python3 scripts/catalog_plan.py {self.path}")
+        print(f"💡 Aplicar:  python3 scripts/catalog_plan.py {self.path} --execute")
+
+
+def read_plan(path) -> Tuple[Dict, List[Dict]]:
+    """Lee un plan; retorna (encabezado, cambios)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('plan') != PLAN_FORMAT:
+            raise ValueError(f"{path} no es un plan de catalog_plan (formato {header.get('plan')!r})")
+        mutations = [json.loads(line) for line in f if line.strip()]
+    return header, mutations
+
+
+def group_mutations(mutations: Iterable[Dict]) -> List[Dict]:
+    """Junta los cambios por producto en filas {id, expected_updated_at, campo: nuevo, ...}"""
+    rows: Dict[str, Dict] = {}
+    for m in mutations:
+        row = rows.setdefault(m['id'], {'id': m['id'], 'expected_updated_at': m.get('updated_at')})
+        row[m['field']] = m['new']
+    return list(rows.values())
+
+
+class PlanApplier:
+    """Aplica filas agrupadas en lotes; una fila cuyo updated_at cambió es un conflicto"""
+
+    def __init__(self, supabase, batch_size: int = DEFAULT_BATCH_SIZE, verbose: bool = True):
+        self.supabase = supabase
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.use_rpc = True
+        self.conflicts: List[str] = []
+        self.applied: Set[str] = set()
+        self.stats = {'products': 0, 'applied': 0, 'conflicts': 0, 'errors': 0, 'batches': 0}
+
+    def apply(self, rows: List[Dict]) -> Dict:
+        for i in range(0, len(rows), self.batch_size):
+            self._apply_batch(rows[i:i + self.batch_size])
+        return self.stats
+
+    def _apply_batch(self, rows: List[Dict]) -> None:
+        self.stats['batches'] += 1
+        self.stats['products'] += len(rows)
+        start = time.perf_counter()
+        mode = 'rpc'
+        result = self._apply_rpc(rows) if self.use_rpc else None
+        if result is None:
+            mode = 'rows'
+            result = self._apply_rows(rows)
+        applied, failed = result
+        metrics.observe('db_batch_seconds', time.perf_counter() - start, op='plan', mode=mode)
+        metrics.inc('db_rows_total', len(applied), op='plan', mode=mode)
+
+        conflicts = [row['id'] for row in rows if row['id'] not in applied and row['id'] not in failed]
+        self.conflicts.extend(conflicts)
+        self.applied.update(applied)
+        self.stats['applied'] += len(applied)
+        self.stats['conflicts'] += len(conflicts)
+        if conflicts:
+            metrics.inc('db_conflicts_total', len(conflicts), op='plan')
+        if self.verbose:
+            extra = f" | {len(conflicts)} conflictos" if conflicts else ''
+            print(f"   💾 Lote {self.stats['batches']}: {len(applied)}/{len(rows)} productos aplicados{extra}")
+
+    def _apply_rpc(self, rows: List[Dict]) -> Optional[Tuple[Set[str], Set[str]]]:
+        try:
+            response = self.supabase.rpc(APPLY_RPC, {'updates': rows}).execute()
+            applied = {str(r[APPLY_RPC] if isinstance(r, dict) else r) for r in response.data or []}
+            return applied, set()
+        except Exception as e:
+            message = str(e)
+            if 'PGRST202' in message or 'Could not find the function' in message or 'does not exist' in message:
+                print(f"   ⚠️  {APPLY_RPC} no existe en la BD; aplicando fila por fila")
+                print("      Ejecuta supabase/migrations/20250124_apply_marketplace_plan.sql")
+                self.use_rpc = False
+                return None
+            print(f"   ❌ Error en lote RPC: {message[:100]}")
+            self.stats['errors'] += len(rows)
+            metrics.inc('db_errors_total', len(rows), op='plan')
+            return set(), {row['id'] for row in rows}
+
+    def _apply_rows(self, rows: List[Dict]) -> Tuple[Set[str], Set[str]]:
+        applied, failed = set(), set()
+        for row in rows:
+            fields = {k: v for k, v in row.items() if k not in ('id', 'expected_updated_at')}
+            query = self.supabase.table('marketplace_products').update(fields).eq('id', row['id'])
+            if row.get('expected_updated_at'):
+                query = query.eq('updated_at', row['expected_updated_at'])
+            try:
+                if query.execute().data:
+                    applied.add(row['id'])
+            except Exception as e:
+                failed.add(row['id'])
+                self.stats['errors'] += 1
+                metrics.inc('db_errors_total', op='plan')
+                if self.verbose:
+                    print(f"   ❌ Error actualizando {row['id']}: {str(e)[:100]}")
+        return applied, failed
+
+
+def summarize_plan(header: Dict, mutations: List[Dict], examples: int = 5) -> None:
+    products = {m['id'] for m in mutations}
+    by_field = Counter(m['field'] for m in mutations)
+    unchecked = sum(1 for m in mutations if not m.get('updated_at'))
+
+    print(f"📄 Plan de {header.get('script', '?')} ({header.get('created_at', '?')})")
+    for key, value in header.items():
+        if key not in ('plan', 'script', 'created_at'):
+            print(f"   {key}: {value}")
+    print(f"   {len(mutations)} cambios en {len(products)} productos")
+    for field, count in by_field.most_common():
+        print(f"   - {field}: {count}")
+    if unchecked:
+        print(f"   ⚠️  {unchecked} cambios sin updated_at (se aplicarán sin verificar conflictos)")
+
+    if mutations and examples:
+        print(f"\n📋 EJEMPLOS (primeros {min(examples, len(mutations))}):")
+        for m in mutations[:examples]:
+            print(f"   {m['id']} {m['field']}:")
+            print(f"      - {m['old']}")
+            print(f"      + {m['new']}")
+
+
+def apply_plan(supabase, path, batch_size: int = DEFAULT_BATCH_SIZE, verbose: bool = True) -> Dict:
+    """Aplica un plan; los conflictos se guardan en <plan>.conflicts.jsonl"""
+    header, mutations = read_plan(path)
+    applier = PlanApplier(supabase, batch_size=batch_size, verbose=verbose)
+    applier.apply(group_mutations(mutations))
+
+    if applier.conflicts:
+        conflict_ids = set(applier.conflicts)
+        conflicts_path = Path(path).with_suffix('.conflicts.jsonl')
+        with open(conflicts_path, 'w', encoding='utf-8') as f:
+            f.write(_dumps({**header, 'conflicts_of': str(path)}) + '\n')
+            for m in mutations:
+                if m['id'] in conflict_ids:
+                    f.write(_dumps(m) + '\n')
+        applier.stats['conflicts_file'] = str(conflicts_path)
+    return applier.stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Revisar o aplicar un plan de cambios del catálogo')
+    parser.add_argument('plan', help='Archivo JSONL generado con --plan')
+    parser.add_argument('--execute', action='store_true', help='Aplicar el plan (por defecto sólo resumen)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--examples', type=int, default=5, help='Cambios de ejemplo a mostrar')
+    args = parser.parse_args()
+
+    try:
+        header, mutations = read_plan(args.plan)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo leer el plan: {e}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("📋 PLAN DE CAMBIOS DEL CATÁLOGO")
+    print("=" * 60)
+    summarize_plan(header, mutations, args.examples)
+
+    if not args.execute:
+        print("\n💡 Para aplicar el plan, ejecuta:")
+        print(f"   python3 scripts/catalog_plan.py {args.plan} --execute")
+        return
+    if not mutations:
+        print("\n✅ El plan no tiene cambios")
+        return
+
+    from catalog_config import get_supabase
+
+    print("\n🔄 Aplicando plan...\n")
+    stats = apply_plan(get_supabase(), args.plan, batch_size=args.batch_size)
+    print(f"\n✅ Aplicados: {stats['applied']}/{stats['products']} productos en {stats['batches']} lotes")
+    if stats['conflicts']:
+        print(f"⚠️  Conflictos (el producto cambió después del plan): {stats['conflicts']}")
+        print(f"   Guardados en: {stats['conflicts_file']}")
+    if stats['errors']:
+        print(f"❌ Errores: {stats['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Barridos de palabras clave sobre marketplace_products en una sola llamada
+
+Los scripts de revisión hacían una consulta title/description ILIKE por cada
+palabra, una tras otra. search_keywords manda todas las palabras a la función
+RPC search_marketplace_keywords (ver
+supabase/migrations/20250126_search_marketplace_keywords.sql), que usa los
+índices de trigramas y regresa por palabra el total de coincidencias, cuántas
+tienen precio > 0 y una muestra de productos.
+
+Si la función aún no existe en la base de datos, cae a una consulta por
+palabra para que los scripts sigan funcionando.
+
+Uso:
+    from catalog_search import search_keywords, unique_products
+
+    hits = search_keywords(supabase, ['flir', 'thermal'], category_id=cat_id, limit=10)
+    for keyword, hit in hits.items():
+        print(keyword, hit['count'], len(hit['products']))
+    products = unique_products(hits)
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+SEARCH_RPC = 'search_marketplace_keywords'
+DEFAULT_LIMIT = 50
+PRODUCT_FIELDS = ('id', 'title', 'description', 'price', 'category_id', 'images', 'external_code')
+
+_rpc_available = True
+
+
+def _search_rpc(supabase, keywords: List[str], category_id: Optional[str], title_only: bool,
+                only_priced: bool, limit: int) -> Optional[Dict[str, Dict]]:
+    global _rpc_available
+    try:
+        response = supabase.rpc(SEARCH_RPC, {
+            'keywords': keywords,
+            'p_category_id': category_id,
+            'title_only': title_only,
+            'only_priced': only_priced,
+            'per_keyword_limit': limit,
+        }).execute()
+    except Exception as e:
+        message = str(e)
+        if 'PGRST202' in message or 'Could not find the function' in message or 'does not exist' in message:
+            print(f"   ⚠️  {SEARCH_RPC} no existe en la BD; buscando palabra por palabra")
+            print("      Ejecuta supabase/migrations/20250126_search_marketplace_keywords.sql")
+            _rpc_available = False
+            return None
+        raise
+
+    hits: Dict[str, Dict] = {}
+    for row in response.data or []:
+        hit = hits.setdefault(row['keyword'], {
+            'count': row['match_count'], 'priced': row['priced_count'], 'products': [],
+        })
+        if row.get('id'):
+            hit['products'].append({field: row.get(field) for field in PRODUCT_FIELDS})
+    return hits
+
+
+def _like_pattern(keyword: str) -> str:
+    """'%palabra%' con \\, % y _ escapados, igual que el patrón de la función RPC"""
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _quoted(value: str) -> str:
+    """Valor entre comillas para un filtro or=(...) de PostgREST (admite , . y paréntesis)"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _search_each(supabase, keywords: List[str], category_id: Optional[str], title_only: bool,
+                 only_priced: bool, limit: int) -> Dict[str, Dict]:
+    """
+    Una consulta por palabra cuando la función RPC no existe
+
+    Con title_only=False la función busca en title || ' ' || description y aquí
+    se busca en title OR description: una palabra que empieza en el título y
+    termina en la descripción sólo coincide con la función.
+    """
+    columns = ','.join(PRODUCT_FIELDS)
+
+    def query(select: str, keyword: str, **kwargs):
+        q = supabase.table('marketplace_products').select(select, **kwargs).eq('status', 'active')
+        if category_id:
+            q = q.eq('category_id', category_id)
+        if only_priced:
+            q = q.gt('price', 0)
+        pattern = _like_pattern(keyword)
+        if title_only:
+            return q.ilike('title', pattern)
+        return q.or_(f'title.ilike.{_quoted(pattern)},description.ilike.{_quoted(pattern)}')
+
+    hits: Dict[str, Dict] = {}
+    for keyword in keywords:
+        response = query(columns, keyword, count='exact').order('created_at', desc=True).limit(limit).execute()
+        priced = response.count or 0
+        if not only_priced:
+            priced = query('id', keyword, count='exact').gt('price', 0).limit(1).execute().count or 0
+        hits[keyword] = {'count': response.count or 0, 'priced': priced, 'products': response.data or []}
+    return hits
+
+
+def search_keywords(supabase, keywords: Iterable[str], category_id: Optional[str] = None,
+                    title_only: bool = False, only_priced: bool = False,
+                    limit: int = DEFAULT_LIMIT) -> Dict[str, Dict]:
+    """
+    Busca cada palabra en productos activos (título, o título y descripción)
+
+    Retorna {palabra: {'count', 'priced', 'products'}} en el orden de las
+    palabras; 'products' trae hasta limit productos por palabra y un mismo
+    producto puede aparecer en varias palabras (ver unique_products).
+    """
+    keywords = list(dict.fromkeys(k for k in keywords if k.strip()))
+    if not keywords:
+        return {}
+    hits = None
+    if _rpc_available:
+        hits = _search_rpc(supabase, keywords, category_id, title_only, only_priced, limit)
+    if hits is None:
+        hits = _search_each(supabase, keywords, category_id, title_only, only_priced, limit)
+    return {keyword: hits.get(keyword) or {'count': 0, 'priced': 0, 'products': []} for keyword in keywords}
+
+
+def unique_products(hits: Dict[str, Dict], keywords: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Productos de varias palabras sin repetir (gana la primera palabra en que aparecen)"""
+    seen = {}
+    for keyword in (keywords if keywords is not None else hits):
+        for product in hits.get(keyword, {}).get('products', []):
+            seen.setdefault(product['id'], product)
+    return list(seen.values())
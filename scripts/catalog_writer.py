@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Escritor por lotes para marketplace_products
+
+Acumula actualizaciones {id, campos...} y las aplica en lotes con la función
+RPC bulk_update_marketplace_products (ver
+supabase/migrations/20250123_bulk_update_marketplace_products.sql), en lugar
+de un .update().eq('id', ...) por producto.
+
+Si la función aún no existe en la base de datos, cae automáticamente a
+actualizaciones fila por fila para que los scripts sigan funcionando.
+
+insert_products inserta productos nuevos en un solo request por lote.
+
+Uso:
+    from catalog_writer import BulkProductWriter
+
+    with BulkProductWriter(supabase, dry_run=not execute) as writer:
+        for product_id, images in results:
+            writer.add(product_id, {'images': images})
+    print(writer.stats)
+
+on_written recibe, después de cada lote, las filas que quedaron escritas en
+la BD (nunca en dry-run ni las de un lote que falló), para que quien tenga
+copias en memoria de los productos sólo las actualice con lo que se guardó.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from etl_metrics import metrics
+
+BULK_UPDATE_RPC = 'bulk_update_marketplace_products'
+DEFAULT_BATCH_SIZE = 500
+
+# Campos que bulk_update_marketplace_products sabe escribir (20250123, stock y
+# seller_id de 20250125; price_currency y exchange_rate de 20250128).
+# La función ignora cualquier otra llave y las actualizaciones fila por fila sí
+# la escribirían, así que add() rechaza lo que no esté aquí.
+BULK_UPDATE_FIELDS = frozenset({
+    'title', 'description', 'price', 'original_price', 'images', 'status', 'seller_id', 'stock',
+    'price_currency', 'exchange_rate',
+})
+
+
+class BulkProductWriter:
+    """Buffer de actualizaciones de productos que se vacía cada batch_size filas"""
+
+    def __init__(self, supabase, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False,
+                 verbose: bool = True, on_written: Optional[Callable[[List[Dict]], None]] = None):
+        self.supabase = supabase
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.verbose = verbose
+        self.on_written = on_written
+        self.use_rpc = True
+        self._buffer: Dict[str, Dict] = {}
+        self.stats = {'queued': 0, 'updated': 0, 'errors': 0, 'batches': 0}
+
+    def __enter__(self) -> "BulkProductWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+    def add(self, product_id: str, fields: Dict) -> None:
+        """Encola cambios para un producto (cambios repetidos se combinan)
+
+        Lanza ValueError si algún campo no está en BULK_UPDATE_FIELDS.
+        """
+        if not fields:
+            return
+        unknown = set(fields) - BULK_UPDATE_FIELDS
+        if unknown:
+            raise ValueError(f"{BULK_UPDATE_RPC} no actualiza los campos: {', '.join(sorted(unknown))}")
+        self._buffer.setdefault(product_id, {}).update(fields)
+        self.stats['queued'] += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Aplica las actualizaciones pendientes; retorna filas actualizadas"""
+        if not self._buffer:
+            return 0
+        rows: List[Dict] = [{'id': pid, **fields} for pid, fields in self._buffer.items()]
+        self._buffer = {}
+        self.stats['batches'] += 1
+
+        if self.dry_run:
+            self.stats['updated'] += len(rows)
+            metrics.inc('db_rows_total', len(rows), op='update', mode='dry_run')
+            return len(rows)
+
+        start = time.perf_counter()
+        mode = 'rpc'
+        updated = self._write_rpc(rows) if self.use_rpc else None
+        if updated is not None:
+            # La función sólo devuelve cuántas filas cambió: si faltó alguna no
+            # se sabe cuál, así que el lote no se reporta como escrito
+            written = rows if updated == len(rows) else []
+        else:
+            mode = 'rows'
+            written = self._write_rows(rows)
+            updated = len(written)
+        metrics.observe('db_batch_seconds', time.perf_counter() - start, op='update', mode=mode)
+        metrics.inc('db_rows_total', updated, op='update', mode=mode)
+
+        self.stats['updated'] += updated
+        if self.verbose:
+            print(f"   💾 Lote {self.stats['batches']}: {updated}/{len(rows)} productos actualizados")
+        if written and self.on_written:
+            self.on_written(written)
+        return updated
+
+    def _write_rpc(self, rows: List[Dict]) -> Optional[int]:
+        try:
+            response = self.supabase.rpc(BULK_UPDATE_RPC, {'updates': rows}).execute()
+            return int(response.data or 0)
+        except Exception as e:
+            message = str(e)
+            if 'PGRST202' in message or 'Could not find the function' in message or 'does not exist' in message:
+                print(f"   ⚠️  {BULK_UPDATE_RPC} no existe en la BD; usando updates fila por fila")
+                print("      Ejecuta supabase/migrations/20250123_bulk_update_marketplace_products.sql")
+                self.use_rpc = False
+                return None
+            print(f"   ❌ Error en lote RPC: {message[:100]}")
+            self.stats['errors'] += len(rows)
+            metrics.inc('db_errors_total', len(rows), op='update')
+            return 0
+
+    def _write_rows(self, rows: List[Dict]) -> List[Dict]:
+        written = []
+        for row in rows:
+            fields = {k: v for k, v in row.items() if k != 'id'}
+            try:
+                result = self.supabase.table('marketplace_products').update(fields).eq('id', row['id']).execute()
+                if result.data:
+                    written.append(row)
+            except Exception as e:
+                self.stats['errors'] += 1
+                metrics.inc('db_errors_total', op='update')
+                if self.verbose:
+                    print(f"   ❌ Error actualizando {row['id']}: {str(e)[:100]}")
+        return written
+
+
+def insert_products(supabase, batch: List[Dict], verbose: bool = True) -> Tuple[int, int]:
+    """Inserta un lote; si falla, uno por uno. Retorna (insertados, errores)"""
+    if not batch:
+        return 0, 0
+    start = time.perf_counter()
+    try:
+        result = supabase.table('marketplace_products').insert(batch).execute()
+        inserted = len(result.data or [])
+        errors = len(batch) - inserted
+        mode = 'batch'
+    except Exception as e:
+        if verbose:
+            print(f"  ⚠️  Lote falló ({str(e)[:80]}), insertando individualmente...")
+        inserted = errors = 0
+        mode = 'rows'
+        for product in batch:
+            try:
+                supabase.table('marketplace_products').insert(product).execute()
+                inserted += 1
+            except Exception:
+                errors += 1
+    metrics.observe('db_batch_seconds', time.perf_counter() - start, op='insert', mode=mode)
+    metrics.inc('db_rows_total', inserted, op='insert', mode=mode)
+    if errors:
+        metrics.inc('db_errors_total', errors, op='insert')
+    return inserted, errors
@@ -3,22 +3,17 @@ Script para verificar cuántos productos tienen URLs de imágenes rotas.
 Verifica la accesibilidad de las URLs de imágenes haciendo requests HTTP.
 """
 
-import os
 import sys
 import time
-from dotenv import load_dotenv
-from supabase import create_client
 from collections import defaultdict
 import concurrent.futures
 import requests
 from urllib.parse import urlparse
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from etl_metrics import metrics
+from etl_profile import phase, run_main
+from product_records import as_table, load_records
 
 # Timeout para requests (en segundos)
 REQUEST_TIMEOUT = 5
@@ -33,6 +28,12 @@ def check_image_url(url: str) -> tuple[bool, int, str]:
     Verifica si una URL de imagen es accesible.
     Retorna: (is_accessible, status_code, error_message)
     """
+    start = time.monotonic()
+    result = _probe_image_url(url)
+    metrics.request('images', urlparse(url).netloc or 'unknown', result[1] or 'error', time.monotonic() - start)
+    return result
+
+def _probe_image_url(url: str) -> tuple[bool, int, str]:
     try:
         response = requests.head(url, headers=HEADERS, timeout=REQUEST_TIMEOUT, allow_redirects=True)
         
@@ -88,52 +89,23 @@ def check_images_batch(urls: list) -> dict:
     
     return results
 
-def main():
-    print("=" * 60)
-    print("🔍 ANÁLISIS DE IMÁGENES ROTAS")
-    print("=" * 60)
-    print("\n⚠️  Este proceso puede tardar varios minutos...\n")
-    
-    # Obtener todos los productos activos con imágenes
-    print("🔍 Obteniendo productos con imágenes...")
-    all_products = []
-    page_size = 1000
-    offset = 0
-    
-    while True:
-        response = supabase.table('marketplace_products').select('id, title, images').eq('status', 'active').range(offset, offset + page_size - 1).execute()
-        batch = response.data
-        
-        if not batch:
-            break
-        
-        # Filtrar solo productos con imágenes
-        products_with_images = [p for p in batch if p.get('images')]
-        all_products.extend(products_with_images)
-        
-        offset += page_size
-        
-        if len(batch) < page_size:
-            break
-    
-    print(f"✅ {len(all_products)} productos con imágenes encontrados\n")
+def check_products_images(all_products) -> tuple:
+    """
+    Verifica las URLs de imágenes de los productos ya cargados (ProductTable o lista).
+    Retorna (urls_unicas, urls_accesibles, urls_rotas); cada URL rota incluye
+    los productos que la usan.
+    """
+    products = as_table(all_products)
     
     # Recopilar todas las URLs únicas
-    all_image_urls = set()
-    product_urls_map = defaultdict(list)  # URL -> lista de productos que la usan
+    product_urls_map = defaultdict(list)  # URL -> ids de productos que la usan
     
-    for product in all_products:
-        images = product.get('images') or []
-        product_id = product['id']
-        
-        for img_url in images:
+    for product in products:
+        for img_url in product.images:
             if img_url and img_url.strip():
-                img_url = img_url.strip()
-                all_image_urls.add(img_url)
-                product_urls_map[img_url].append({
-                    'id': product_id,
-                    'title': product.get('title', 'Sin título'),
-                })
+                product_urls_map[img_url.strip()].append(product.id)
+    
+    all_image_urls = set(product_urls_map)
     
     print(f"📊 Total de URLs únicas a verificar: {len(all_image_urls)}\n")
     
@@ -145,7 +117,6 @@ def main():
     batch_size = 50
     total_batches = (len(url_list) + batch_size - 1) // batch_size
     
-    url_results = {}
     broken_urls = []
     accessible_urls = []
     
@@ -156,28 +127,48 @@ def main():
         print(f"   Verificando lote {batch_num}/{total_batches} ({len(batch)} URLs)...", end=' ', flush=True)
         
         batch_results = check_images_batch(batch)
-        url_results.update(batch_results)
-        
-        # Contar resultados del lote
-        batch_broken = sum(1 for r in batch_results.values() if not r['accessible'])
-        batch_ok = sum(1 for r in batch_results.values() if r['accessible'])
         
-        print(f"✅ {batch_ok} OK, ❌ {batch_broken} rotas")
-        
-        # Pequeña pausa para no sobrecargar los servidores
-        time.sleep(0.5)
-    
-    # Analizar resultados
-    for url, result in url_results.items():
-        if result['accessible']:
-            accessible_urls.append(url)
-        else:
+        # Analizar los resultados del lote (sin acumular el detalle de las URLs accesibles)
+        batch_broken = 0
+        for url, result in batch_results.items():
+            if result['accessible']:
+                accessible_urls.append(url)
+                continue
+            batch_broken += 1
             broken_urls.append({
                 'url': url,
                 'status_code': result['status_code'],
                 'error': result['error'],
-                'products': product_urls_map[url],
+                'products': [
+                    {'id': product_id, 'title': products[product_id].title or 'Sin título'}
+                    for product_id in product_urls_map[url]
+                ],
             })
+        
+        print(f"✅ {len(batch_results) - batch_broken} OK, ❌ {batch_broken} rotas")
+        
+        # Pequeña pausa para no sobrecargar los servidores
+        time.sleep(0.5)
+    
+    return all_image_urls, accessible_urls, broken_urls
+
+def main():
+    print("=" * 60)
+    print("🔍 ANÁLISIS DE IMÁGENES ROTAS")
+    print("=" * 60)
+    print("\n⚠️  Este proceso puede tardar varios minutos...\n")
+    
+    # Obtener todos los productos activos con imágenes
+    print("🔍 Obteniendo productos con imágenes...")
+    
+    with phase('fetch_products'):
+        # Filtrar solo productos con imágenes
+        all_products = load_records(supabase, 'id, title, images', keep=lambda p: p.images)
+    
+    print(f"✅ {len(all_products)} productos con imágenes encontrados\n")
+    
+    with phase('check_urls'):
+        all_image_urls, accessible_urls, broken_urls = check_products_images(all_products)
     
     # Contar productos afectados
     products_with_broken_images = set()
@@ -226,8 +217,7 @@ def main():
         
         print("\n📦 PRODUCTOS MÁS AFECTADOS (con más imágenes rotas):")
         for product_id, count in top_affected:
-            # Encontrar el producto
-            product = next((p for p in all_products if p['id'] == product_id), None)
+            product = all_products.get(product_id)
             if product:
                 print(f"   {count} imágenes rotas: {product.get('title', 'Sin título')[:70]}")
     
@@ -250,6 +240,7 @@ def main():
         print(f"\n💾 Resultados guardados en: {output_file}")
 
 if __name__ == "__main__":
-    main()
+    metrics.export_at_exit('check_broken_images')
+    run_main(main)
 
 
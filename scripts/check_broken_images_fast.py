@@ -2,18 +2,10 @@
 Script rápido para verificar imágenes rotas con muestra representativa.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client
 from collections import defaultdict
 import requests
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
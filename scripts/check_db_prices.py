@@ -4,21 +4,8 @@ Script para verificar precios en la base de datos
 Identifica productos con precio 0 o precios sospechosamente bajos
 """
 
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from catalog_config import supabase
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def check_prices():
     print("=" * 80)
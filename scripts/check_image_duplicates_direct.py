@@ -3,17 +3,9 @@ Script directo para verificar imágenes duplicadas en la base de datos.
 Consulta directamente y muestra ejemplos reales.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client
 from collections import Counter
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 print("🔍 Consultando productos con imágenes...\n")
 
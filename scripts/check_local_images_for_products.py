@@ -3,19 +3,11 @@ Verifica si los productos sin imágenes tienen imágenes locales disponibles
 que no están siendo asignadas correctamente.
 """
 
-import os
 import re
 from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client
 from collections import defaultdict
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 LOCAL_IMAGES_DIR = Path('public/images/marketplace/truper')
 
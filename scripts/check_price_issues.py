@@ -4,25 +4,13 @@ Script para verificar y corregir precios erróneos en la base de datos
 Detecta precios que fueron incorrectamente convertidos de USD a MXN
 """
 
-import os
 import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
 
-# Cargar variables de entorno
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno no configuradas")
-    print("Requiere: NEXT_PUBLIC_SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY")
-    sys.exit(1)
+from catalog_config import get_supabase
 
 def check_price_issues():
     """Verifica precios sospechosos en la base de datos"""
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase = get_supabase()
     
     print("🔍 Verificando precios en la base de datos...\n")
     
@@ -2,30 +2,8 @@
 """
 Script para verificar el precio específico de este producto
 """
-import os
-import sys
-from pathlib import Path
 
-# Cargar variables de entorno
-env_file = Path(__file__).parent.parent / '.env.local'
-if env_file.exists():
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                os.environ[key.strip()] = value.strip().strip('"').strip("'")
-
-from supabase import create_client, Client
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 print("=" * 80)
 print("VERIFICACIÓN DE PRECIO - ROTOMARTILLO")
@@ -1,31 +1,13 @@
 #!/usr/bin/env python3
 """
 Script para verificar productos de videovigilancia en categoría Sistemas
-"""
-import os
-import sys
-from pathlib import Path
-
-# Cargar variables de entorno
-env_file = Path(__file__).parent.parent / '.env.local'
-if env_file.exists():
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                os.environ[key.strip()] = value.strip().strip('"').strip("'")
-
-from supabase import create_client, Client
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
 
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
+Los conteos por palabra clave y el muestreo se piden con catalog_search
+(una llamada para todas las palabras).
+"""
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from catalog_search import search_keywords, unique_products
 
 print("=" * 80)
 print("PRODUCTOS DE VIDEOVIGILANCIA EN SISTEMAS")
@@ -49,23 +31,13 @@ if response_cat.data:
     # Buscar productos con palabras clave de videovigilancia
     keywords = ['cámara', 'camara', 'domo', 'bala', 'nvr', 'dvr', 'video', 'cctv', 'vigilancia']
     
-    total_videovigilancia = 0
-    con_precio = 0
-    sin_precio = 0
-    
-    for keyword in keywords:
-        response = supabase.table('marketplace_products').select(
-            'id,title,price', count='exact'
-        ).eq('category_id', category_id).eq('status', 'active').or_(
-            f'title.ilike.%{keyword}%,description.ilike.%{keyword}%'
-        ).execute()
-        
-        if response.data:
-            count = len(response.data)
-            with_price = len([p for p in response.data if p.get('price', 0) > 0])
-            without_price = count - with_price
-            
-            print(f"   🔍 '{keyword}': {count} productos ({with_price} con precio, {without_price} sin precio)")
+    hits = search_keywords(supabase, keywords, category_id=category_id, limit=0)
+
+    for keyword, hit in hits.items():
+        if hit['count']:
+            with_price = hit['priced']
+            without_price = hit['count'] - with_price
+            print(f"   🔍 '{keyword}': {hit['count']} productos ({with_price} con precio, {without_price} sin precio)")
     
     print()
     print("3️⃣ Contando TODOS los productos de Sistemas...")
@@ -92,15 +64,13 @@ if response_cat.data:
     print("4️⃣ Muestreo de productos de videovigilancia (con precio > 0):")
     
     # Buscar productos de cámaras específicamente
-    response_camaras = supabase.table('marketplace_products').select(
-        'id,title,price,external_code'
-    ).eq('category_id', category_id).eq('status', 'active').gt('price', 0).or_(
-        'title.ilike.%cámara%,title.ilike.%camara%,title.ilike.%domo%,title.ilike.%bala%'
-    ).limit(15).execute()
+    camera_hits = search_keywords(supabase, ['cámara', 'camara', 'domo', 'bala'], category_id=category_id,
+                                  title_only=True, only_priced=True, limit=15)
+    camaras = unique_products(camera_hits)[:15]
     
-    print(f"   Encontrados: {len(response_camaras.data)} productos de cámaras")
+    print(f"   Encontrados: {len(camaras)} productos de cámaras")
     print()
-    for i, product in enumerate(response_camaras.data, 1):
+    for i, product in enumerate(camaras, 1):
         title = product['title'][:70]
         price = product['price']
         is_syscom = "🔧" if product.get('external_code') else "🔨"
@@ -3,53 +3,30 @@ Script para limpiar URLs de imágenes duplicadas en productos del marketplace.
 Analiza productos con imágenes duplicadas y las elimina, manteniendo solo una instancia única.
 """
 
-import os
 import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from typing import List, Dict, Set
+from typing import TYPE_CHECKING, List, Dict, Set
 from collections import Counter
 
-# Cargar variables de entorno
-load_dotenv('.env.local')
+from catalog_config import get_supabase
+from catalog_plan import PlanWriter, plan_arg
+from mutation_journal import MutationJournal, bulk_apply, journal_arg
+from product_records import load_records
 
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+if TYPE_CHECKING:
+    from supabase import Client
 
-def analyze_duplicate_images(supabase: Client, limit: int = None):
+def analyze_duplicate_images(supabase: 'Client', limit: int = None, products: List[Dict] = None):
     """
     Analiza productos con imágenes duplicadas en el array de imágenes.
+    Si se pasan products (ya cargados) no se consulta la base de datos.
     """
     print("🔍 Analizando productos con imágenes duplicadas...\n")
     
     try:
-        # Obtener todos los productos activos (sin límite por defecto)
-        query = supabase.table('marketplace_products').select('id, title, images').eq('status', 'active')
+        # Obtener todos los productos activos (sin límite por defecto) como registros compactos
+        if products is None:
+            products = load_records(supabase, 'id, title, images, updated_at', limit=limit)
         
-        # Obtener todos los productos en lotes si es necesario
-        all_products = []
-        page_size = 1000
-        offset = 0
-        
-        while True:
-            batch_query = query.range(offset, offset + page_size - 1)
-            response = batch_query.execute()
-            batch_products = response.data
-            
-            if not batch_products:
-                break
-            
-            all_products.extend(batch_products)
-            offset += page_size
-            
-            if limit and len(all_products) >= limit:
-                all_products = all_products[:limit]
-                break
-            
-            if len(batch_products) < page_size:
-                break
-        
-        products = all_products
         print(f"✅ {len(products)} productos encontrados\n")
         
         products_with_duplicates = []
@@ -95,6 +72,8 @@ def analyze_duplicate_images(supabase: Client, limit: int = None):
                     'id': product['id'],
                     'title': product.get('title', 'Sin título'),
                     'images': images,
+                    'db_images': list(product.get('images') or []),
+                    'updated_at': product.get('updated_at'),
                     'duplicates': duplicates,
                     'similar_duplicates': similar_duplicates,
                     'unique_images': list(dict.fromkeys(images)),  # Mantener orden, eliminar duplicados
@@ -110,10 +89,48 @@ def analyze_duplicate_images(supabase: Client, limit: int = None):
         print(f"❌ Error al analizar productos: {e}")
         return [], {}
 
-def clean_duplicate_images(supabase: Client, products_with_duplicates: List[Dict], dry_run: bool = True):
+def dedupe_images(images: List[str]) -> List[str]:
+    """
+    Mantiene el orden original, pero solo la primera ocurrencia de cada URL.
+    Normaliza para detectar duplicados similares también.
+    """
+    seen = set()
+    seen_normalized = set()
+    cleaned_images = []
+    
+    for img in images:
+        if not img or not img.strip():
+            continue
+        
+        img_clean = img.strip()
+        img_normalized = img_clean.lower().replace(' ', '').replace('%20', '')
+        
+        # Si ya vimos esta URL (exacta o normalizada), saltarla
+        if img_clean not in seen and img_normalized not in seen_normalized:
+            cleaned_images.append(img_clean)
+            seen.add(img_clean)
+            seen_normalized.add(img_normalized)
+    
+    return cleaned_images
+
+def write_plan(products_with_duplicates: List[Dict], plan_path) -> PlanWriter:
+    """
+    Guarda los cambios como plan (ver catalog_plan.py) en lugar de aplicarlos.
+    """
+    with PlanWriter(plan_path, 'clean_duplicate_images', products_analyzed=len(products_with_duplicates)) as plan:
+        for product_data in products_with_duplicates:
+            plan.add(product_data['id'], 'images', product_data.get('db_images', product_data['images']),
+                     dedupe_images(product_data['images']), product_data.get('updated_at'))
+    return plan
+
+def clean_duplicate_images(supabase: 'Client', products_with_duplicates: List[Dict], dry_run: bool = True,
+                           resume=None):
     """
     Limpia las imágenes duplicadas de los productos.
     Mantiene solo una instancia de cada URL única, preservando el orden.
+    Los cambios se registran en una bitácora (mutation_journal.py) y se aplican en lotes.
+    Los productos cuya galería limpia quedó escrita en la BD se marcan con
+    'images_written' (nunca en dry-run).
     """
     if dry_run:
         print("\n🔍 MODO DRY RUN - No se realizarán cambios\n")
@@ -122,31 +139,14 @@ def clean_duplicate_images(supabase: Client, products_with_duplicates: List[Dict
     
     cleaned_count = 0
     error_count = 0
+    rows = []
     
     for product_data in products_with_duplicates:
         product_id = product_data['id']
         original_images = product_data['images']
-        unique_images = product_data['unique_images']
-        
-        # Mantener el orden original, pero solo la primera ocurrencia
-        # Normalizar para detectar duplicados similares también
-        seen = set()
-        seen_normalized = set()
-        cleaned_images = []
-        
-        for img in original_images:
-            if not img or not img.strip():
-                continue
-            
-            img_clean = img.strip()
-            img_normalized = img_clean.lower().replace(' ', '').replace('%20', '')
-            
-            # Si ya vimos esta URL (exacta o normalizada), saltarla
-            if img_clean not in seen and img_normalized not in seen_normalized:
-                cleaned_images.append(img_clean)
-                seen.add(img_clean)
-                seen_normalized.add(img_normalized)
         
+        cleaned_images = dedupe_images(original_images)
+        product_data['cleaned_images'] = cleaned_images
         if len(cleaned_images) != len(original_images):
             print(f"📦 Producto: {product_data['title'][:60]}...")
             print(f"   Antes: {len(original_images)} imágenes")
@@ -154,26 +154,29 @@ def clean_duplicate_images(supabase: Client, products_with_duplicates: List[Dict
             print(f"   Duplicados eliminados: {len(original_images) - len(cleaned_images)}")
             
             if not dry_run:
-                try:
-                    update_response = supabase.table('marketplace_products').update(
-                        {'images': cleaned_images}
-                    ).eq('id', product_id).execute()
-                    
-                    if update_response.data:
-                        cleaned_count += 1
-                        print(f"   ✅ Actualizado\n")
-                    else:
-                        error_count += 1
-                        print(f"   ❌ Error al actualizar\n")
-                except Exception as e:
-                    error_count += 1
-                    print(f"   ❌ Error: {e}\n")
+                rows.append({
+                    'id': product_id,
+                    'before': {'images': product_data.get('db_images', original_images)},
+                    'after': {'images': cleaned_images},
+                })
+                print()
             else:
                 print(f"   [DRY RUN] Se actualizaría\n")
     
+    if rows:
+        journal = MutationJournal.start('clean_duplicate_images', resume=resume)
+        rows = journal.skip_committed(rows)
+        cleaned_count = journal.apply(rows, bulk_apply(supabase))
+        error_count = len(rows) - cleaned_count
+        committed = journal.committed
+        for product_data in products_with_duplicates:
+            if committed.get(product_data['id']) == {'images': product_data['cleaned_images']}:
+                product_data['images_written'] = True
+        print(f"↩️  Revertir: python3 scripts/mutation_journal.py {journal.path} --rollback --execute")
+    
     return cleaned_count, error_count
 
-def analyze_wrong_images(supabase: Client):
+def analyze_wrong_images(supabase: 'Client', products: List[Dict] = None):
     """
     Analiza productos con posibles imágenes erróneas.
     Busca patrones como:
@@ -185,28 +188,9 @@ def analyze_wrong_images(supabase: Client):
     print("\n🔍 Analizando posibles imágenes erróneas...\n")
     
     try:
-        # Obtener todos los productos en lotes
-        query = supabase.table('marketplace_products').select('id, title, description, images').eq('status', 'active')
-        
-        all_products = []
-        page_size = 1000
-        offset = 0
-        
-        while True:
-            batch_query = query.range(offset, offset + page_size - 1)
-            response = batch_query.execute()
-            batch_products = response.data
-            
-            if not batch_products:
-                break
-            
-            all_products.extend(batch_products)
-            offset += page_size
-            
-            if len(batch_products) < page_size:
-                break
-        
-        products = all_products
+        # Obtener sólo los productos con imágenes, como registros compactos
+        if products is None:
+            products = load_records(supabase, 'id, title, description, images', keep=lambda p: p.images)
         
         wrong_images = []
         
@@ -264,21 +248,24 @@ def analyze_wrong_images(supabase: Client):
         return []
 
 def main():
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("❌ Error: Las variables de entorno NEXT_PUBLIC_SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY deben estar configuradas.")
-        return
-    
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase = get_supabase()
     
     # Verificar si es dry run
     dry_run = '--execute' not in sys.argv
+    plan_path = plan_arg()
     
-    if dry_run:
+    if plan_path:
+        print("=" * 60)
+        print("📋 PLAN DE LIMPIEZA DE IMÁGENES DUPLICADAS")
+        print("=" * 60)
+        print("\n⚠️  MODO PLAN - Los cambios se guardan en un archivo, no en la BD\n")
+    elif dry_run:
         print("=" * 60)
         print("🔍 ANÁLISIS DE IMÁGENES DUPLICADAS Y ERRÓNEAS")
         print("=" * 60)
         print("\n⚠️  MODO DRY RUN - No se realizarán cambios")
-        print("   Usa --execute para aplicar los cambios\n")
+        print("   Usa --execute para aplicar los cambios")
+        print("   o --plan [ARCHIVO] para guardarlos y aplicarlos después\n")
     else:
         print("=" * 60)
         print("🔄 LIMPIEZA DE IMÁGENES DUPLICADAS Y ERRÓNEAS")
@@ -325,11 +312,14 @@ def main():
     else:
         print("\n✅ No se encontraron productos con imágenes erróneas obvias\n")
     
-    # 3. Limpiar duplicados si no es dry run
-    if products_with_duplicates and not dry_run:
+    # 3. Guardar el plan o limpiar duplicados si no es dry run
+    if plan_path:
+        write_plan(products_with_duplicates, plan_path).report()
+    elif products_with_duplicates and not dry_run:
         confirmation = input(f"\n¿Deseas limpiar {stats['products_with_duplicates']} productos con imágenes duplicadas? (s/N): ").lower()
         if confirmation == 's':
-            cleaned_count, error_count = clean_duplicate_images(supabase, products_with_duplicates, dry_run=False)
+            cleaned_count, error_count = clean_duplicate_images(supabase, products_with_duplicates, dry_run=False,
+                                                                resume=journal_arg())
             print(f"\n✅ Limpieza completada:")
             print(f"   Productos actualizados: {cleaned_count}")
             print(f"   Errores: {error_count}")
@@ -6,18 +6,11 @@ Elimina:
 3. URLs de Supabase Storage antiguas que ya no se usan
 """
 
-import os
 import sys
-from dotenv import load_dotenv
-from supabase import create_client
 from collections import Counter
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from catalog_plan import PlanWriter, plan_arg
 
 # URLs erróneas conocidas (códigos muy cortos que son genéricos)
 WRONG_IMAGE_PATTERNS = [
@@ -105,13 +98,20 @@ def clean_product_images(images: list, title: str = '', description: str = '') -
 def main():
     dry_run = '--execute' not in sys.argv
     auto_confirm = '--yes' in sys.argv or '-y' in sys.argv
+    plan_path = plan_arg()
     
-    if dry_run:
+    if plan_path:
+        print("=" * 60)
+        print("📋 PLAN DE LIMPIEZA DE IMÁGENES ERRÓNEAS Y DUPLICADAS")
+        print("=" * 60)
+        print("\n⚠️  MODO PLAN - Los cambios se guardan en un archivo, no en la BD\n")
+    elif dry_run:
         print("=" * 60)
         print("🔍 ANÁLISIS Y LIMPIEZA DE IMÁGENES ERRÓNEAS Y DUPLICADAS")
         print("=" * 60)
         print("\n⚠️  MODO DRY RUN - No se realizarán cambios")
-        print("   Usa --execute para aplicar los cambios\n")
+        print("   Usa --execute para aplicar los cambios")
+        print("   o --plan [ARCHIVO] para guardarlos y aplicarlos después\n")
     else:
         print("=" * 60)
         print("🔄 LIMPIEZA DE IMÁGENES ERRÓNEAS Y DUPLICADAS")
@@ -125,7 +125,7 @@ def main():
     offset = 0
     
     while True:
-        response = supabase.table('marketplace_products').select('id, title, description, images').eq('status', 'active').range(offset, offset + page_size - 1).execute()
+        response = supabase.table('marketplace_products').select('id, title, description, images, updated_at').eq('status', 'active').range(offset, offset + page_size - 1).execute()
         batch = response.data
         
         if not batch:
@@ -184,6 +184,7 @@ def main():
                 'cleaned_images': cleaned_images,
                 'removed_images': removed_images,
                 'added_images': added_images,
+                'updated_at': product.get('updated_at'),
             })
     
     # Mostrar estadísticas
@@ -208,8 +209,13 @@ def main():
             if item['added_images']:
                 print(f"   ✅ Agregadas: {item['added_images']}")
     
-    # Aplicar cambios si no es dry run
-    if products_to_update and not dry_run:
+    # Guardar el plan o aplicar cambios si no es dry run
+    if plan_path:
+        with PlanWriter(plan_path, 'clean_wrong_and_duplicate_images', **stats) as plan:
+            for item in products_to_update:
+                plan.add(item['id'], 'images', item['original_images'], item['cleaned_images'], item['updated_at'])
+        plan.report()
+    elif products_to_update and not dry_run:
         if not auto_confirm:
             confirmation = input(f"\n¿Deseas limpiar {stats['products_needing_cleanup']} productos? (s/N): ").lower()
         else:
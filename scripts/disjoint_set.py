@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Estructura union-find (conjuntos disjuntos) para agrupar productos duplicados
+
+Usa compresión de caminos y unión por tamaño, por lo que agrupar n registros
+con m uniones cuesta prácticamente O(n + m).
+"""
+
+from typing import Dict, Hashable, List
+
+
+class DisjointSet:
+    """Conjuntos disjuntos sobre claves hasheables (ids de producto, posiciones...)"""
+
+    def __init__(self):
+        self._parent: Dict[Hashable, Hashable] = {}
+        self._size: Dict[Hashable, int] = {}
+
+    def add(self, item: Hashable) -> None:
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        parent = self._parent
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+        # Compresión de caminos
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+        return root
+
+    def union(self, a: Hashable, b: Hashable) -> Hashable:
+        self.add(a)
+        self.add(b)
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        return root_a
+
+    def groups(self, min_size: int = 2) -> List[List[Hashable]]:
+        """Retorna los grupos con al menos min_size elementos"""
+        by_root: Dict[Hashable, List[Hashable]] = {}
+        for item in self._parent:
+            by_root.setdefault(self.find(item), []).append(item)
+        return [members for members in by_root.values() if len(members) >= min_size]
@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 """
 Script para descargar reporte de Syscom.mx usando Selenium (requiere navegador)
+
+Sólo como respaldo: download_syscom_report.py (syscom_report_poller) obtiene
+el reporte sin navegador y espera lo que indique Syscom. Aquí Chrome corre en
+modo headless (--show para verlo) y, si Syscom pide esperar, no se duerme:
+se informa el tiempo indicado y se termina.
 """
 
 from selenium import webdriver
@@ -11,9 +16,11 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from datetime import datetime
 from pathlib import Path
-import time
+import sys
 import json
 
+from syscom_report_parser import WAIT_MARKERS, parse_wait_seconds
+
 # Configuración
 REPORT_URL = "http://www.syscom.mx/principal/reporte_art_hora?cadena1=104560873&cadena2=872f3291e35cff2fe2933f1c7a85e29f&all=1&cadena3=1&alm=1&img=1&obs=1&tc=1&ctg=8&lnk=1&idc=1&idp=1&clear=1&sel=0"
 
@@ -45,7 +52,7 @@ def setup_driver(headless=True):
         return None
 
 
-def download_report_with_selenium():
+def download_report_with_selenium(headless=True):
     """Descarga el reporte usando Selenium"""
     print("=" * 80)
     print("📥 DESCARGADOR DE REPORTE SYSCOM.MX (SELENIUM)")
@@ -53,7 +60,7 @@ def download_report_with_selenium():
     print()
     print("🔄 Iniciando navegador...")
     
-    driver = setup_driver(headless=False)  # No headless para ver el proceso
+    driver = setup_driver(headless=headless)
     
     if not driver:
         return None
@@ -64,20 +71,20 @@ def download_report_with_selenium():
         
         # Esperar a que la página cargue
         print("⏳ Esperando a que la página cargue...")
-        time.sleep(5)
+        WebDriverWait(driver, 60).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
         
         # Verificar si hay mensaje de espera
         page_source = driver.page_source
         
-        if "Intente mas tarde" in page_source or "tiempo de espera" in page_source:
+        if any(marker in page_source.lower() for marker in WAIT_MARKERS):
+            wait = parse_wait_seconds(page_source)
             print("⚠️ El reporte requiere tiempo de espera")
-            print("💡 Esperando 60 segundos...")
-            time.sleep(60)
-            
-            # Recargar la página
-            driver.refresh()
-            time.sleep(5)
-            page_source = driver.page_source
+            if wait is not None:
+                print(f"   Syscom indica: {wait // 60} min {wait % 60} s")
+            print("💡 Usa scripts/download_syscom_report.py, que espera sin navegador")
+            return None
         
         # Guardar el HTML
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -161,7 +168,7 @@ def extract_info_from_page(driver, html_file):
 
 def main():
     """Función principal"""
-    html_file = download_report_with_selenium()
+    html_file = download_report_with_selenium(headless="--show" not in sys.argv)
     
     if html_file:
         print()
@@ -1,28 +1,30 @@
 #!/usr/bin/env python3
 """
 Descargador de Imágenes desde Banco de Contenido Digital TRUPER
-Usa Playwright para interactuar con el banco y descargar imágenes en batch
+Usa Playwright para interactuar con el banco y descargar imágenes con un solo pool de navegadores
 """
 
 import csv
+import sys
 import json
-import time
-import base64
 from pathlib import Path
 from typing import Dict, List, Optional
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+
+from truper_bank_pool import run_pool, search_bank, DEFAULT_WORKERS
+from truper_negative_cache import BANK, load_negative_cache
 
 # Configuration
 CSV_FILE = Path("data/truper_catalog_full.csv")
-TRUPER_BANK_URL = "https://www.truper.com/BancoContenidoDigital/index.php?r=site/index"
 OUTPUT_DIR = Path("public/images/marketplace/truper")
 LOG_FILE = Path("scripts/truper_bank_download_log.json")
-MAX_WORKERS = 1  # Playwright no es thread-safe, procesar secuencialmente
-WAIT_TIME = 2  # Segundos entre búsquedas para no sobrecargar el servidor
-BATCH_SIZE = 50  # Procesar en lotes para guardar progreso
+MAX_WORKERS = DEFAULT_WORKERS  # Contextos de navegador en paralelo (ver truper_bank_pool.py)
+SAVE_EVERY = 10  # Guardar el log cada N productos
+STATS_EVERY = 200  # Mostrar estadísticas cada N productos
 
 class TruperBankDownloader:
-    def __init__(self):
+    def __init__(self, workers: int = MAX_WORKERS):
+        self.workers = workers
+        self.negative_cache = load_negative_cache()
         self.output_dir = OUTPUT_DIR
         self.log_file = LOG_FILE
         self.results = {
@@ -72,8 +74,11 @@ class TruperBankDownloader:
         
         return rows
     
-    def search_and_download_image(self, page, clave: str, codigo: str) -> Dict:
+    async def search_and_download_image(self, page, product: Dict[str, str]) -> Dict:
         """Busca un producto en el banco y descarga su imagen"""
+        clave = product["clave"]
+        codigo = product["codigo"]
+
         # Verificar si ya existe
         image_path_jpg = self.output_dir / f"{clave}.jpg"
         image_path_webp = self.output_dir / f"{clave}.webp"
@@ -86,211 +91,134 @@ class TruperBankDownloader:
                 "reason": "already_exists"
             }
         
-        try:
-            # Navegar al banco
-            page.goto(TRUPER_BANK_URL, wait_until="domcontentloaded", timeout=30000)
-            time.sleep(1)
-            
-            # Buscar el producto por clave o código
-            search_box = page.locator("#buscador, input[name='search'], input[type='text']").first
-            if search_box.count() > 0:
-                search_box.fill(clave)
-                time.sleep(0.5)
-                
-                # Buscar botón de búsqueda
-                search_button = page.locator("button.btn-primary, button[type='submit'], input[type='submit']").first
-                if search_button.count() > 0:
-                    search_button.click()
-                    time.sleep(2)
-                else:
-                    # Intentar presionar Enter
-                    search_box.press("Enter")
-                    time.sleep(2)
-            
-            # Buscar imagen del producto en los resultados
-            # Intentar diferentes selectores comunes
-            image_selectors = [
-                "img.product-image",
-                "img[src*='truper']",
-                ".product img",
-                "img[alt*='{}']".format(clave),
-                "img"
-            ]
+        # Buscar el producto por clave (la página del contexto se reutiliza)
+        search = await search_bank(page, clave)
+        image_url = search["image_urls"][0] if search["image_urls"] else None
+        
+        # Si no encontramos imagen en la página, intentar URL directa
+        if not image_url:
+            # Patrón común de URLs de imágenes TRUPER
+            possible_urls = self.negative_cache.filter_urls([
+                f"https://www.truper.com/media/import/imagenes/{clave}.jpg",
+                f"https://www.truper.com/media/import/imagenes/{codigo}.jpg",
+                f"https://www.truper.com/BancoContenidoDigital/uploads/{clave}.jpg",
+            ])
             
-            image_url = None
-            for selector in image_selectors:
+            for url in possible_urls:
                 try:
-                    images = page.locator(selector).all()
-                    if images:
-                        # Buscar la imagen que corresponde al producto
-                        for img in images[:5]:  # Revisar primeras 5 imágenes
-                            src = img.get_attribute("src") or ""
-                            alt = img.get_attribute("alt") or ""
-                            
-                            # Verificar si la imagen parece ser del producto buscado
-                            if clave.lower() in alt.lower() or clave.lower() in src.lower():
-                                image_url = src
-                                break
-                        
-                        if image_url:
-                            break
-                except:
+                    response = await page.request.head(url)
+                    if response.status == 200:
+                        image_url = url
+                        break
+                    self.negative_cache.record_response(url, response.status, '', 'download_truper_images_bank')
+                except Exception:
                     continue
-            
-            # Si no encontramos imagen en la página, intentar URL directa
-            if not image_url:
-                # Patrón común de URLs de imágenes TRUPER
-                possible_urls = [
-                    f"https://www.truper.com/media/import/imagenes/{clave}.jpg",
-                    f"https://www.truper.com/media/import/imagenes/{codigo}.jpg",
-                    f"https://www.truper.com/BancoContenidoDigital/uploads/{clave}.jpg",
-                ]
-                
-                for url in possible_urls:
-                    try:
-                        response = page.request.get(url)
-                        if response.status == 200:
-                            image_url = url
-                            break
-                    except:
-                        continue
-            
-            if not image_url:
+        
+        if not image_url:
+            return {
+                "clave": clave,
+                "codigo": codigo,
+                "status": "not_found",
+                "reason": "no_image_in_results"
+            }
+        
+        # Descargar la imagen
+        try:
+            response = await page.request.get(image_url)
+            if response.status != 200:
                 return {
                     "clave": clave,
                     "codigo": codigo,
-                    "status": "not_found",
-                    "reason": "no_image_in_results"
+                    "status": "failed",
+                    "reason": f"http_{response.status}"
                 }
+            image_data = await response.body()
             
-            # Descargar la imagen
-            try:
-                # Asegurar que la URL sea absoluta
-                if image_url.startswith("//"):
-                    image_url = "https:" + image_url
-                elif image_url.startswith("/"):
-                    image_url = "https://www.truper.com" + image_url
-                
-                response = page.request.get(image_url)
-                if response.status == 200:
-                    image_data = response.body()
-                    
-                    # Verificar que sea una imagen válida
-                    if image_data[:2] == b'\xff\xd8':  # JPEG
-                        image_path = self.output_dir / f"{clave}.jpg"
-                    elif image_data[:4] == b'\x89PNG':  # PNG
-                        image_path = self.output_dir / f"{clave}.png"
-                    elif image_data[:6] in [b'GIF87a', b'GIF89a']:  # GIF
-                        image_path = self.output_dir / f"{clave}.gif"
-                    else:
-                        return {
-                            "clave": clave,
-                            "codigo": codigo,
-                            "status": "failed",
-                            "reason": "invalid_image_format"
-                        }
-                    
-                    # Guardar imagen
-                    with open(image_path, 'wb') as f:
-                        f.write(image_data)
-                    
-                    return {
-                        "clave": clave,
-                        "codigo": codigo,
-                        "status": "downloaded",
-                        "path": str(image_path),
-                        "url": image_url
-                    }
-                else:
-                    return {
-                        "clave": clave,
-                        "codigo": codigo,
-                        "status": "failed",
-                        "reason": f"http_{response.status}"
-                    }
-            except Exception as e:
+            # Verificar que sea una imagen válida
+            if image_data[:2] == b'\xff\xd8':  # JPEG
+                image_path = self.output_dir / f"{clave}.jpg"
+            elif image_data[:4] == b'\x89PNG':  # PNG
+                image_path = self.output_dir / f"{clave}.png"
+            elif image_data[:6] in [b'GIF87a', b'GIF89a']:  # GIF
+                image_path = self.output_dir / f"{clave}.gif"
+            else:
                 return {
                     "clave": clave,
                     "codigo": codigo,
                     "status": "failed",
-                    "reason": str(e)[:100]
+                    "reason": "invalid_image_format"
                 }
-                
-        except PlaywrightTimeout:
+            
+            # Guardar imagen
+            with open(image_path, 'wb') as f:
+                f.write(image_data)
+            
             return {
                 "clave": clave,
                 "codigo": codigo,
-                "status": "failed",
-                "reason": "timeout"
+                "status": "downloaded",
+                "path": str(image_path),
+                "url": image_url
             }
         except Exception as e:
             return {
                 "clave": clave,
                 "codigo": codigo,
-                "status": "error",
+                "status": "failed",
                 "reason": str(e)[:100]
             }
     
-    def process_batch(self, products: List[Dict[str, str]], start_idx: int = 0):
-        """Procesa un lote de productos"""
-        print(f"\n🔄 Procesando lote desde índice {start_idx}...")
+    def record_result(self, product: Dict[str, str], result: Dict):
+        """Clasifica el resultado de una búsqueda y guarda el log periódicamente"""
+        result.setdefault("clave", product["clave"])
+        result.setdefault("codigo", product["codigo"])
+        self.processed += 1
+        prefix = f"[{self.processed}/{self.total}] {product['clave']}:"
         
-        with sync_playwright() as p:
-            # Lanzar navegador (headless=False para debugging, cambiar a True para producción)
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
-            page = context.new_page()
-            
-            total = len(products)
-            for i, product in enumerate(products):
-                clave = product["clave"]
-                codigo = product["codigo"]
-                idx = start_idx + i + 1
-                
-                # Saltar si ya fue procesado
-                already_processed = (
-                    clave in [r.get("clave") for r in self.results["downloaded"]]
-                    or clave in [r.get("clave") for r in self.results["skipped"]]
-                    or clave in [r.get("clave") for r in self.results["not_found"]]
-                )
-                
-                if already_processed:
-                    print(f"[{idx}/{total}] ⏭️  {clave} - Ya procesado")
-                    continue
-                
-                print(f"[{idx}/{total}] 🔍 Buscando {clave}...", end=" ", flush=True)
-                
-                result = self.search_and_download_image(page, clave, codigo)
-                
-                # Clasificar resultado
-                if result["status"] == "downloaded":
-                    print(f"✅ Descargado")
-                    self.results["downloaded"].append(result)
-                elif result["status"] == "skipped":
-                    print(f"⏭️  Omitido")
-                    self.results["skipped"].append(result)
-                elif result["status"] == "not_found":
-                    print(f"❌ No encontrado")
-                    self.results["not_found"].append(result)
-                else:
-                    print(f"❌ Error: {result.get('reason', 'unknown')}")
-                    self.results["failed"].append(result)
-                
-                # Guardar log cada 10 productos
-                if (i + 1) % 10 == 0:
-                    self.save_log()
-                
-                # Esperar entre búsquedas
-                if i < len(products) - 1:
-                    time.sleep(WAIT_TIME)
-            
-            browser.close()
+        if result["status"] == "downloaded":
+            print(f"{prefix} ✅ Descargado")
+            self.results["downloaded"].append(result)
+            self.negative_cache.clear_code(product["clave"])
+        elif result["status"] == "skipped":
+            print(f"{prefix} ⏭️  Omitido")
+            self.results["skipped"].append(result)
+        elif result["status"] == "not_found":
+            print(f"{prefix} ❌ No encontrado")
+            self.results["not_found"].append(result)
+            self.negative_cache.mark_code_missing(product["clave"], BANK, result.get("reason", "not_found"), 'download_truper_images_bank')
+        else:
+            print(f"{prefix} ❌ Error: {result.get('reason', 'unknown')}")
+            self.results["failed"].append(result)
         
-        # Guardar log final del lote
-        self.save_log()
+        if self.processed % SAVE_EVERY == 0:
+            self.save_log()
+        if self.processed % STATS_EVERY == 0:
+            self.print_stats(f"Estadísticas después de {self.processed} productos")
+    
+    def pending_products(self, products: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Quita los productos ya procesados en el log y los de la caché negativa"""
+        processed = {
+            r.get("clave")
+            for key in ("downloaded", "skipped", "not_found")
+            for r in self.results[key]
+        }
+        pending = [p for p in products if p["clave"] not in processed]
+        if len(pending) < len(products):
+            print(f"   ⏭️  {len(products) - len(pending)} ya procesados")
+        
+        # Claves que ya se sabe que no existen (caché negativa compartida)
+        before = len(pending)
+        pending = [p for p in pending if not self.negative_cache.is_missing_code(p["clave"], BANK)]
+        if len(pending) < before:
+            print(f"   ⏭️  {before - len(pending)} omitidos por caché negativa")
+        return pending
+    
+    def print_stats(self, title: str):
+        print(f"\n📊 {title}:")
+        print(f"   ✅ Descargados: {len(self.results['downloaded'])}")
+        print(f"   ⏭️  Omitidos: {len(self.results['skipped'])}")
+        print(f"   ❌ No encontrados: {len(self.results['not_found'])}")
+        print(f"   ❌ Fallidos: {len(self.results['failed'])}")
     
     def download_all(self):
         """Descarga todas las imágenes del catálogo"""
@@ -319,26 +247,17 @@ class TruperBankDownloader:
             print("\n✅ Todos los productos ya tienen imágenes descargadas!")
             return
         
-        # Procesar en lotes
-        total_batches = (len(products_to_process) + BATCH_SIZE - 1) // BATCH_SIZE
+        pending = self.pending_products(products_to_process)
         
-        for batch_num in range(total_batches):
-            start_idx = batch_num * BATCH_SIZE
-            end_idx = min(start_idx + BATCH_SIZE, len(products_to_process))
-            batch = products_to_process[start_idx:end_idx]
-            
-            print(f"\n{'='*70}")
-            print(f"📦 Lote {batch_num + 1}/{total_batches} ({len(batch)} productos)")
-            print(f"{'='*70}")
-            
-            self.process_batch(batch, start_idx)
-            
-            # Mostrar estadísticas después de cada lote
-            print(f"\n📊 Estadísticas después del lote {batch_num + 1}:")
-            print(f"   ✅ Descargados: {len(self.results['downloaded'])}")
-            print(f"   ⏭️  Omitidos: {len(self.results['skipped'])}")
-            print(f"   ❌ No encontrados: {len(self.results['not_found'])}")
-            print(f"   ❌ Fallidos: {len(self.results['failed'])}")
+        # Un solo pool (un Chromium) para todas las claves pendientes; record_result
+        # guarda el log y muestra estadísticas periódicamente
+        print(f"\n🔄 Procesando {len(pending)} productos ({self.workers} contextos en paralelo)...")
+        self.processed = 0
+        self.total = len(pending)
+        try:
+            run_pool(pending, self.search_and_download_image, workers=self.workers, on_result=self.record_result)
+        finally:
+            self.save_log()
         
         # Resumen final
         print(f"\n{'='*70}")
@@ -359,7 +278,9 @@ def main():
         print(f"❌ Error: No se encontró el archivo CSV: {CSV_FILE}")
         return
     
-    downloader = TruperBankDownloader()
+    # Primer argumento opcional: número de contextos de navegador en paralelo
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_WORKERS
+    downloader = TruperBankDownloader(workers=workers)
     downloader.download_all()
     
     print("\n✨ ¡Proceso completado!")
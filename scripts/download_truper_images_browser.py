@@ -6,18 +6,18 @@ Interactúa con el banco de contenido digital de TRUPER para descargar imágenes
 
 import csv
 import json
-import time
 from pathlib import Path
 from typing import Dict, List, Optional
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+
+from truper_bank_pool import run_pool, search_bank, DEFAULT_WORKERS
+from truper_negative_cache import BANK, load_negative_cache
 
 # Configuration
 CSV_FILE = Path("data/truper_catalog_full.csv")
 IMAGE_DIR = Path("public/images/marketplace/truper")
 LOG_FILE = Path("scripts/truper_download_log.json")
-TRUPER_BANK_URL = "https://www.truper.com/BancoContenidoDigital/index.php?r=site/index"
 BATCH_SIZE = 100  # Guardar progreso cada N productos
-DELAY_BETWEEN_SEARCHES = 2  # Segundos entre búsquedas
+WORKERS = DEFAULT_WORKERS  # Contextos de navegador en paralelo
 
 class TruperBrowserDownloader:
     def __init__(self):
@@ -75,107 +75,76 @@ class TruperBrowserDownloader:
                 return f"/images/marketplace/truper/{var}"
         return None
 
-    def download_from_url(self, url: str, filename: str) -> bool:
-        """Descarga una imagen desde una URL"""
+    async def download_from_url(self, page, url: str, filename: str) -> bool:
+        """Descarga una imagen desde una URL con la sesión del contexto"""
         try:
-            import urllib.request
-            urllib.request.urlretrieve(url, IMAGE_DIR / filename)
+            response = await page.request.get(url)
+            if response.status != 200:
+                return False
+            with open(IMAGE_DIR / filename, "wb") as f:
+                f.write(await response.body())
             return True
         except Exception as e:
             print(f"      Error descargando: {e}")
             return False
 
-    def search_and_download(self, page, codigo: str, clave: str) -> tuple[bool, Optional[str]]:
+    async def search_and_download(self, page, row: Dict[str, str]) -> tuple[bool, Optional[str]]:
         """Busca un producto en el banco y descarga su imagen"""
+        codigo = row.get("código", "").strip()
+        clave = row.get("clave", "").strip()
+
         # Verificar si ya existe localmente
         existing = self.check_image_exists_local(codigo, clave)
         if existing:
             self.stats["already_exists"] += 1
             return True, existing
         
-        # Intentar URL directa primero (más rápido)
+        # Intentar URL directa primero (más rápido), salvo que ya se sepa que da 404
         image_key = clave if clave else codigo
+        filename = f"{image_key}.jpg"
         direct_url = f"https://www.truper.com/media/import/imagenes/{codigo}.jpg"
+        negative_cache = load_negative_cache()
+        
+        try:
+            if negative_cache.is_missing_url(direct_url):
+                raise LookupError(direct_url)
+            response = await page.request.head(direct_url, timeout=5000)
+            negative_cache.record_response(direct_url, response.status, response.headers.get("content-type", ""), "download_truper_images_browser")
+            if response.status == 200 and await self.download_from_url(page, direct_url, filename):
+                self.downloaded.append({
+                    "codigo": codigo,
+                    "clave": clave,
+                    "filename": filename,
+                    "method": "direct_url",
+                })
+                self.stats["downloaded"] += 1
+                negative_cache.clear_url(direct_url)
+                negative_cache.clear_code(codigo)
+                negative_cache.clear_code(clave)
+                return True, f"/images/marketplace/truper/{filename}"
+        except Exception:
+            pass
         
+        # Si la URL directa no funciona, buscar en el banco
         try:
-            import urllib.request
-            import urllib.error
+            search_term = clave if clave else codigo
+            result = await search_bank(page, search_term)
             
-            req = urllib.request.Request(direct_url, method="HEAD")
-            with urllib.request.urlopen(req, timeout=5) as response:
-                if response.status == 200:
-                    # Descargar imagen
-                    filename = f"{image_key}.jpg"
-                    urllib.request.urlretrieve(direct_url, IMAGE_DIR / filename)
+            for img_url in result["image_urls"]:
+                if await self.download_from_url(page, img_url, filename):
                     self.downloaded.append({
                         "codigo": codigo,
                         "clave": clave,
                         "filename": filename,
-                        "method": "direct_url",
+                        "method": "bank_search",
                     })
                     self.stats["downloaded"] += 1
+                    negative_cache.clear_code(codigo)
+                    negative_cache.clear_code(clave)
                     return True, f"/images/marketplace/truper/{filename}"
-        except:
-            pass
-        
-        # Si la URL directa no funciona, buscar en el banco
-        try:
-            # Navegar al banco
-            page.goto(TRUPER_BANK_URL, wait_until="domcontentloaded", timeout=30000)
-            time.sleep(1)
-            
-            # Buscar por código o clave
-            search_term = clave if clave else codigo
-            
-            # Buscar campo de búsqueda
-            try:
-                search_input = page.locator("input[type='text'], input[name*='search'], input[id*='search'], #buscador").first
-                if search_input.count() > 0:
-                    search_input.fill(search_term)
-                    time.sleep(0.5)
-                    
-                    # Buscar botón de búsqueda
-                    search_button = page.locator("button[type='submit'], button.btn-primary, input[type='submit']").first
-                    if search_button.count() > 0:
-                        search_button.click()
-                        time.sleep(2)
-                        
-                        # Buscar imagen en los resultados
-                        # Intentar encontrar imagen o link de descarga
-                        img_selectors = [
-                            "img[src*='imagenes']",
-                            "img[src*='truper']",
-                            ".product-image img",
-                            "a[href*='download'] img",
-                        ]
-                        
-                        for selector in img_selectors:
-                            images = page.locator(selector).all()
-                            if len(images) > 0:
-                                img_src = images[0].get_attribute("src")
-                                if img_src:
-                                    # Construir URL completa si es relativa
-                                    if img_src.startswith("http"):
-                                        img_url = img_src
-                                    else:
-                                        img_url = f"https://www.truper.com{img_src}" if img_src.startswith("/") else f"{TRUPER_BANK_URL.rsplit('/', 1)[0]}/{img_src}"
-                                    
-                                    # Descargar imagen
-                                    filename = f"{image_key}.jpg"
-                                    if self.download_from_url(img_url, filename):
-                                        self.downloaded.append({
-                                            "codigo": codigo,
-                                            "clave": clave,
-                                            "filename": filename,
-                                            "method": "bank_search",
-                                        })
-                                        self.stats["downloaded"] += 1
-                                        return True, f"/images/marketplace/truper/{filename}"
-            
-            except Exception as e:
-                pass
             
             self.stats["not_found"] += 1
+            negative_cache.mark_code_missing(search_term, BANK, "bank_not_found", "download_truper_images_browser")
             return False, None
             
         except Exception as e:
@@ -208,7 +177,7 @@ class TruperBrowserDownloader:
                     rows.append(row)
         return rows
 
-    def process_all(self, start_from: int = 0, limit: Optional[int] = None):
+    def process_all(self, start_from: int = 0, limit: Optional[int] = None, workers: int = WORKERS):
         """Procesa todos los productos del CSV"""
         print("📖 Leyendo CSV...")
         rows = self.read_csv()
@@ -227,53 +196,50 @@ class TruperBrowserDownloader:
         print(f"   Total en CSV: {total}")
         print(f"   Ya procesados: {len(processed_codes)}")
         print(f"   Por procesar: {remaining}")
-        print(f"\n🚀 Iniciando descarga con Playwright...")
-        print("   (Esto puede tardar varias horas)\n")
+        print(f"\n🚀 Iniciando descarga con Playwright ({workers} contextos en paralelo)...\n")
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+        # Omitir códigos/claves que ya se sabe que no existen por ninguna de las dos vías
+        # (URL directa y banco; caché negativa compartida)
+        negative_cache = load_negative_cache()
+        rows_to_process = [
+            r for r in rows_to_process
+            if r.get("código", "").strip()
+            and not (
+                negative_cache.is_missing_code(r.get("clave", "").strip() or r.get("código", "").strip(), BANK)
+                and negative_cache.is_missing_url(f"https://www.truper.com/media/import/imagenes/{r['código'].strip()}.jpg")
             )
-            page = context.new_page()
+        ]
+        if len(rows_to_process) < remaining:
+            print(f"   Omitidos (sin código o en caché negativa): {remaining - len(rows_to_process)}\n")
+        processed = 0
+        
+        def record_result(row: Dict[str, str], result):
+            nonlocal processed
+            codigo = row.get("código", "").strip()
+            clave = row.get("clave", "").strip()
+            processed += 1
+            
+            # Un error inesperado del worker llega como dict en lugar de tupla
+            success, image_path = result if isinstance(result, tuple) else (False, None)
             
-            try:
-                for i, row in enumerate(rows_to_process):
-                    codigo = row.get("código", "").strip()
-                    clave = row.get("clave", "").strip()
-                    
-                    if not codigo:
-                        continue
-                    
-                    current = start_from + i + 1
-                    print(f"[{current}/{start_from + remaining}] {codigo} ({clave})...", end=" ")
-                    
-                    success, image_path = self.search_and_download(page, codigo, clave)
-                    
-                    if success:
-                        print(f"✅ {image_path}")
-                    else:
-                        print("❌ No encontrada")
-                        self.skipped.append({
-                            "codigo": codigo,
-                            "clave": clave,
-                            "reason": "not_found",
-                        })
-                    
-                    self.stats["total_processed"] += 1
-                    
-                    # Guardar log periódicamente
-                    if (i + 1) % BATCH_SIZE == 0:
-                        self.save_log()
-                        print(f"\n💾 Progreso guardado ({i + 1}/{remaining} procesados)\n")
-                    
-                    # Delay entre búsquedas
-                    if i < len(rows_to_process) - 1:
-                        time.sleep(DELAY_BETWEEN_SEARCHES)
+            if success:
+                print(f"[{start_from + processed}/{start_from + remaining}] {codigo} ({clave}) ✅ {image_path}")
+            else:
+                print(f"[{start_from + processed}/{start_from + remaining}] {codigo} ({clave}) ❌ No encontrada")
+                self.skipped.append({
+                    "codigo": codigo,
+                    "clave": clave,
+                    "reason": "not_found",
+                })
             
-            finally:
-                browser.close()
+            self.stats["total_processed"] += 1
+            
+            # Guardar log periódicamente
+            if processed % BATCH_SIZE == 0:
+                self.save_log()
+                print(f"\n💾 Progreso guardado ({processed}/{remaining} procesados)\n")
+        
+        run_pool(rows_to_process, self.search_and_download, workers=workers, on_result=record_result)
         
         # Guardar log final
         self.save_log()
@@ -307,7 +273,7 @@ def main():
     
     # Verificar que Playwright esté instalado
     try:
-        from playwright.sync_api import sync_playwright
+        from playwright.async_api import async_playwright
     except ImportError:
         print("❌ Error: Playwright no está instalado")
         print("   Instala con: pip install playwright")
@@ -319,12 +285,13 @@ def main():
     # Opciones de línea de comandos
     start_from = int(sys.argv[1]) if len(sys.argv) > 1 else 0
     limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else WORKERS
     
     if limit:
         print(f"⚠️ Modo limitado: procesando {limit} productos desde el índice {start_from}")
     
     try:
-        downloader.process_all(start_from=start_from, limit=limit)
+        downloader.process_all(start_from=start_from, limit=limit, workers=workers)
         print("\n✨ ¡Proceso completado!")
         print(f"\n📋 Próximos pasos:")
         print(f"   1. Revisar imágenes en: {IMAGE_DIR}")
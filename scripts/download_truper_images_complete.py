@@ -13,6 +13,8 @@ from typing import Dict, List, Optional
 from urllib.parse import urlencode
 import os
 
+from truper_negative_cache import DIRECT, load_negative_cache
+
 # Configuration
 CSV_FILE = Path("data/truper_catalog_full.csv")
 IMAGE_DIR = Path("public/images/marketplace/truper")
@@ -34,8 +36,10 @@ class TruperImageDownloader:
             "downloaded": 0,
             "already_exists": 0,
             "not_found": 0,
+            "known_missing": 0,
             "errors": 0,
         }
+        self.negative_cache = load_negative_cache()
         
         # Crear directorio si no existe
         IMAGE_DIR.mkdir(parents=True, exist_ok=True)
@@ -107,13 +111,14 @@ class TruperImageDownloader:
                         "url": image_url,
                     })
                     self.stats["downloaded"] += 1
+                    self.negative_cache.clear_url(image_url)
+                    self.negative_cache.clear_code(codigo)
                     return True, f"/images/marketplace/truper/{filename}"
-                else:
-                    self.stats["not_found"] += 1
-                    return False, None
-            else:
-                self.stats["not_found"] += 1
-                return False, None
+            # 404 o contenido que no es imagen: no volver a probar este código
+            if self.negative_cache.record_response(image_url, response.status_code, response.headers.get('content-type', ''), 'download_truper_images_complete'):
+                self.negative_cache.mark_code_missing(codigo, DIRECT, 'direct_url_404', 'download_truper_images_complete')
+            self.stats["not_found"] += 1
+            return False, None
                 
         except Exception as e:
             self.stats["errors"] += 1
@@ -158,6 +163,7 @@ class TruperImageDownloader:
         print("   (Esto puede tardar varias horas para todos los productos)\n")
         
         processed = 0
+        downloaded_codes = {item.get("codigo") for item in self.downloaded}
         for i, row in enumerate(rows):
             codigo = row.get("código", "").strip()
             clave = row.get("clave", "").strip()
@@ -166,7 +172,12 @@ class TruperImageDownloader:
                 continue
             
             # Saltar si ya está descargado
-            if any(item.get("codigo") == codigo for item in self.downloaded):
+            if codigo in downloaded_codes:
+                continue
+            
+            # Saltar códigos que ya se sabe que no tienen imagen (sin delay)
+            if self.negative_cache.is_missing_code(codigo, DIRECT):
+                self.stats["known_missing"] += 1
                 continue
             
             # Descargar imagen
@@ -200,6 +211,7 @@ class TruperImageDownloader:
         print(f"Descargadas nuevas: {self.stats['downloaded']}")
         print(f"Ya existían: {self.stats['already_exists']}")
         print(f"No encontradas: {self.stats['not_found']}")
+        print(f"Omitidas (caché negativa): {self.stats['known_missing']}")
         print(f"Errores: {self.stats['errors']}")
         print(f"\n📝 Log guardado: {LOG_FILE}")
         print("=" * 60)
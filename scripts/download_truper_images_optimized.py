@@ -14,6 +14,8 @@ from typing import Dict, List, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from playwright.sync_api import sync_playwright
 
+from truper_negative_cache import DIRECT, load_negative_cache
+
 # Configuration
 CSV_FILE = Path("data/truper_catalog_full.csv")
 IMAGE_DIR = Path("public/images/marketplace/truper")
@@ -82,6 +84,10 @@ class TruperImageDownloader:
         filename = f"{image_key}.jpg"
         filepath = IMAGE_DIR / filename
         
+        negative_cache = load_negative_cache()
+        if negative_cache.is_missing_url(url):
+            return False, None
+        
         try:
             req = urllib.request.Request(url, headers={
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
@@ -92,7 +98,12 @@ class TruperImageDownloader:
                     if 'image' in content_type:
                         with open(filepath, 'wb') as f:
                             f.write(response.read())
+                        negative_cache.clear_url(url)
+                        negative_cache.clear_code(codigo)
                         return True, filename
+                negative_cache.record_response(url, response.status, response.headers.get('content-type', ''), 'download_truper_images_optimized')
+        except urllib.error.HTTPError as e:
+            negative_cache.record_response(url, e.code, '', 'download_truper_images_optimized')
         except:
             pass
         return False, None
@@ -105,6 +116,11 @@ class TruperImageDownloader:
             self.stats["already_exists"] += 1
             return True, existing, "exists"
         
+        # Código que ya se sabe que no tiene imagen (caché negativa compartida)
+        if load_negative_cache().is_missing_code(codigo, DIRECT):
+            self.stats["not_found"] += 1
+            return False, None, "known_missing"
+        
         # Intentar descarga directa
         success, filename = self.download_direct(codigo, clave)
         if success:
@@ -118,6 +134,9 @@ class TruperImageDownloader:
             return True, filename, "direct"
         
         # No encontrada
+        url = TRUPER_IMAGE_BASE_URL.format(codigo=codigo)
+        if load_negative_cache().is_missing_url(url):
+            load_negative_cache().mark_code_missing(codigo, DIRECT, 'direct_url_404', 'download_truper_images_optimized')
         self.stats["not_found"] += 1
         self.skipped.append({
             "codigo": codigo,
@@ -209,6 +228,7 @@ class TruperImageDownloader:
         print(f"Ya existían: {self.stats['already_exists']}")
         print(f"No encontradas: {self.stats['not_found']}")
         print(f"Errores: {self.stats['errors']}")
+        print(f"Caché negativa: {load_negative_cache().summary()}")
         print(f"\n📝 Log: {LOG_FILE}")
         print("=" * 60)
 
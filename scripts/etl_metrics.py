@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Métricas de los scripts ETL del catálogo (contadores, gauges e histogramas)
+
+Registro en memoria, seguro entre hilos, que al final de cada corrida se
+escribe como:
+
+- data/metrics/<job>.prom : formato textfile de Prometheus (node_exporter
+  --collector.textfile.directory puede apuntar a esa carpeta)
+- data/metrics/<job>.json : instantánea con los mismos valores más las tasas
+  por segundo de cada contador durante la corrida
+
+La carpeta se cambia con la variable de entorno ETL_METRICS_DIR.
+
+Uso:
+    from etl_metrics import metrics
+
+    metrics.export_at_exit('sync_syscom_products')
+    metrics.request('syscom', 'productos', response.status_code, elapsed)
+    metrics.inc('db_rows_total', len(batch), op='insert', mode='batch')
+    with metrics.time('stage_duration_seconds', stage='prices'):
+        ...
+    metrics.set('queue_depth', q.qsize(), queue='fetch')
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+METRIC_PREFIX = 'catalog_etl_'
+DEFAULT_DIR = Path(__file__).parent.parent / "data" / "metrics"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ''
+    escape = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in items) + '}'
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Contadores, gauges e histogramas con etiquetas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        """Mide la duración del bloque en segundos (también si lanza excepción)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def request(self, service: str, endpoint: str, status, seconds: float) -> None:
+        """Registra un request HTTP (status puede ser un código o 'error')"""
+        self.inc('http_requests_total', service=service, endpoint=endpoint, status=status)
+        self.observe('http_request_seconds', seconds, service=service, endpoint=endpoint)
+
+    def retry(self, service: str, endpoint: str, reason) -> None:
+        self.inc('http_retries_total', service=service, endpoint=endpoint, reason=reason)
+
+    def value(self, name: str, **labels) -> float:
+        """Valor actual de un contador o gauge (0 si no existe)"""
+        key = _labels(labels)
+        with self._lock:
+            for table in (self.counters, self.gauges):
+                if name in table and key in table[name]:
+                    return table[name][key]
+        return 0
+
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+
+    def to_prometheus(self, job: str) -> str:
+        job_label = (('job', job),)
+        lines = []
+        with self._lock:
+            elapsed = time.time() - self.started
+            for kind, table in (('counter', self.counters), ('gauge', self.gauges)):
+                for name, series in sorted(table.items()):
+                    full = METRIC_PREFIX + name
+                    if name in self.help:
+                        lines.append(f"# HELP {full} {self.help[name]}")
+                    lines.append(f"# TYPE {full} {kind}")
+                    for labels, value in sorted(series.items()):
+                        lines.append(f"{full}{_format_labels(labels, job_label)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                full = METRIC_PREFIX + name
+                if name in self.help:
+                    lines.append(f"# HELP {full} {self.help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for labels, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{_format_labels(labels, job_label + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(labels, job_label + (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{full}_sum{_format_labels(labels, job_label)} {hist.total:g}")
+                    lines.append(f"{full}_count{_format_labels(labels, job_label)} {hist.count}")
+            lines.append(f"# TYPE {METRIC_PREFIX}run_duration_seconds gauge")
+            lines.append(f"{METRIC_PREFIX}run_duration_seconds{_format_labels((), job_label)} {elapsed:.3f}")
+            lines.append(f"# TYPE {METRIC_PREFIX}last_run_timestamp_seconds gauge")
+            lines.append(f"{METRIC_PREFIX}last_run_timestamp_seconds{_format_labels((), job_label)} {time.time():.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self, job: str) -> Dict:
+        def label_str(labels: LabelKey) -> str:
+            return ','.join(f"{k}={v}" for k, v in labels) or '-'
+
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            return {
+                'job': job,
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'duration_s': round(elapsed, 3),
+                'counters': {
+                    name: {label_str(k): {'value': v, 'per_second': round(v / elapsed, 3)} for k, v in series.items()}
+                    for name, series in self.counters.items()
+                },
+                'gauges': {
+                    name: {label_str(k): v for k, v in series.items()}
+                    for name, series in self.gauges.items()
+                },
+                'histograms': {
+                    name: {
+                        label_str(k): {
+                            'count': h.count,
+                            'sum': round(h.total, 6),
+                            'avg': round(h.total / h.count, 6) if h.count else None,
+                            'buckets': dict(zip((f'{b:g}' for b in h.buckets), h.counts)),
+                        }
+                        for k, h in series.items()
+                    }
+                    for name, series in self.histograms.items()
+                },
+            }
+
+    def export(self, job: str, directory: Optional[Path] = None) -> Optional[Path]:
+        """Escribe <job>.prom y <job>.json de forma atómica; retorna la ruta .prom"""
+        if not (self.counters or self.gauges or self.histograms):
+            return None
+        directory = Path(directory or os.environ.get('ETL_METRICS_DIR') or DEFAULT_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        outputs = {
+            directory / f"{job}.prom": self.to_prometheus(job),
+            directory / f"{job}.json": json.dumps(self.snapshot(job), indent=2, ensure_ascii=False),
+        }
+        for path, content in outputs.items():
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return directory / f"{job}.prom"
+
+    def export_at_exit(self, job: str) -> None:
+        """Exporta al terminar el proceso (también si el script sale con error)"""
+        def _export():
+            path = self.export(job)
+            if path:
+                print(f"📈 Métricas guardadas en: {path}")
+        atexit.register(_export)
+
+
+# Registro compartido por todos los módulos del proceso
+metrics = MetricsRegistry()
+metrics.describe('http_requests_total', 'Requests HTTP por servicio, endpoint y status')
+metrics.describe('http_request_seconds', 'Latencia de requests HTTP')
+metrics.describe('http_retries_total', 'Reintentos de requests HTTP')
+metrics.describe('db_rows_total', 'Filas escritas en la BD por operación y modo')
+metrics.describe('db_batch_seconds', 'Duración de cada lote escrito en la BD')
+metrics.describe('db_errors_total', 'Filas que no se pudieron escribir')
+metrics.describe('db_conflicts_total', 'Filas omitidas porque cambiaron desde que se generó el plan')
+metrics.describe('currency_conversions_total', 'Productos de Syscom en USD con equivalente en MXN registrado')
+metrics.describe('currency_flags_total', 'Productos de Syscom marcados para revisión por su moneda')
+metrics.describe('queue_depth', 'Elementos en cola entre etapas del pipeline')
+metrics.describe('stage_duration_seconds', 'Duración de cada etapa de catalog.py')
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Modo de perfilado común para los scripts del catálogo (--profile)
+
+Los scripts llaman a su main() a través de run_main(), que reconoce la opción
+--profile antes de que el argparse del script la vea:
+
+    python3 scripts/import_all_syscom_products.py --profile
+    python3 scripts/fix_all_products_without_images.py --execute --profile sample,memory
+    python3 scripts/sync_syscom_products_improved.py --profile=all
+
+Modos (separados por coma; sin valor = cprofile):
+- cprofile : cProfile del hilo principal (cprofile.prof + cprofile.txt)
+- sample   : muestreo de pilas de TODOS los hilos cada SAMPLE_INTERVAL s,
+             útil para pipelines con hilos (sample.folded para flamegraph /
+             speedscope + sample_top.txt)
+- memory   : tracemalloc; pico de memoria total y por fase (memory.txt)
+- all      : los tres
+
+Las fases se marcan con `with phase('nombre'):`; su tiempo de reloj se mide
+siempre (también sin --profile) y se publica en etl_metrics como
+phase_seconds. Con --profile todo se guarda en
+data/profiles/<script>_<fecha>/ junto con summary.json, para comparar
+corridas. La carpeta base se cambia con ETL_PROFILE_DIR.
+
+Uso:
+    from etl_profile import run_main, phase
+
+    def main():
+        with phase('fetch'):
+            ...
+
+    if __name__ == "__main__":
+        run_main(main)
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from etl_metrics import metrics
+
+PROFILE_MODES = ('cprofile', 'sample', 'memory')
+DEFAULT_DIR = Path(__file__).parent.parent / "data" / "profiles"
+SAMPLE_INTERVAL = 0.005
+TOP_N = 40
+
+
+class PhaseTimer:
+    """Tiempo de reloj acumulado por fase (anidadas como 'padre/hija')"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.phases: Dict[str, Dict] = {}
+        self.track_memory = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(name)
+        full_name = '/'.join(stack)
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            peak = tracemalloc.get_traced_memory()[1] if self.track_memory and tracemalloc.is_tracing() else None
+            with self._lock:
+                entry = self.phases.setdefault(full_name, {'calls': 0, 'seconds': 0.0, 'peak_mb': None})
+                entry['calls'] += 1
+                entry['seconds'] += elapsed
+                if peak is not None:
+                    entry['peak_mb'] = max(entry['peak_mb'] or 0, round(peak / 1024 / 1024, 2))
+            metrics.observe('phase_seconds', elapsed, phase=full_name)
+
+
+_timer = PhaseTimer()
+phase = _timer.phase
+metrics.describe('phase_seconds', 'Tiempo de reloj por fase de un script')
+
+
+class StackSampler(threading.Thread):
+    """Muestrea las pilas de todos los hilos (sin dependencias externas)"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name='etl-profile-sampler', daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            names.update((t.ident, t.name) for t in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join(timeout=1)
+
+    def write(self, directory: Path) -> None:
+        with open(directory / 'sample.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        all_samples = sum(self.stacks.values()) or 1
+        with open(directory / 'sample_top.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Muestras: {self.samples} (intervalo {self.interval * 1000:.0f} ms, todos los hilos)\n\n")
+            f.write(f"{'propio %':>9} {'total %':>8}  función\n")
+            for frame, count in own.most_common(TOP_N):
+                f.write(f"{100 * count / all_samples:8.1f}% {100 * total[frame] / all_samples:7.1f}%  {frame}\n")
+
+
+def pop_profile_arg(argv: List[str]) -> Optional[Set[str]]:
+    """Quita --profile[=modos] de argv; retorna los modos o None si no vino"""
+    for i, arg in enumerate(argv):
+        if arg == '--profile' or arg.startswith('--profile='):
+            value = arg.partition('=')[2]
+            del argv[i]
+            if not value and i < len(argv) and not argv[i].startswith('-'):
+                candidate = argv[i]
+                if all(m in PROFILE_MODES + ('all',) for m in candidate.split(',')):
+                    value = argv.pop(i)
+            modes = {m.strip() for m in (value or 'cprofile').split(',') if m.strip()}
+            if 'all' in modes:
+                modes = set(PROFILE_MODES)
+            unknown = modes - set(PROFILE_MODES)
+            if unknown:
+                print(f"❌ Modo de --profile desconocido: {', '.join(sorted(unknown))} "
+                      f"(opciones: {', '.join(PROFILE_MODES)}, all)")
+                sys.exit(2)
+            return modes
+    return None
+
+
+def _write_memory(directory: Path, snapshot: "tracemalloc.Snapshot", peak: int) -> None:
+    with open(directory / 'memory.txt', 'w', encoding='utf-8') as f:
+        f.write(f"Pico de memoria (tracemalloc): {peak / 1024 / 1024:.1f} MB\n\n")
+        f.write("Asignaciones vivas al final, por línea:\n")
+        for stat in snapshot.statistics('lineno')[:TOP_N]:
+            f.write(f"{stat.size / 1024:10.1f} KB {stat.count:8d} bloques  {stat.traceback}\n")
+
+
+def run_main(main: Callable, job: Optional[str] = None, argv: Optional[List[str]] = None):
+    """Ejecuta main() con el perfilado pedido en la línea de comandos"""
+    argv = sys.argv if argv is None else argv
+    modes = pop_profile_arg(argv)
+    if not modes:
+        return main()
+
+    job = job or Path(argv[0]).stem or 'script'
+    base = Path(os.environ.get('ETL_PROFILE_DIR') or DEFAULT_DIR)
+    directory = base / f"{job}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    directory.mkdir(parents=True, exist_ok=True)
+    print(f"🔬 Perfilado activo ({', '.join(sorted(modes))}) → {directory}")
+
+    profiler = cProfile.Profile() if 'cprofile' in modes else None
+    sampler = StackSampler() if 'sample' in modes else None
+    if 'memory' in modes:
+        tracemalloc.start()
+        _timer.track_memory = True
+
+    status = 'ok'
+    start = time.perf_counter()
+    started_at = datetime.now().isoformat(timespec='seconds')
+    if sampler:
+        sampler.start()
+    if profiler:
+        profiler.enable()
+    try:
+        return main()
+    except SystemExit as e:
+        status = f"exit {e.code}" if e.code not in (None, 0) else 'ok'
+        raise
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - start
+        if sampler:
+            sampler.stop()
+            sampler.write(directory)
+        if profiler:
+            profiler.dump_stats(str(directory / 'cprofile.prof'))
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(TOP_N)
+            (directory / 'cprofile.txt').write_text(text.getvalue(), encoding='utf-8')
+        peak_mb = None
+        if 'memory' in modes:
+            peak = tracemalloc.get_traced_memory()[1]
+            peak_mb = round(peak / 1024 / 1024, 2)
+            _write_memory(directory, tracemalloc.take_snapshot(), peak)
+            tracemalloc.stop()
+
+        summary = {
+            'job': job,
+            'argv': argv[1:],
+            'modes': sorted(modes),
+            'inicio': started_at,
+            'status': status,
+            'wall_s': round(wall, 3),
+            'peak_mb': peak_mb,
+            'phases': {
+                name: {**p, 'seconds': round(p['seconds'], 3), 'pct': round(100 * p['seconds'] / wall, 1) if wall else 0}
+                for name, p in _timer.phases.items()
+            },
+        }
+        (directory / 'summary.json').write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding='utf-8')
+
+        print(f"\n🔬 Perfil guardado en: {directory}")
+        print(f"   Tiempo total: {wall:.1f} s" + (f" | pico de memoria: {peak_mb} MB" if peak_mb is not None else ""))
+        for name, p in sorted(summary['phases'].items(), key=lambda kv: -kv[1]['seconds']):
+            print(f"   {name:30s} {p['seconds']:9.1f} s ({p['pct']:5.1f}%)")
@@ -3,22 +3,12 @@
 Ejecuta el SQL de importación de TRUPER en Supabase
 """
 
-import os
 import sys
 from pathlib import Path
-from supabase import create_client, Client
 
-# Leer variables de entorno
-SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+from catalog_config import SUPABASE_VARS, require_env, supabase
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    print("❌ Error: Variables de entorno no encontradas")
-    print("   Asegúrate de tener NEXT_PUBLIC_SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY")
-    sys.exit(1)
-
-# Crear cliente Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+SUPABASE_URL, SUPABASE_SERVICE_KEY = require_env(*SUPABASE_VARS)
 
 # Leer archivo SQL
 SQL_FILE = Path("supabase/migrations/20250120_import_truper_full_catalog.sql")
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita la API de Syscom (para benchmarks sin credenciales)
+
+Implementa los endpoints que usan los scripts:
+- POST /oauth/token                      -> access_token / expires_in
+- GET  /api/v1/productos?categoria=&pagina=  -> {cantidad, pagina, paginas, todo, productos}
+- GET  /api/v1/productos/{producto_id}   -> detalle del producto
+- GET  /api/v1/categorias                -> categorías de primer nivel
+- GET  /api/v1/categorias/{id}           -> categoría con sus subcategorias
+- GET  /api/v1/tipocambio                -> tipo de cambio USD/MXN
+- GET  /__stats                          -> requests atendidos por endpoint y status
+
+Los productos pueden venir de un catálogo grabado (--catalog, JSON con
+{categoria: [productos]}, una lista de productos o la carpeta syscom_pages de
+synthetic_catalog.py) o generarse de forma
+determinista (--categories 22:3000,26:1500). Se pueden configurar latencia,
+tasa de errores 5xx, límite de requests por minuto (responde 429 con
+Retry-After, igual que la API real) y tamaño de página. Con --subcategories N
+cada categoría se divide en N subcategorías hoja (ids <categoria>01, ...);
+listar la categoría padre devuelve los productos de todas sus hojas.
+
+Los scripts se apuntan al servidor con variables de entorno:
+    SYSCOM_OAUTH_URL=http://127.0.0.1:8765/oauth/token
+    SYSCOM_API_BASE=http://127.0.0.1:8765/api/v1
+
+Uso:
+    python3 scripts/fake_syscom_server.py --port 8765 --latency 0.08 --error-rate 0.02
+    python3 scripts/fake_syscom_server.py --categories 22:5000 --rate-limit 0
+
+    from fake_syscom_server import FakeSyscomServer
+    server = FakeSyscomServer(catalog, latency=0.05)
+    base_url, stop = server.start_in_thread()
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import secrets
+import threading
+from collections import Counter, deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+DEFAULT_PORT = 8765
+DEFAULT_PAGE_SIZE = 60
+DEFAULT_RATE_LIMIT = 60          # Requests por ventana (la API real: 60 por minuto)
+DEFAULT_WINDOW = 60.0
+DEFAULT_CATEGORIES = {"22": 1200, "26": 800, "30": 400}
+
+BRANDS = ['HIKVISION', 'DAHUA', 'EPCOM', 'UBIQUITI', 'TP-LINK', 'CAMBIUM', 'EPCOM POWERLINE', 'AXIS', 'ZKTECO', 'SYSCOM']
+PRODUCT_TYPES = {
+    '22': ['Cámara Bala', 'Cámara Domo', 'DVR', 'NVR', 'Cámara PTZ', 'Kit de Videovigilancia'],
+    '26': ['Switch PoE', 'Access Point', 'Router', 'Cable UTP Cat6', 'Patch Panel', 'Radio PtP'],
+    '30': ['Panel Solar', 'Inversor', 'Batería', 'Controlador de Carga', 'UPS', 'Fuente de Poder'],
+}
+FEATURES = ['Resolución 4 MP', 'Visión nocturna 30 m', 'IP67', 'PoE 802.3af', 'Gigabit', '2.4/5 GHz',
+            'Uso exterior', 'Garantía 3 años', 'Montaje en pared', 'Audio bidireccional']
+
+
+def synthetic_product(rng: random.Random, producto_id: int, categoria: str) -> Dict:
+    """Producto con la forma de la API de Syscom (precios en USD como la API)"""
+    brand = rng.choice(BRANDS)
+    kind = rng.choice(PRODUCT_TYPES.get(categoria, ['Accesorio', 'Equipo', 'Kit']))
+    modelo = f"{brand[:2]}-{rng.randint(1000, 9999)}{rng.choice('ABCDEFGHX')}"
+    lista = round(rng.uniform(8, 2500), 2)
+    especial = round(lista * rng.uniform(0.6, 0.95), 2)
+    has_image = rng.random() > 0.05
+    return {
+        'producto_id': str(producto_id),
+        'modelo': modelo,
+        'total_existencia': rng.choice([0, 0, 1, 3, 12, 40, 250]),
+        'titulo': f"{kind} {brand} {modelo}",
+        'marca': brand,
+        'sat_key': '46171610',
+        'img_portada': f"https://ftp3.syscom.mx/usuarios/fotos/BancoFotografiasSyscom/{brand}/{modelo}/{modelo}-p.PNG" if has_image else '',
+        'link_privado': f"https://www.syscom.mx/producto/{modelo}-{producto_id}.html",
+        'categorias': [{'id': categoria, 'nombre': kind, 'nivel': 1}],
+        'marca_logo': '',
+        'link': f"https://www.syscom.mx/producto/{modelo}-{producto_id}.html",
+        'descripcion': f"{kind} marca {brand}, modelo {modelo}.",
+        'caracteristicas': rng.sample(FEATURES, k=rng.randint(0, 4)),
+        'imagenes': [
+            {'orden': i, 'url': f"https://ftp3.syscom.mx/usuarios/fotos/BancoFotografiasSyscom/{brand}/{modelo}/{modelo}-{i}.JPG"}
+            for i in range(1, rng.randint(1, 4) if has_image else 1)
+        ],
+        'precios': {
+            'precio_1': f"{lista:.2f}",
+            'precio_especial': f"{especial:.2f}",
+            'precio_descuento': f"{especial:.2f}",
+            'precio_lista': f"{lista:.2f}",
+        },
+    }
+
+
+def synthetic_catalog(categories: Dict[str, int], seed: int = 0) -> Dict[str, List[Dict]]:
+    """{categoria: [productos]} con ids únicos, reproducible por seed"""
+    rng = random.Random(seed)
+    catalog: Dict[str, List[Dict]] = {}
+    next_id = 100000
+    for categoria, count in categories.items():
+        catalog[categoria] = [synthetic_product(rng, next_id + i, categoria) for i in range(count)]
+        next_id += count
+    return catalog
+
+
+def load_catalog(path: Path) -> Dict[str, List[Dict]]:
+    """
+    Catálogo grabado: JSON {categoria: [productos]}, lista de productos o
+    carpeta <categoria>/pagina_<n>.json (como la genera synthetic_catalog.py)
+    """
+    if path.is_dir():
+        catalog = {}
+        for category_dir in sorted(p for p in path.iterdir() if p.is_dir()):
+            pages = sorted(category_dir.glob('pagina_*.json'), key=lambda p: int(p.stem.split('_')[1]))
+            catalog[category_dir.name] = [
+                product for page in pages
+                for product in json.loads(page.read_text(encoding='utf-8')).get('productos', [])
+            ]
+        return catalog
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return {str(k): list(v) for k, v in data.items()}
+    catalog: Dict[str, List[Dict]] = {}
+    for product in data:
+        categorias = product.get('categorias') or [{}]
+        catalog.setdefault(str(categorias[0].get('id', '0')), []).append(product)
+    return catalog
+
+
+def parse_categories(value: str) -> Dict[str, int]:
+    """'22:3000,26:1500' -> {'22': 3000, '26': 1500}"""
+    result = {}
+    for item in value.split(','):
+        if item.strip():
+            categoria, _, count = item.partition(':')
+            result[categoria.strip()] = int(count or 100)
+    return result
+
+
+class FakeSyscomServer:
+    """Aplicación aiohttp con latencia, errores y rate limit configurables"""
+
+    def __init__(self, catalog: Dict[str, List[Dict]], latency: float = 0.05, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: int = DEFAULT_RATE_LIMIT,
+                 window: float = DEFAULT_WINDOW, page_size: int = DEFAULT_PAGE_SIZE,
+                 token_ttl: int = 3600, seed: int = 0, subcategories: int = 0, usd_mxn: float = 17.5):
+        if web is None:
+            raise ImportError("aiohttp no está instalado (pip install aiohttp)")
+        self.catalog = dict(catalog)
+        self.tree: Dict[str, List[str]] = {categoria: [] for categoria in catalog}
+        if subcategories > 0:
+            for categoria, products in catalog.items():
+                size = max(1, (len(products) + subcategories - 1) // subcategories)
+                for i in range(subcategories):
+                    leaf = f"{categoria}{i + 1:02d}"
+                    self.tree[categoria].append(leaf)
+                    self.catalog[leaf] = products[i * size:(i + 1) * size]
+        self.by_id = {p['producto_id']: p for products in catalog.values() for p in products}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.window = window
+        self.page_size = page_size
+        self.usd_mxn = usd_mxn
+        self.token_ttl = token_ttl
+        self.rng = random.Random(seed)
+        self.tokens: Dict[str, float] = {}
+        self.history: Dict[str, deque] = {}
+        self.stats: Counter = Counter()
+
+    # ------------------------------------------------------------------
+    # Aplicación
+    # ------------------------------------------------------------------
+
+    def make_app(self) -> "web.Application":
+        @web.middleware
+        async def middleware(request, handler):
+            return await self._handle(request, handler)
+
+        app = web.Application(middlewares=[middleware])
+        app.router.add_post('/oauth/token', self.token)
+        app.router.add_get('/api/v1/productos', self.listing)
+        app.router.add_get('/api/v1/productos/{producto_id}', self.detail)
+        app.router.add_get('/api/v1/categorias', self.categories)
+        app.router.add_get('/api/v1/categorias/{categoria_id}', self.category)
+        app.router.add_get('/api/v1/tipocambio', self.exchange_rate)
+        app.router.add_get('/__stats', self.stats_view)
+        return app
+
+    async def _handle(self, request: "web.Request", handler) -> "web.StreamResponse":
+        endpoint = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        if endpoint == '/__stats':
+            return await handler(request)
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        response = await self._guard(request, endpoint)
+        if response is None:
+            response = await handler(request)
+        self.stats[(endpoint, response.status)] += 1
+        return response
+
+    async def _guard(self, request: "web.Request", endpoint: str) -> Optional["web.Response"]:
+        """401 sin token, 429 si se excede el límite, 5xx aleatorios"""
+        if endpoint.startswith('/api/'):
+            token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+            if self.tokens.get(token, 0) < time.time():
+                return web.json_response({'message': 'Unauthenticated.'}, status=401)
+            if self.rate_limit:
+                now = time.monotonic()
+                history = self.history.setdefault(token, deque())
+                while history and now - history[0] >= self.window:
+                    history.popleft()
+                if len(history) >= self.rate_limit:
+                    retry_after = max(1, int(self.window - (now - history[0]) + 0.999))
+                    return web.json_response({'message': 'Too Many Attempts.'}, status=429,
+                                             headers={'Retry-After': str(retry_after)})
+                history.append(now)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            status = self.rng.choice((500, 502, 503))
+            return web.json_response({'message': 'Server Error'}, status=status)
+        return None
+
+    async def token(self, request: "web.Request") -> "web.Response":
+        form = await request.post()
+        if form.get('grant_type') != 'client_credentials' or not form.get('client_id'):
+            return web.json_response({'error': 'invalid_client'}, status=401)
+        token = secrets.token_hex(16)
+        self.tokens[token] = time.time() + self.token_ttl
+        return web.json_response({'token_type': 'Bearer', 'expires_in': self.token_ttl, 'access_token': token})
+
+    async def listing(self, request: "web.Request") -> "web.Response":
+        products = self.catalog.get(request.query.get('categoria', ''), [])
+        pages = max(1, (len(products) + self.page_size - 1) // self.page_size)
+        try:
+            page = max(1, int(request.query.get('pagina', 1)))
+        except ValueError:
+            page = 1
+        start = (page - 1) * self.page_size
+        return web.json_response({
+            'cantidad': len(products),
+            'pagina': page,
+            'paginas': pages,
+            'todo': False,
+            'productos': products[start:start + self.page_size],
+        })
+
+    async def detail(self, request: "web.Request") -> "web.Response":
+        product = self.by_id.get(request.match_info['producto_id'])
+        if product is None:
+            return web.json_response({'message': 'Producto no encontrado'}, status=404)
+        return web.json_response(product)
+
+    async def categories(self, request: "web.Request") -> "web.Response":
+        return web.json_response([{'id': c, 'nombre': f"Categoría {c}", 'nivel': 1} for c in self.tree])
+
+    async def category(self, request: "web.Request") -> "web.Response":
+        categoria = request.match_info['categoria_id']
+        if categoria in self.tree:
+            return web.json_response({
+                'id': categoria, 'nombre': f"Categoría {categoria}", 'nivel': 1,
+                'subcategorias': [{'id': leaf, 'nombre': f"Subcategoría {leaf}", 'nivel': 2}
+                                  for leaf in self.tree[categoria]],
+                'origen': [],
+            })
+        parent = next((c for c, leaves in self.tree.items() if categoria in leaves), None)
+        if parent is None:
+            return web.json_response({'message': 'Categoría no encontrada'}, status=404)
+        return web.json_response({
+            'id': categoria, 'nombre': f"Subcategoría {categoria}", 'nivel': 2, 'subcategorias': [],
+            'origen': [{'id': parent, 'nombre': f"Categoría {parent}", 'nivel': 1}],
+        })
+
+    async def exchange_rate(self, request: "web.Request") -> "web.Response":
+        return web.json_response({'normal': f"{self.usd_mxn:.4f}", 'preferencial': f"{self.usd_mxn - 0.1:.4f}"})
+
+    async def stats_view(self, request: "web.Request") -> "web.Response":
+        return web.json_response(self.stats_dict())
+
+    def stats_dict(self) -> Dict[str, Dict[str, int]]:
+        result: Dict[str, Dict[str, int]] = {}
+        for (endpoint, status), count in sorted(self.stats.items()):
+            result.setdefault(endpoint, {})[str(status)] = count
+        return result
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def start_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[str, Callable[[], None]]:
+        """Arranca el servidor en un hilo; retorna (url base, función para detenerlo)"""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        state = {}
+
+        async def start():
+            runner = web.AppRunner(self.make_app())
+            await runner.setup()
+            site = web.TCPSite(runner, host, port)
+            await site.start()
+            state['runner'] = runner
+            state['port'] = runner.addresses[0][1]
+
+        def serve():
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(start())
+            except Exception:
+                ready.set()
+                raise
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(state['runner'].cleanup())
+            loop.close()
+
+        thread = threading.Thread(target=serve, name='fake-syscom', daemon=True)
+        thread.start()
+        ready.wait()
+        if 'port' not in state:
+            raise RuntimeError("No se pudo iniciar el servidor simulado")
+
+        def stop():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+
+        return f"http://{host}:{state['port']}", stop
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Servidor local que imita la API de Syscom')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--catalog', type=Path, help='Catálogo grabado (JSON o carpeta de páginas)')
+    parser.add_argument('--categories', default=','.join(f"{k}:{v}" for k, v in DEFAULT_CATEGORIES.items()),
+                        help='Catálogo sintético: categoria:cantidad,... (si no hay --catalog)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.05, help='Latencia base por request (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variación ± de la latencia (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de requests con 5xx')
+    parser.add_argument('--rate-limit', type=int, default=DEFAULT_RATE_LIMIT, help='Requests por ventana (0 = sin límite)')
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW, help='Ventana del rate limit (s)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--subcategories', type=int, default=0, help='Subcategorías hoja por categoría')
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.catalog) if args.catalog else synthetic_catalog(parse_categories(args.categories), args.seed)
+    try:
+        server = FakeSyscomServer(catalog, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                  rate_limit=args.rate_limit, window=args.window, page_size=args.page_size,
+                                  seed=args.seed, subcategories=args.subcategories)
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    total = sum(len(v) for v in catalog.values())
+    print(f"🧪 Syscom simulado en http://{args.host}:{args.port} ({total} productos, {len(catalog)} categorías)")
+    print(f"   SYSCOM_OAUTH_URL=http://{args.host}:{args.port}/oauth/token")
+    print(f"   SYSCOM_API_BASE=http://{args.host}:{args.port}/api/v1")
+    web.run_app(server.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,42 @@ Usa la API FIX Ferreterias: http://201.151.220.227:8999/
 
 Endpoint: GET Article/{ItemCode}/{CodTienda}
 Respuesta: Articulo con campo Pictures (lista de URLs de imágenes)
+
+Las consultas se hacen en paralelo (aiohttp con pool de conexiones y
+concurrencia acotada), una sola vez por código aunque varios productos lo
+compartan. Cada respuesta se guarda en scripts/truper_api_cache.json, así que
+si el script se interrumpe la siguiente corrida continúa sin volver a
+consultar lo ya resuelto. Las galerías encontradas se escriben en lotes con
+BulkProductWriter.
+
+Uso:
+    python3 scripts/fetch_truper_images_from_api.py                      # dry-run
+    python3 scripts/fetch_truper_images_from_api.py --execute
+    python3 scripts/fetch_truper_images_from_api.py --execute --concurrency 32
+    python3 scripts/fetch_truper_images_from_api.py --refresh            # ignorar caché
 """
 
 import os
 import sys
 import re
-import requests
-from typing import Dict, List, Optional
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno SUPABASE_URL y SUPABASE_KEY no configuradas")
+try:
+    import aiohttp
+except ImportError:
+    print("❌ Error: aiohttp no está instalado (pip install aiohttp)")
     sys.exit(1)
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from catalog_writer import BulkProductWriter
+from etl_metrics import metrics
+from etl_profile import phase, run_main
 
 # URL base de la API de Truper
 TRUPER_API_BASE = "http://201.151.220.227:8999"
@@ -39,6 +55,16 @@ HEADERS = {
     'Content-Type': 'application/json'
 }
 
+DEFAULT_CONCURRENCY = 16
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 2
+PAGE_SIZE = 1000
+WRITE_BATCH_SIZE = 200
+
+# Caché de respuestas por código (para reanudar)
+CACHE_FILE = Path(__file__).parent / "truper_api_cache.json"
+CACHE_SAVE_EVERY = 200
+
 
 def extract_item_code_from_product(product: Dict) -> Optional[str]:
     """
@@ -82,98 +108,215 @@ def extract_item_code_from_product(product: Dict) -> Optional[str]:
     return None
 
 
-def fetch_images_from_api(item_code: str, cod_tienda: str = DEFAULT_COD_TIENDA) -> Optional[List[str]]:
+def extract_pictures(data: Any) -> List[str]:
+    """
+    Obtiene la lista de imágenes de la respuesta de la API.
+
+    La respuesta puede venir como Articulo directo ({'Pictures': [...]}),
+    envuelta en Data/Result (objeto o lista de artículos).
+    """
+    candidates = []
+    if isinstance(data, dict):
+        candidates.append(data)
+        for wrapper in ('Data', 'Result'):
+            inner = data.get(wrapper)
+            if isinstance(inner, dict):
+                candidates.append(inner)
+            elif isinstance(inner, list):
+                candidates.extend(item for item in inner if isinstance(item, dict))
+    elif isinstance(data, list):
+        candidates.extend(item for item in data if isinstance(item, dict))
+
+    pictures: List[str] = []
+    for candidate in candidates:
+        for img in candidate.get('Pictures') or []:
+            # Filtrar URLs válidas
+            if img and isinstance(img, str) and (img.startswith('http') or img.startswith('/')) and img not in pictures:
+                pictures.append(img)
+    return pictures
+
+
+class ApiResponseCache:
+    """Respuestas de la API por código: {'status', 'pictures', 'fetched_at'}"""
+
+    def __init__(self, path: Path = CACHE_FILE, refresh: bool = False):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self._pending = 0
+        if not refresh and path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"⚠️  No se pudo leer la caché de la API ({e}), se empieza vacía")
+
+    def get(self, item_code: str) -> Optional[Dict]:
+        return self.entries.get(item_code)
+
+    def put(self, item_code: str, status: int, pictures: List[str]) -> None:
+        self.entries[item_code] = {
+            'status': status,
+            'pictures': pictures,
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._pending += 1
+        if self._pending >= CACHE_SAVE_EVERY:
+            self.save()
+
+    def save(self) -> None:
+        if self._pending == 0:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._pending = 0
+
+
+async def fetch_images_from_api(session: "aiohttp.ClientSession", item_code: str,
+                                cod_tienda: str = DEFAULT_COD_TIENDA) -> Tuple[Optional[int], List[str]]:
     """
     Obtiene las imágenes del artículo desde la API de Truper.
     
     Args:
+        session: Sesión aiohttp compartida (pool de conexiones)
         item_code: Código o clave del artículo
         cod_tienda: Código de la tienda (default: "1")
     
     Returns:
-        Lista de URLs de imágenes o None si hay error
+        (status HTTP, lista de URLs). status es None si hubo error de
+        conexión/timeout tras los reintentos (no se cachea).
     """
     url = f"{TRUPER_API_ENDPOINT}/{item_code}/{cod_tienda}"
-    
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # La respuesta puede tener diferentes estructuras
-            # Buscar el campo Pictures o Data.Pictures
-            pictures = None
-            
-            if isinstance(data, dict):
-                # Estructura directa
-                if 'Pictures' in data:
-                    pictures = data['Pictures']
-                elif 'Data' in data and isinstance(data['Data'], dict):
-                    if 'Pictures' in data['Data']:
-                        pictures = data['Data']['Pictures']
-                elif 'Result' in data and isinstance(data['Result'], dict):
-                    if 'Pictures' in data['Result']:
-                        pictures = data['Result']['Pictures']
-            
-            if pictures and isinstance(pictures, list) and len(pictures) > 0:
-                # Filtrar URLs válidas
-                valid_images = [
-                    img for img in pictures 
-                    if img and isinstance(img, str) and (img.startswith('http') or img.startswith('/'))
-                ]
-                if valid_images:
-                    return valid_images
-        
-        elif response.status_code == 404:
-            print(f"  ⚠️  Artículo no encontrado: {item_code}")
-        else:
-            print(f"  ⚠️  Error HTTP {response.status_code}: {item_code}")
-    
-    except requests.exceptions.Timeout:
-        print(f"  ⏱️  Timeout al obtener: {item_code}")
-    except requests.exceptions.RequestException as e:
-        print(f"  ❌ Error de conexión: {item_code} - {str(e)}")
-    except Exception as e:
-        print(f"  ❌ Error inesperado: {item_code} - {str(e)}")
-    
-    return None
 
+    for attempt in range(MAX_RETRIES + 1):
+        start = time.monotonic()
+        status = 'error'
+        try:
+            async with session.get(url) as response:
+                status = response.status
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    return 200, extract_pictures(data)
+                if response.status == 404:
+                    return 404, []
+                if response.status < 500 and response.status != 429:
+                    print(f"  ⚠️  Error HTTP {response.status}: {item_code}")
+                    return response.status, []
+        except asyncio.TimeoutError:
+            pass
+        except (aiohttp.ClientError, ValueError) as e:
+            if attempt == MAX_RETRIES:
+                print(f"  ❌ Error de conexión: {item_code} - {str(e)[:80]}")
+        finally:
+            metrics.request('truper', 'articulo', status, time.monotonic() - start)
+        # 5xx / 429 / timeout: reintentar con espera creciente
+        if attempt < MAX_RETRIES:
+            metrics.retry('truper', 'articulo', status)
+            await asyncio.sleep(1.5 * (attempt + 1))
 
-def update_product_images(product_id: str, images: List[str]) -> bool:
-    """
-    Actualiza las imágenes del producto en la base de datos.
-    """
-    try:
-        response = supabase.table('marketplace_products').update({
-            'images': images,
-            'updated_at': 'now()'
-        }).eq('id', product_id).execute()
-        
-        return True
-    except Exception as e:
-        print(f"  ❌ Error actualizando BD: {str(e)}")
-        return False
-
-
-def main():
+    print(f"  ⏱️  Sin respuesta tras {MAX_RETRIES + 1} intentos: {item_code}")
+    return None, []
+
+
+def fetch_products() -> List[Dict]:
+    """Todos los productos activos, paginados"""
+    products: List[Dict] = []
+    offset = 0
+    while True:
+        response = supabase.table('marketplace_products').select(
+            'id, title, description, images, contact_phone'
+        ).eq('status', 'active').order('id').range(offset, offset + PAGE_SIZE - 1).execute()
+        batch = response.data or []
+        products.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return products
+
+
+async def run(codes: Dict[str, List[Dict]], cache: ApiResponseCache, writer: BulkProductWriter,
+              stats: Dict[str, int], concurrency: int, cod_tienda: str) -> None:
+    """Consulta los códigos en paralelo y va encolando las galerías al escritor"""
+    code_queue: asyncio.Queue = asyncio.Queue()
+    for item_code in codes:
+        code_queue.put_nowait(item_code)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_BATCH_SIZE * 2)
+    total = len(codes)
+    done = 0
+
+    async def fetch_worker(session):
+        nonlocal done
+        while True:
+            try:
+                item_code = code_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            entry = cache.get(item_code)
+            if entry is not None:
+                stats['cached'] += 1
+                status, pictures = entry['status'], entry['pictures']
+            else:
+                status, pictures = await fetch_images_from_api(session, item_code, cod_tienda)
+                stats['requests'] += 1
+                if status is None:
+                    stats['errors'] += 1
+                else:
+                    cache.put(item_code, status, pictures)
+
+            done += 1
+            if done % 100 == 0 or done == total:
+                print(f"  🔄 {done}/{total} códigos ({stats['requests']} consultas, {stats['cached']} de caché)")
+
+            if not pictures:
+                if status is not None:
+                    stats['no_images'] += len(codes[item_code])
+                continue
+            for product in codes[item_code]:
+                await write_queue.put((product, pictures))
+
+    async def write_worker():
+        # Único consumidor: el escritor no es thread-safe y el flush (bloqueante)
+        # se ejecuta en un hilo para no frenar las descargas
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                return
+            product, pictures = item
+            metrics.set('queue_depth', write_queue.qsize(), queue='truper_write')
+            if (product.get('images') or []) == pictures:
+                stats['unchanged'] += 1
+                continue
+            stats['updated'] += 1
+            await asyncio.to_thread(writer.add, product['id'], {'images': pictures})
+
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+        writer_task = asyncio.create_task(write_worker())
+        await asyncio.gather(*(fetch_worker(session) for _ in range(concurrency)))
+        await write_queue.put(None)
+        await writer_task
+
+
+def main(execute: bool, concurrency: int = DEFAULT_CONCURRENCY, refresh: bool = False,
+         cod_tienda: str = DEFAULT_COD_TIENDA, products: Optional[List[Dict]] = None) -> Optional[Dict]:
     """
     Función principal: obtiene productos y actualiza sus imágenes desde la API.
+
+    products permite pasar productos ya cargados (instantánea de
+    scripts/catalog.py); sus 'images' se actualizan en memoria sólo cuando el
+    lote que las contiene quedó escrito en la BD.
     """
     print("🚀 Iniciando actualización de imágenes desde API de Truper\n")
     print(f"📍 API: {TRUPER_API_BASE}")
-    print(f"🔗 Endpoint: {TRUPER_API_ENDPOINT}\n")
-    
-    # Obtener productos TRUPER (sin imágenes válidas o con imágenes locales)
-    print("📥 Obteniendo productos de la base de datos...")
+    print(f"🔗 Endpoint: {TRUPER_API_ENDPOINT}")
+    print(f"⚡ Concurrencia: {concurrency}\n")
     
-    # Obtener productos activos que puedan ser de Truper
-    # Filtrar por productos que tengan contacto de Sumee o que sean nuevos
-    response = supabase.table('marketplace_products').select(
-        'id, title, description, images, contact_phone'
-    ).eq('status', 'active').limit(5000).execute()
-    
-    products = response.data if response.data else []
+    if products is None:
+        print("📥 Obteniendo productos de la base de datos...")
+        with phase('fetch_products'):
+            products = fetch_products()
     print(f"✅ {len(products)} productos encontrados\n")
     
     if len(products) == 0:
@@ -183,71 +326,78 @@ def main():
     # Estadísticas
     stats = {
         'total': len(products),
+        'codes': 0,
+        'requests': 0,
+        'cached': 0,
         'updated': 0,
+        'unchanged': 0,
         'no_code': 0,
         'no_images': 0,
         'errors': 0,
-        'skipped': 0
     }
-    
-    # Procesar productos
-    print("🔄 Procesando productos...\n")
-    
-    for i, product in enumerate(products, 1):
-        product_id = product.get('id')
-        title = product.get('title', '')[:50]
-        
-        print(f"[{i}/{len(products)}] {title}...")
-        
-        # Extraer código del artículo
+
+    # Agrupar por código: una sola consulta aunque varios productos lo compartan
+    codes: Dict[str, List[Dict]] = {}
+    for product in products:
         item_code = extract_item_code_from_product(product)
-        
         if not item_code:
-            print(f"  ⚠️  No se pudo extraer código/clave")
             stats['no_code'] += 1
             continue
-        
-        print(f"  🔍 Código encontrado: {item_code}")
-        
-        # Obtener imágenes desde la API
-        images = fetch_images_from_api(item_code)
-        
-        if not images or len(images) == 0:
-            print(f"  ⚠️  No se obtuvieron imágenes")
-            stats['no_images'] += 1
-            continue
-        
-        print(f"  ✅ {len(images)} imagen(es) obtenida(s)")
-        
-        # Actualizar en base de datos
-        if update_product_images(product_id, images):
-            print(f"  ✅ Actualizado en BD")
-            stats['updated'] += 1
-        else:
-            stats['errors'] += 1
-        
-        print()  # Línea en blanco
+        codes.setdefault(item_code, []).append(product)
+    stats['codes'] = len(codes)
+    print(f"🔍 {len(codes)} códigos distintos ({stats['no_code']} productos sin código/clave)\n")
+
+    by_id = {product['id']: product for product in products}
+
+    def on_written(rows: List[Dict]):
+        for row in rows:
+            by_id[row['id']]['images'] = row['images']
+
+    cache = ApiResponseCache(refresh=refresh)
+    writer = BulkProductWriter(supabase, batch_size=WRITE_BATCH_SIZE, dry_run=not execute,
+                               on_written=on_written)
+
+    print("🔄 Consultando API...\n")
+    try:
+        with phase('api_and_writes'):
+            asyncio.run(run(codes, cache, writer, stats, concurrency, cod_tienda))
+    finally:
+        with phase('final_flush'):
+            cache.save()
+            writer.flush()
     
     # Resumen
     print("\n" + "="*60)
     print("📊 RESUMEN")
     print("="*60)
     print(f"Total procesados:     {stats['total']}")
-    print(f"✅ Actualizados:       {stats['updated']}")
+    print(f"Códigos distintos:    {stats['codes']}")
+    print(f"Consultas a la API:   {stats['requests']}")
+    print(f"Desde caché:          {stats['cached']}")
+    print(f"✅ {'Actualizados' if execute else 'A actualizar'}:       {stats['updated']}")
+    print(f"= Sin cambios:        {stats['unchanged']}")
     print(f"⚠️  Sin código/clave:  {stats['no_code']}")
     print(f"⚠️  Sin imágenes API:  {stats['no_images']}")
-    print(f"❌ Errores:            {stats['errors']}")
+    print(f"❌ Errores:            {stats['errors'] + writer.stats['errors']}")
     print("="*60)
+    return stats
 
 
-if __name__ == "__main__":
-    # Verificar si se debe ejecutar (modo dry-run por defecto)
-    execute = "--execute" in sys.argv
+def cli():
+    parser = argparse.ArgumentParser(description='Obtener imágenes de productos Truper desde la API')
+    parser.add_argument('--execute', action='store_true', help='Aplicar cambios (por defecto dry-run)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Consultas simultáneas')
+    parser.add_argument('--refresh', action='store_true', help='Ignorar la caché de respuestas')
+    parser.add_argument('--cod-tienda', default=DEFAULT_COD_TIENDA, help='CodTienda de la API')
+    args = parser.parse_args()
+    metrics.export_at_exit('fetch_truper_images_from_api')
     
-    if not execute:
+    if not args.execute:
         print("⚠️  MODO DRY-RUN: No se realizarán cambios en la base de datos")
         print("   Usa --execute para aplicar cambios\n")
     
-    main()
+    main(args.execute, max(1, args.concurrency), args.refresh, args.cod_tienda)
 
 
+if __name__ == "__main__":
+    run_main(cli)
@@ -10,23 +10,10 @@ import csv
 import re
 import requests
 from bs4 import BeautifulSoup
-from dotenv import load_dotenv
-from supabase import create_client
 from typing import Dict, Optional
 import time
 
-# Cargar variables de entorno
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno SUPABASE_URL y SUPABASE_KEY no encontradas")
-    sys.exit(1)
-
-# Inicializar cliente Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 # URLs del banco de Truper
 TRUPER_BANK_BASE = "https://www.truper.com/BancoContenidoDigital/index.php"
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Detecta productos casi duplicados entre catálogos de proveedores (Truper vs Syscom)
+
+Cada producto se convierte en un conjunto de "shingles" (palabras y pares de
+palabras del título, tríos de palabras de la descripción, marca y modelo), se
+resume con MinHash y se agrupa con LSH por bandas. Sólo se comparan los
+productos que caen en la misma cubeta, así que el costo crece linealmente con
+el catálogo en lugar de O(n²).
+
+Los pares candidatos con Jaccard estimado >= --threshold se unen con
+union-find en clusters y se escriben en un archivo de revisión JSON. Después de
+revisarlo (marcar "approved": true en los clusters correctos) se aplica con:
+
+    python3 scripts/remove_duplicate_products.py --from-review data/dedup_review/<archivo>.json --execute
+
+Uso:
+    python3 scripts/find_near_duplicate_products.py
+    python3 scripts/find_near_duplicate_products.py --threshold 0.7 --include-same-supplier
+"""
+
+import re
+import json
+import time
+import argparse
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from catalog_config import get_supabase
+from disjoint_set import DisjointSet
+from minhash_lsh import MinHasher
+from title_matcher import normalize_title
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+REVIEW_DIR = Path(__file__).parent.parent / "data" / "dedup_review"
+TRUPER_CONTACT_PHONE = '5636741156'
+PRODUCT_COLUMNS = 'id,title,description,sku,external_code,seller_id,contact_phone,price,images'
+PAGE_SIZE = 1000
+
+# 64 permutaciones en 16 bandas de 4 filas: umbral LSH aproximado de 0.5
+NUM_PERM = 64
+BANDS = 16
+# Palabras de la descripción que se usan para los shingles (evita que textos
+# muy largos de características dominen la firma)
+DESCRIPTION_WORDS = 80
+
+_BRAND_RE = re.compile(r'Marca:\s*([^.\n]+)', re.IGNORECASE)
+_MODEL_RE = re.compile(r'Modelo:\s*([^.\n]+)', re.IGNORECASE)
+_SYSCOM_HEADER_RE = re.compile(r'^\s*Marca:[^\n]*?Modelo:[^\n]*?\.\s*', re.IGNORECASE)
+
+
+def detect_supplier(product: Dict) -> str:
+    """Clasifica el producto por proveedor de origen"""
+    if product.get('external_code'):
+        return 'syscom'
+    if not product.get('seller_id') and product.get('contact_phone') == TRUPER_CONTACT_PHONE:
+        return 'truper'
+    return 'otro'
+
+
+def extract_brand_model(product: Dict) -> Tuple[str, str]:
+    """
+    Marca y modelo del producto
+
+    Syscom los guarda al inicio de la descripción ("Marca: X. Modelo: Y.");
+    en Truper la marca es la última parte del título ("..., Truper") y el
+    modelo es el SKU/clave.
+    """
+    title = product.get('title') or ''
+    description = product.get('description') or ''
+
+    brand_match = _BRAND_RE.search(description)
+    if brand_match:
+        brand = brand_match.group(1)
+    elif ',' in title:
+        brand = title.rsplit(',', 1)[1]
+    else:
+        brand = ''
+
+    model_match = _MODEL_RE.search(description)
+    model = model_match.group(1) if model_match else (product.get('sku') or '')
+
+    brand = normalize_title(brand)
+    model = normalize_title(model)
+    if model in ('S M', 'SM'):
+        model = ''
+    return brand, model
+
+
+def product_shingles(product: Dict) -> set:
+    """Conjunto de shingles de título, descripción, marca y modelo"""
+    shingles = set()
+
+    title_words = normalize_title(product.get('title') or '').split()
+    shingles.update(f"T:{w}" for w in title_words)
+    shingles.update(f"T:{a} {b}" for a, b in zip(title_words, title_words[1:]))
+
+    description = _SYSCOM_HEADER_RE.sub('', product.get('description') or '')
+    desc_words = normalize_title(description).split()[:DESCRIPTION_WORDS]
+    shingles.update(f"D:{a} {b} {c}" for a, b, c in zip(desc_words, desc_words[1:], desc_words[2:]))
+
+    brand, model = extract_brand_model(product)
+    if brand:
+        shingles.add(f"B:{brand}")
+    if model:
+        shingles.add(f"M:{model.replace(' ', '')}")
+    return shingles
+
+
+def iter_active_products(supabase: 'Client', page_size: int = PAGE_SIZE):
+    """Recorre todos los productos activos paginando por rango"""
+    offset = 0
+    while True:
+        response = supabase.table('marketplace_products').select(PRODUCT_COLUMNS).eq(
+            'status', 'active'
+        ).order('id').range(offset, offset + page_size - 1).execute()
+        page = response.data or []
+        yield from page
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+
+class NearDuplicateFinder:
+    """
+    Firma MinHash por producto guardada en un solo array('Q') plano
+    (num_perm enteros de 64 bits por producto) para que cientos de miles de
+    productos quepan en memoria; las cubetas LSH se construyen una banda a la
+    vez y se descartan antes de la siguiente.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.hasher = MinHasher(num_perm)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signatures = array('Q')
+        self.records: List[Tuple[str, str, str]] = []  # (id, proveedor, título corto)
+
+    def add(self, product: Dict) -> bool:
+        shingles = product_shingles(product)
+        if not shingles:
+            return False
+        self.signatures.extend(self.hasher.signature(shingles))
+        self.records.append((product['id'], detect_supplier(product), (product.get('title') or '')[:120]))
+        return True
+
+    def _signature(self, pos: int):
+        start = pos * self.num_perm
+        return self.signatures[start:start + self.num_perm]
+
+    def estimate(self, pos_a: int, pos_b: int) -> float:
+        sig_a = self._signature(pos_a)
+        sig_b = self._signature(pos_b)
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / self.num_perm
+
+    def candidate_pairs(self, cross_supplier_only: bool = True, max_bucket: int = 100):
+        """
+        Genera pares (pos_a, pos_b) que comparten al menos una banda
+
+        Las cubetas con más de max_bucket productos (texto repetitivo) se omiten
+        para no volver a un costo cuadrático; se cuentan en self.skipped_buckets.
+        """
+        self.skipped_buckets = 0
+        seen = set()
+        num_perm, rows = self.num_perm, self.rows
+        signatures = self.signatures
+        total = len(self.records)
+
+        for band in range(self.bands):
+            buckets: Dict[int, List[int]] = defaultdict(list)
+            offset = band * rows
+            for pos in range(total):
+                start = pos * num_perm + offset
+                buckets[hash(tuple(signatures[start:start + rows]))].append(pos)
+
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                if len(members) > max_bucket:
+                    self.skipped_buckets += 1
+                    continue
+                for i, pos_a in enumerate(members):
+                    supplier_a = self.records[pos_a][1]
+                    for pos_b in members[i + 1:]:
+                        if cross_supplier_only and supplier_a == self.records[pos_b][1]:
+                            continue
+                        pair = (pos_a, pos_b)
+                        if pair not in seen:
+                            seen.add(pair)
+                            yield pair
+            del buckets
+
+
+def build_clusters(finder: NearDuplicateFinder, threshold: float,
+                   cross_supplier_only: bool, max_bucket: int) -> List[Dict]:
+    """Une los pares con Jaccard estimado >= threshold en clusters"""
+    dsu = DisjointSet()
+    pair_scores: Dict[Tuple[int, int], float] = {}
+    candidates = 0
+
+    for pos_a, pos_b in finder.candidate_pairs(cross_supplier_only, max_bucket):
+        candidates += 1
+        score = finder.estimate(pos_a, pos_b)
+        if score >= threshold:
+            pair_scores[(pos_a, pos_b)] = score
+            dsu.union(pos_a, pos_b)
+
+    print(f"   Pares candidatos (LSH): {candidates}")
+    print(f"   Pares sobre el umbral: {len(pair_scores)}")
+    if finder.skipped_buckets:
+        print(f"   ⚠️  Cubetas omitidas por tamaño (> {max_bucket}): {finder.skipped_buckets}")
+
+    pairs_by_root: Dict[int, List] = defaultdict(list)
+    for (pos_a, pos_b), score in pair_scores.items():
+        pairs_by_root[dsu.find(pos_a)].append((pos_a, pos_b, score))
+
+    clusters = []
+    for members in dsu.groups():
+        root = dsu.find(members[0])
+        pairs = sorted(pairs_by_root[root], key=lambda p: p[2], reverse=True)
+        clusters.append({
+            'approved': False,
+            'max_jaccard': round(pairs[0][2], 3),
+            'members': [
+                {'id': finder.records[pos][0], 'supplier': finder.records[pos][1], 'title': finder.records[pos][2]}
+                for pos in sorted(members)
+            ],
+            'pairs': [
+                [finder.records[a][0], finder.records[b][0], round(score, 3)]
+                for a, b, score in pairs
+            ],
+        })
+
+    clusters.sort(key=lambda c: c['max_jaccard'], reverse=True)
+    for i, cluster in enumerate(clusters, 1):
+        cluster['cluster_id'] = i
+    return clusters
+
+
+def write_review_file(clusters: List[Dict], threshold: float, output: Optional[str] = None) -> Path:
+    """Escribe el archivo de revisión que consume remove_duplicate_products.py --from-review"""
+    if output:
+        path = Path(output)
+    else:
+        REVIEW_DIR.mkdir(parents=True, exist_ok=True)
+        path = REVIEW_DIR / f"near_duplicates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.now().isoformat(),
+            'method': f'minhash-lsh ({NUM_PERM} perm, {BANDS} bandas)',
+            'threshold': threshold,
+            'total_clusters': len(clusters),
+            'clusters': clusters,
+        }, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detectar productos casi duplicados entre proveedores (MinHash LSH)')
+    parser.add_argument('--threshold', type=float, default=0.6, help='Jaccard estimado mínimo para proponer duplicados (default: 0.6)')
+    parser.add_argument('--include-same-supplier', action='store_true', help='Incluir pares del mismo proveedor')
+    parser.add_argument('--max-bucket', type=int, default=100, help='Tamaño máximo de cubeta LSH a comparar (default: 100)')
+    parser.add_argument('--output', type=str, help='Ruta del archivo de revisión (default: data/dedup_review/)')
+    args = parser.parse_args()
+
+    supabase = get_supabase()
+
+    print("=" * 80)
+    print("DETECCIÓN DE CASI DUPLICADOS (MinHash LSH)")
+    print("=" * 80)
+    print()
+
+    start = time.time()
+    finder = NearDuplicateFinder()
+    suppliers = defaultdict(int)
+    print("🔍 Leyendo y firmando productos activos...")
+    for product in iter_active_products(supabase):
+        if finder.add(product):
+            suppliers[detect_supplier(product)] += 1
+        if len(finder.records) % 10000 == 0 and finder.records:
+            print(f"   ... {len(finder.records)} productos firmados")
+
+    print(f"✅ {len(finder.records)} productos firmados en {time.time() - start:.1f}s")
+    for supplier, count in sorted(suppliers.items()):
+        print(f"   {supplier}: {count}")
+    print()
+
+    print("🔗 Buscando pares candidatos...")
+    clusters = build_clusters(
+        finder, args.threshold,
+        cross_supplier_only=not args.include_same_supplier,
+        max_bucket=args.max_bucket,
+    )
+
+    path = write_review_file(clusters, args.threshold, args.output)
+
+    print()
+    print("=" * 80)
+    print("RESUMEN")
+    print("=" * 80)
+    print(f"✅ Clusters candidatos: {len(clusters)}")
+    print(f"📦 Productos involucrados: {sum(len(c['members']) for c in clusters)}")
+    print(f"⏱️  Tiempo total: {time.time() - start:.1f}s")
+    print(f"📝 Archivo de revisión: {path}")
+    print()
+    for cluster in clusters[:5]:
+        print(f"   #{cluster['cluster_id']} (Jaccard ~{cluster['max_jaccard']:.2f})")
+        for member in cluster['members'][:3]:
+            print(f"      [{member['supplier']}] {member['title'][:70]}")
+    print()
+    print("💡 Marca \"approved\": true en los clusters correctos y ejecuta:")
+    print(f"   python3 scripts/remove_duplicate_products.py --from-review {path} --execute")
+
+
+if __name__ == "__main__":
+    main()
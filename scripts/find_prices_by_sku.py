@@ -5,37 +5,20 @@ y actualizar la base de datos con precios encontrados
 """
 
 import os
-import sys
 import time
 import re
 import requests
-from dotenv import load_dotenv
-from supabase import create_client, Client
 from typing import Dict, Optional, List
 from datetime import datetime
 from urllib.parse import quote_plus
 
-# Intentar importar BeautifulSoup
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except ImportError:
-    HAS_BS4 = False
-    print("⚠️  BeautifulSoup4 no instalado. Instalar con: pip3 install beautifulsoup4 lxml")
+from catalog_config import optional_import, supabase
 
-load_dotenv('.env.local')
+BS4_INSTALL_HINT = "pip3 install beautifulsoup4 lxml"
 
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
 SYSCOM_CLIENT_ID = os.environ.get('SYSCOM_CLIENT_ID')
 SYSCOM_CLIENT_SECRET = os.environ.get('SYSCOM_CLIENT_SECRET')
 
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 # Headers para simular navegador
 BROWSER_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -58,10 +41,11 @@ def get_price_from_cyberpuerta(sku: str, title: str = "") -> Optional[Dict]:
         if response.status_code != 200:
             return None
         
-        if not HAS_BS4:
+        bs4 = optional_import('bs4', BS4_INSTALL_HINT)
+        if not bs4:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = bs4.BeautifulSoup(response.text, 'html.parser')
         
         # Buscar productos en los resultados
         products = soup.find_all('div', class_=re.compile(r'product|item', re.I))
@@ -139,10 +123,11 @@ def get_price_from_syscom_web(sku: str) -> Optional[Dict]:
         if response.status_code != 200:
             return None
         
-        if not HAS_BS4:
+        bs4 = optional_import('bs4', BS4_INSTALL_HINT)
+        if not bs4:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = bs4.BeautifulSoup(response.text, 'html.parser')
         
         # Buscar productos en los resultados
         products = soup.find_all(['div', 'article'], class_=re.compile(r'product|item', re.I))
@@ -195,10 +180,11 @@ def get_price_from_mercadolibre(sku: str) -> Optional[Dict]:
         if response.status_code != 200:
             return None
         
-        if not HAS_BS4:
+        bs4 = optional_import('bs4', BS4_INSTALL_HINT)
+        if not bs4:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = bs4.BeautifulSoup(response.text, 'html.parser')
         
         # Buscar precio en resultados
         price_elem = soup.find('span', class_=re.compile(r'price|precio', re.I))
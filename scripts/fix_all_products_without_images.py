@@ -9,16 +9,12 @@ import csv
 import re
 import requests
 from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client
 from collections import defaultdict
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from catalog_plan import PlanWriter, plan_arg
+from truper_negative_cache import DIRECT, load_negative_cache
+from etl_profile import phase, run_main
 
 LOCAL_IMAGES_DIR = Path('public/images/marketplace/truper')
 LOCAL_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
@@ -140,10 +136,32 @@ def find_code_in_title(title: str, codes_by_code: dict, codes_by_clave: dict) ->
     
     return None
 
+def _fetch_truper_image(url: str, filepath: Path, negative_cache) -> str:
+    """Descarga una URL directa de Truper; retorna 'ok', 'missing' o 'error'"""
+    if negative_cache.is_missing_url(url):
+        return 'missing'
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=5, stream=True)
+        if response.status_code == 200:
+            content_type = response.headers.get('content-type', '').lower()
+            if 'image' in content_type:
+                with open(filepath, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        f.write(chunk)
+                negative_cache.clear_url(url)
+                return 'ok'
+        if negative_cache.record_response(url, response.status_code, response.headers.get('content-type', ''), 'fix_all_products_without_images'):
+            return 'missing'
+    except:
+        pass
+    return 'error'
+
 def download_image_from_truper(code: str, clave: str = None) -> str:
     """Descarga imagen de Truper si no existe localmente.
     Intenta con código y clave."""
     code_upper = code.upper()
+    negative_cache = load_negative_cache()
+    outcomes = []
     
     # Intentar primero con clave si está disponible
     if clave:
@@ -154,19 +172,14 @@ def download_image_from_truper(code: str, clave: str = None) -> str:
         if filepath_by_clave.exists():
             return f"/images/marketplace/truper/{filename_by_clave}"
         
-        # Intentar descargar por clave
-        url_by_clave = f"https://www.truper.com/media/import/imagenes/{clave_upper}.jpg"
-        try:
-            response = requests.get(url_by_clave, headers=HEADERS, timeout=5, stream=True)
-            if response.status_code == 200:
-                content_type = response.headers.get('content-type', '').lower()
-                if 'image' in content_type:
-                    with open(filepath_by_clave, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    return f"/images/marketplace/truper/{filename_by_clave}"
-        except:
-            pass
+        # Intentar descargar por clave (omitido si ya se sabe que no existe)
+        if not negative_cache.is_missing_code(clave_upper, DIRECT):
+            url_by_clave = f"https://www.truper.com/media/import/imagenes/{clave_upper}.jpg"
+            outcome = _fetch_truper_image(url_by_clave, filepath_by_clave, negative_cache)
+            if outcome == 'ok':
+                negative_cache.clear_code(clave_upper)
+                return f"/images/marketplace/truper/{filename_by_clave}"
+            outcomes.append(outcome)
     
     # Intentar con código
     filename = f"{code_upper}.jpg"
@@ -175,35 +188,44 @@ def download_image_from_truper(code: str, clave: str = None) -> str:
     if filepath.exists():
         return f"/images/marketplace/truper/{filename}"
     
+    if negative_cache.is_missing_code(code_upper, DIRECT):
+        return None
+    
     url = TRUPER_IMAGE_URL_TEMPLATE.format(codigo=code_upper)
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=5, stream=True)
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', '').lower()
-            if 'image' in content_type:
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                return f"/images/marketplace/truper/{filename}"
-    except:
-        pass
+    outcome = _fetch_truper_image(url, filepath, negative_cache)
+    if outcome == 'ok':
+        negative_cache.clear_code(code_upper)
+        return f"/images/marketplace/truper/{filename}"
+    outcomes.append(outcome)
+    
+    # Sólo se marca el código si todas las variantes fallaron de forma definitiva
+    if all(o == 'missing' for o in outcomes):
+        negative_cache.mark_code_missing(code_upper, DIRECT, 'direct_url_404', 'fix_all_products_without_images')
+        if clave:
+            negative_cache.mark_code_missing(clave, DIRECT, 'direct_url_404', 'fix_all_products_without_images')
     
     return None
 
 def main():
     dry_run = '--execute' not in sys.argv
+    # En modo plan las imágenes sí se descargan (el plan guarda rutas que existen)
+    plan_path = plan_arg()
+    download = not dry_run or plan_path is not None
     
     print("=" * 60)
     print("🔍 RESOLVER PRODUCTOS SIN IMÁGENES (USANDO CSV)")
     print("=" * 60)
     
-    if dry_run:
+    if plan_path:
+        print("\n⚠️  MODO PLAN - Se descargan imágenes, los cambios se guardan en un archivo\n")
+    elif dry_run:
         print("\n⚠️  MODO DRY RUN - No se realizarán cambios\n")
     else:
         print("\n⚠️  MODO EJECUCIÓN - Se realizarán cambios\n")
     
     # Leer CSV
-    codes_by_code, codes_by_clave, title_to_code = read_csv_codes()
+    with phase('read_csv'):
+        codes_by_code, codes_by_clave, title_to_code = read_csv_codes()
     
     if not codes_by_code:
         print("❌ No se pudieron leer códigos del CSV")
@@ -215,20 +237,21 @@ def main():
     offset = 0
     page_size = 1000
     
-    while True:
-        response = supabase.table('marketplace_products').select(
-            'id, title, description, images'
-        ).eq('status', 'active').range(offset, offset + page_size - 1).execute()
+    with phase('fetch_products'):
+        while True:
+            response = supabase.table('marketplace_products').select(
+                'id, title, description, images, updated_at'
+            ).eq('status', 'active').range(offset, offset + page_size - 1).execute()
         
-        batch = response.data
-        if not batch:
-            break
+            batch = response.data
+            if not batch:
+                break
         
-        all_products.extend(batch)
-        offset += page_size
+            all_products.extend(batch)
+            offset += page_size
         
-        if len(batch) < page_size:
-            break
+            if len(batch) < page_size:
+                break
     
     print(f"✅ {len(all_products)} productos encontrados\n")
     
@@ -302,21 +325,25 @@ def main():
             print(f"   Procesados {i}/{len(products_without_images)}...")
         
         title = product.get('title', '')
-        code_data = find_code_in_title(title, codes_by_code, codes_by_clave)
+        with phase('match_titles'):
+            code_data = find_code_in_title(title, codes_by_code, codes_by_clave)
         
         if code_data:
             codigo = code_data['codigo']
             clave = code_data.get('clave')
             
             # Intentar descargar o usar local
-            if not dry_run:
-                local_path = download_image_from_truper(codigo, clave)
+            if download:
+                with phase('download_images'):
+                    local_path = download_image_from_truper(codigo, clave)
                 if local_path:
                     products_to_update.append({
                         'id': product['id'],
                         'title': title[:60],
                         'code': codigo,
                         'image': local_path,
+                        'images': product.get('images'),
+                        'updated_at': product.get('updated_at'),
                     })
                     stats['downloaded'] += 1
                     if Path('public/images/marketplace/truper').exists() and (LOCAL_IMAGES_DIR / f"{codigo}.jpg").exists():
@@ -363,8 +390,13 @@ def main():
             clave_info = f" (clave: {item.get('clave', 'N/A')})" if item.get('clave') else ""
             print(f"{i}. {item['title']}... -> {item['image']}{clave_info}")
     
-    # Aplicar cambios
-    if products_to_update and not dry_run:
+    # Guardar el plan o aplicar cambios
+    if plan_path:
+        with PlanWriter(plan_path, 'fix_all_products_without_images', **stats) as plan:
+            for item in products_to_update:
+                plan.add(item['id'], 'images', item['images'], [item['image']], item['updated_at'])
+        plan.report()
+    elif products_to_update and not dry_run:
         auto_confirm = '--yes' in sys.argv or '-y' in sys.argv
         if not auto_confirm:
             confirmation = input(f"\n¿Actualizar {len(products_to_update)} productos? (s/N): ").lower()
@@ -376,31 +408,35 @@ def main():
             updated = 0
             errors = 0
             
-            for item in products_to_update:
-                try:
-                    response = supabase.table('marketplace_products').update({
-                        'images': [item['image']]
-                    }).eq('id', item['id']).execute()
+            with phase('write_db'):
+                for item in products_to_update:
+                    try:
+                        response = supabase.table('marketplace_products').update({
+                            'images': [item['image']]
+                        }).eq('id', item['id']).execute()
                     
-                    if response.data:
-                        updated += 1
-                        if updated % 50 == 0:
-                            print(f"   ✅ {updated} actualizados...")
-                    else:
+                        if response.data:
+                            updated += 1
+                            if updated % 50 == 0:
+                                print(f"   ✅ {updated} actualizados...")
+                        else:
+                            errors += 1
+                    except Exception as e:
                         errors += 1
-                except Exception as e:
-                    errors += 1
             
             print(f"\n✅ Completado: {updated} actualizados, {errors} errores")
         else:
             print("\n❌ Cancelado")
     elif products_to_update and dry_run:
         print("\n💡 Para aplicar: python3 scripts/fix_all_products_without_images.py --execute --yes")
+        print("   (o --plan para descargar, guardar los cambios y aplicarlos con catalog_plan.py)")
+    
+    print(f"\n🗂️  Caché negativa: {load_negative_cache().summary()}")
     
     print("\n" + "=" * 60)
     print("✅ PROCESO COMPLETADO")
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
 
@@ -3,19 +3,11 @@ Script para identificar y corregir URLs de imágenes rotas (404).
 Actualiza productos con URLs rotas usando imágenes locales cuando están disponibles.
 """
 
-import os
 import sys
 import requests
 from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 LOCAL_IMAGES_DIR = Path('public/images/marketplace/truper')
 BROKEN_URLS = set()
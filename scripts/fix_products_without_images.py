@@ -3,21 +3,13 @@ Script para identificar y resolver productos sin imágenes.
 Intenta encontrar y asignar imágenes a productos que no las tienen.
 """
 
-import os
 import sys
 import re
 import requests
 from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client
 import time
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 LOCAL_IMAGES_DIR = Path('public/images/marketplace/truper')
 LOCAL_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
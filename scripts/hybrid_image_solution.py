@@ -4,22 +4,15 @@ Script para implementar solución híbrida de imágenes:
 - Descarga y usa imágenes locales para productos sin URLs válidas
 """
 
-import os
 import sys
 import re
 import requests
 from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client
 from collections import defaultdict
 import time
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from truper_negative_cache import DIRECT, load_negative_cache
 
 # Directorio local para imágenes
 LOCAL_IMAGES_DIR = Path('public/images/marketplace/truper')
@@ -78,13 +71,19 @@ def download_image_from_truper(code: str) -> str:
     if filepath.exists():
         return f"/images/marketplace/truper/{filename}"
     
-    # Intentar diferentes formatos de URL
-    urls_to_try = [
+    # Omitir códigos que ya se sabe que no tienen imagen
+    negative_cache = load_negative_cache()
+    if negative_cache.is_missing_code(code, DIRECT):
+        return None
+    
+    # Intentar diferentes formatos de URL (sin las que ya dieron 404)
+    urls_to_try = negative_cache.filter_urls([
         f"https://www.truper.com/media/import/imagenes/{code_upper}.jpg",
         f"https://www.truper.com/media/import/imagenes/{code}.jpg",
         f"https://www.truper.com/media/import/imagenes/{code.lower()}.jpg",
-    ]
+    ])
     
+    all_missing = True
     for url in urls_to_try:
         try:
             response = requests.get(url, headers=HEADERS, timeout=5, stream=True)
@@ -95,12 +94,21 @@ def download_image_from_truper(code: str) -> str:
                     with open(filepath, 'wb') as f:
                         for chunk in response.iter_content(chunk_size=8192):
                             f.write(chunk)
+                    negative_cache.clear_url(url)
+                    negative_cache.clear_code(code)
                     
                     # Retornar ruta relativa para usar en la BD
                     return f"/images/marketplace/truper/{filename}"
+            # Los errores temporales (5xx, 429) no se cachean
+            if not negative_cache.record_response(url, response.status_code, response.headers.get('content-type', ''), 'hybrid_image_solution'):
+                all_missing = False
         except Exception as e:
+            all_missing = False
             continue
     
+    # Todas las variantes fallaron de forma definitiva
+    if all_missing:
+        negative_cache.mark_code_missing(code, DIRECT, 'direct_url_404', 'hybrid_image_solution')
     return None
 
 def process_products(limit: int = None, dry_run: bool = True):
@@ -310,6 +318,8 @@ def process_products(limit: int = None, dry_run: bool = True):
         print("\n💡 Para aplicar los cambios, ejecuta:")
         print("   python3 scripts/hybrid_image_solution.py --execute --yes")
     
+    print(f"\n🗂️  Caché negativa: {load_negative_cache().summary()}")
+    
     print("\n" + "=" * 60)
     print("✅ PROCESO COMPLETADO")
     print("=" * 60)
@@ -326,6 +336,15 @@ def main():
             print("❌ Error: --limit requiere un valor numérico")
             return
     
+    # Días antes de volver a probar códigos/URLs que ya dieron 404
+    if '--retry-days' in sys.argv:
+        try:
+            retry_idx = sys.argv.index('--retry-days')
+            load_negative_cache(retry_days=float(sys.argv[retry_idx + 1]))
+        except (ValueError, IndexError):
+            print("❌ Error: --retry-days requiere un valor numérico")
+            return
+    
     process_products(limit=limit, dry_run=dry_run)
 
 if __name__ == "__main__":
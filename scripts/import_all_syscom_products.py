@@ -2,77 +2,41 @@
 """
 Script para importar TODOS los productos de Syscom de categorías relevantes
 a la base de datos del marketplace en la categoría "sistemas".
+
+Con --from-report el catálogo se carga del reporte por hora
+(reporte_art_hora) en una sola descarga en lugar de paginar la API:
+    python3 scripts/import_all_syscom_products.py --from-report
+    python3 scripts/import_all_syscom_products.py --from-report data/syscom_reports/X.html --execute
 """
 
-import os
 import sys
 import time
 import requests
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from typing import List, Dict, Optional
-
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-SYSCOM_CLIENT_ID = os.environ.get('SYSCOM_CLIENT_ID')
-SYSCOM_CLIENT_SECRET = os.environ.get('SYSCOM_CLIENT_SECRET')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno SUPABASE_URL y SUPABASE_KEY no configuradas")
-    sys.exit(1)
-
-if not SYSCOM_CLIENT_ID or not SYSCOM_CLIENT_SECRET:
-    print("❌ Error: Variables de entorno SYSCOM_CLIENT_ID y SYSCOM_CLIENT_SECRET no configuradas")
-    print("💡 Obtén tus credenciales en: https://developers.syscom.mx/")
-    sys.exit(1)
+from typing import List, Dict, Optional, Tuple
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase, syscom, syscom_api_base, syscom_rate_limit_delay
+from catalog_writer import BulkProductWriter, insert_products
+from etl_metrics import metrics
+from etl_profile import phase, run_main
+from syscom_currency import CURRENCY_COLUMNS, CurrencyNormalizer
+from syscom_report_parser import ReportStream
 
-# URLs de la API de Syscom
-SYSCOM_OAUTH_URL = "https://developers.syscom.mx/oauth/token"
-SYSCOM_API_BASE = "https://developers.syscom.mx/api/v1"
-
-# Cache de token
-access_token = None
-token_expiry = 0
+# URL de la API de Syscom (se puede apuntar a scripts/fake_syscom_server.py)
+SYSCOM_API_BASE = syscom_api_base()
 
 # Rate limit: 60 peticiones por minuto = 1 por segundo
-RATE_LIMIT_DELAY = 1.1  # 1.1 segundos entre peticiones para estar seguros
+RATE_LIMIT_DELAY = syscom_rate_limit_delay()  # 1.1 segundos entre peticiones para estar seguros
+
+# Moneda de origen de los precios de Syscom, registrada antes de mapearlos (ver syscom_currency.py)
+normalizer = CurrencyNormalizer()
 
 
 def get_access_token() -> str:
-    """Obtiene un token de acceso válido"""
-    global access_token, token_expiry
-    
-    # Verificar si el token aún es válido (con margen de 1 hora)
-    if access_token and token_expiry > (time.time() * 1000) - 3600000:
-        return access_token
-    
-    print("🔐 Obteniendo token de acceso de Syscom...")
-    
-    response = requests.post(
-        SYSCOM_OAUTH_URL,
-        data={
-            "grant_type": "client_credentials",
-            "client_id": SYSCOM_CLIENT_ID,
-            "client_secret": SYSCOM_CLIENT_SECRET,
-        },
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-    )
-    
-    if response.status_code != 200:
-        print(f"❌ Error obteniendo token: {response.status_code}")
-        print(f"   Respuesta: {response.text}")
+    """Obtiene un token de acceso válido (caché compartida en catalog_config)"""
+    token = syscom.token()
+    if not token:
         sys.exit(1)
-    
-    data = response.json()
-    access_token = data["access_token"]
-    token_expiry = (time.time() * 1000) + (data["expires_in"] * 1000)
-    
-    print("✅ Token obtenido exitosamente")
-    return access_token
+    return token
 
 
 def get_all_products_from_category(categoria_id: str, categoria_nombre: str, start_page: int = 1) -> List[Dict]:
@@ -88,6 +52,7 @@ def get_all_products_from_category(categoria_id: str, categoria_nombre: str, sta
     response = None
     
     while retry_count < max_retries:
+        request_start = time.monotonic()
         try:
             response = requests.get(
                 f"{SYSCOM_API_BASE}/productos",
@@ -98,10 +63,13 @@ def get_all_products_from_category(categoria_id: str, categoria_nombre: str, sta
                 },
                 timeout=60  # Aumentar timeout
             )
+            metrics.request('syscom', 'productos', response.status_code, time.monotonic() - request_start)
             break
         except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+            metrics.request('syscom', 'productos', 'error', time.monotonic() - request_start)
             retry_count += 1
             if retry_count < max_retries:
+                metrics.retry('syscom', 'productos', 'timeout')
                 wait_time = retry_count * 5
                 print(f"  ⚠️  Timeout en primera petición, reintentando en {wait_time}s... (intento {retry_count}/{max_retries})")
                 time.sleep(wait_time)
@@ -150,6 +118,7 @@ def get_all_products_from_category(categoria_id: str, categoria_nombre: str, sta
             success = False
             
             while retry_count < max_retries:
+                request_start = time.monotonic()
                 try:
                     response = requests.get(
                         f"{SYSCOM_API_BASE}/productos",
@@ -163,6 +132,7 @@ def get_all_products_from_category(categoria_id: str, categoria_nombre: str, sta
                         },
                         timeout=90  # Aumentar timeout a 90 segundos
                     )
+                    metrics.request('syscom', 'productos', response.status_code, time.monotonic() - request_start)
                     if response.status_code == 200:
                         success = True
                         break  # Éxito, salir del bucle de reintentos
@@ -170,10 +140,13 @@ def get_all_products_from_category(categoria_id: str, categoria_nombre: str, sta
                         print(f"     ⚠️  Error HTTP {response.status_code} en página {pagina}")
                         retry_count += 1
                         if retry_count < max_retries:
+                            metrics.retry('syscom', 'productos', response.status_code)
                             time.sleep(3)
                 except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+                    metrics.request('syscom', 'productos', 'error', time.monotonic() - request_start)
                     retry_count += 1
                     if retry_count < max_retries:
+                        metrics.retry('syscom', 'productos', 'timeout')
                         wait_time = retry_count * 3  # Esperar 3, 6, 9, 12 segundos
                         print(f"     ⚠️  Timeout en página {pagina}, reintentando en {wait_time}s... (intento {retry_count}/{max_retries})")
                         time.sleep(wait_time)
@@ -233,6 +206,7 @@ def map_syscom_to_marketplace(syscom_product: Dict, categoria_id: str) -> Option
     
     # Determinar precio - manejar diferentes estructuras
     precio_data = syscom_product.get("precio")
+    priced = syscom_product  # De donde sale el precio (y su moneda)
     precio = 0
     precio_lista = None
     precio_especial = None
@@ -243,6 +217,7 @@ def map_syscom_to_marketplace(syscom_product: Dict, categoria_id: str) -> Option
         if producto_id:
             try:
                 token = get_access_token()
+                request_start = time.monotonic()
                 detail_response = requests.get(
                     f"{SYSCOM_API_BASE}/productos/{producto_id}",
                     headers={
@@ -251,9 +226,12 @@ def map_syscom_to_marketplace(syscom_product: Dict, categoria_id: str) -> Option
                     },
                     timeout=30
                 )
+                metrics.request('syscom', 'productos/detalle', detail_response.status_code,
+                                time.monotonic() - request_start)
                 if detail_response.status_code == 200:
-                    detail_data = detail_response.json()
+                    detail_data = normalizer.normalize_products([detail_response.json()])[0]
                     precio_data = detail_data.get("precio")
+                    priced = detail_data
                     time.sleep(0.5)  # Rate limit
             except Exception as e:
                 # Si falla, continuar sin precio
@@ -333,6 +311,7 @@ def map_syscom_to_marketplace(syscom_product: Dict, categoria_id: str) -> Option
         "contact_phone": "5636741156",
         "external_code": str(syscom_product.get("producto_id")),  # Código de Syscom
         "sku": sku,  # Modelo como SKU
+        **normalizer.currency_fields(priced),
     }
 
 
@@ -353,6 +332,7 @@ def import_products(products: List[Dict], dry_run: bool = True):
     if not categoria_id:
         print("❌ No se pudo obtener el ID de categoría")
         return
+    normalizer.prepare(supabase)
     
     # Verificar si existe la columna external_code
     try:
@@ -385,6 +365,7 @@ def import_products(products: List[Dict], dry_run: bool = True):
         print(f"   ⚠️  Error obteniendo códigos existentes: {e}")
         print("   Continuando sin verificación de duplicados...")
     
+    normalizer.normalize_products(products)
     for idx, syscom_product in enumerate(products, 1):
         producto_id = syscom_product.get("producto_id")
         titulo = syscom_product.get("titulo", "Sin título")[:60]
@@ -504,10 +485,237 @@ def import_products(products: List[Dict], dry_run: bool = True):
     print(f"✅ Importados: {imported}")
     print(f"⏭️  Omitidos: {skipped}")
     print(f"❌ Errores: {errors}")
+    normalizer.report()
     print("=" * 80)
 
 
-if __name__ == "__main__":
+# ---------------------------------------------------------------------------
+# Modo reporte: catálogo completo desde reporte_art_hora en una sola descarga
+# ---------------------------------------------------------------------------
+
+PAGE_SIZE = 1000
+INSERT_BATCH_SIZE = 200
+# Campos que se comparan para decidir si un producto existente cambió
+SYNC_FIELDS = ('title', 'price', 'original_price', 'images')
+
+
+def report_row_to_syscom(row: Dict) -> Dict:
+    """
+    Convierte una fila normalizada del reporte (syscom_report_parser) a la
+    misma estructura que devuelve /productos de la API, para reutilizar
+    map_syscom_to_marketplace sin cambios.
+    """
+    marca = row.get('marca') or ''
+    modelo = row.get('modelo') or ''
+    titulo = row.get('titulo') or modelo
+    precio = None
+    if row.get('precio') or row.get('precio_lista'):
+        precio = {
+            'precio_especial': row.get('precio'),
+            'precio_lista': row.get('precio_lista') or row.get('precio'),
+        }
+    return {
+        'producto_id': row.get('producto_id'),
+        'modelo': modelo,
+        'titulo': titulo,
+        'marca': marca,
+        'descripcion': f"Marca: {marca}. Modelo: {modelo}. {titulo}".strip() if marca or modelo else titulo,
+        'img_portada': row.get('imagen'),
+        'precio': precio,
+        'moneda': row.get('moneda'),
+    }
+
+
+def enrich_from_api(syscom_product: Dict) -> Dict:
+    """Completa imágenes, descripción y características con el detalle de la API"""
+    token = get_access_token()
+    try:
+        response = requests.get(
+            f"{SYSCOM_API_BASE}/productos/{syscom_product['producto_id']}",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            timeout=30
+        )
+        time.sleep(RATE_LIMIT_DELAY)
+        if response.status_code != 200:
+            return syscom_product
+        detail = normalizer.normalize_products([response.json()])[0]
+    except requests.exceptions.RequestException:
+        return syscom_product
+
+    enriched = dict(syscom_product)
+    for key in ('img_portada', 'imagenes', 'descripcion', 'caracteristicas', 'precio'):
+        if detail.get(key) and not (key == 'img_portada' and enriched.get(key)):
+            enriched[key] = detail[key]
+    if detail.get('precio'):
+        # La moneda registrada es la del precio que se usa
+        for key in ('moneda_origen', 'tipo_cambio', 'fecha_tipo_cambio', 'precios_mxn'):
+            enriched.pop(key, None)
+            if key in detail:
+                enriched[key] = detail[key]
+    return enriched
+
+
+def fetch_existing_products() -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """Productos existentes (paginados) indexados por external_code y por SKU"""
+    by_code: Dict[str, Dict] = {}
+    by_sku: Dict[str, Dict] = {}
+    offset = 0
+    while True:
+        response = supabase.table('marketplace_products').select(
+            'id, external_code, sku, title, price, original_price, images'
+        ).neq('status', 'deleted').order('id').range(offset, offset + PAGE_SIZE - 1).execute()
+        batch = response.data or []
+        for prod in batch:
+            if prod.get('external_code'):
+                by_code[str(prod['external_code'])] = prod
+            if prod.get('sku'):
+                by_sku.setdefault(str(prod['sku']).strip().upper(), prod)
+        if len(batch) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return by_code, by_sku
+
+
+def changed_fields(existing: Dict, mapped: Dict) -> Dict:
+    """Campos de SYNC_FIELDS cuyo valor nuevo difiere del guardado (y la moneda si cambia el precio)"""
+    changes = {}
+    for field in SYNC_FIELDS:
+        new_value = mapped.get(field)
+        old_value = existing.get(field)
+        if field == 'images':
+            # El reporte sólo trae la portada: nunca se achica la galería guardada
+            # (puede venir de la API); sólo se agrega la portada si falta
+            stored = list(old_value or [])
+            missing = [img for img in (new_value or []) if img not in stored]
+            if missing:
+                changes[field] = missing + stored
+            continue
+        if field in ('price', 'original_price'):
+            if (float(old_value) if old_value is not None else None) != new_value:
+                changes[field] = new_value
+        elif old_value != new_value:
+            changes[field] = new_value
+    if 'price' in changes or 'original_price' in changes:
+        # La moneda y el tipo de cambio se guardan junto con el precio que se escribe
+        changes.update({field: mapped[field] for field in CURRENCY_COLUMNS if field in mapped})
+    return changes
+
+
+def import_from_report(html_file: Optional[str], dry_run: bool = True, enrich_limit: int = 0):
+    """
+    Importa/actualiza el catálogo de Syscom desde el reporte por hora
+
+    El reporte trae todo el surtido en una descarga; cada fila pasa por
+    map_syscom_to_marketplace. Los productos nuevos se insertan en lotes y los
+    existentes sólo se actualizan (con BulkProductWriter) si cambió título,
+    precio o imágenes. La API se usa sólo para enriquecer hasta enrich_limit
+    productos nuevos sin imagen.
+    """
+    print("\n" + "=" * 80)
+    print("IMPORTACIÓN DESDE REPORTE SYSCOM")
+    print("=" * 80)
+    print(f"Modo: {'DRY RUN (no se guardarán cambios)' if dry_run else 'PRODUCCIÓN'}")
+    print()
+
+    if not html_file:
+        from download_syscom_report import download_report
+        with phase('download_report'):
+            html_file = download_report()
+        if not html_file:
+            print("❌ No se pudo descargar el reporte")
+            return
+
+    stream = ReportStream(html_file)
+
+    categoria_id = get_category_id()
+    if not categoria_id:
+        print("❌ No se pudo obtener el ID de categoría")
+        return
+    normalizer.prepare(supabase)
+
+    print("🔍 Cargando productos existentes...")
+    with phase('load_existing'):
+        by_code, by_sku = fetch_existing_products()
+    print(f"   ✅ {len(by_code)} con external_code, {len(by_sku)} SKUs\n")
+
+    stats = {'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'enriched': 0, 'errors': 0}
+    seen_codes = set()
+    insert_buffer: List[Dict] = []
+
+    with BulkProductWriter(supabase, dry_run=dry_run) as writer:
+        for syscom_product in normalizer.normalize_stream(report_row_to_syscom(row) for row in stream):
+            stats['rows'] += 1
+            producto_id = syscom_product.get('producto_id')
+            if not producto_id or producto_id in seen_codes:
+                stats['skipped'] += 1
+                continue
+            seen_codes.add(producto_id)
+
+            existing = by_code.get(str(producto_id))
+            # Igual que el modo API: un SKU ya cargado sin este external_code no se toca
+            if existing is None and syscom_product['modelo'] and syscom_product['modelo'].strip().upper() in by_sku:
+                stats['skipped'] += 1
+                continue
+
+            if existing is None and not syscom_product['img_portada'] and stats['enriched'] < enrich_limit:
+                with phase('enrich_api'):
+                    syscom_product = enrich_from_api(syscom_product)
+                stats['enriched'] += 1
+
+            mapped = map_syscom_to_marketplace(syscom_product, categoria_id)
+            if not mapped:
+                stats['skipped'] += 1
+                continue
+
+            if existing is not None:
+                changes = changed_fields(existing, mapped)
+                if changes:
+                    writer.add(existing['id'], changes)
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+                continue
+
+            stats['inserted'] += 1
+            if not dry_run:
+                insert_buffer.append(mapped)
+                if len(insert_buffer) >= INSERT_BATCH_SIZE:
+                    inserted, errors = insert_products(supabase, insert_buffer)
+                    stats['errors'] += errors
+                    stats['inserted'] -= errors
+                    insert_buffer = []
+
+            if stats['rows'] % 1000 == 0:
+                print(f"📊 {stats['rows']} filas | ➕ {stats['inserted']} nuevos | 🔄 {stats['updated']} actualizados | = {stats['unchanged']} sin cambios")
+
+        if insert_buffer:
+            inserted, errors = insert_products(supabase, insert_buffer)
+            stats['errors'] += errors
+            stats['inserted'] -= errors
+
+    if not stats['rows'] and stream.wait_text:
+        print(f"⏳ El archivo es la página de espera de Syscom: {stream.wait_text}")
+        return
+
+    stats['errors'] += writer.stats['errors']
+    print("\n" + "=" * 80)
+    print("RESUMEN:")
+    print("=" * 80)
+    print(f"📄 Filas del reporte: {stats['rows']}")
+    print(f"➕ Nuevos: {stats['inserted']}")
+    print(f"🔄 Actualizados: {stats['updated']}")
+    print(f"= Sin cambios: {stats['unchanged']}")
+    print(f"⏭️  Omitidos: {stats['skipped']}")
+    print(f"🔎 Enriquecidos con API: {stats['enriched']}")
+    print(f"❌ Errores: {stats['errors']}")
+    normalizer.report()
+    print("=" * 80)
+
+
+def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Importar TODOS los productos de Syscom de categorías relevantes')
@@ -515,14 +723,25 @@ if __name__ == "__main__":
     parser.add_argument('--category', type=str, help='Importar solo una categoría específica (ID)')
     parser.add_argument('--start-page', type=int, default=1, help='Página inicial para reanudar importación (default: 1)')
     parser.add_argument('--save-progress', action='store_true', help='Guardar progreso en archivo para poder reanudar')
+    parser.add_argument('--from-report', nargs='?', const='', metavar='HTML',
+                        help='Cargar desde el reporte por hora (descarga uno nuevo si no se indica archivo)')
+    parser.add_argument('--enrich-limit', type=int, default=200,
+                        help='Máximo de productos nuevos sin imagen a completar con la API (modo reporte)')
     
     args = parser.parse_args()
+    metrics.export_at_exit('import_all_syscom_products')
     
     print("=" * 80)
     print("IMPORTADOR COMPLETO DE PRODUCTOS SYSCOM")
     print("=" * 80)
     print()
     
+    if args.from_report is not None:
+        import_from_report(args.from_report or None, dry_run=not args.execute, enrich_limit=args.enrich_limit)
+        if not args.execute:
+            print("\n💡 Para ejecutar la importación real, usa: --execute")
+        sys.exit(0)
+    
     # Categorías relevantes para sistemas
     categorias = [
         {'id': '22', 'nombre': 'Videovigilancia'},
@@ -540,13 +759,14 @@ if __name__ == "__main__":
     all_products = []
     
     # Obtener productos de cada categoría
-    for cat in categorias:
-        productos = get_all_products_from_category(cat['id'], cat['nombre'], args.start_page)
-        all_products.extend(productos)
-        
-        # Respetar rate limit entre categorías
-        if cat != categorias[-1]:  # No esperar después de la última
-            time.sleep(RATE_LIMIT_DELAY)
+    with phase('fetch_api'):
+        for cat in categorias:
+            productos = get_all_products_from_category(cat['id'], cat['nombre'], args.start_page)
+            all_products.extend(productos)
+            
+            # Respetar rate limit entre categorías
+            if cat != categorias[-1]:  # No esperar después de la última
+                time.sleep(RATE_LIMIT_DELAY)
     
     # Eliminar duplicados por producto_id
     seen_ids = set()
@@ -565,8 +785,12 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Importar productos
-    import_products(unique_products, dry_run=not args.execute)
+    with phase('import'):
+        import_products(unique_products, dry_run=not args.execute)
     
     if not args.execute:
         print("\n💡 Para ejecutar la importación real, usa: --execute")
 
+
+if __name__ == "__main__":
+    run_main(main)
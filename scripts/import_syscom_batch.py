@@ -4,60 +4,24 @@ Script optimizado para importar productos de Syscom en lotes (batch)
 para mejorar el rendimiento y reducir errores de conexión.
 """
 
-import os
 import sys
 import time
-import requests
-from dotenv import load_dotenv
-from supabase import create_client, Client
 from typing import List, Dict, Optional
 
-load_dotenv('.env.local')
+from catalog_config import supabase, syscom, syscom_api_base
 
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-SYSCOM_CLIENT_ID = os.environ.get('SYSCOM_CLIENT_ID')
-SYSCOM_CLIENT_SECRET = os.environ.get('SYSCOM_CLIENT_SECRET')
-
-if not all([SUPABASE_URL, SUPABASE_KEY, SYSCOM_CLIENT_ID, SYSCOM_CLIENT_SECRET]):
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-SYSCOM_OAUTH_URL = "https://developers.syscom.mx/oauth/token"
-SYSCOM_API_BASE = "https://developers.syscom.mx/api/v1"
+SYSCOM_API_BASE = syscom_api_base()
 RATE_LIMIT_DELAY = 1.1
 BATCH_SIZE = 50  # Insertar productos en lotes de 50
 
-access_token = None
-token_expiry = 0
 _cached_category_id = None
 
 def get_access_token() -> str:
-    global access_token, token_expiry
-    if access_token and token_expiry > (time.time() * 1000) - 3600000:
-        return access_token
-    
-    print("🔐 Obteniendo token de acceso...")
-    response = requests.post(
-        SYSCOM_OAUTH_URL,
-        data={
-            "grant_type": "client_credentials",
-            "client_id": SYSCOM_CLIENT_ID,
-            "client_secret": SYSCOM_CLIENT_SECRET,
-        },
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-    )
-    
-    if response.status_code != 200:
-        print(f"❌ Error obteniendo token: {response.status_code}")
+    """Obtiene un token de acceso válido (caché compartida en catalog_config)"""
+    token = syscom.token()
+    if not token:
         sys.exit(1)
-    
-    data = response.json()
-    access_token = data["access_token"]
-    token_expiry = (time.time() * 1000) + (data["expires_in"] * 1000)
-    return access_token
+    return token
 
 def get_category_id():
     global _cached_category_id
@@ -4,73 +4,22 @@ Script para importar cámaras termográficas desde la API de Syscom
 a la base de datos del marketplace.
 """
 
-import os
 import sys
-import time
 import requests
-from dotenv import load_dotenv
-from supabase import create_client, Client
 from typing import List, Dict, Optional
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-SYSCOM_CLIENT_ID = os.environ.get('SYSCOM_CLIENT_ID')
-SYSCOM_CLIENT_SECRET = os.environ.get('SYSCOM_CLIENT_SECRET')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno SUPABASE_URL y SUPABASE_KEY no configuradas")
-    sys.exit(1)
-
-if not SYSCOM_CLIENT_ID or not SYSCOM_CLIENT_SECRET:
-    print("❌ Error: Variables de entorno SYSCOM_CLIENT_ID y SYSCOM_CLIENT_SECRET no configuradas")
-    print("💡 Obtén tus credenciales en: https://developers.syscom.mx/")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase, syscom, syscom_api_base
 
 # URLs de la API de Syscom
-SYSCOM_OAUTH_URL = "https://developers.syscom.mx/oauth/token"
-SYSCOM_API_BASE = "https://developers.syscom.mx/api/v1"
-
-# Cache de token
-access_token = None
-token_expiry = 0
+SYSCOM_API_BASE = syscom_api_base()
 
 
 def get_access_token() -> str:
-    """Obtiene un token de acceso válido"""
-    global access_token, token_expiry
-    
-    # Verificar si el token aún es válido (con margen de 1 hora)
-    if access_token and token_expiry > (time.time() * 1000) - 3600000:
-        return access_token
-    
-    print("🔐 Obteniendo token de acceso de Syscom...")
-    
-    # Syscom usa application/x-www-form-urlencoded, NO JSON
-    response = requests.post(
-        SYSCOM_OAUTH_URL,
-        data={
-            "grant_type": "client_credentials",
-            "client_id": SYSCOM_CLIENT_ID,
-            "client_secret": SYSCOM_CLIENT_SECRET,
-        },
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-    )
-    
-    if response.status_code != 200:
-        print(f"❌ Error obteniendo token: {response.status_code}")
-        print(f"   Respuesta: {response.text}")
+    """Obtiene un token de acceso válido (caché compartida en catalog_config)"""
+    token = syscom.token()
+    if not token:
         sys.exit(1)
-    
-    data = response.json()
-    access_token = data["access_token"]
-    token_expiry = (time.time() * 1000) + (data["expires_in"] * 1000)
-    
-    print("✅ Token obtenido exitosamente")
-    return access_token
+    return token
 
 
 def search_thermal_cameras() -> List[Dict]:
@@ -2,63 +2,28 @@
 """
 Importador Rápido de Catálogo TRUPER
 Versión optimizada que asume que las imágenes existen localmente
+
+Para cambiar el margen o el redondeo de los productos ya importados no hace
+falta regenerar el SQL: usar truper_pricing.py.
 """
 
-import csv
 import json
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from truper_classifier import TruperClassifier
+from truper_pricing import read_truper_rows, truper_price
+
 # Configuration
 CSV_FILE = Path("data/truper_catalog_full.csv")
 SQL_OUTPUT_FILE = Path("supabase/migrations/20250120_import_truper_full_catalog.sql")
 LOCAL_IMAGE_PATTERN = "/images/marketplace/truper/{codigo}.jpg"
 LOG_FILE = Path("scripts/truper_import_log.json")
 
-# Mapeo de familias TRUPER a categorías normalizadas
-FAMILY_TO_CATEGORY = {
-    "P085": "plomeria",
-    "P049": "varios",
-    "P129": "construccion",
-    "P216": "jardineria",
-    "P515": "construccion",
-    "P402": "jardineria",
-}
-
-# Mapeo de descripciones de familia a categorías
-FAMILY_DESC_TO_CATEGORY = {
-    "llaves": "plomeria",
-    "cutters": "varios",
-    "sierra": "construccion",
-    "serrucho": "jardineria",
-    "lija": "construccion",
-    "cavador": "jardineria",
-    "electric": "electricidad",
-    "eléctrico": "electricidad",
-    "eléctrica": "electricidad",
-    "construccion": "construccion",
-    "construcción": "construccion",
-    "plomeria": "plomeria",
-    "plomería": "plomeria",
-    "mecanica": "mecanica",
-    "mecánica": "mecanica",
-    "pintura": "pintura",
-    "jardineria": "jardineria",
-    "jardinería": "jardineria",
-    "herramienta": "herramienta-manual",
-    "taladro": "electricidad",
-    "rotomartillo": "electricidad",
-    "esmeril": "electricidad",
-    "pulidora": "electricidad",
-    "sierra": "electricidad",
-    "lijadora": "electricidad",
-    "atornillador": "electricidad",
-    "destornillador": "electricidad",
-}
-
 
 class TruperFastImporter:
     def __init__(self):
+        self.classifier = TruperClassifier()
         self.sql_statements = []
         self.stats = {
             "total_rows": 0,
@@ -75,28 +40,11 @@ class TruperFastImporter:
 
     def map_category(self, familia: str, desc_familia: str) -> str:
         """Mapea familia TRUPER a categoría normalizada"""
-        if familia and familia in FAMILY_TO_CATEGORY:
-            return FAMILY_TO_CATEGORY[familia]
-
-        desc_lower = (desc_familia or "").lower()
-        for key, category in FAMILY_DESC_TO_CATEGORY.items():
-            if key in desc_lower:
-                return category
-
-        return "varios"
+        return self.classifier.category(familia, desc_familia)
 
     def determine_power_type(self, descripcion: str, clave: str) -> Optional[str]:
         """Determina el tipo de potencia basado en descripción y clave"""
-        text = f"{(descripcion or '').lower()} {(clave or '').lower()}"
-
-        if any(word in text for word in ["inalámbrico", "inalambrico", "bateria", "batería", "cordless", "battery"]):
-            return "cordless"
-        elif any(word in text for word in ["electric", "eléctrico", "eléctrica", "enchufe", "cable"]):
-            return "electric"
-        elif any(word in text for word in ["manual", "mango", "mano"]):
-            return "manual"
-
-        return None
+        return self.classifier.power_type(descripcion, clave)
 
     def escape_sql(self, value: str) -> str:
         """Escapa valores SQL"""
@@ -149,25 +97,14 @@ class TruperFastImporter:
             self.stats["without_images"] += 1
             return None
 
-        # Determinar precio
-        try:
-            price = None
-            if precio_publico:
-                price = float(precio_publico.replace(",", "").replace("$", "").strip())
-            if not price and precio_distribuidor:
-                price = float(precio_distribuidor.replace(",", "").replace("$", "").strip())
-            if not price or price <= 0:
-                self.stats["skipped"] += 1
-                return None
-        except (ValueError, AttributeError):
+        # Determinar precio (público con IVA; si falta, el de distribuidor)
+        price = truper_price(precio_publico, precio_distribuidor)
+        if price is None:
             self.stats["skipped"] += 1
             return None
 
-        # Mapear categoría
-        category_slug = self.map_category(familia, desc_familia)
-
-        # Determinar power_type
-        power_type = self.determine_power_type(descripcion, clave)
+        # Mapear categoría y power_type
+        category_slug, power_type = self.classifier.classify(familia, desc_familia, descripcion, clave)
 
         # Generar SQL INSERT
         title = descripcion[:200]
@@ -223,26 +160,7 @@ class TruperFastImporter:
 
     def read_csv(self) -> List[Dict[str, str]]:
         """Lee el CSV y retorna lista de diccionarios"""
-        rows = []
-        with open(CSV_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-            # Buscar la línea que contiene los headers
-            header_line_idx = None
-            for i, line in enumerate(lines):
-                if "código" in line.lower() and "clave" in line.lower():
-                    header_line_idx = i
-                    break
-
-            if header_line_idx is None:
-                raise ValueError("No se encontró la línea de headers en el CSV")
-
-            # Leer desde la línea de headers
-            reader = csv.DictReader(lines[header_line_idx:])
-            for row in reader:
-                if any(row.values()):
-                    rows.append(row)
-        return rows
+        return read_truper_rows(CSV_FILE)
 
     def generate_sql(self):
         """Genera el script SQL completo"""
@@ -1,41 +1,23 @@
 #!/usr/bin/env python3
 """
 Helper para cargar variables de entorno desde .env.local
+
+Se conserva por compatibilidad; los scripts nuevos usan catalog_config.
 """
 import os
-from pathlib import Path
+
+from catalog_config import ROOT, load_env
+
 
 def load_env_from_file(env_file='.env.local'):
-    """Carga variables de entorno desde un archivo"""
-    env_path = Path(__file__).parent.parent / env_file
-    
+    """Carga variables de entorno desde un archivo (ver catalog_config.load_env)"""
+    env_path = ROOT / env_file
+
     if not env_path.exists():
         print(f"⚠️  Archivo {env_file} no encontrado en: {env_path}")
         return False
-    
-    loaded_vars = {}
-    with open(env_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            # Ignorar comentarios y líneas vacías
-            if not line or line.startswith('#'):
-                continue
-            
-            # Parsear KEY=VALUE
-            if '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                # Remover comillas si existen
-                if value.startswith('"') and value.endswith('"'):
-                    value = value[1:-1]
-                elif value.startswith("'") and value.endswith("'"):
-                    value = value[1:-1]
-                
-                os.environ[key] = value
-                loaded_vars[key] = value
-    
+
+    loaded_vars = load_env(env_file, override=True)
     print(f"✅ Cargadas {len(loaded_vars)} variables desde {env_file}")
     return True
 
@@ -4,18 +4,15 @@ Migra rutas locales de imágenes TRUPER a URLs directas de truper.com
 Actualiza la base de datos para usar URLs remotas en lugar de rutas locales
 """
 
-import os
 import re
 from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict
 
-# Cargar variables de entorno
-load_dotenv('.env.local')
+from catalog_config import get_supabase
+from mutation_journal import MutationJournal, bulk_apply, journal_arg
 
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+if TYPE_CHECKING:
+    from supabase import Client
 
 # Patrones de URLs
 TRUPER_URL_PATTERN = "https://www.truper.com/media/import/imagenes/{identifier}.jpg"
@@ -29,12 +26,15 @@ def extract_identifier(image_path: str) -> str:
         return match.group(1)
     return None
 
-def migrate_product_images(supabase: Client, batch_size: int = 100):
-    """Migra imágenes de productos TRUPER a URLs directas"""
+def migrate_product_images(supabase: 'Client', batch_size: int = 100, resume: Path = None):
+    """Migra imágenes de productos TRUPER a URLs directas.
+    Cada lote se registra en una bitácora (mutation_journal.py) antes de escribirse."""
     
     print("🔄 Iniciando migración de imágenes TRUPER a URLs directas...")
     print(f"   Patrón URL: {TRUPER_URL_PATTERN}")
     print()
+    journal = MutationJournal.start('migrate_truper_to_direct_urls', resume=resume)
+    apply_rows = bulk_apply(supabase)
     
     updated_count = 0
     error_count = 0
@@ -70,6 +70,7 @@ def migrate_product_images(supabase: Client, batch_size: int = 100):
             
             print(f"📦 Procesando lote {offset // batch_size + 1} ({len(truper_products)} productos TRUPER de {len(products)} totales)...")
             
+            rows = []
             for product in truper_products:
                 product_id = product['id']
                 images = product.get('images', [])
@@ -93,20 +94,13 @@ def migrate_product_images(supabase: Client, batch_size: int = 100):
                         # Si ya es URL externa, mantenerla
                         new_images.append(img_path)
                 
-                # Actualizar producto en BD
-                try:
-                    supabase.table('marketplace_products').update({
-                        'images': new_images
-                    }).eq('id', product_id).execute()
-                    
-                    updated_count += 1
-                    
-                    if updated_count % 50 == 0:
-                        print(f"   ✅ {updated_count} productos actualizados...")
-                        
-                except Exception as e:
-                    error_count += 1
-                    print(f"   ❌ Error actualizando producto {product_id}: {e}")
+                rows.append({'id': product_id, 'before': {'images': images}, 'after': {'images': new_images}})
+            
+            # Actualizar el lote en BD (registrado antes en la bitácora)
+            rows = journal.skip_committed(rows)
+            updated = journal.apply(rows, apply_rows, batch_size=batch_size)
+            updated_count += updated
+            error_count += len(rows) - updated
             
             offset += batch_size
             
@@ -127,6 +121,7 @@ def migrate_product_images(supabase: Client, batch_size: int = 100):
     print(f"❌ Errores: {error_count}")
     print()
     print("🎉 Migración completada!")
+    print(f"↩️  Revertir: python3 scripts/mutation_journal.py {journal.path} --rollback --execute")
     print()
     print("📝 PRÓXIMOS PASOS:")
     print("1. Verificar que next.config.ts permite el dominio 'www.truper.com'")
@@ -134,12 +129,7 @@ def migrate_product_images(supabase: Client, batch_size: int = 100):
     print("3. Verificar que las URLs funcionan correctamente")
 
 def main():
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("❌ Error: Variables de entorno SUPABASE no configuradas")
-        print("   Asegúrate de tener NEXT_PUBLIC_SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY en .env.local")
-        return
-    
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase = get_supabase()
     
     # Confirmar antes de ejecutar
     print("⚠️  ADVERTENCIA: Este script actualizará las rutas de imágenes en la base de datos")
@@ -151,7 +141,7 @@ def main():
         print("❌ Migración cancelada")
         return
     
-    migrate_product_images(supabase)
+    migrate_product_images(supabase, resume=journal_arg())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+MinHash + LSH (Locality Sensitive Hashing) en Python puro
+
+Permite encontrar conjuntos parecidos (similitud de Jaccard alta) sin comparar
+todos contra todos: cada conjunto se resume en una firma de num_perm enteros,
+la firma se parte en bandas y sólo se comparan los conjuntos que caen en la
+misma cubeta en al menos una banda.
+
+La firma usa "one permutation hashing": cada elemento se hashea una sola vez,
+el hash elige el bin y el resto del hash es el valor; los bins vacíos se
+rellenan con el bin no vacío siguiente (densificación). Así el costo por
+conjunto es O(|elementos|) en lugar de O(|elementos| · num_perm).
+
+Con b bandas de r filas la probabilidad de que dos conjuntos con Jaccard s
+sean candidatos es 1 - (1 - s^r)^b; el umbral aproximado es (1/b)^(1/r).
+"""
+
+import hashlib
+import struct
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+_MAX_HASH = (1 << 64) - 1
+
+
+def _hash64(token: str) -> int:
+    """Hash estable de 64 bits (no depende de PYTHONHASHSEED)"""
+    digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+    return struct.unpack('<Q', digest)[0]
+
+
+class MinHasher:
+    """Calcula firmas MinHash de num_perm valores con un solo hash por elemento"""
+
+    def __init__(self, num_perm: int = 64):
+        if num_perm < 1:
+            raise ValueError("num_perm debe ser >= 1")
+        self.num_perm = num_perm
+        # Los mismos tokens (trigramas, palabras) se repiten muchísimo entre productos
+        self._cache: Dict[str, int] = {}
+
+    def _token_hash(self, token: str) -> int:
+        value = self._cache.get(token)
+        if value is None:
+            value = _hash64(token)
+            self._cache[token] = value
+        return value
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        num_perm = self.num_perm
+        bins: List[int] = [_MAX_HASH] * num_perm
+        for token in tokens:
+            h = self._token_hash(token)
+            idx = h % num_perm
+            value = h // num_perm
+            if value < bins[idx]:
+                bins[idx] = value
+
+        # Densificación: un bin vacío toma el valor del siguiente bin lleno
+        if _MAX_HASH in bins and any(v != _MAX_HASH for v in bins):
+            filled = list(bins)
+            for i in range(num_perm):
+                if bins[i] != _MAX_HASH:
+                    continue
+                step = 1
+                while bins[(i + step) % num_perm] == _MAX_HASH:
+                    step += 1
+                filled[i] = bins[(i + step) % num_perm] + step
+            bins = filled
+        return tuple(bins)
+
+
+def estimate_jaccard(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimación de Jaccard a partir de dos firmas del mismo MinHasher"""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    same = sum(1 for a, b in zip(sig_a, sig_b) if a == b)
+    return same / len(sig_a)
+
+
+class MinHashLSH:
+    """
+    Índice LSH por bandas sobre firmas MinHash
+
+    keys pueden ser cualquier valor hasheable (id de producto, posición, etc.)
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.hasher = MinHasher(num_perm)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._tables: List[Dict[Tuple[int, ...], List[Hashable]]] = [{} for _ in range(bands)]
+        self.signatures: Dict[Hashable, Tuple[int, ...]] = {}
+
+    @property
+    def threshold(self) -> float:
+        """Similitud aproximada a partir de la cual dos conjuntos suelen colisionar"""
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        rows = self.rows
+        for band in range(self.bands):
+            yield band, signature[band * rows:(band + 1) * rows]
+
+    def add(self, key: Hashable, tokens: Iterable[str],
+            signature: Optional[Tuple[int, ...]] = None) -> Tuple[int, ...]:
+        if signature is None:
+            signature = self.hasher.signature(tokens)
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._tables[band].setdefault(band_key, []).append(key)
+        return signature
+
+    def query(self, tokens: Iterable[str] = (),
+              signature: Optional[Tuple[int, ...]] = None) -> Set[Hashable]:
+        """Claves que comparten al menos una banda con los tokens dados"""
+        if signature is None:
+            signature = self.hasher.signature(tokens)
+        candidates: Set[Hashable] = set()
+        for band, band_key in self._band_keys(signature):
+            bucket = self._tables[band].get(band_key)
+            if bucket:
+                candidates.update(bucket)
+        return candidates
+
+    def buckets(self):
+        """Itera las cubetas con más de una clave (pares candidatos en lote)"""
+        for table in self._tables:
+            for bucket in table.values():
+                if len(bucket) > 1:
+                    yield bucket
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Bitácora de cambios (write-ahead) para los arreglos masivos del catálogo
+
+Antes de escribir un lote en marketplace_products se agrega al archivo
+data/journals/<script>_<fecha>.jsonl una línea con el lote completo (valores
+anteriores y nuevos de cada producto) y se sincroniza a disco; cuando el lote
+termina se agrega su línea de commit. El archivo sólo crece:
+
+    {"type":"begin","script":"remove_duplicate_products","created_at":"…"}
+    {"type":"batch","seq":1,"kind":"apply","rows":[{"id":"…","before":{"status":"active"},"after":{"status":"deleted"}}]}
+    {"type":"commit","seq":1,"updated":200,"rows":200,"ok":true}
+    {"type":"batch","seq":2,...}
+    {"type":"commit","seq":2,"updated":198,"rows":200,"ok":false,"missing":["…","…"]}
+    {"type":"batch","seq":3,...}                 <- sin commit: se cayó a la mitad
+
+La función que aplica un lote regresa los ids que sí se actualizaron, así que
+el commit es por fila: las filas escritas de un lote incompleto cuentan como
+aplicadas (y se revierten) y sólo las que faltan ("missing") quedan pendientes.
+
+Con eso:
+- Reanudar es idempotente: con --resume JOURNAL el script vuelve a correr y
+  omite los productos que ya tienen commit; los lotes sin commit se reintentan
+  (los valores nuevos son absolutos, aplicarlos dos veces no cambia nada).
+  Este mismo script también puede reaplicar los lotes pendientes sin repetir
+  el análisis.
+- Revertir es un solo paso en lote: se restauran los valores anteriores de
+  todos los lotes aplicados (en orden inverso), sólo en los productos que
+  siguen teniendo el valor que escribió la corrida. La reversión también queda
+  en la bitácora.
+
+Uso:
+    journal = MutationJournal.start('clean_duplicate_images', resume=journal_arg())
+    rows = journal.skip_committed(rows)
+    journal.apply(rows, bulk_apply(supabase))
+
+    python3 scripts/mutation_journal.py                          # listar bitácoras
+    python3 scripts/mutation_journal.py data/journals/X.jsonl    # estado
+    python3 scripts/mutation_journal.py data/journals/X.jsonl --resume --execute
+    python3 scripts/mutation_journal.py data/journals/X.jsonl --rollback --execute
+"""
+
+import os
+import sys
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from catalog_plan import PlanApplier
+
+ROOT = Path(__file__).parent.parent
+JOURNAL_DIR = ROOT / "data" / "journals"
+DEFAULT_BATCH_SIZE = 500
+
+# Una fila del journal: {'id': ..., 'before': {campo: valor}, 'after': {campo: valor}}
+# La función que aplica un lote regresa los ids que se actualizaron
+ApplyFn = Callable[[List[Dict]], Iterable[str]]
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def journal_arg(argv: Optional[List[str]] = None) -> Optional[Path]:
+    """Ruta de --resume JOURNAL en la línea de comandos (para scripts sin argparse)"""
+    argv = sys.argv if argv is None else argv
+    if '--resume' in argv:
+        i = argv.index('--resume')
+        if i + 1 < len(argv):
+            return Path(argv[i + 1])
+    return None
+
+
+def bulk_apply(supabase, verbose: bool = False) -> ApplyFn:
+    """Aplica las filas con PlanApplier (RPC apply_marketplace_plan, que regresa los ids actualizados)"""
+    def apply(rows: List[Dict]) -> Set[str]:
+        applier = PlanApplier(supabase, batch_size=len(rows) + 1, verbose=verbose)
+        applier.apply([{'id': row['id'], **row['after']} for row in rows])
+        return applier.applied
+    return apply
+
+
+class MutationJournal:
+    """Archivo JSONL de sólo-agregar con los lotes aplicados y sus commits"""
+
+    def __init__(self, path, script: Optional[str] = None, **meta):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.batches: Dict[int, Dict] = {}
+        self.commits: Dict[int, Dict] = {}
+        self.header: Dict = {}
+        self._committed: Dict[str, Dict] = {}
+        self.written: Dict[int, Set[str]] = {}
+        self._seq = 0
+
+        if self.path.exists():
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.header = {'type': 'begin', 'script': script,
+                           'created_at': datetime.now().isoformat(timespec='seconds'), **meta}
+            self._append(self.header)
+
+    @classmethod
+    def start(cls, script: str, resume: Optional[Path] = None, **meta) -> "MutationJournal":
+        """Bitácora nueva en data/journals, o la indicada con --resume"""
+        if resume:
+            journal = cls(resume)
+            print(f"📒 Reanudando bitácora {journal.path}: {len(journal.committed)} productos ya aplicados")
+            return journal
+        path = JOURNAL_DIR / f"{script}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        journal = cls(path, script, **meta)
+        print(f"📒 Bitácora de cambios: {journal.path}")
+        return journal
+
+    def _load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Última línea truncada por una caída: el lote no llegó a aplicarse
+                kind = record.get('type')
+                if kind == 'begin':
+                    self.header = record
+                elif kind == 'batch':
+                    self.batches[record['seq']] = record
+                elif kind == 'commit':
+                    self._record_commit(record)
+                self._seq = max(self._seq, record.get('seq', 0))
+
+    def _append(self, record: Dict) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(_dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- Estado -----------------------------------------------------------
+
+    def _record_commit(self, commit: Dict) -> None:
+        self.commits[commit['seq']] = commit
+        batch = self.batches.get(commit['seq'])
+        if not batch:
+            return
+        if commit.get('ok'):
+            missing = set()
+        elif 'missing' in commit:
+            missing = set(commit['missing'])
+        else:
+            return  # Error: no se escribió nada del lote
+        written = self.written.setdefault(commit['seq'], set())
+        for row in batch['rows']:
+            if row['id'] in missing:
+                continue
+            written.add(row['id'])
+            if batch['kind'] == 'rollback':
+                self._committed.pop(row['id'], None)
+            else:
+                self._committed[row['id']] = row['after']
+
+    @property
+    def committed(self) -> Dict[str, Dict]:
+        """id -> valores vigentes escritos por esta bitácora (sin los revertidos)"""
+        return self._committed
+
+    def pending(self) -> List[Dict]:
+        """Lotes escritos en la bitácora sin commit exitoso (caída o error a la mitad)"""
+        return [self.batches[seq] for seq in sorted(self.batches)
+                if not self.commits.get(seq, {}).get('ok')]
+
+    def skip_committed(self, rows: List[Dict]) -> List[Dict]:
+        """Quita las filas que esta bitácora ya aplicó con los mismos valores"""
+        committed = self.committed
+        return [row for row in rows if committed.get(row['id']) != row['after']]
+
+    # --- Escritura --------------------------------------------------------
+
+    def apply(self, rows: List[Dict], apply_fn: ApplyFn, batch_size: int = DEFAULT_BATCH_SIZE,
+              kind: str = 'apply', verbose: bool = True) -> int:
+        """Registra y aplica las filas en lotes; retorna filas actualizadas"""
+        updated = 0
+        for i in range(0, len(rows), batch_size):
+            updated += self.apply_batch(rows[i:i + batch_size], apply_fn, kind, verbose)
+        return updated
+
+    def apply_batch(self, rows: List[Dict], apply_fn: ApplyFn, kind: str = 'apply', verbose: bool = True,
+                    seq: Optional[int] = None) -> int:
+        if not rows:
+            return 0
+        with self._lock:
+            if seq is None:
+                self._seq += 1
+                seq = self._seq
+                batch = {'type': 'batch', 'seq': seq, 'kind': kind, 'rows': rows}
+                self._append(batch)
+                self.batches[seq] = batch
+
+        try:
+            updated_ids = {str(pid) for pid in apply_fn(rows)}
+            error = None
+        except Exception as e:
+            updated_ids, error = set(), str(e)[:200]
+
+        missing = [row['id'] for row in rows if row['id'] not in updated_ids]
+        updated = len(rows) - len(missing)
+        commit = {'type': 'commit', 'seq': seq, 'updated': updated, 'rows': len(rows),
+                  'ok': error is None and not missing}
+        if error:
+            commit['error'] = error
+        elif missing:
+            commit['missing'] = missing
+        with self._lock:
+            self._append(commit)
+            self._record_commit(commit)
+        if verbose:
+            status = '✅' if commit['ok'] else '⚠️ '
+            print(f"   {status} Lote {seq} ({kind}): {updated}/{len(rows)} productos{' - ' + error if error else ''}")
+        return updated
+
+    def resume(self, apply_fn: ApplyFn, verbose: bool = True) -> int:
+        """Reaplica los lotes pendientes (mismo seq, los valores son absolutos)"""
+        updated = 0
+        for batch in self.pending():
+            updated += self.apply_batch(batch['rows'], apply_fn, batch['kind'], verbose, seq=batch['seq'])
+        return updated
+
+    def rollback_rows(self, supabase) -> Dict[str, List[Dict]]:
+        """Filas para revertir (before/after invertidos) y las que ya cambió otro proceso"""
+        committed = self.committed
+        first_rows: Dict[str, Dict] = {}
+        for seq in sorted(self.batches, reverse=True):
+            batch = self.batches[seq]
+            if batch['kind'] == 'rollback':
+                continue
+            written = self.written.get(seq, set())
+            for row in batch['rows']:
+                # El before más antiguo de las filas que sí se escribieron es el que se restaura
+                if row['id'] in committed and row['id'] in written:
+                    first_rows[row['id']] = row
+
+        rows, conflicts = [], []
+        ids = list(first_rows)
+        for i in range(0, len(ids), DEFAULT_BATCH_SIZE):
+            chunk = ids[i:i + DEFAULT_BATCH_SIZE]
+            fields = sorted({f for pid in chunk for f in committed[pid]})
+            response = supabase.table('marketplace_products').select(
+                ', '.join(['id'] + fields)).in_('id', chunk).execute()
+            current = {r['id']: r for r in response.data or []}
+            for pid in chunk:
+                after = committed[pid]
+                now = {f: current.get(pid, {}).get(f) for f in after}
+                row = {'id': pid, 'before': after, 'after': first_rows[pid]['before']}
+                (rows if now == after else conflicts).append(row)
+        return {'rows': rows, 'conflicts': conflicts}
+
+    def summary(self) -> Dict:
+        pending = self.pending()
+        return {
+            'script': self.header.get('script'),
+            'created_at': self.header.get('created_at'),
+            'batches': len(self.batches),
+            'committed_products': len(self.committed),
+            'pending_batches': len(pending),
+            'pending_rows': sum(len(b['rows']) for b in pending),
+            'rollbacks': sum(1 for b in self.batches.values() if b['kind'] == 'rollback'),
+        }
+
+
+def print_summary(journal: MutationJournal) -> None:
+    s = journal.summary()
+    print(f"📒 {journal.path}")
+    print(f"   Script: {s['script']} ({s['created_at']})")
+    print(f"   Lotes: {s['batches']} | productos aplicados vigentes: {s['committed_products']}")
+    print(f"   Lotes pendientes: {s['pending_batches']} ({s['pending_rows']} filas)")
+    if s['rollbacks']:
+        print(f"   Lotes de reversión: {s['rollbacks']}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Estado, reanudación y reversión de bitácoras de cambios')
+    parser.add_argument('journal', nargs='?', help='Archivo de bitácora (sin argumento: listar)')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--resume', action='store_true', help='Reaplicar los lotes sin commit')
+    action.add_argument('--rollback', action='store_true', help='Restaurar los valores anteriores')
+    parser.add_argument('--execute', action='store_true', help='Escribir en la BD (por defecto sólo muestra)')
+    args = parser.parse_args()
+
+    if not args.journal:
+        journals = sorted(JOURNAL_DIR.glob('*.jsonl')) if JOURNAL_DIR.exists() else []
+        if not journals:
+            print(f"📭 No hay bitácoras en {JOURNAL_DIR}")
+        for path in journals:
+            s = MutationJournal(path).summary()
+            pending = f" | ⚠️  {s['pending_batches']} lotes pendientes" if s['pending_batches'] else ''
+            print(f"{path.name}: {s['committed_products']} productos{pending}")
+        return
+
+    path = Path(args.journal)
+    if not path.exists():
+        print(f"❌ No existe la bitácora: {path}")
+        sys.exit(1)
+    journal = MutationJournal(path)
+    print_summary(journal)
+
+    if not (args.resume or args.rollback):
+        return
+
+    from catalog_config import get_supabase
+    supabase = get_supabase()
+
+    if args.resume:
+        pending = journal.pending()
+        if not pending:
+            print("\n✅ No hay lotes pendientes")
+            return
+        if not args.execute:
+            print(f"\n⚠️  DRY RUN: se reaplicarían {len(pending)} lotes. Usa --execute")
+            return
+        print("\n🔄 Reaplicando lotes pendientes...")
+        updated = journal.resume(bulk_apply(supabase))
+        print(f"\n✅ {updated} productos actualizados")
+        return
+
+    plan = journal.rollback_rows(supabase)
+    print(f"\n↩️  Productos a revertir: {len(plan['rows'])}")
+    if plan['conflicts']:
+        print(f"⚠️  Productos modificados después de la corrida (no se revierten): {len(plan['conflicts'])}")
+        for row in plan['conflicts'][:5]:
+            print(f"   - {row['id']}")
+    if not plan['rows']:
+        return
+    if not args.execute:
+        print("\n⚠️  DRY RUN: usa --execute para revertir")
+        return
+    print("\n🔄 Revirtiendo...")
+    updated = journal.apply(plan['rows'], bulk_apply(supabase), kind='rollback')
+    print(f"\n✅ {updated} productos revertidos")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,78 +9,16 @@ Uso:
 """
 
 import os
-import sys
 import csv
 import argparse
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-from dotenv import load_dotenv
 
-try:
-    from supabase import create_client, Client
-    HAS_SUPABASE = True
-except ImportError:
-    print("❌ Error: Se requiere supabase-py")
-    print("   Instalar con: pip install supabase")
-    sys.exit(1)
+from catalog_config import load_env, supabase
+from title_matcher import TitleIndex, DEFAULT_AUTO_ACCEPT
 
-# Cargar variables de entorno
-# Intentar múltiples ubicaciones y métodos
-env_files = ['.env.local', '.env']
-env_loaded = False
-
-for env_file in env_files:
-    try:
-        env_path = Path(__file__).parent.parent / env_file
-        if env_path.exists():
-            load_dotenv(env_path, override=True)
-            env_loaded = True
-            print(f"✅ Variables cargadas desde: {env_file}")
-            break
-    except Exception as e:
-        continue
-
-# También intentar cargar desde la ruta absoluta
-if not env_loaded:
-    try:
-        env_local_path = Path(__file__).parent.parent / '.env.local'
-        if env_local_path.exists():
-            load_dotenv(env_local_path, override=True)
-            env_loaded = True
-            print(f"✅ Variables cargadas desde: .env.local (ruta absoluta)")
-    except Exception:
-        pass
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("=" * 80)
-    print("❌ ERROR: Variables de entorno no configuradas")
-    print("=" * 80)
-    print()
-    print("📋 REQUISITOS:")
-    print("   - NEXT_PUBLIC_SUPABASE_URL")
-    print("   - SUPABASE_SERVICE_ROLE_KEY")
-    print()
-    print("💡 OPCIONES PARA CONFIGURAR:")
-    print()
-    print("1. Exportar en la terminal (temporal):")
-    print("   export NEXT_PUBLIC_SUPABASE_URL='tu_url'")
-    print("   export SUPABASE_SERVICE_ROLE_KEY='tu_key'")
-    print()
-    print("2. Verificar .env.local:")
-    print("   Asegúrate de que .env.local contiene:")
-    print("   NEXT_PUBLIC_SUPABASE_URL=tu_url")
-    print("   SUPABASE_SERVICE_ROLE_KEY=tu_key")
-    print()
-    print("3. Verificar variables actuales:")
-    print("   echo $NEXT_PUBLIC_SUPABASE_URL")
-    print("   echo $SUPABASE_SERVICE_ROLE_KEY")
-    print()
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# .env.local se carga en catalog_config; .env queda como respaldo
+load_env('.env')
 
 # Directorio de datos
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -299,9 +237,16 @@ def find_csv_files() -> List[Path]:
     return sorted(csv_files)
 
 
-def update_prices_from_csv(file_path: str, execute: bool = False):
+def update_prices_from_csv(file_path: str, execute: bool = False,
+                           fuzzy_threshold: float = DEFAULT_AUTO_ACCEPT):
     """
     Procesa CSV y actualiza precios en la base de datos
+
+    Args:
+        file_path: Ruta al archivo CSV
+        execute: Si es True, actualiza la BD
+        fuzzy_threshold: Similitud mínima (0-1) para aceptar automáticamente
+            una coincidencia difusa por título
     """
     print("=" * 80)
     print("PROCESAMIENTO DE CSV DE SYSCOM")
@@ -405,6 +350,10 @@ def update_prices_from_csv(file_path: str, execute: bool = False):
         print(f"✅ Índice por SKU: {len(sku_index)} productos")
         print(f"✅ Índice por external_code: {len(external_code_index)} productos")
         print(f"✅ Índice por título: {len(title_index)} grupos")
+        
+        # Índice difuso (trigramas + MinHash-LSH) para títulos con redacción distinta
+        fuzzy_index = TitleIndex(db_products)
+        print(f"✅ Índice difuso por título: {len(fuzzy_index)} productos (umbral {fuzzy_threshold:.2f})")
         print()
         
     except Exception as e:
@@ -416,6 +365,7 @@ def update_prices_from_csv(file_path: str, execute: bool = False):
     not_found = 0
     errors = 0
     skipped = 0
+    fuzzy_matched = 0
     
     print("📊 Procesando productos...")
     print()
@@ -451,10 +401,22 @@ def update_prices_from_csv(file_path: str, execute: bool = False):
                 if not db_product and candidates:
                     db_product = candidates[0]
         
+        # Último recurso: coincidencia difusa por título
+        fuzzy_candidates = []
+        if not db_product and csv_product.get('title'):
+            fuzzy_candidates = fuzzy_index.search(csv_product['title'], k=3)
+            if fuzzy_candidates and fuzzy_candidates[0][1] >= fuzzy_threshold:
+                db_product, score = fuzzy_candidates[0]
+                fuzzy_matched += 1
+                if idx <= 10:
+                    print(f"  🔗 [{row_num}] Coincidencia difusa ({score:.2f}): {db_product.get('title', 'N/A')[:50]}")
+        
         if not db_product:
             not_found += 1
             if idx <= 10:
                 print(f"  ⚠️  [{row_num}] SKU '{sku}' no encontrado en BD")
+                for candidate, score in fuzzy_candidates:
+                    print(f"      ❓ Candidato ({score:.2f}): {candidate.get('title', 'N/A')[:60]}")
             continue
         
         product_id = db_product['id']
@@ -502,6 +464,7 @@ def update_prices_from_csv(file_path: str, execute: bool = False):
     print("RESUMEN:")
     print("=" * 80)
     print(f"✅ Actualizados: {updated}")
+    print(f"🔗 Encontrados por título aproximado: {fuzzy_matched}")
     print(f"⚠️  No encontrados (SKU no existe en BD): {not_found}")
     print(f"❌ Errores: {errors}")
     print(f"⏭️  Omitidos (sin cambios): {skipped}")
@@ -523,6 +486,8 @@ def main():
     parser.add_argument('--file', type=str, help='Ruta al archivo CSV')
     parser.add_argument('--auto', action='store_true', help='Buscar CSV automáticamente en data/')
     parser.add_argument('--execute', action='store_true', help='Aplicar cambios a la base de datos')
+    parser.add_argument('--fuzzy-threshold', type=float, default=DEFAULT_AUTO_ACCEPT,
+                        help=f'Similitud mínima para aceptar una coincidencia por título aproximado (default: {DEFAULT_AUTO_ACCEPT})')
     
     args = parser.parse_args()
     
@@ -543,7 +508,7 @@ def main():
         if len(csv_files) == 1:
             print(f"✅ Archivo CSV encontrado: {csv_files[0].name}")
             print()
-            update_prices_from_csv(str(csv_files[0]), execute=args.execute)
+            update_prices_from_csv(str(csv_files[0]), execute=args.execute, fuzzy_threshold=args.fuzzy_threshold)
         else:
             print("📁 Múltiples archivos CSV encontrados:")
             for i, csv_file in enumerate(csv_files, 1):
@@ -553,7 +518,7 @@ def main():
             try:
                 idx = int(choice) - 1
                 if 0 <= idx < len(csv_files):
-                    update_prices_from_csv(str(csv_files[idx]), execute=args.execute)
+                    update_prices_from_csv(str(csv_files[idx]), execute=args.execute, fuzzy_threshold=args.fuzzy_threshold)
                 else:
                     print("❌ Selección inválida")
             except ValueError:
@@ -564,7 +529,7 @@ def main():
             print(f"❌ Archivo no encontrado: {args.file}")
             return
         
-        update_prices_from_csv(args.file, execute=args.execute)
+        update_prices_from_csv(args.file, execute=args.execute, fuzzy_threshold=args.fuzzy_threshold)
     
     else:
         print("❌ Debes especificar --file o --auto")
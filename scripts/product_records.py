@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Registros compactos de marketplace_products para scripts que cargan el catálogo completo
+
+Cada fila de PostgREST es un dict con todas las columnas pedidas; con ~60k
+productos y descripciones largas, más los índices paralelos que arma cada
+script, el pico de memoria se va a cientos de MB. ProductRecord guarda sólo
+las columnas pedidas en __slots__ (sin __dict__), las imágenes como tupla y
+category_id internado (se repite en miles de productos), y ProductTable
+indexa por id para no buscar con next(...) en una lista.
+
+Los registros se convierten página por página mientras se lee la tabla y
+keep decide qué productos se guardan, así que los que no interesan (p. ej. los
+que ya tienen imagen) nunca se acumulan.
+
+ProductRecord acepta record.get('images') y record['title'] como un dict, por
+lo que las funciones que reciben productos funcionan igual con los dicts de
+la instantánea de catalog.py.
+
+Uso:
+    from product_records import load_records
+
+    products = load_records(supabase, 'id, title, images', keep=lambda p: p.images)
+    product = products.get(product_id)
+"""
+
+import sys
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+PAGE_SIZE = 1000
+
+# Columnas que se pueden guardar; las demás se ignoran al convertir
+RECORD_FIELDS = ('id', 'title', 'images', 'description', 'category_id', 'updated_at')
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ProductRecord:
+    """Producto con sólo las columnas necesarias; compatible con .get() de dict"""
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, id: str, title: str = '', images: Tuple[str, ...] = (), description: Optional[str] = None,
+                 category_id: Optional[str] = None, updated_at: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.images = images
+        self.description = description
+        self.category_id = category_id
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "ProductRecord":
+        return cls(
+            row['id'],
+            row.get('title') or '',
+            tuple(row.get('images') or ()),
+            row.get('description'),
+            _intern(row.get('category_id')),
+            row.get('updated_at'),
+        )
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in RECORD_FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"<ProductRecord {self.id} {self.title[:40]!r} ({len(self.images)} imágenes)>"
+
+
+class ProductTable:
+    """Registros indexados por id, en orden de lectura"""
+
+    def __init__(self, records: Iterable = ()):
+        self._by_id: Dict[str, ProductRecord] = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record) -> None:
+        if not isinstance(record, ProductRecord):
+            record = ProductRecord.from_row(record)
+        self._by_id[record.id] = record
+
+    def get(self, product_id: str) -> Optional[ProductRecord]:
+        return self._by_id.get(product_id)
+
+    def __getitem__(self, product_id: str) -> ProductRecord:
+        return self._by_id[product_id]
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._by_id
+
+    def __iter__(self) -> Iterator[ProductRecord]:
+        return iter(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+def as_table(products: Iterable) -> ProductTable:
+    """ProductTable a partir de dicts o registros (la misma tabla si ya lo es)"""
+    return products if isinstance(products, ProductTable) else ProductTable(products)
+
+
+def load_records(supabase, columns: str, keep: Optional[Callable[[ProductRecord], bool]] = None,
+                 status: Optional[str] = 'active', page_size: int = PAGE_SIZE,
+                 limit: Optional[int] = None) -> ProductTable:
+    """Lee marketplace_products paginando y convierte cada página al vuelo"""
+    table = ProductTable()
+    offset = 0
+    while True:
+        query = supabase.table('marketplace_products').select(columns)
+        if status:
+            query = query.eq('status', status)
+        page = query.order('id').range(offset, offset + page_size - 1).execute().data or []
+        for row in page:
+            record = ProductRecord.from_row(row)
+            if keep is None or keep(record):
+                table.add(record)
+                if limit and len(table) >= limit:
+                    return table
+        if len(page) < page_size:
+            break
+        offset += page_size
+    return table
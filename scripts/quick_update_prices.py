@@ -3,65 +3,30 @@
 Script optimizado para actualizar precios desde API Syscom en batches
 Versión rápida y eficiente con mejor manejo de errores
 """
-import os
-import sys
 import time
 import requests
-from pathlib import Path
-from supabase import create_client, Client
 
-# Cargar variables de entorno
-env_file = Path(__file__).parent.parent / '.env.local'
-if env_file.exists():
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                os.environ[key.strip()] = value.strip().strip('"').strip("'")
+from catalog_config import supabase, syscom, syscom_api_base
+from etl_metrics import metrics
+from etl_profile import phase, run_main
 
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-SYSCOM_CLIENT_ID = os.environ.get('SYSCOM_CLIENT_ID')
-SYSCOM_CLIENT_SECRET = os.environ.get('SYSCOM_CLIENT_SECRET')
-
-if not all([SUPABASE_URL, SUPABASE_KEY, SYSCOM_CLIENT_ID, SYSCOM_CLIENT_SECRET]):
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# URL de la API de Syscom (se puede apuntar a scripts/fake_syscom_server.py)
+SYSCOM_API_BASE = syscom_api_base()
 
 def get_syscom_token():
-    """Obtener token de acceso de Syscom"""
-    try:
-        response = requests.post(
-            "https://developers.syscom.mx/oauth/token",
-            data={
-                'client_id': SYSCOM_CLIENT_ID,
-                'client_secret': SYSCOM_CLIENT_SECRET,
-                'grant_type': 'client_credentials'
-            },
-            headers={'Content-Type': 'application/x-www-form-urlencoded'},
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json().get('access_token')
-        else:
-            print(f"❌ Error obteniendo token: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"❌ Excepción obteniendo token: {e}")
-        return None
+    """Obtener token de acceso de Syscom (compartido vía catalog_config)"""
+    return syscom.token()
 
 def get_product_price_from_syscom(product_id, access_token):
     """Obtener precio de un producto específico desde Syscom API"""
+    start = time.monotonic()
     try:
         response = requests.get(
-            f"https://developers.syscom.mx/api/v1/productos/{product_id}",
+            f"{SYSCOM_API_BASE}/productos/{product_id}",
             headers={'Authorization': f'Bearer {access_token}'},
             timeout=10
         )
+        metrics.request('syscom', 'productos/detalle', response.status_code, time.monotonic() - start)
         
         if response.status_code == 200:
             data = response.json()
@@ -79,12 +44,21 @@ def get_product_price_from_syscom(product_id, access_token):
             elif precio_lista and float(precio_lista) > 0:
                 return float(precio_lista)
         
+        return None
+    except requests.exceptions.RequestException:
+        metrics.request('syscom', 'productos/detalle', 'error', time.monotonic() - start)
         return None
     except Exception as e:
         return None
 
-def update_prices_batch(limit=1000):
-    """Actualizar precios en batches"""
+def update_prices_batch(limit=1000, productos=None, dry_run=False):
+    """
+    Actualizar precios en batches
+
+    productos: lista ya cargada (p. ej. instantánea de scripts/catalog.py);
+    se filtran los de precio 0 con external_code en lugar de consultar la BD.
+    El precio escrito en la BD también se asigna al dict del producto.
+    """
     print("=" * 80)
     print("ACTUALIZACIÓN RÁPIDA DE PRECIOS - SYSCOM API")
     print("=" * 80)
@@ -102,11 +76,17 @@ def update_prices_batch(limit=1000):
     # Obtener productos con precio 0 que tengan external_code
     print(f"🔍 Buscando productos con precio 0 (límite: {limit})...")
     try:
-        response = supabase.table('marketplace_products').select(
-            'id,title,external_code'
-        ).eq('price', 0).not_.is_('external_code', 'null').limit(limit).execute()
+        if productos is None:
+            response = supabase.table('marketplace_products').select(
+                'id,title,external_code'
+            ).eq('price', 0).not_.is_('external_code', 'null').limit(limit).execute()
+            productos = response.data
+        else:
+            productos = [
+                p for p in productos
+                if not p.get('price') and p.get('external_code')
+            ][:limit]
         
-        productos = response.data
         if not productos:
             print("✅ No hay productos con precio 0 que tengan external_code")
             return
@@ -136,21 +116,28 @@ def update_prices_batch(limit=1000):
             print(f"📊 Progreso: {idx}/{len(productos)} | ✅ {updated} | ❌ {failed} | ⚠️  {no_price}")
         
         # Obtener precio desde Syscom
-        price = get_product_price_from_syscom(external_code, access_token)
+        with phase('syscom_price'):
+            price = get_product_price_from_syscom(external_code, access_token)
         
-        if price and price > 0:
+        if price and price > 0 and dry_run:
+            updated += 1
+        elif price and price > 0:
             try:
                 # Actualizar en Supabase
-                supabase.table('marketplace_products').update({
-                    'price': price,
-                    'updated_at': 'now()'
-                }).eq('id', product_id).execute()
+                with phase('write_db'), metrics.time('db_batch_seconds', op='update', mode='rows'):
+                    supabase.table('marketplace_products').update({
+                        'price': price,
+                        'updated_at': 'now()'
+                    }).eq('id', product_id).execute()
+                metrics.inc('db_rows_total', op='update', mode='rows')
                 
+                producto['price'] = price
                 updated += 1
                 if idx % 10 == 0:  # Mostrar solo cada 10 actualizaciones exitosas
                     print(f"   ✅ {title}... → ${price:.2f}")
             except Exception as e:
                 failed += 1
+                metrics.inc('db_errors_total', op='update')
                 print(f"   ❌ Error actualizando {title}... : {e}")
         else:
             no_price += 1
@@ -174,12 +161,18 @@ def update_prices_batch(limit=1000):
         print(f"🎉 Se actualizaron {updated} productos con precios válidos")
     else:
         print("⚠️  No se pudo actualizar ningún producto")
+    
+    return {'updated': updated, 'failed': failed, 'no_price': no_price, 'total': len(productos)}
 
-if __name__ == "__main__":
+def main():
     import argparse
     parser = argparse.ArgumentParser(description='Actualizar precios desde Syscom API')
     parser.add_argument('--limit', type=int, default=1000, help='Límite de productos a procesar')
     args = parser.parse_args()
+    metrics.export_at_exit('quick_update_prices')
     
     update_prices_batch(limit=args.limit)
 
+if __name__ == "__main__":
+    run_main(main)
+
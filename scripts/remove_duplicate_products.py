@@ -1,26 +1,21 @@
 #!/usr/bin/env python3
 """
-Script para identificar y eliminar productos duplicados por SKU y external_code
+Script para identificar y eliminar productos duplicados por SKU, external_code y título
 Mantiene el producto más reciente o el que tenga mejor información
+
+Lee la tabla completa paginando y une los registros que comparten cualquiera de
+las claves con union-find, así que las cadenas (A y B comparten SKU, B y C
+comparten external_code) se tratan como un solo grupo.
 """
 
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client
+import json
 from collections import defaultdict
-from typing import Dict, List
-
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
+from typing import Dict, Iterable, List, Optional, Tuple
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
+from disjoint_set import DisjointSet
+from mutation_journal import MutationJournal
+from title_matcher import normalize_title
 
 
 def score_product(product: Dict) -> int:
@@ -31,7 +26,7 @@ def score_product(product: Dict) -> int:
     score = 0
     
     # Preferir productos con precio > 0
-    if product.get('price', 0) > 0:
+    if (product.get('price') or 0) > 0:
         score += 100
     
     # Preferir productos con más imágenes
@@ -57,118 +52,197 @@ def score_product(product: Dict) -> int:
     return score
 
 
-def find_duplicates_by_sku() -> Dict[str, List[Dict]]:
-    """Encuentra productos duplicados por SKU"""
-    print("🔍 Buscando duplicados por SKU...")
-    
-    response = supabase.table('marketplace_products').select(
-        'id,title,sku,external_code,price,images,description,created_at,status'
-    ).not_.is_('sku', 'null').neq('sku', '').eq('status', 'active').execute()
-    
-    productos = response.data
-    print(f"   Total productos con SKU: {len(productos)}")
-    
-    # Agrupar por SKU normalizado
-    sku_groups = defaultdict(list)
-    for producto in productos:
-        sku = str(producto.get('sku', '')).strip().upper()
-        if sku:
-            sku_groups[sku].append(producto)
-    
-    # Filtrar solo los que tienen duplicados
-    duplicados = {sku: prods for sku, prods in sku_groups.items() if len(prods) > 1}
-    
-    print(f"   SKUs con duplicados: {len(duplicados)}")
-    return duplicados
+PRODUCT_COLUMNS = 'id,title,sku,external_code,price,images,description,created_at,status'
+PAGE_SIZE = 1000
+DELETE_BATCH_SIZE = 200
 
 
-def find_duplicates_by_external_code() -> Dict[str, List[Dict]]:
-    """Encuentra productos duplicados por external_code"""
-    print("🔍 Buscando duplicados por external_code...")
-    
-    response = supabase.table('marketplace_products').select(
-        'id,title,sku,external_code,price,images,description,created_at,status'
-    ).not_.is_('external_code', 'null').neq('external_code', '').eq('status', 'active').execute()
-    
-    productos = response.data
-    print(f"   Total productos con external_code: {len(productos)}")
-    
-    # Agrupar por external_code normalizado
-    code_groups = defaultdict(list)
-    for producto in productos:
-        external_code = str(producto.get('external_code', '')).strip()
+def iter_active_products(page_size: int = PAGE_SIZE):
+    """
+    Recorre TODOS los productos activos paginando por rango
+    (un solo .select() queda limitado a 1000 filas por PostgREST)
+    """
+    offset = 0
+    while True:
+        response = supabase.table('marketplace_products').select(PRODUCT_COLUMNS).eq(
+            'status', 'active'
+        ).order('id').range(offset, offset + page_size - 1).execute()
+        page = response.data or []
+        yield from page
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+
+def product_keys(product: Dict, keys: List[str]):
+    """Claves de agrupación normalizadas de un producto: (tipo, valor)"""
+    if 'sku' in keys:
+        sku = str(product.get('sku') or '').strip().upper()
+        if sku:
+            yield 'SKU', sku
+    if 'external_code' in keys:
+        external_code = str(product.get('external_code') or '').strip()
         if external_code:
-            code_groups[external_code].append(producto)
-    
-    # Filtrar solo los que tienen duplicados
-    duplicados = {code: prods for code, prods in code_groups.items() if len(prods) > 1}
-    
-    print(f"   External codes con duplicados: {len(duplicados)}")
-    return duplicados
+            yield 'external_code', external_code
+    if 'title' in keys:
+        title = normalize_title(product.get('title') or '')
+        if title:
+            yield 'title', title
+
+
+def find_duplicate_groups(keys: List[str], products_source: Optional[Iterable[Dict]] = None) -> List[Dict]:
+    """
+    Agrupa productos que comparten cualquier clave (SKU, external_code, título)
+    usando union-find, de modo que las cadenas A-B (mismo SKU) y B-C (mismo
+    external_code) terminan en un solo grupo {A, B, C}.
+
+    products_source permite pasar productos ya cargados (p. ej. la instantánea
+    de scripts/catalog.py) en lugar de volver a leer la tabla.
+
+    Retorna una lista de grupos: {'products': [...], 'keys': {(tipo, valor), ...}}
+    """
+    print(f"🔍 Leyendo productos activos (claves: {', '.join(keys)})...")
+
+    products: Dict[str, Dict] = {}
+    first_by_key: Dict[Tuple[str, str], str] = {}
+    dsu = DisjointSet()
+
+    for product in (products_source if products_source is not None else iter_active_products()):
+        if product.get('status', 'active') != 'active':
+            continue
+        product_id = product['id']
+        products[product_id] = product
+        for key in product_keys(product, keys):
+            owner = first_by_key.setdefault(key, product_id)
+            if owner != product_id:
+                dsu.union(owner, product_id)
+        if len(products) % 5000 == 0:
+            print(f"   ... {len(products)} productos leídos")
+
+    print(f"   Total productos activos: {len(products)}")
 
+    groups = []
+    for members in dsu.groups():
+        group_products = [products[pid] for pid in members]
+        shared = defaultdict(int)
+        for product in group_products:
+            for key in product_keys(product, keys):
+                shared[key] += 1
+        groups.append({
+            'products': group_products,
+            'keys': {key for key, count in shared.items() if count > 1},
+        })
 
-def remove_duplicates(duplicados: Dict[str, List[Dict]], by_field: str, execute: bool = False):
-    """Elimina productos duplicados, manteniendo el mejor"""
-    print(f"\n{'🔴 ELIMINANDO' if execute else '🔍 IDENTIFICANDO'} duplicados por {by_field}...")
+    print(f"   Grupos con duplicados: {len(groups)}")
+    return groups
+
+
+def load_review_groups(review_file: str) -> List[Dict]:
+    """
+    Carga los clusters aprobados ("approved": true) de un archivo de revisión
+    generado por find_near_duplicate_products.py
+    """
+    with open(review_file, 'r', encoding='utf-8') as f:
+        review = json.load(f)
+
+    clusters = [c for c in review.get('clusters', []) if c.get('approved')]
+    print(f"📄 Archivo de revisión: {review_file}")
+    print(f"   Clusters aprobados: {len(clusters)} de {len(review.get('clusters', []))}")
+
+    ids = [member['id'] for cluster in clusters for member in cluster['members']]
+    products: Dict[str, Dict] = {}
+    for i in range(0, len(ids), DELETE_BATCH_SIZE):
+        response = supabase.table('marketplace_products').select(PRODUCT_COLUMNS).in_(
+            'id', ids[i:i + DELETE_BATCH_SIZE]
+        ).eq('status', 'active').execute()
+        for product in response.data or []:
+            products[product['id']] = product
+
+    groups = []
+    for cluster in clusters:
+        group_products = [products[m['id']] for m in cluster['members'] if m['id'] in products]
+        if len(group_products) > 1:
+            groups.append({
+                'products': group_products,
+                'keys': {('cluster', str(cluster.get('cluster_id'))), ('jaccard', str(cluster.get('max_jaccard')))},
+            })
+
+    print(f"   Grupos con más de un producto activo: {len(groups)}")
+    return groups
+
+
+def _describe_keys(group_keys) -> str:
+    return ', '.join(f"{kind}={value[:40]}" for kind, value in sorted(group_keys))
+
+
+def soft_delete(rows: List[Dict]) -> List[str]:
+    """Soft delete de un lote: cambiar status a 'deleted'. Retorna los ids afectados"""
+    result = supabase.table('marketplace_products').update({
+        'status': 'deleted'
+    }).in_('id', [row['id'] for row in rows]).execute()
+    return [row['id'] for row in result.data or []]
+
+
+def remove_duplicates(groups: List[Dict], execute: bool = False, resume: Optional[str] = None) -> int:
+    """
+    Elimina productos duplicados (soft delete), manteniendo el mejor de cada grupo.
+    Cada lote queda en una bitácora (mutation_journal.py) antes de aplicarse;
+    resume reutiliza la bitácora de una corrida que se cayó. Cada grupo recibe
+    en 'deleted' los ids que quedaron marcados en la BD (vacío en dry-run).
+    """
+    print(f"\n{'🔴 ELIMINANDO' if execute else '🔍 IDENTIFICANDO'} duplicados...")
     print("=" * 80)
     
     to_delete = []
     to_keep = []
     
-    for key, productos in duplicados.items():
-        # Ordenar por score (mejor primero)
-        productos_sorted = sorted(productos, key=score_product, reverse=True)
-        
-        # Mantener el primero (mejor)
-        keep_product = productos_sorted[0]
+    for group in groups:
+        # El mejor producto según score_product se mantiene
+        keep_product = max(group['products'], key=score_product)
         to_keep.append(keep_product)
         
         # Marcar los demás para eliminar
-        for dup_product in productos_sorted[1:]:
+        for dup_product in group['products']:
+            if dup_product['id'] == keep_product['id']:
+                continue
             to_delete.append({
                 'id': dup_product['id'],
-                'title': dup_product.get('title', 'N/A')[:50],
-                'key': key,
+                'status': dup_product.get('status') or 'active',
+                'title': (dup_product.get('title') or 'N/A')[:50],
+                'key': _describe_keys(group['keys']),
                 'keep_id': keep_product['id'],
-                'keep_title': keep_product.get('title', 'N/A')[:50]
+                'keep_title': (keep_product.get('title') or 'N/A')[:50]
             })
     
     print(f"\n📊 RESUMEN:")
-    print(f"   Total grupos duplicados: {len(duplicados)}")
+    print(f"   Total grupos duplicados: {len(groups)}")
     print(f"   Productos a mantener: {len(to_keep)}")
     print(f"   Productos a eliminar: {len(to_delete)}")
     
     if to_delete:
         print(f"\n📋 PRODUCTOS A ELIMINAR (primeros 10):")
         for i, dup in enumerate(to_delete[:10], 1):
-            print(f"\n{i}. {by_field}: {dup['key']}")
+            print(f"\n{i}. {dup['key']}")
             print(f"   ❌ Eliminar: {dup['id']} - {dup['title']}")
             print(f"   ✅ Mantener: {dup['keep_id']} - {dup['keep_title']}")
     
     if execute and to_delete:
-        print(f"\n🗑️  Eliminando {len(to_delete)} productos duplicados...")
-        deleted_count = 0
-        error_count = 0
-        
-        for dup in to_delete:
-            try:
-                # Soft delete: cambiar status a 'deleted'
-                result = supabase.table('marketplace_products').update({
-                    'status': 'deleted'
-                }).eq('id', dup['id']).execute()
-                
-                if result.data:
-                    deleted_count += 1
-                    print(f"   ✅ Eliminado: {dup['id']} - {dup['title'][:40]}...")
-                else:
-                    error_count += 1
-                    print(f"   ❌ Error eliminando: {dup['id']}")
-            except Exception as e:
-                error_count += 1
-                print(f"   ❌ Error: {dup['id']} - {str(e)[:100]}")
+        journal = MutationJournal.start('remove_duplicate_products', resume=resume)
+        rows = journal.skip_committed([
+            {'id': dup['id'], 'before': {'status': dup['status']}, 'after': {'status': 'deleted'}}
+            for dup in to_delete
+        ])
+        print(f"\n🗑️  Eliminando {len(rows)} productos duplicados en lotes de {DELETE_BATCH_SIZE}...")
+        deleted_count = journal.apply(rows, soft_delete, batch_size=DELETE_BATCH_SIZE)
+        error_count = len(rows) - deleted_count
+        committed = journal.committed
+        for group in groups:
+            group['deleted'] = [product['id'] for product in group['products']
+                                if committed.get(product['id']) == {'status': 'deleted'}]
         
         print(f"\n✅ Eliminados: {deleted_count}")
         print(f"❌ Errores: {error_count}")
+        print(f"💡 Revertir: python3 scripts/mutation_journal.py {journal.path} --rollback --execute")
     
     return len(to_delete)
 
@@ -177,8 +251,11 @@ def main():
     import argparse
     parser = argparse.ArgumentParser(description='Eliminar productos duplicados')
     parser.add_argument('--execute', action='store_true', help='Ejecutar eliminación (por defecto es dry-run)')
-    parser.add_argument('--by-sku', action='store_true', help='Buscar duplicados por SKU')
-    parser.add_argument('--by-external-code', action='store_true', help='Buscar duplicados por external_code')
+    parser.add_argument('--by-sku', action='store_true', help='Agrupar duplicados por SKU')
+    parser.add_argument('--by-external-code', action='store_true', help='Agrupar duplicados por external_code')
+    parser.add_argument('--by-title', action='store_true', help='Agrupar duplicados por título normalizado (no se usa por defecto)')
+    parser.add_argument('--from-review', type=str, help='Usar los clusters aprobados de un archivo de find_near_duplicate_products.py')
+    parser.add_argument('--resume', type=str, help='Reanudar con la bitácora de una corrida anterior (data/journals/...)')
     args = parser.parse_args()
     
     if not args.execute:
@@ -186,32 +263,31 @@ def main():
         print("💡 Usa --execute para eliminar duplicados")
         print()
     
-    total_deleted = 0
-    
-    # Por defecto, buscar por ambos campos
-    if not args.by_sku and not args.by_external_code:
-        args.by_sku = True
-        args.by_external_code = True
-    
+    # Por defecto, unir por SKU y external_code; el título sólo con --by-title
+    keys = []
     if args.by_sku:
-        print("\n" + "=" * 80)
-        print("DUPLICADOS POR SKU")
-        print("=" * 80)
-        duplicados_sku = find_duplicates_by_sku()
-        if duplicados_sku:
-            total_deleted += remove_duplicates(duplicados_sku, 'SKU', args.execute)
-        else:
-            print("✅ No se encontraron duplicados por SKU")
-    
+        keys.append('sku')
     if args.by_external_code:
-        print("\n" + "=" * 80)
-        print("DUPLICADOS POR EXTERNAL_CODE")
+        keys.append('external_code')
+    if args.by_title:
+        keys.append('title')
+    if not keys:
+        keys = ['sku', 'external_code']
+    
+    print("\n" + "=" * 80)
+    if args.from_review:
+        print("DUPLICADOS DESDE ARCHIVO DE REVISIÓN")
         print("=" * 80)
-        duplicados_external = find_duplicates_by_external_code()
-        if duplicados_external:
-            total_deleted += remove_duplicates(duplicados_external, 'external_code', args.execute)
-        else:
-            print("✅ No se encontraron duplicados por external_code")
+        groups = load_review_groups(args.from_review)
+    else:
+        print("DUPLICADOS POR " + " + ".join(k.upper() for k in keys))
+        print("=" * 80)
+        groups = find_duplicate_groups(keys)
+    total_deleted = 0
+    if groups:
+        total_deleted = remove_duplicates(groups, args.execute, args.resume)
+    else:
+        print("✅ No se encontraron duplicados")
     
     print("\n" + "=" * 80)
     print("RESUMEN FINAL")
@@ -224,4 +300,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
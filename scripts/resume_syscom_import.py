@@ -2,84 +2,92 @@
 """
 Script para reanudar la importación de productos de Syscom desde donde se quedó.
 Útil cuando el script principal falla por timeout o interrupciones.
-"""
-
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client
-
-load_dotenv('.env.local')
 
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+Los totales de productos y páginas se piden a la API (antes estaban escritos
+a mano) y, si hay una descarga de syscom_crawler.py, se muestra cuántas
+páginas de cada subcategoría ya se bajaron.
+"""
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
+from catalog_config import supabase
+from syscom_crawler import PROGRESS_FILE, SYSCOM_DIR, SyscomApi, leaves, load_tree, read_progress
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Categorías y sus IDs de Syscom
 CATEGORIAS = {
-    '22': {'nombre': 'Videovigilancia', 'total_paginas': 137},
-    '26': {'nombre': 'Redes e IT', 'total_paginas': 144},
-    '30': {'nombre': 'Energía / Herramientas', 'total_paginas': 107},
+    '22': 'Videovigilancia',
+    '26': 'Redes e IT',
+    '30': 'Energía / Herramientas',
 }
 
+
+def latest_crawl():
+    """Carpeta de la descarga más reciente de syscom_crawler.py (None si no hay)"""
+    crawls = sorted(SYSCOM_DIR.glob(f"crawl_*/{PROGRESS_FILE}"))
+    return crawls[-1].parent if crawls else None
+
+
 def check_import_status():
     """Verifica cuántos productos se han importado de cada categoría"""
     cat_response = supabase.table('marketplace_categories').select('id').eq('slug', 'sistemas').single().execute()
-    
+
     if not cat_response.data:
         print("❌ Categoría 'sistemas' no encontrada")
         return
-    
+
     categoria_id = cat_response.data['id']
-    
+
+    api = SyscomApi()
+    tree = load_tree(api, list(CATEGORIAS))
+    crawl = latest_crawl()
+    progress = read_progress(crawl / PROGRESS_FILE) if crawl else {}
+
     print("=" * 80)
     print("ESTADO DE IMPORTACIÓN DE PRODUCTOS SYSCOM")
     print("=" * 80)
     print()
-    
-    total_importados = 0
-    
-    for cat_id, cat_info in CATEGORIAS.items():
-        # Contar productos con external_code que empiecen con números típicos de Syscom
-        # (Los IDs de Syscom son numéricos)
-        count_response = supabase.table('marketplace_products').select('id', count='exact').eq('category_id', categoria_id).not_.is_('external_code', 'null').execute()
-        
-        # Estimación: asumimos distribución uniforme (no perfecto pero útil)
-        estimated = count_response.count // 3  # Dividir entre 3 categorías
-        
-        print(f"📦 {cat_info['nombre']} (ID: {cat_id}):")
-        print(f"   Productos estimados importados: ~{estimated}")
-        print(f"   Páginas totales: {cat_info['total_paginas']}")
-        print(f"   Productos por página: ~60")
-        print(f"   Total esperado: ~{cat_info['total_paginas'] * 60}")
+
+    total_esperado = 0
+
+    for cat_id, nombre in CATEGORIAS.items():
+        data = api.get('/productos', {'categoria': cat_id, 'pagina': 1}, endpoint='productos') or {}
+        cantidad = int(data.get('cantidad') or 0)
+        total_esperado += cantidad
+        cat_leaves = leaves(tree, cat_id)
+
+        print(f"📦 {nombre} (ID: {cat_id}):")
+        print(f"   Productos en Syscom: {cantidad}")
+        print(f"   Páginas totales: {data.get('paginas', '?')}")
+        print(f"   Subcategorías hoja: {len(cat_leaves)}")
+        if progress:
+            known = [progress[leaf] for leaf in cat_leaves if leaf in progress]
+            pages_done = sum(len(state['done']) for state in known)
+            pages_total = sum(state['paginas'] for state in known)
+            print(f"   Descarga {crawl.name}: {pages_done}/{pages_total} páginas "
+                  f"({len(known)}/{len(cat_leaves)} subcategorías iniciadas)")
         print()
-        
-        total_importados += estimated
-    
+
     # Contar total real
     total_real = supabase.table('marketplace_products').select('id', count='exact').eq('category_id', categoria_id).not_.is_('external_code', 'null').execute()
-    
+
     print("=" * 80)
     print(f"📊 Total de productos Syscom importados: {total_real.count}")
-    print(f"📊 Total esperado: ~23,145")
-    print(f"📊 Progreso: {(total_real.count / 23145) * 100:.1f}%")
+    print(f"📊 Total esperado: ~{total_esperado:,}")
+    if total_esperado:
+        print(f"📊 Progreso: {(total_real.count / total_esperado) * 100:.1f}%")
     print("=" * 80)
     print()
-    
-    if total_real.count < 23145:
+
+    if total_real.count < total_esperado:
         print("💡 Para continuar la importación:")
         print("   python3 scripts/import_all_syscom_products.py --execute")
         print()
         print("💡 Para importar solo una categoría específica:")
-        print("   python3 scripts/import_all_syscom_products.py --execute --category 22  # Videovigilancia")
-        print("   python3 scripts/import_all_syscom_products.py --execute --category 26  # Redes e IT")
-        print("   python3 scripts/import_all_syscom_products.py --execute --category 30  # Energía")
+        for cat_id, nombre in CATEGORIAS.items():
+            print(f"   python3 scripts/import_all_syscom_products.py --execute --category {cat_id}  # {nombre}")
+        if crawl:
+            print()
+            print("💡 Para continuar la descarga por subcategorías:")
+            print(f"   python3 scripts/syscom_crawler.py --resume {crawl}")
 
 if __name__ == "__main__":
     check_import_status()
-
@@ -2,23 +2,13 @@
 """
 Script para buscar productos de Syscom en la categoría sistemas
 y verificar si hay cámaras termográficas disponibles.
-"""
-
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+Todas las palabras se buscan en una sola llamada con catalog_search.
+"""
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno SUPABASE_URL y SUPABASE_KEY no configuradas")
-    sys.exit(1)
+from catalog_config import supabase
+from catalog_search import search_keywords, unique_products
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def search_syscom_in_sistemas():
     """Busca productos de Syscom en la categoría sistemas"""
@@ -44,11 +34,22 @@ def search_syscom_in_sistemas():
     print(f"📊 Total de productos en sistemas: {total_products}")
     print()
     
-    # Buscar productos que mencionen Syscom
-    print("🔍 Buscando productos que mencionen 'Syscom'...")
-    syscom_response = supabase.table('marketplace_products').select('id,title,description,price,images').eq('category_id', cat_id).eq('status', 'active').or_('title.ilike.%syscom%,description.ilike.%syscom%').limit(20).execute()
-    
-    syscom_products = syscom_response.data or []
+    thermal_terms = [
+        'termografica',
+        'termográfica', 
+        'thermal',
+        'cámara térmica',
+        'camara termica',
+        'flir',
+        'hikvision thermal',
+        'thermal camera'
+    ]
+
+    # Buscar 'syscom' y los términos de cámaras termográficas en una sola llamada
+    print("🔍 Buscando productos que mencionen 'Syscom' y cámaras termográficas...")
+    hits = search_keywords(supabase, ['syscom'] + thermal_terms, category_id=cat_id, limit=20)
+
+    syscom_products = hits['syscom']['products']
     print(f"✅ Encontrados {len(syscom_products)} productos que mencionan Syscom")
     print()
     
@@ -69,43 +70,19 @@ def search_syscom_in_sistemas():
     print("=" * 80)
     print()
     
-    thermal_terms = [
-        'termografica',
-        'termográfica', 
-        'thermal',
-        'cámara térmica',
-        'camara termica',
-        'flir',
-        'hikvision thermal',
-        'thermal camera'
-    ]
-    
-    thermal_products = []
     seen_ids = set()
-    
     for term in thermal_terms:
+        hit = hits[term]
         print(f"Buscando: '{term}'...")
-        # Buscar en título
-        title_results = supabase.table('marketplace_products').select('id,title,price').eq('category_id', cat_id).eq('status', 'active').ilike('title', f'%{term}%').limit(10).execute()
-        # Buscar en descripción
-        desc_results = supabase.table('marketplace_products').select('id,title,price').eq('category_id', cat_id).eq('status', 'active').ilike('description', f'%{term}%').limit(10).execute()
-        
-        results = []
-        for item in (title_results.data or []):
-            if item['id'] not in seen_ids:
-                results.append(item)
-                seen_ids.add(item['id'])
-        for item in (desc_results.data or []):
-            if item['id'] not in seen_ids:
-                results.append(item)
-                seen_ids.add(item['id'])
-        
-        if results:
-            print(f"  ✅ Encontrados {len(results)} productos")
-            thermal_products.extend(results)
+        new_ids = {p['id'] for p in hit['products']} - seen_ids
+        seen_ids |= new_ids
+        if hit['count']:
+            print(f"  ✅ Encontrados {hit['count']} productos ({len(new_ids)} nuevos)")
         else:
             print(f"  ❌ No encontrados")
-    
+
+    thermal_products = unique_products(hits, thermal_terms)
+
     print()
     print("=" * 80)
     print(f"RESUMEN:")
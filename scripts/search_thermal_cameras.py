@@ -2,23 +2,13 @@
 """
 Script para buscar cámaras termográficas en la base de datos del marketplace
 y verificar si hay productos de Syscom relacionados.
-"""
-
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
 
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+Todas las palabras se buscan en una sola llamada con catalog_search.
+"""
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno SUPABASE_URL y SUPABASE_KEY no configuradas")
-    sys.exit(1)
+from catalog_config import supabase
+from catalog_search import search_keywords, unique_products
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Términos de búsqueda para cámaras termográficas
 SEARCH_TERMS = [
@@ -40,43 +30,17 @@ def search_thermal_cameras():
     """Busca productos relacionados con cámaras termográficas"""
     print("🔍 Buscando cámaras termográficas en el marketplace...\n")
     
-    all_results = []
-    
+    hits = search_keywords(supabase, SEARCH_TERMS, limit=50)
+
     for term in SEARCH_TERMS:
-        print(f"Buscando: '{term}'...")
-        
-        # Buscar en título
-        response_title = supabase.table('marketplace_products').select('*').ilike('title', f'%{term}%').eq('status', 'active').limit(50).execute()
-        
-        # Buscar en descripción
-        response_desc = supabase.table('marketplace_products').select('*').ilike('description', f'%{term}%').eq('status', 'active').limit(50).execute()
-        
-        # Combinar resultados
-        results = []
-        seen_ids = set()
-        
-        for item in (response_title.data or []):
-            if item['id'] not in seen_ids:
-                results.append(item)
-                seen_ids.add(item['id'])
-        
-        for item in (response_desc.data or []):
-            if item['id'] not in seen_ids:
-                results.append(item)
-                seen_ids.add(item['id'])
-        
-        if results:
-            print(f"  ✅ Encontrados {len(results)} productos con '{term}'")
-            all_results.extend(results)
+        count = hits[term]['count']
+        if count:
+            print(f"  ✅ Encontrados {count} productos con '{term}'")
         else:
             print(f"  ❌ No se encontraron productos con '{term}'")
-    
-    # Eliminar duplicados
-    unique_results = {}
-    for item in all_results:
-        if item['id'] not in unique_results:
-            unique_results[item['id']] = item
-    
+
+    unique_results = {product['id']: product for product in unique_products(hits)}
+
     print(f"\n📊 Total de productos únicos encontrados: {len(unique_results)}\n")
     
     if unique_results:
@@ -109,16 +73,16 @@ def check_syscom_products():
     print("=" * 80)
     
     # Buscar productos que mencionen Syscom
-    response = supabase.table('marketplace_products').select('*').or_('title.ilike.%syscom%,description.ilike.%syscom%').eq('status', 'active').limit(20).execute()
+    products = search_keywords(supabase, ['syscom'], limit=20)['syscom']['products']
     
-    if response.data:
-        print(f"\n✅ Encontrados {len(response.data)} productos relacionados con Syscom:")
-        for product in response.data[:5]:  # Mostrar solo los primeros 5
+    if products:
+        print(f"\n✅ Encontrados {len(products)} productos relacionados con Syscom:")
+        for product in products[:5]:  # Mostrar solo los primeros 5
             print(f"  - {product['title']}")
     else:
         print("\n❌ No se encontraron productos explícitamente marcados como Syscom")
     
-    return response.data if response.data else []
+    return products
 
 if __name__ == "__main__":
     print("=" * 80)
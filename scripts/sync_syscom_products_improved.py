@@ -2,45 +2,26 @@
 """
 Script mejorado para sincronizar productos desde la API de Syscom
 Basado en las mejores prácticas de import_all_syscom_products.py
+
+Para las corridas cada hora que sólo actualizan precios y existencias usar
+scripts/syscom_price_sync.py (no reescribe título, descripción ni imágenes).
 """
 
-import os
 import sys
-import time
-import requests
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import queue
+import threading
+from pathlib import Path
 from typing import Dict, Optional, List
 
-# Load environment variables
-load_dotenv('.env.local')
-
-# Configuration
-SYSCOM_CLIENT_ID = os.getenv("SYSCOM_CLIENT_ID")
-SYSCOM_CLIENT_SECRET = os.getenv("SYSCOM_CLIENT_SECRET")
-SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-if not SYSCOM_CLIENT_ID or not SYSCOM_CLIENT_SECRET:
-    print("❌ Error: Missing Syscom Credentials.")
-    print("Please add SYSCOM_CLIENT_ID and SYSCOM_CLIENT_SECRET to your .env.local file.")
-    sys.exit(1)
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Missing Supabase Credentials.")
-    sys.exit(1)
-
-# Initialize Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# Syscom API Config
-BASE_URL = "https://developers.syscom.mx/api/v1"
-TOKEN_URL = "https://developers.syscom.mx/oauth/token"
-RATE_LIMIT_DELAY = 1.1  # Respeta límite de 60 req/min
+from catalog_config import supabase, syscom, syscom_rate_limit_delay
+from catalog_writer import BulkProductWriter, insert_products
+from etl_metrics import metrics
+from etl_profile import phase, run_main
+from syscom_currency import CURRENCY_COLUMNS, CurrencyNormalizer
+from syscom_crawler import TREE_CACHE, CategoryCrawler, QuotaLimiter, SyscomApi, leaves, load_tree
 
-# Cache de token
-access_token = None
-token_expiry = 0
+# Syscom API Config (SYSCOM_API_BASE se puede apuntar a scripts/fake_syscom_server.py)
+RATE_LIMIT_DELAY = syscom_rate_limit_delay()  # Respeta límite de 60 req/min
 
 # Mapping Syscom Categories (ID) to Sumee Subcategory Slugs
 SYSCOM_MAP = {
@@ -61,32 +42,11 @@ _cached_subcategory_map = {}
 
 
 def get_access_token():
-    """Obtiene token de acceso con caché"""
-    global access_token, token_expiry
-    
-    # Verificar si el token aún es válido (con margen de 1 hora)
-    if access_token and token_expiry > (time.time() * 1000) - 3600000:
-        return access_token
-    
-    print("🔑 Authenticating with Syscom...")
-    data = {
-        "client_id": SYSCOM_CLIENT_ID,
-        "client_secret": SYSCOM_CLIENT_SECRET,
-        "grant_type": "client_credentials"
-    }
-    try:
-        res = requests.post(TOKEN_URL, data=data, headers={"Content-Type": "application/x-www-form-urlencoded"})
-        res.raise_for_status()
-        token_data = res.json()
-        access_token = token_data["access_token"]
-        token_expiry = (time.time() * 1000) + (token_data["expires_in"] * 1000)
-        print("✅ Authentication successful!")
-        return access_token
-    except Exception as e:
-        print(f"❌ Auth failed: {e}")
-        if res:
-            print(res.text)
+    """Obtiene token de acceso (caché compartida en catalog_config)"""
+    token = syscom.token()
+    if not token:
         sys.exit(1)
+    return token
 
 
 def get_sistemas_uuid():
@@ -132,6 +92,35 @@ def get_valid_seller_id():
     return "0ad1a921-8b5e-4fa4-a5ac-6bb5299bdae8"
 
 
+def syscom_prices(p: Dict):
+    """
+    (price, original_price) de un producto de Syscom
+    MEJORADO: misma lógica que import_all_syscom_products.py
+    """
+    precios = p.get('precios') or p.get('precio') or {}
+    precio_lista = None
+    precio_especial = None
+    
+    if isinstance(precios, dict):
+        precio_lista = precios.get('precio_lista')
+        precio_especial = precios.get('precio_especial') or precios.get('precio_descuento')
+    
+    # PRIORIDAD: precio_especial es el precio principal
+    if precio_especial and float(precio_especial) > 0:
+        price = float(precio_especial)
+    elif precio_lista and float(precio_lista) > 0:
+        price = float(precio_lista)
+    else:
+        price = 0  # "Consultar precio"
+    
+    # original_price solo si hay descuento
+    original_price = None
+    if precio_especial and precio_lista and float(precio_especial) > 0 and float(precio_lista) > 0:
+        if float(precio_especial) < float(precio_lista):
+            original_price = float(precio_lista)
+    return price, original_price
+
+
 def map_syscom_product(p: Dict, sistemas_uuid: str, subcat_uuid: str, seller_id: str) -> Optional[Dict]:
     """
     Mapea un producto de Syscom al formato del marketplace
@@ -166,28 +155,7 @@ def map_syscom_product(p: Dict, sistemas_uuid: str, subcat_uuid: str, seller_id:
             elif isinstance(img, str) and img not in imagenes:
                 imagenes.append(img)
     
-    # Price handling (MEJORADO - misma lógica que import_all_syscom_products.py)
-    precios = p.get('precios', {})
-    precio_lista = None
-    precio_especial = None
-    
-    if isinstance(precios, dict):
-        precio_lista = precios.get('precio_lista')
-        precio_especial = precios.get('precio_especial') or precios.get('precio_descuento')
-    
-    # PRIORIDAD: precio_especial es el precio principal
-    if precio_especial and float(precio_especial) > 0:
-        price = float(precio_especial)
-    elif precio_lista and float(precio_lista) > 0:
-        price = float(precio_lista)
-    else:
-        price = 0  # "Consultar precio"
-    
-    # original_price solo si hay descuento
-    original_price = None
-    if precio_especial and precio_lista and float(precio_especial) > 0 and float(precio_lista) > 0:
-        if float(precio_especial) < float(precio_lista):
-            original_price = float(precio_lista)
+    price, original_price = syscom_prices(p)
     
     # External code y SKU (CRÍTICO - faltaba en el código original)
     external_code = str(p.get('producto_id') or p.get('id', ''))
@@ -217,132 +185,228 @@ def map_syscom_product(p: Dict, sistemas_uuid: str, subcat_uuid: str, seller_id:
     return payload
 
 
-def sync_products(token: str, sistemas_uuid: str, subcat_map: Dict, seller_id: str, max_pages: int = 100):
+# Pipeline: fetch -> map -> write, conectados por colas acotadas
+FETCH_QUEUE_PAGES = 4       # Páginas descargadas esperando a ser mapeadas
+WRITE_QUEUE_SIZE = 500      # Productos mapeados esperando a ser escritos
+WRITE_BATCH_SIZE = 100
+CRAWL_WORKERS = 4           # Subcategorías descargándose a la vez (misma cuota)
+PAGE_SIZE = 1000
+_DONE = object()
+
+
+def fetch_existing_products(sistemas_uuid: str) -> Dict[str, Dict]:
+    """external_code -> {id, price} de los productos ya cargados (paginado)"""
+    existing: Dict[str, Dict] = {}
+    offset = 0
+    while True:
+        res = supabase.table("marketplace_products").select("id,external_code,price").eq(
+            "category_id", sistemas_uuid
+        ).not_.is_("external_code", "null").order("id").range(offset, offset + PAGE_SIZE - 1).execute()
+        batch = res.data or []
+        for item in batch:
+            existing[str(item['external_code'])] = item
+        if len(batch) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return existing
+
+
+def fetch_pages(headers: Dict, syscom_map: Dict, subcat_map: Dict, max_pages: int,
+                out_queue: queue.Queue, stop: threading.Event, workers: int = CRAWL_WORKERS,
+                refresh_tree: bool = False, tree_cache: Path = TREE_CACHE):
+    """
+    Etapa 1 (hilo): descarga páginas con syscom_crawler
+
+    Cada categoría del mapeo se divide en sus subcategorías hoja (árbol de la
+    API, en caché) y las hojas se descargan en paralelo compartiendo el rate
+    limit de la API; max_pages es por subcategoría. Si las colas están llenas,
+    put() bloquea los hilos de descarga hasta que la escritura alcance.
+    """
+    try:
+        api = SyscomApi(limiter=QuotaLimiter(RATE_LIMIT_DELAY), headers=headers)
+        roots = {}
+        for syscom_id, sumee_slug in syscom_map.items():
+            if sumee_slug not in subcat_map:
+                print(f"⚠️  Skipping Syscom ID {syscom_id} because '{sumee_slug}' subcategory not found in DB.")
+                continue
+            roots[syscom_id] = subcat_map[sumee_slug]
+        if not roots:
+            return
+
+        tree = load_tree(api, list(roots), refresh=refresh_tree, path=tree_cache, workers=workers)
+        leaf_subcats: Dict[str, str] = {}
+        for syscom_id, subcat_uuid in roots.items():
+            syscom_leaves = leaves(tree, syscom_id)
+            print(f"\n📡 Syscom ID {syscom_id} -> '{syscom_map[syscom_id]}': {len(syscom_leaves)} subcategorías")
+            for leaf in syscom_leaves:
+                leaf_subcats.setdefault(leaf, subcat_uuid)
+
+        def on_page(leaf: str, page: int, products: List[Dict], data: Dict):
+            metrics.set('queue_depth', out_queue.qsize(), queue='syscom_pages')
+            while not stop.is_set():
+                try:
+                    out_queue.put((products, leaf_subcats[leaf], page), timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        crawler = CategoryCrawler(api, workers=workers, max_pages=max_pages, on_page=on_page, stop=stop)
+        stats = crawler.crawl(leaf_subcats)
+        print(f"\n📡 Descarga: {stats['pages']} páginas de {stats['leaves']} subcategorías | "
+              f"{stats['products']} productos ({stats['duplicates']} repetidos entre subcategorías)")
+        if stats['failed_pages']:
+            print(f"   ❌ Páginas con error: {stats['failed_pages']}")
+    finally:
+        out_queue.put(_DONE)
+
+
+def map_pages(in_queue: queue.Queue, out_queue: queue.Queue, sistemas_uuid: str,
+              seller_id: str, stats: Dict[str, int], normalizer: Optional[CurrencyNormalizer] = None):
+    """Etapa 2 (hilo): registra la moneda de los precios de cada página y mapea cada producto"""
+    try:
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                return
+            products, subcat_uuid, page = item
+            if normalizer is not None:
+                normalizer.normalize_products(products)
+            for p in products:
+                payload = map_syscom_product(p, sistemas_uuid, subcat_uuid, seller_id)
+                if not payload:
+                    stats['skipped'] += 1
+                    continue
+                if normalizer is not None:
+                    payload.update(normalizer.currency_fields(p))
+                out_queue.put((payload, page))
+    finally:
+        out_queue.put(_DONE)
+
+
+def write_products(in_queue: queue.Queue, existing: Dict[str, Dict], seller_id: str,
+                   stats: Dict[str, int]):
+    """
+    Etapa 3: escribe en lotes (inserts de WRITE_BATCH_SIZE y updates por RPC)
+    """
+    inserts: List[Dict] = []
+
+    def flush_inserts():
+        inserted, errors = insert_products(supabase, inserts)
+        stats['synced'] += inserted
+        stats['errors'] += errors
+        inserts.clear()
+
+    with BulkProductWriter(supabase, batch_size=WRITE_BATCH_SIZE, verbose=False) as writer:
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                break
+            payload, page = item
+            metrics.set('queue_depth', in_queue.qsize(), queue='syscom_write')
+            external_code = payload['external_code']
+            title = payload['title']
+            price = payload['price']
+
+            current = existing.get(external_code)
+            if current is not None:
+                # Solo actualizar si el precio cambió o es > 0
+                if current.get('id') and (current.get('price', 0) != price or price > 0):
+                    writer.add(current['id'], {
+                        "price": price,
+                        "original_price": payload.get('original_price'),
+                        "seller_id": seller_id,
+                        "images": payload['images'],
+                        **{field: payload[field] for field in CURRENCY_COLUMNS if field in payload},
+                    })
+                    stats['updated'] += 1
+                    if page <= 3:  # Solo mostrar primeros productos
+                        print(f"     ~ Updated: {title[:30]}... -> ${price}")
+                else:
+                    stats['skipped'] += 1
+                continue
+
+            inserts.append(payload)
+            existing[external_code] = {'id': None, 'price': price}  # Evitar duplicados en la misma corrida
+            if page <= 3:
+                print(f"     + Inserted: {title[:30]}... ${price}")
+            if len(inserts) >= WRITE_BATCH_SIZE:
+                flush_inserts()
+
+        flush_inserts()
+    stats['errors'] += writer.stats['errors']
+
+
+def sync_products(token: str, sistemas_uuid: str, subcat_map: Dict, seller_id: str, max_pages: int = 100,
+                  syscom_map: Optional[Dict] = None, workers: int = CRAWL_WORKERS, refresh_tree: bool = False):
     """
     Sincroniza productos desde Syscom
     MEJORADO: Procesa todas las páginas disponibles, busca duplicados por external_code
+
+    Descarga, mapeo y escritura corren en paralelo conectados por colas
+    acotadas: mientras se escribe un lote ya se está descargando la siguiente
+    página, y si la BD va más lenta las colas se llenan y frenan la descarga.
     """
     headers = {"Authorization": f"Bearer {token}"}
-    
-    total_synced = 0
-    total_updated = 0
-    total_skipped = 0
-    total_errors = 0
+    stats = {'synced': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
     
     # Obtener external_codes existentes en batch (optimización)
     print("🔍 Obteniendo productos existentes para evitar duplicados...")
     try:
-        existing_response = supabase.table("marketplace_products").select("external_code").eq("category_id", sistemas_uuid).not_.is_("external_code", "null").execute()
-        existing_codes = {str(item['external_code']) for item in (existing_response.data or [])}
-        print(f"✅ Encontrados {len(existing_codes)} productos existentes")
+        with phase('load_existing'):
+            existing = fetch_existing_products(sistemas_uuid)
+        print(f"✅ Encontrados {len(existing)} productos existentes")
     except Exception as e:
         print(f"⚠️  No se pudieron obtener productos existentes: {e}")
-        existing_codes = set()
-    
-    for syscom_id, sumee_slug in SYSCOM_MAP.items():
-        if sumee_slug not in subcat_map:
-            print(f"⚠️  Skipping Syscom ID {syscom_id} because '{sumee_slug}' subcategory not found in DB.")
-            continue
-            
-        subcat_uuid = subcat_map[sumee_slug]
-        print(f"\n📡 Fetching products for Syscom ID {syscom_id} -> '{sumee_slug}'...")
-        
-        page = 1
-        total_pages = 1  # Se actualizará con la primera respuesta
-        
-        while page <= total_pages and page <= max_pages:
-            try:
-                print(f"   Reading page {page}/{total_pages}...")
-                url = f"{BASE_URL}/productos"
-                params = {"categoria": syscom_id, "pagina": page}
-
-                res = requests.get(url, headers=headers, params=params, timeout=60)
-                res.raise_for_status()
-                
-                data = res.json()
-                products = data.get('productos', [])
-                total_in_cat = data.get('cantidad', 0)
-                total_pages = data.get('paginas', 1)  # ✅ Actualizar total de páginas
-                
-                if not products:
-                    print("   No products found on this page. Stopping category.")
-                    break
-
-                print(f"   Found {len(products)} products (Total in Syscom: {total_in_cat}, Pages: {total_pages}). Syncing...")
-                
-                for p in products:
-                    # Mapear producto
-                    payload = map_syscom_product(p, sistemas_uuid, subcat_uuid, seller_id)
-                    
-                    if not payload:
-                        total_skipped += 1
-                        continue
-                    
-                    external_code = payload['external_code']
-                    title = payload['title']
-                    price = payload['price']
-                    
-                    # Verificar si ya existe por external_code (MEJORADO)
-                    if external_code in existing_codes:
-                        # UPDATE existing product
-                        try:
-                            existing = supabase.table("marketplace_products").select("id,price").eq("external_code", external_code).single().execute()
-                            if existing.data:
-                                existing_id = existing.data['id']
-                                # Solo actualizar si el precio cambió o es 0
-                                if existing.data.get('price', 0) != price or price > 0:
-                                    supabase.table("marketplace_products").update({
-                                        "price": price,
-                                        "original_price": payload.get('original_price'),
-                                        "seller_id": seller_id,
-                                        "images": payload['images'],
-                                    }).eq("id", existing_id).execute()
-                                    total_updated += 1
-                                    if page <= 3:  # Solo mostrar primeros productos
-                                        print(f"     ~ Updated: {title[:30]}... -> ${price}")
-                                else:
-                                    total_skipped += 1
-                        except Exception as update_err:
-                            print(f"     ❌ Update Failed: {update_err}")
-                            total_errors += 1
-                    else:
-                        # INSERT new product
-                        try:
-                            supabase.table("marketplace_products").insert(payload).execute()
-                            existing_codes.add(external_code)  # Agregar a cache
-                            total_synced += 1
-                            if page <= 3:  # Solo mostrar primeros productos
-                                print(f"     + Inserted: {title[:30]}... ${price}")
-                        except Exception as insert_err:
-                            print(f"     ❌ Insert Failed: {insert_err}")
-                            total_errors += 1
-                    
-                    time.sleep(0.01)  # Pequeño delay entre productos
-                
-                page += 1
-                time.sleep(RATE_LIMIT_DELAY)  # ✅ Rate limiting mejorado
-                
-            except Exception as e:
-                print(f"❌ Error syncing page {page} of ID {syscom_id}: {e}")
-                import traceback
-                traceback.print_exc()
-                break
+        existing = {}
+
+    pages_queue: queue.Queue = queue.Queue(maxsize=FETCH_QUEUE_PAGES)
+    write_queue: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    stop = threading.Event()
+    normalizer = CurrencyNormalizer()
+    normalizer.prepare(supabase)
+
+    fetcher = threading.Thread(
+        target=fetch_pages, name="syscom-fetch", daemon=True,
+        args=(headers, syscom_map or SYSCOM_MAP, subcat_map, max_pages, pages_queue, stop),
+        kwargs={'workers': workers, 'refresh_tree': refresh_tree},
+    )
+    mapper = threading.Thread(
+        target=map_pages, name="syscom-map", daemon=True,
+        args=(pages_queue, write_queue, sistemas_uuid, seller_id, stats, normalizer),
+    )
+    fetcher.start()
+    mapper.start()
+    try:
+        with phase('pipeline'):
+            write_products(write_queue, existing, seller_id, stats)
+    finally:
+        stop.set()
+        # Vaciar colas para que los hilos no queden bloqueados en put()
+        for q in (pages_queue, write_queue):
+            while not q.empty():
+                q.get_nowait()
+        fetcher.join(timeout=5)
+        mapper.join(timeout=5)
 
     print(f"\n✅ Sync Complete.")
-    print(f"   ✅ Nuevos productos: {total_synced}")
-    print(f"   🔄 Actualizados: {total_updated}")
-    print(f"   ⏭️  Omitidos: {total_skipped}")
-    print(f"   ❌ Errores: {total_errors}")
-    print(f"   📊 Total procesado: {total_synced + total_updated + total_skipped}")
+    print(f"   ✅ Nuevos productos: {stats['synced']}")
+    print(f"   🔄 Actualizados: {stats['updated']}")
+    print(f"   ⏭️  Omitidos: {stats['skipped']}")
+    print(f"   ❌ Errores: {stats['errors']}")
+    print(f"   📊 Total procesado: {stats['synced'] + stats['updated'] + stats['skipped']}")
+    normalizer.report()
 
 
 def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Sincronizar productos de Syscom')
-    parser.add_argument('--max-pages', type=int, default=100, help='Máximo de páginas por categoría')
+    parser.add_argument('--max-pages', type=int, default=100, help='Máximo de páginas por subcategoría')
+    parser.add_argument('--workers', type=int, default=CRAWL_WORKERS, help='Subcategorías descargándose a la vez')
+    parser.add_argument('--refresh-tree', action='store_true', help='Volver a pedir el árbol de categorías a la API')
     parser.add_argument('--category', type=str, help='Sincronizar solo una categoría específica (ID de Syscom)')
     args = parser.parse_args()
+    metrics.export_at_exit('sync_syscom_products')
     
     token = get_access_token()
     sistemas_uuid = get_sistemas_uuid()
@@ -369,9 +433,10 @@ def main():
             print(f"❌ Categoría {args.category} no encontrada en el mapeo")
             sys.exit(1)
     
-    sync_products(token, sistemas_uuid, subcat_map, seller_id, max_pages=args.max_pages)
+    sync_products(token, sistemas_uuid, subcat_map, seller_id, max_pages=args.max_pages, syscom_map=syscom_map,
+                  workers=args.workers, refresh_tree=args.refresh_tree)
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
 
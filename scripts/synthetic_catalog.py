@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Generador de catálogos sintéticos a escala (10x–100x producción)
+
+Genera, de forma reproducible (--seed), los mismos formatos que consumen los
+scripts del catálogo:
+
+- truper_catalog_full.csv : mismo encabezado que data/truper_catalog_full.csv
+                            (línea de título + columnas), ~15.8k filas x escala
+- syscom_pages/<cat>/pagina_<n>.json : respuestas de /productos como la API de
+                            Syscom (~23k productos x escala); sirven como
+                            --catalog de scripts/fake_syscom_server.py
+- marketplace_products.jsonl : instantánea de marketplace_products con los
+                            productos "importados" de ambos proveedores
+- precios.csv             : archivo sku,precio,precio_original para
+                            update_prices_from_csv.py
+- manifest.json           : parámetros y conteos reales de cada anomalía
+                            (sirve de referencia para validar los scripts)
+
+Tasas controlables (fracción de filas):
+- --duplicate-rate       copias exactas (mismo SKU/título) o casi duplicados
+                         entre proveedores (Truper re-publicado como Syscom)
+- --missing-image-rate   productos sin imágenes o con ruta local inexistente
+- --duplicate-image-rate imágenes repetidas dentro del mismo producto
+- --price-anomaly-rate   precio 0, atípico (x100) u original_price < price;
+                         en precios.csv: vacío, 0 o con formato "$1,234.50"
+
+Uso:
+    python3 scripts/synthetic_catalog.py --scale 10
+    python3 scripts/synthetic_catalog.py --scale 100 --output data/synthetic/x100 --duplicate-rate 0.05
+
+    from synthetic_catalog import generate
+    manifest = generate(Path('data/synthetic/x10'), scale=10)
+"""
+
+import csv
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fake_syscom_server import DEFAULT_PAGE_SIZE, synthetic_product
+
+BASE_TRUPER_ROWS = 15_800
+BASE_SYSCOM_PRODUCTS = 23_000
+SYSCOM_CATEGORIES = {'22': 0.45, '26': 0.30, '30': 0.15, '37': 0.10}
+TRUPER_CONTACT_PHONE = '5636741156'
+SYSCOM_SELLER_ID = '0ad1a921-8b5e-4fa4-a5ac-6bb5299bdae8'
+DEFAULT_OUTPUT = Path(__file__).parent.parent / "data" / "synthetic"
+DEFAULT_RATES = {
+    'duplicate_rate': 0.03,
+    'missing_image_rate': 0.08,
+    'duplicate_image_rate': 0.05,
+    'price_anomaly_rate': 0.02,
+}
+IMPORTED_FRACTION = 0.95      # Filas del proveedor que existen en marketplace_products
+PRICE_UPDATE_FRACTION = 0.5   # SKUs del marketplace que aparecen en precios.csv
+
+TRUPER_TITLE = 'catálogo TRUPER 2025.xlsx - catálogo TRUPER 2025'
+TRUPER_HEADERS = [
+    'código', 'clave', 'descripción', 'margen de mercado', 'caja', 'master', 'precio', 'unidad', 'ean',
+    'precio mínimo de venta', 'alta rotación', 'precio mayoreo con IVA', 'precio distribuidor con IVA',
+    'precio público con IVA', 'precio mayoreo sin IVA', 'precio distribuidor sin IVA', 'precio público sin IVA',
+    'Marca', 'Precio Medio Mayoreo sin IVA', 'Precio Medio Mayoreo con IVA', 'Codigo SAT', 'Descripcion SAT',
+    'Familia', 'Descripción Familia', 'Peso[Kg]', 'Volumen[cm3]',
+]
+TRUPER_PREFIXES = ['PET', 'RMAX', 'MADE', 'TALI', 'DEST', 'MART', 'PINZ', 'LLAV', 'SIER', 'ESME', 'CINT', 'NIVE',
+                   'TAL', 'COMP', 'MANG', 'FLEX', 'CARR', 'ESCA', 'BROC', 'DISC']
+TRUPER_ITEMS = [
+    ('Llave ajustable', 'cromada mango de PVC'), ('Rotomartillo SDS Max', '1,500 W'),
+    ('Martillo demoledor', '12 kg'), ('Taladro inalámbrico', '20 V, 1/2"'), ('Desarmador de cruz', 'punta magnética'),
+    ('Pinza de electricista', '8" mango bimaterial'), ('Sierra circular', '7-1/4", 1,400 W'),
+    ('Esmeriladora angular', '4-1/2", 750 W'), ('Cinta métrica', '8 m contra impacto'), ('Nivel de aluminio', '24"'),
+    ('Compresor de aire', '25 L, 2 HP'), ('Manguera para jardín', '15 m reforzada'), ('Carretilla', '5 ft³ llanta neumática'),
+    ('Escalera de tijera', 'aluminio 5 peldaños'), ('Broca para concreto', '3/8" x 6"'), ('Disco de corte', '4-1/2" metal'),
+]
+TRUPER_BRANDS = ['Truper', 'Truper', 'Truper', 'Pretul', 'Foset', 'Volteck', 'Hermex', 'Fiero']
+
+
+def _truper_row(rng: random.Random, codigo: int, anomaly: bool) -> Dict[str, str]:
+    item, spec = rng.choice(TRUPER_ITEMS)
+    brand = rng.choice(TRUPER_BRANDS)
+    clave = f"{rng.choice(TRUPER_PREFIXES)}-{rng.randint(1, 9999)}{rng.choice(['', 'X', 'N', 'NX', 'P'])}"
+    publico = round(rng.uniform(25, 9000), 2)
+    if anomaly:
+        publico = rng.choice([0, round(publico * 100, 2)])
+    distribuidor = round(publico * 0.64, 2)
+    mayoreo = round(publico * 0.83, 2)
+    values = [
+        str(codigo), clave, f"{item} {spec}, {brand}", 'MM00', str(rng.choice([1, 2, 4, 6])),
+        str(rng.choice([6, 12, 24])), f"{publico:g}", 'Pieza', f"750624{rng.randint(10 ** 6, 10 ** 7 - 1)}",
+        f"{distribuidor:g}", str(rng.randint(0, 1)), f"{mayoreo:g}", f"{distribuidor:g}", f"{publico:g}",
+        f"{mayoreo / 1.16:.2f}", f"{distribuidor / 1.16:.2f}", f"{publico / 1.16:.2f}", brand,
+        f"{mayoreo * 0.95 / 1.16:.2f}", f"{mayoreo * 0.95:.2f}", '27111707', item, f"P{rng.randint(1, 999):03d}",
+        item, f"{rng.uniform(0.1, 30):.3f}", f"{rng.uniform(50, 90000):.3f}",
+    ]
+    return dict(zip(TRUPER_HEADERS, values))
+
+
+class SyntheticCatalog:
+    """Genera los archivos de una escala; los conteos quedan en self.counts"""
+
+    def __init__(self, scale: float = 1.0, seed: int = 0, page_size: int = DEFAULT_PAGE_SIZE, **rates):
+        unknown = set(rates) - set(DEFAULT_RATES)
+        if unknown:
+            raise ValueError(f"Tasas desconocidas: {', '.join(sorted(unknown))}")
+        self.scale = scale
+        self.seed = seed
+        self.page_size = page_size
+        self.rates = {**DEFAULT_RATES, **rates}
+        self.rng = random.Random(seed)
+        self.counts = {
+            'truper_rows': 0, 'syscom_products': 0, 'marketplace_rows': 0, 'price_rows': 0,
+            'exact_duplicates': 0, 'near_duplicates': 0, 'missing_images': 0, 'duplicate_images': 0,
+            'price_anomalies': 0, 'price_csv_anomalies': 0,
+        }
+        self._created = datetime(2025, 1, 1)
+
+    # ------------------------------------------------------------------
+    # Filas de marketplace_products
+    # ------------------------------------------------------------------
+
+    def _base_row(self) -> Dict:
+        self._created += timedelta(seconds=self.rng.randint(1, 90))
+        return {
+            'id': str(uuid.UUID(int=self.rng.getrandbits(128), version=4)),
+            'status': 'active',
+            'created_at': self._created.isoformat() + '+00:00',
+            'updated_at': self._created.isoformat() + '+00:00',
+        }
+
+    def _images(self, urls: List[str]) -> List[str]:
+        rng = self.rng
+        if rng.random() < self.rates['missing_image_rate']:
+            self.counts['missing_images'] += 1
+            return rng.choice([[], [f"/images/marketplace/truper/{rng.randint(10 ** 5, 10 ** 6)}.jpg"]])
+        if urls and rng.random() < self.rates['duplicate_image_rate']:
+            self.counts['duplicate_images'] += 1
+            duplicate = urls[0] if rng.random() < 0.7 else urls[0][:-4] + urls[0][-4:].swapcase()
+            return urls + [duplicate]
+        return urls
+
+    def _price(self, price: float, original: Optional[float]) -> Tuple[float, Optional[float]]:
+        rng = self.rng
+        if rng.random() < self.rates['price_anomaly_rate']:
+            self.counts['price_anomalies'] += 1
+            kind = rng.randrange(3)
+            if kind == 0:
+                return 0, original
+            if kind == 1:
+                return round(price * 100, 2), original
+            return price, round(price * rng.uniform(0.3, 0.9), 2)
+        return price, original
+
+    def truper_product(self, row: Dict[str, str]) -> Dict:
+        codigo = row['código']
+        product = self._base_row()
+        price, original = self._price(float(row['precio público con IVA'] or 0), None)
+        product.update({
+            'title': f"{row['clave']} - {row['descripción']}",
+            'description': row['descripción'],
+            'sku': row['clave'],
+            'external_code': None,
+            'price': price,
+            'original_price': original,
+            'images': self._images([f"https://www.truper.com/media/import/imagenes/{codigo}.jpg"]),
+            'contact_phone': TRUPER_CONTACT_PHONE,
+            'seller_id': None,
+        })
+        return product
+
+    def syscom_product(self, p: Dict) -> Dict:
+        product = self._base_row()
+        precios = p['precios']
+        lista, especial = float(precios['precio_lista']), float(precios['precio_especial'])
+        price, original = self._price(especial, lista if especial < lista else None)
+        urls = [p['img_portada']] + [img['url'] for img in p['imagenes']] if p['img_portada'] else []
+        product.update({
+            'title': p['titulo'],
+            'description': f"Marca: {p['marca']}. Modelo: {p['modelo']}. {p['descripcion']}",
+            'sku': p['modelo'],
+            'external_code': p['producto_id'],
+            'price': price,
+            'original_price': original,
+            'images': self._images(urls),
+            'contact_phone': None,
+            'seller_id': SYSCOM_SELLER_ID,
+        })
+        return product
+
+    def duplicate_of(self, product: Dict) -> Dict:
+        """Copia exacta (nuevo id) o casi duplicado publicado por el otro proveedor"""
+        rng = self.rng
+        copy = {**product, **self._base_row()}
+        if rng.random() < 0.5:
+            self.counts['exact_duplicates'] += 1
+            return copy
+        self.counts['near_duplicates'] += 1
+        words = product['title'].split()
+        if len(words) > 3:
+            words.pop(rng.randrange(1, len(words)))
+        copy['title'] = ' '.join(words) + rng.choice(['', ' Nuevo', ' (2025)'])
+        if product.get('external_code'):
+            copy.update({'external_code': None, 'seller_id': None, 'contact_phone': TRUPER_CONTACT_PHONE})
+        else:
+            copy.update({'external_code': str(rng.randint(10 ** 6, 10 ** 7)), 'seller_id': SYSCOM_SELLER_ID,
+                         'contact_phone': None,
+                         'description': f"Marca: TRUPER. Modelo: {product['sku']}. {product['description']}"})
+        return copy
+
+    def _with_duplicates(self, product: Dict) -> Iterator[Dict]:
+        yield product
+        if self.rng.random() < self.rates['duplicate_rate']:
+            yield self.duplicate_of(product)
+
+    # ------------------------------------------------------------------
+    # Archivos
+    # ------------------------------------------------------------------
+
+    def write_truper_csv(self, path: Path, snapshot) -> None:
+        rows = int(BASE_TRUPER_ROWS * self.scale)
+        codigos = self.rng.sample(range(100000, 999999), rows) if rows < 899999 else range(100000, 100000 + rows)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(TRUPER_TITLE + '\n')
+            writer = csv.DictWriter(f, fieldnames=TRUPER_HEADERS)
+            writer.writeheader()
+            for codigo in codigos:
+                anomaly = self.rng.random() < self.rates['price_anomaly_rate']
+                row = _truper_row(self.rng, codigo, anomaly)
+                writer.writerow(row)
+                self.counts['truper_rows'] += 1
+                if self.rng.random() < IMPORTED_FRACTION:
+                    for product in self._with_duplicates(self.truper_product(row)):
+                        snapshot(product)
+
+    def write_syscom_pages(self, directory: Path, snapshot) -> None:
+        total = int(BASE_SYSCOM_PRODUCTS * self.scale)
+        next_id = 200000
+        for categoria, share in SYSCOM_CATEGORIES.items():
+            count = int(total * share)
+            pages = max(1, (count + self.page_size - 1) // self.page_size)
+            category_dir = directory / categoria
+            category_dir.mkdir(parents=True, exist_ok=True)
+            for page in range(1, pages + 1):
+                size = min(self.page_size, count - (page - 1) * self.page_size)
+                productos = [synthetic_product(self.rng, next_id + i, categoria) for i in range(size)]
+                next_id += size
+                with open(category_dir / f"pagina_{page}.json", 'w', encoding='utf-8') as f:
+                    json.dump({'cantidad': count, 'pagina': page, 'paginas': pages, 'todo': False,
+                               'productos': productos}, f, ensure_ascii=False)
+                self.counts['syscom_products'] += size
+                for p in productos:
+                    if self.rng.random() < IMPORTED_FRACTION:
+                        for product in self._with_duplicates(self.syscom_product(p)):
+                            snapshot(product)
+
+    def price_row(self, product: Dict) -> Optional[Dict[str, str]]:
+        rng = self.rng
+        if not product.get('sku') or rng.random() >= PRICE_UPDATE_FRACTION:
+            return None
+        new_price = round(max(1.0, float(product['price'] or 100)) * rng.uniform(0.9, 1.15), 2)
+        original = f"{new_price * 1.2:.2f}" if rng.random() < 0.3 else ''
+        price = f"{new_price:.2f}"
+        if rng.random() < self.rates['price_anomaly_rate']:
+            self.counts['price_csv_anomalies'] += 1
+            price = rng.choice(['', '0', f"${new_price:,.2f}", 'N/D'])
+        return {'sku': product['sku'], 'precio': price, 'precio_original': original}
+
+    def generate(self, output: Path) -> Dict:
+        output.mkdir(parents=True, exist_ok=True)
+        with open(output / 'marketplace_products.jsonl', 'w', encoding='utf-8') as snapshot_file, \
+                open(output / 'precios.csv', 'w', encoding='utf-8', newline='') as prices_file:
+            prices = csv.DictWriter(prices_file, fieldnames=['sku', 'precio', 'precio_original'])
+            prices.writeheader()
+
+            def snapshot(product: Dict) -> None:
+                snapshot_file.write(json.dumps(product, ensure_ascii=False) + '\n')
+                self.counts['marketplace_rows'] += 1
+                row = self.price_row(product)
+                if row:
+                    prices.writerow(row)
+                    self.counts['price_rows'] += 1
+
+            self.write_truper_csv(output / 'truper_catalog_full.csv', snapshot)
+            self.write_syscom_pages(output / 'syscom_pages', snapshot)
+
+        manifest = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'scale': self.scale,
+            'seed': self.seed,
+            'rates': self.rates,
+            'counts': self.counts,
+            'files': {
+                'truper_csv': 'truper_catalog_full.csv',
+                'syscom_pages': 'syscom_pages',
+                'marketplace_products': 'marketplace_products.jsonl',
+                'prices_csv': 'precios.csv',
+            },
+        }
+        with open(output / 'manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        return manifest
+
+
+def generate(output: Path, scale: float = 1.0, seed: int = 0, **rates) -> Dict:
+    """Genera una escala completa en output; retorna el manifest"""
+    return SyntheticCatalog(scale, seed, **rates).generate(output)
+
+
+def load_snapshot(path: Path) -> List[Dict]:
+    """Lee marketplace_products.jsonl"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generar catálogos sintéticos a escala')
+    parser.add_argument('--scale', type=float, default=10, help='Múltiplo del tamaño de producción')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help='Carpeta de salida (default: data/synthetic/x<escala>)')
+    for name, value in DEFAULT_RATES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args()
+
+    output = args.output or DEFAULT_OUTPUT / f"x{args.scale:g}"
+    rates = {name: getattr(args, name) for name in DEFAULT_RATES}
+    print(f"🧪 Generando catálogo sintético x{args.scale:g} en {output}...")
+    manifest = generate(output, args.scale, args.seed, **rates)
+    for key, value in manifest['counts'].items():
+        print(f"   {key:22s} {value:>10,}")
+    print(f"\n💾 Manifest: {output / 'manifest.json'}")
+
+
+if __name__ == "__main__":
+    main()
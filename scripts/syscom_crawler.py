@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Crawler de Syscom por árbol de categorías
+
+En lugar de recorrer cada categoría de primer nivel como una sola secuencia
+larga de páginas (con los ids y los totales de páginas escritos a mano), el
+árbol se descubre con la API:
+
+    GET /categorias         -> categorías de primer nivel
+    GET /categorias/{id}    -> la categoría con sus subcategorias
+
+y se guarda en data/syscom/category_tree.json (se vuelve a pedir cada
+TREE_TTL o con --refresh-tree). El trabajo se divide en las subcategorías
+hoja: la primera página de cada hoja dice cuántas páginas tiene y el resto se
+reparte entre varios hilos. Todos los hilos comparten un QuotaLimiter, así
+que el total de requests sigue respetando el límite de la API; lo que se gana
+es que la latencia de varios requests se solapa. Un producto que aparece en
+dos hojas se entrega una sola vez.
+
+Cada página descargada se anota en <salida>/progress.jsonl; con --resume se
+saltan las páginas ya guardadas y se piden sólo las que faltan.
+
+Las páginas se guardan como <salida>/<hoja>/pagina_<n>.json, el mismo formato
+que lee fake_syscom_server.py --catalog.
+
+Uso:
+    python3 scripts/syscom_crawler.py --tree-only                 # ver el árbol
+    python3 scripts/syscom_crawler.py --roots 22,26 --workers 4
+    python3 scripts/syscom_crawler.py --resume data/syscom/crawl_20250125_101500
+"""
+
+import sys
+import json
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import requests
+
+from catalog_config import ROOT, syscom, syscom_api_base, syscom_rate_limit_delay
+from etl_metrics import metrics
+
+SYSCOM_DIR = ROOT / "data" / "syscom"
+TREE_CACHE = SYSCOM_DIR / "category_tree.json"
+TREE_TTL = 7 * 24 * 3600  # El árbol de categorías casi no cambia
+PROGRESS_FILE = 'progress.jsonl'
+DEFAULT_WORKERS = 4
+MAX_RETRIES = 4
+REQUEST_TIMEOUT = 60
+
+
+class QuotaLimiter:
+    """Intervalo mínimo entre requests compartido por todos los hilos"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Reserva el siguiente turno y espera a que llegue"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def penalize(self, seconds: float) -> None:
+        """Nadie vuelve a pedir antes de seconds (Retry-After de un 429)"""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+class SyscomApi:
+    """GET a la API de Syscom con cuota compartida, reintentos y token renovable"""
+
+    def __init__(self, limiter: Optional[QuotaLimiter] = None, headers: Optional[Dict] = None,
+                 retries: int = MAX_RETRIES):
+        self.base_url = syscom_api_base()
+        self.limiter = limiter or QuotaLimiter(syscom_rate_limit_delay())
+        self.retries = retries
+        self._headers = headers
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def get(self, path: str, params: Optional[Dict] = None, endpoint: Optional[str] = None):
+        """JSON de la respuesta, o None si no existe o se agotaron los reintentos"""
+        endpoint = endpoint or path.strip('/').split('/')[0]
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self._session().get(f"{self.base_url}{path}", params=params,
+                                               headers=self._headers or syscom.headers(),
+                                               timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                metrics.request('syscom', endpoint, 'error', time.perf_counter() - start)
+                reason, detail, wait_s = 'timeout', str(e)[:100], min(30, 2 ** attempt)
+            else:
+                metrics.request('syscom', endpoint, response.status_code, time.perf_counter() - start)
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code == 404:
+                    return None
+                detail = f"HTTP {response.status_code}"
+                if response.status_code == 401:
+                    # Token vencido o revocado: pedir uno nuevo en el siguiente intento
+                    syscom.invalidate()
+                    self._headers = None
+                    reason, wait_s = 'auth', 0
+                elif response.status_code == 429:
+                    reason, wait_s = 'rate_limit', 0
+                    self.limiter.penalize(float(response.headers.get('Retry-After') or 5))
+                elif response.status_code >= 500:
+                    reason, wait_s = 'server', min(30, 2 ** attempt)
+                else:
+                    print(f"   ❌ {path} {params or ''}: {detail} {response.text[:100]}")
+                    return None
+            if attempt == self.retries:
+                print(f"   ❌ {path} {params or ''}: {detail} (sin más reintentos)")
+                return None
+            metrics.retry('syscom', endpoint, reason)
+            if wait_s:
+                time.sleep(wait_s)
+        return None
+
+
+def discover_tree(api: SyscomApi, roots: Optional[Iterable[str]] = None,
+                  workers: int = DEFAULT_WORKERS) -> Dict:
+    """
+    Recorre el árbol por niveles desde roots (o desde todas las categorías de
+    primer nivel). Una categoría que no se pudo consultar queda como hoja.
+    """
+    names: Dict[str, str] = {}
+    if roots is None:
+        top = api.get('/categorias', endpoint='categorias') or []
+        roots = [str(c['id']) for c in top]
+        names = {str(c['id']): c.get('nombre') for c in top}
+    roots = [str(r) for r in roots]
+
+    nodes: Dict[str, Dict] = {}
+    level = [(root, None) for root in roots]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while level:
+            responses = pool.map(lambda item: api.get(f"/categorias/{item[0]}", endpoint='categorias'), level)
+            next_level = []
+            for (category_id, parent), data in zip(level, responses):
+                data = data or {}
+                children = [str(c['id']) for c in data.get('subcategorias') or [] if str(c['id']) not in nodes]
+                nodes[category_id] = {
+                    'id': category_id,
+                    'nombre': data.get('nombre') or names.get(category_id) or category_id,
+                    'nivel': data.get('nivel'),
+                    'parent': parent,
+                    'children': children,
+                }
+                next_level.extend((child, category_id) for child in children)
+            level = next_level
+    return {'fecha': datetime.now().isoformat(timespec='seconds'), 'fetched_at': time.time(),
+            'roots': roots, 'nodes': nodes}
+
+
+def load_tree(api: SyscomApi, roots: Optional[Iterable[str]] = None, refresh: bool = False,
+              path: Path = TREE_CACHE, ttl: float = TREE_TTL, workers: int = DEFAULT_WORKERS) -> Dict:
+    """Árbol en caché si está vigente y contiene roots; si no, se descubre y se guarda"""
+    roots = [str(r) for r in roots] if roots is not None else None
+    tree = None
+    if not refresh and path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = json.load(f)
+        if time.time() - tree.get('fetched_at', 0) > ttl:
+            tree = None
+
+    if tree is not None:
+        missing = [r for r in (roots or tree['roots']) if r not in tree['nodes']]
+        if not missing:
+            return tree
+        # Raíces nuevas: se descubren sólo ésas y se agregan a la caché
+        extra = discover_tree(api, missing, workers)
+        tree['nodes'].update(extra['nodes'])
+        tree['roots'] = tree['roots'] + [r for r in missing if r not in tree['roots']]
+    else:
+        tree = discover_tree(api, roots, workers)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(tree, f, ensure_ascii=False, indent=2)
+    return tree
+
+
+def leaves(tree: Dict, root: str) -> List[str]:
+    """Subcategorías hoja bajo root (root mismo si no tiene hijas o no está en el árbol)"""
+    nodes = tree['nodes']
+    result, stack = [], [str(root)]
+    while stack:
+        category_id = stack.pop()
+        children = nodes.get(category_id, {}).get('children') or []
+        if children:
+            stack.extend(reversed(children))
+        else:
+            result.append(category_id)
+    return result
+
+
+def root_of(tree: Dict, category_id: str) -> str:
+    nodes = tree['nodes']
+    while nodes.get(category_id, {}).get('parent'):
+        category_id = nodes[category_id]['parent']
+    return category_id
+
+
+def read_progress(path: Path) -> Dict[str, Dict]:
+    """{hoja: {'paginas': n, 'done': {páginas}}} a partir del archivo de progreso"""
+    progress: Dict[str, Dict] = {}
+    if not path.exists():
+        return progress
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Última línea cortada por una interrupción
+            leaf = progress.setdefault(entry['leaf'], {'paginas': entry['paginas'], 'cantidad': None, 'done': set()})
+            leaf['paginas'] = entry['paginas']
+            leaf['cantidad'] = entry.get('cantidad', leaf['cantidad'])
+            leaf['done'].add(entry['page'])
+    return progress
+
+
+class CategoryCrawler:
+    """
+    Descarga las páginas de varias hojas en paralelo
+
+    on_page(hoja, página, productos, respuesta) se llama desde los hilos de
+    descarga con los productos que no se habían visto en otra página.
+    """
+
+    def __init__(self, api: SyscomApi, workers: int = DEFAULT_WORKERS, max_pages: Optional[int] = None,
+                 progress_path: Optional[Path] = None,
+                 on_page: Optional[Callable[[str, int, List[Dict], Dict], None]] = None,
+                 stop: Optional[threading.Event] = None, verbose: bool = True):
+        self.api = api
+        self.workers = workers
+        self.max_pages = max_pages
+        self.on_page = on_page
+        self.stop = stop or threading.Event()
+        self.verbose = verbose
+        self.progress_path = Path(progress_path) if progress_path else None
+        self.progress = read_progress(self.progress_path) if self.progress_path else {}
+        self._progress_file = None
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+        self.stats = {'leaves': 0, 'pages': 0, 'resumed_pages': 0, 'products': 0, 'duplicates': 0,
+                      'failed_pages': 0}
+
+    def _fetch(self, leaf: str, page: int) -> Optional[int]:
+        """Descarga una página; retorna el total de páginas de la hoja (None si falló)"""
+        if self.stop.is_set():
+            return None
+        data = self.api.get('/productos', {'categoria': leaf, 'pagina': page}, endpoint='productos')
+        if data is None:
+            with self._lock:
+                self.stats['failed_pages'] += 1
+            return None
+
+        products = data.get('productos') or []
+        fresh = []
+        with self._lock:
+            for p in products:
+                key = str(p.get('producto_id') or p.get('id') or '')
+                if key and key in self._seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                self._seen.add(key)
+                fresh.append(p)
+            self.stats['pages'] += 1
+            self.stats['products'] += len(fresh)
+
+        paginas = int(data.get('paginas') or 1) if products else 0
+        if self.on_page and fresh:
+            self.on_page(leaf, page, fresh, data)
+        self._mark(leaf, page, paginas, data.get('cantidad'))
+        if self.verbose:
+            print(f"   📄 {leaf} página {page}/{paginas}: {len(fresh)} productos "
+                  f"(Total en Syscom: {data.get('cantidad', 0)})")
+        return paginas
+
+    def _mark(self, leaf: str, page: int, paginas: int, cantidad) -> None:
+        with self._lock:
+            state = self.progress.setdefault(leaf, {'paginas': paginas, 'cantidad': cantidad, 'done': set()})
+            state['paginas'] = paginas
+            state['cantidad'] = cantidad
+            state['done'].add(page)
+            if self.progress_path:
+                if self._progress_file is None:
+                    self.progress_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._progress_file = open(self.progress_path, 'a', encoding='utf-8')
+                self._progress_file.write(json.dumps({'leaf': leaf, 'page': page, 'paginas': paginas,
+                                                      'cantidad': cantidad}) + '\n')
+                self._progress_file.flush()
+
+    def _remaining(self, leaf: str, paginas: int) -> List[int]:
+        last = min(paginas, self.max_pages) if self.max_pages else paginas
+        done = self.progress.get(leaf, {}).get('done', set())
+        return [page for page in range(2, last + 1) if page not in done]
+
+    def crawl(self, leaf_ids: Iterable[str]) -> Dict:
+        """Descarga todas las páginas de las hojas; la página 1 de cada una va primero"""
+        leaf_ids = list(leaf_ids)
+        self.stats['leaves'] += len(leaf_ids)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='syscom-crawl') as pool:
+                pending = {}
+                for leaf in leaf_ids:
+                    state = self.progress.get(leaf)
+                    if state and 1 in state['done']:
+                        # Ya se sabe cuántas páginas tiene: pedir directamente las que faltan
+                        remaining = self._remaining(leaf, state['paginas'])
+                        self.stats['resumed_pages'] += len(state['done'])
+                        for page in remaining:
+                            pending[pool.submit(self._fetch, leaf, page)] = (leaf, page)
+                    else:
+                        pending[pool.submit(self._fetch, leaf, 1)] = (leaf, 1)
+
+                try:
+                    while pending and not self.stop.is_set():
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            leaf, page = pending.pop(future)
+                            paginas = future.result()
+                            if page == 1 and paginas and not self.stop.is_set():
+                                for next_page in self._remaining(leaf, paginas):
+                                    pending[pool.submit(self._fetch, leaf, next_page)] = (leaf, next_page)
+                finally:
+                    # Interrupción o stop: las páginas en cola no se piden (quedan para --resume)
+                    if pending:
+                        self.stop.set()
+                        for future in pending:
+                            future.cancel()
+        finally:
+            if self._progress_file is not None:
+                self._progress_file.close()
+                self._progress_file = None
+        return self.stats
+
+
+def page_writer(output: Path) -> Callable[[str, int, List[Dict], Dict], None]:
+    """on_page que guarda cada página como <output>/<hoja>/pagina_<n>.json"""
+    def write(leaf: str, page: int, products: List[Dict], data: Dict) -> None:
+        leaf_dir = output / leaf
+        leaf_dir.mkdir(parents=True, exist_ok=True)
+        page_data = {'cantidad': data.get('cantidad'), 'pagina': page, 'paginas': data.get('paginas'),
+                     'productos': products}
+        tmp = leaf_dir / f"pagina_{page}.json.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(page_data, f, ensure_ascii=False)
+        tmp.replace(leaf_dir / f"pagina_{page}.json")
+    return write
+
+
+def print_tree(tree: Dict, roots: List[str]) -> None:
+    nodes = tree['nodes']
+
+    def show(category_id: str, depth: int) -> None:
+        node = nodes.get(category_id, {'nombre': category_id, 'children': []})
+        mark = '🍃' if not node['children'] else '📁'
+        print(f"{'   ' * depth}{mark} {category_id} {node['nombre']}")
+        for child in node['children']:
+            show(child, depth + 1)
+
+    for root in roots:
+        show(root, 0)
+    print(f"\n📊 {len(roots)} categorías raíz, {sum(len(leaves(tree, r)) for r in roots)} hojas "
+          f"(árbol del {tree.get('fecha', '?')})")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Descargar productos de Syscom por árbol de categorías')
+    parser.add_argument('--roots', help='IDs de categorías raíz separadas por coma (por defecto todas)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Descargas en paralelo')
+    parser.add_argument('--max-pages', type=int, help='Máximo de páginas por subcategoría')
+    parser.add_argument('--refresh-tree', action='store_true', help='Volver a pedir el árbol aunque esté en caché')
+    parser.add_argument('--tree-only', action='store_true', help='Sólo descubrir y mostrar el árbol')
+    parser.add_argument('--output', type=Path, help='Carpeta de salida (por defecto data/syscom/crawl_<fecha>)')
+    parser.add_argument('--resume', type=Path, metavar='CARPETA', help='Continuar una descarga interrumpida')
+    args = parser.parse_args()
+    metrics.export_at_exit('syscom_crawler')
+
+    api = SyscomApi()
+    roots = [r.strip() for r in args.roots.split(',') if r.strip()] if args.roots else None
+    print("🌳 Cargando árbol de categorías...")
+    tree = load_tree(api, roots, refresh=args.refresh_tree, workers=args.workers)
+    roots = roots or tree['roots']
+    if args.tree_only:
+        print_tree(tree, roots)
+        return
+
+    output = args.resume or args.output or SYSCOM_DIR / f"crawl_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if args.resume and not (args.resume / PROGRESS_FILE).exists():
+        print(f"❌ {args.resume / PROGRESS_FILE} no existe; nada que reanudar")
+        sys.exit(1)
+
+    leaf_ids = [leaf for root in roots for leaf in leaves(tree, root)]
+    print(f"📡 {len(leaf_ids)} subcategorías de {len(roots)} categorías | {args.workers} hilos | "
+          f"{api.limiter.interval:.2f} s entre requests")
+    crawler = CategoryCrawler(api, workers=args.workers, max_pages=args.max_pages,
+                              progress_path=output / PROGRESS_FILE, on_page=page_writer(output))
+    start = time.perf_counter()
+    try:
+        stats = crawler.crawl(leaf_ids)
+    except KeyboardInterrupt:
+        crawler.stop.set()
+        print("\n⚠️  Interrumpido. Para continuar:")
+        print(f"   python3 scripts/syscom_crawler.py --resume {output}")
+        sys.exit(130)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Descarga completa en {elapsed:.1f} s: {output}")
+    print(f"   📄 Páginas: {stats['pages']} (ya descargadas antes: {stats['resumed_pages']})")
+    print(f"   📦 Productos: {stats['products']} | repetidos entre subcategorías: {stats['duplicates']}")
+    if stats['failed_pages']:
+        print(f"   ❌ Páginas con error: {stats['failed_pages']}")
+        print(f"💡 Reintentar las que faltan: python3 scripts/syscom_crawler.py --resume {output}")
+
+
+if __name__ == "__main__":
+    main()
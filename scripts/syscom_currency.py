@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Detección de moneda de los precios de Syscom
+
+El precio de un producto de Syscom se guarda tal como lo da Syscom: así lo
+muestra ProductPrice.tsx (con la etiqueta USD) y así lo escribe
+/api/marketplace/price/sync. Esta etapa no cambia esa convención; va antes
+del mapeo y, por producto, detecta la moneda de origen y la deja registrada
+junto al precio:
+
+    p['moneda_origen'] = 'USD'; p['tipo_cambio'] = 17.85; p['fecha_tipo_cambio'] = '2025-01-27'
+    p['precios_mxn'] = {'precio_lista': 1785.0, ...}      # equivalente en MXN, no se guarda como price
+
+La moneda sale del producto (campo moneda / currency / precios.moneda) o de
+la moneda documentada de la fuente (SYSCOM_PRICE_CURRENCY); si ninguna la
+indica queda como desconocida (None) y no se calcula equivalente. Sólo se
+usa el tipo de cambio cuando la moneda es USD. Con la migración
+20250128_marketplace_products_price_currency.sql, price_currency y
+exchange_rate se escriben junto a price (ver currency_fields).
+
+Un producto ya procesado (con moneda_origen) no se vuelve a procesar. Se
+trabaja por lotes (una página de la API, un bloque del reporte): el tipo de
+cambio se busca una vez por lote.
+
+Los tipos de cambio se guardan por fecha en data/syscom/exchange_rates.json.
+El del día se pide a /tipocambio de la API de Syscom (o se toma de
+SYSCOM_USD_MXN si está definida); si no se puede obtener se usa el último
+guardado y se marca como tipo de cambio anterior.
+
+Lo que merece revisión (moneda distinta a la que se guarda, moneda
+desconocida, tipo de cambio anterior, equivalente fuera de rango) se cuenta
+en el resumen y en las métricas currency_*.
+
+Uso:
+    from syscom_currency import CurrencyNormalizer
+
+    normalizer = CurrencyNormalizer()
+    normalizer.prepare(supabase)
+    normalizer.normalize_products(page['productos'])   # antes de mapear
+    payload.update(normalizer.currency_fields(p))
+
+    python3 scripts/syscom_currency.py                 # tabla de tipos de cambio
+    python3 scripts/syscom_currency.py --refresh       # pedir el del día
+"""
+
+import os
+import sys
+import json
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from catalog_config import env
+from etl_metrics import metrics
+from syscom_crawler import SYSCOM_DIR, SyscomApi
+
+RATES_PATH = SYSCOM_DIR / "exchange_rates.json"
+TARGET_CURRENCY = 'MXN'
+STORED_CURRENCY = 'USD'  # Moneda con la que ProductPrice.tsx etiqueta los precios de Syscom guardados
+PRICE_RANGE_MXN = (1.0, 2_000_000.0)  # Fuera de esto, un equivalente en MXN se marca para revisión
+CURRENCY_COLUMNS = ('price_currency', 'exchange_rate')
+NORMALIZE_BATCH = 500
+
+CURRENCY_ALIASES = {
+    'USD': 'USD', 'US': 'USD', 'US$': 'USD', 'DLL': 'USD', 'DLLS': 'USD', 'DLS': 'USD',
+    'DOLARES': 'USD', 'DÓLARES': 'USD',
+    'MXN': 'MXN', 'MN': 'MXN', 'M.N.': 'MXN', 'PESOS': 'MXN', 'MXP': 'MXN',
+}
+
+
+def currency_code(value) -> Optional[str]:
+    """'Dlls' -> 'USD', 'M.N.' -> 'MXN'; None si no es una moneda reconocible"""
+    if not isinstance(value, str):
+        return None
+    return CURRENCY_ALIASES.get(value.strip().upper())
+
+
+class ExchangeRates:
+    """Tabla {moneda: {fecha: {rate, source}}} guardada en disco"""
+
+    def __init__(self, path=RATES_PATH, api: Optional[SyscomApi] = None):
+        self.path = path
+        self._api = api
+        self.table: Dict[str, Dict[str, Dict]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.table = json.load(f)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.table, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+    def record(self, currency: str, day: str, rate: float, source: str) -> None:
+        self.table.setdefault(currency, {})[day] = {
+            'rate': rate, 'source': source, 'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.save()
+
+    def fetch(self, currency: str = 'USD') -> Optional[float]:
+        """Tipo de cambio de hoy: SYSCOM_USD_MXN o /tipocambio de Syscom"""
+        today = date.today().isoformat()
+        manual = env('SYSCOM_USD_MXN')
+        if manual:
+            self.record(currency, today, float(manual), 'manual')
+            return float(manual)
+        api = self._api or SyscomApi()
+        data = api.get('/tipocambio', endpoint='tipocambio') or {}
+        try:
+            rate = float(data.get('normal') or 0)
+        except (TypeError, ValueError):
+            rate = 0
+        if rate <= 0:
+            print(f"⚠️  No se pudo obtener el tipo de cambio de Syscom: {str(data)[:100]}")
+            return None
+        self.record(currency, today, rate, 'syscom')
+        return rate
+
+    def rate(self, currency: str = 'USD', day: Optional[str] = None) -> Tuple[Optional[float], Optional[str]]:
+        """
+        (tipo de cambio, fecha) para day (hoy por defecto). Para hoy se pide si
+        no está guardado; si no se puede, o para una fecha pasada sin registro,
+        se usa el último anterior.
+        """
+        day = day or date.today().isoformat()
+        by_day = self.table.get(currency, {})
+        if day in by_day:
+            return by_day[day]['rate'], day
+        if day == date.today().isoformat() and self.fetch(currency):
+            return self.table[currency][day]['rate'], day
+        earlier = [d for d in self.table.get(currency, {}) if d <= day]
+        if not earlier:
+            return None, None
+        latest = max(earlier)
+        return self.table[currency][latest]['rate'], latest
+
+
+def _convert(value, rate: float):
+    """Convierte un precio (número o texto) y lo deja como número redondeado"""
+    try:
+        amount = float(str(value).replace('$', '').replace(',', '').strip())
+    except (TypeError, ValueError):
+        return value
+    return round(amount * rate, 2)
+
+
+class CurrencyNormalizer:
+    """Etapa que registra la moneda de origen de lotes de productos de Syscom"""
+
+    def __init__(self, rates: Optional[ExchangeRates] = None, source_currency: Optional[str] = None,
+                 day: Optional[str] = None):
+        self.rates = rates or ExchangeRates()
+        # Sólo una moneda documentada para la fuente; sin ella no se supone ninguna
+        self.source_currency = currency_code(source_currency or env('SYSCOM_PRICE_CURRENCY', ''))
+        self.day = day
+        self.store_columns = False
+        self.stats: Counter = Counter()
+        self.flagged: List[Dict] = []
+        self._rates: Dict[str, Tuple[float, str]] = {}
+
+    def detect(self, p: Dict) -> Tuple[Optional[str], str]:
+        """(moneda, cómo se supo): 'campo' si el producto la trae, 'fuente' si es la
+        documentada (SYSCOM_PRICE_CURRENCY), (None, 'desconocida') si no"""
+        precios = p.get('precios') if isinstance(p.get('precios'), dict) else p.get('precio')
+        for value in (p.get('moneda'), p.get('currency'),
+                      precios.get('moneda') if isinstance(precios, dict) else None):
+            code = currency_code(value)
+            if code:
+                return code, 'campo'
+        if self.source_currency:
+            return self.source_currency, 'fuente'
+        return None, 'desconocida'
+
+    def _rate(self, currency: str) -> Tuple[float, str]:
+        if currency not in self._rates:
+            rate, day = self.rates.rate(currency, self.day)
+            if rate is None:
+                print(f"❌ Error: No hay tipo de cambio {currency}/{TARGET_CURRENCY} (ni guardado ni de la API)")
+                print(f"💡 Define SYSCOM_USD_MXN=<tipo de cambio> o revisa {self.rates.path}")
+                sys.exit(1)
+            if day != (self.day or date.today().isoformat()):
+                self.stats['tipo_cambio_anterior'] += 1
+                print(f"⚠️  Usando el tipo de cambio {currency} del {day}: {rate}")
+            self._rates[currency] = (rate, day)
+        return self._rates[currency]
+
+    def prepare(self, supabase=None) -> None:
+        """
+        Antes de arrancar hilos: obtiene el tipo de cambio de la moneda de la
+        fuente y, si se pasa supabase, revisa si existen price_currency y
+        exchange_rate (si no, currency_fields no regresa nada)
+        """
+        if self.source_currency and self.source_currency != TARGET_CURRENCY:
+            self._rate(self.source_currency)
+        if supabase is not None:
+            try:
+                supabase.table('marketplace_products').select(','.join(CURRENCY_COLUMNS)).limit(1).execute()
+                self.store_columns = True
+            except Exception as e:
+                if not any(column in str(e) for column in CURRENCY_COLUMNS):
+                    raise
+                print("⚠️  marketplace_products no tiene price_currency/exchange_rate; la moneda sólo se reporta")
+                print("   Ejecuta supabase/migrations/20250128_marketplace_products_price_currency.sql")
+                self.store_columns = False
+
+    def currency_fields(self, p: Dict) -> Dict:
+        """{price_currency, exchange_rate} para guardar junto al precio (vacío sin las columnas)"""
+        if not self.store_columns or 'moneda_origen' not in p:
+            return {}
+        return {'price_currency': p['moneda_origen'], 'exchange_rate': p.get('tipo_cambio')}
+
+    def normalize_products(self, products: Iterable[Dict]) -> List[Dict]:
+        """Registra en su lugar la moneda de un lote de productos (API o reporte); no toca los precios"""
+        products = list(products)
+        for p in products:
+            if 'moneda_origen' in p:
+                continue
+            currency, how = self.detect(p)
+            p['moneda_origen'] = currency
+            p['tipo_cambio'] = None
+            if currency is None:
+                self.stats['sin_moneda'] += 1
+                continue
+            self.stats[f"{currency}_{how}"] += 1
+            if currency != STORED_CURRENCY:
+                self._flag(p, 'moneda_inesperada', currency)
+            if currency != 'USD':
+                continue
+            rate, day = self._rate(currency)
+            p['tipo_cambio'] = rate
+            p['fecha_tipo_cambio'] = day
+            precios = p.get('precios') if isinstance(p.get('precios'), dict) else p.get('precio')
+            if isinstance(precios, dict):
+                p['precios_mxn'] = {k: _convert(v, rate) for k, v in precios.items()
+                                    if k.startswith('precio') and v not in (None, '')}
+            elif isinstance(precios, (int, float, str)) and precios != '':
+                p['precios_mxn'] = _convert(precios, rate)
+            self.stats['con_tipo_cambio'] += 1
+            metrics.inc('currency_conversions_total', source=currency, target=TARGET_CURRENCY, detected=how)
+            self._check_range(p)
+        return products
+
+    def normalize_stream(self, products: Iterable[Dict], batch_size: int = NORMALIZE_BATCH) -> Iterator[Dict]:
+        """normalize_products por bloques sobre un iterador (p. ej. las filas del reporte)"""
+        batch: List[Dict] = []
+        for p in products:
+            batch.append(p)
+            if len(batch) >= batch_size:
+                yield from self.normalize_products(batch)
+                batch = []
+        if batch:
+            yield from self.normalize_products(batch)
+
+    def _check_range(self, p: Dict) -> None:
+        precios = p.get('precios_mxn')
+        values = precios.values() if isinstance(precios, dict) else [precios]
+        low, high = PRICE_RANGE_MXN
+        for value in values:
+            if isinstance(value, (int, float)) and value and not low <= value <= high:
+                self._flag(p, 'fuera_de_rango', value)
+                return
+
+    def _flag(self, p: Dict, reason: str, detail) -> None:
+        self.stats[reason] += 1
+        metrics.inc('currency_flags_total', reason=reason)
+        self.flagged.append({'producto_id': p.get('producto_id'), 'motivo': reason, 'detalle': detail})
+
+    def report(self, examples: int = 5) -> None:
+        if not self.stats:
+            return
+        rates = ', '.join(f"{c} {r} ({d})" for c, (r, d) in self._rates.items()) or 'no se usó'
+        print(f"\n💱 Moneda: {self.stats['con_tipo_cambio']} productos en USD con tipo de cambio | "
+              f"tipo de cambio: {rates}")
+        detected = {k: v for k, v in self.stats.items() if k.endswith(('_campo', '_fuente'))}
+        print(f"   Detección: {', '.join(f'{k}={v}' for k, v in sorted(detected.items())) or 'ninguna'}")
+        if self.stats['sin_moneda']:
+            print(f"   ⚠️  Sin moneda: {self.stats['sin_moneda']} "
+                  f"(se guardan sin price_currency; define SYSCOM_PRICE_CURRENCY si la fuente la documenta)")
+        for reason in ('moneda_inesperada', 'fuera_de_rango', 'tipo_cambio_anterior'):
+            if self.stats[reason]:
+                print(f"   ⚠️  {reason}: {self.stats[reason]}")
+        for flag in self.flagged[:examples]:
+            print(f"      - {flag['producto_id']}: {flag['motivo']} ({flag['detalle']})")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tipos de cambio usados para los precios de Syscom')
+    parser.add_argument('--refresh', action='store_true', help='Pedir el tipo de cambio de hoy a Syscom')
+    parser.add_argument('--date', help='Tipo de cambio aplicable a una fecha (AAAA-MM-DD)')
+    args = parser.parse_args()
+
+    rates = ExchangeRates()
+    if args.refresh:
+        rate = rates.fetch('USD')
+        if rate is None:
+            sys.exit(1)
+        print(f"✅ Tipo de cambio USD/MXN de hoy: {rate}")
+    if args.date:
+        rate, day = rates.rate('USD', args.date)
+        print(f"💱 USD/MXN para {args.date}: {rate if rate else 'sin registro'}" + (f" (del {day})" if day else ''))
+        return
+
+    by_day = rates.table.get('USD', {})
+    if not by_day:
+        print(f"⚠️  Sin tipos de cambio guardados en {rates.path}")
+        print("💡 python3 scripts/syscom_currency.py --refresh")
+        return
+    print(f"💱 Tipos de cambio USD/MXN ({rates.path}):")
+    for day in sorted(by_day)[-15:]:
+        entry = by_day[day]
+        print(f"   {day}: {entry['rate']:.4f} ({entry['source']})")
+    if os.environ.get('SYSCOM_USD_MXN'):
+        print(f"   SYSCOM_USD_MXN definido: {os.environ['SYSCOM_USD_MXN']} (tiene prioridad sobre la API)")
+
+
+if __name__ == "__main__":
+    main()
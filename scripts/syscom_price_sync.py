@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Sincronización rápida de precios y existencias de Syscom (delta)
+
+Los precios y existencias de Syscom cambian cada hora, pero la sincronización
+completa reconstruye todo el producto (descripción con características,
+imágenes, título). Este modo sólo mira price, original_price y stock: los
+compara con el último valor conocido, guardado en data/syscom/price_cache.json,
+y escribe en lotes únicamente {price, original_price, stock} de los productos
+que cambiaron (con price_currency y exchange_rate cuando cambia el precio, si
+existen las columnas de 20250128_marketplace_products_price_currency.sql).
+
+La caché se arma leyendo de la BD sólo id, external_code, price,
+original_price y stock (la primera vez, con --refresh-cache o si tiene más de
+CACHE_TTL) y después se mantiene con lo que se escribe. Un producto de Syscom
+que no está en la caché es nuevo y se deja para sync_syscom_products_improved.py.
+
+Fuentes:
+- API (por defecto): páginas de /productos con syscom_crawler, subcategorías en paralelo
+- --from-report: el reporte por hora (reporte_art_hora), en una sola descarga
+
+La columna stock y su soporte en bulk_update_marketplace_products están en
+supabase/migrations/20250125_marketplace_products_stock.sql; si la columna aún
+no existe sólo se sincronizan los precios.
+
+Uso:
+    python3 scripts/syscom_price_sync.py                      # dry-run
+    python3 scripts/syscom_price_sync.py --execute
+    python3 scripts/syscom_price_sync.py --from-report data/syscom_reports/X.html --execute
+    python3 scripts/syscom_price_sync.py --refresh-cache --execute
+"""
+
+import sys
+import json
+import time
+import queue
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from catalog_config import supabase
+from catalog_writer import BulkProductWriter
+from etl_metrics import metrics
+from etl_profile import phase, run_main
+from syscom_crawler import SYSCOM_DIR
+from syscom_currency import CurrencyNormalizer
+from sync_syscom_products_improved import (
+    FETCH_QUEUE_PAGES, SYSCOM_MAP, _DONE, fetch_pages, get_access_token, get_sistemas_uuid, syscom_prices,
+)
+
+CACHE_PATH = SYSCOM_DIR / "price_cache.json"
+CACHE_TTL = 24 * 3600  # Volver a leer la BD una vez al día por si alguien editó precios a mano
+PAGE_SIZE = 1000
+WRITE_BATCH_SIZE = 500
+
+# (external_code, price, original_price, stock, {price_currency, exchange_rate})
+PriceRow = Tuple[str, float, Optional[float], Optional[int], Dict]
+
+
+def _money(value) -> Optional[float]:
+    return round(float(value), 2) if value not in (None, '') else None
+
+
+def _stock(value) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class PriceCache:
+    """external_code -> [id, price, original_price, stock] con el último valor conocido"""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, list] = {}
+        self.loaded_at = 0.0
+        self.has_stock = True
+
+    @property
+    def stale(self) -> bool:
+        return not self.entries or time.time() - self.loaded_at > CACHE_TTL
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.entries = data.get('entries', {})
+        self.loaded_at = data.get('loaded_at', 0.0)
+        self.has_stock = data.get('has_stock', True)
+        return True
+
+    def seed(self, sistemas_uuid: str) -> int:
+        """Lee de la BD el último valor de los productos de Syscom (sólo columnas de precio)"""
+        columns = 'id,external_code,price,original_price,stock'
+        try:
+            supabase.table('marketplace_products').select(columns).limit(1).execute()
+            self.has_stock = True
+        except Exception as e:
+            if 'stock' not in str(e):
+                raise
+            print("⚠️  marketplace_products no tiene columna stock; sólo se sincronizan precios")
+            print("   Ejecuta supabase/migrations/20250125_marketplace_products_stock.sql")
+            columns = 'id,external_code,price,original_price'
+            self.has_stock = False
+
+        entries: Dict[str, list] = {}
+        offset = 0
+        while True:
+            res = supabase.table('marketplace_products').select(columns).eq(
+                'category_id', sistemas_uuid
+            ).not_.is_('external_code', 'null').order('id').range(offset, offset + PAGE_SIZE - 1).execute()
+            batch = res.data or []
+            for item in batch:
+                entries[str(item['external_code'])] = [
+                    item['id'], _money(item.get('price')), _money(item.get('original_price')),
+                    _stock(item.get('stock')),
+                ]
+            if len(batch) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        self.entries = entries
+        self.loaded_at = time.time()
+        return len(entries)
+
+    def diff(self, code: str, price: float, original_price: Optional[float], stock: Optional[int]) -> Optional[Dict]:
+        """Campos que cambiaron respecto al último valor conocido (None si el producto no está)"""
+        entry = self.entries.get(code)
+        if entry is None:
+            return None
+        fields = {}
+        # Sin precio en Syscom ("Consultar precio") no se pisa el último precio conocido
+        if price and (price != entry[1] or original_price != entry[2]):
+            fields['price'] = price
+            fields['original_price'] = original_price
+        if self.has_stock and stock is not None and stock != entry[3]:
+            fields['stock'] = stock
+        return fields
+
+    def product_id(self, code: str) -> str:
+        return self.entries[code][0]
+
+    def commit(self, code: str, fields: Dict) -> None:
+        entry = self.entries[code]
+        if 'price' in fields:
+            entry[1] = fields['price']
+            entry[2] = fields['original_price']
+        if 'stock' in fields:
+            entry[3] = fields['stock']
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'loaded_at': self.loaded_at, 'has_stock': self.has_stock, 'entries': self.entries},
+                      f, separators=(',', ':'))
+        tmp.replace(self.path)
+
+
+def price_row(p: Dict, normalizer: Optional[CurrencyNormalizer] = None) -> Optional[PriceRow]:
+    """Sólo los campos de precio, existencia y moneda de un producto de la API"""
+    code = str(p.get('producto_id') or p.get('id') or '')
+    if not code:
+        return None
+    price, original_price = syscom_prices(p)
+    currency = normalizer.currency_fields(p) if normalizer is not None else {}
+    return code, _money(price), _money(original_price), _stock(p.get('total_existencia')), currency
+
+
+def api_price_rows(syscom_map: Dict, workers: int, max_pages: Optional[int],
+                   normalizer: CurrencyNormalizer) -> Iterator[PriceRow]:
+    """Precios desde /productos: el crawler descarga y este generador sólo extrae precio y stock"""
+    headers = {"Authorization": f"Bearer {get_access_token()}"}
+    pages: queue.Queue = queue.Queue(maxsize=FETCH_QUEUE_PAGES)
+    stop = threading.Event()
+    labels = {slug: slug for slug in syscom_map.values()}
+    fetcher = threading.Thread(target=fetch_pages, name="syscom-fetch", daemon=True,
+                               args=(headers, syscom_map, labels, max_pages, pages, stop),
+                               kwargs={'workers': workers})
+    fetcher.start()
+    try:
+        while True:
+            item = pages.get()
+            if item is _DONE:
+                break
+            for p in normalizer.normalize_products(item[0]):
+                row = price_row(p, normalizer)
+                if row:
+                    yield row
+    finally:
+        stop.set()
+        while not pages.empty():
+            pages.get_nowait()
+        fetcher.join(timeout=5)
+
+
+def report_price_rows(html_file: Optional[str], normalizer: CurrencyNormalizer) -> Iterator[PriceRow]:
+    """Precios desde el reporte por hora (ya trae sólo precio, precio de lista y existencia)"""
+    from import_all_syscom_products import report_row_to_syscom
+    from syscom_report_parser import ReportStream
+
+    if not html_file:
+        from download_syscom_report import download_report
+        with phase('download_report'):
+            html_file = download_report()
+        if not html_file:
+            print("❌ No se pudo descargar el reporte")
+            return
+    rows = (dict(report_row_to_syscom(row), total_existencia=row.get('existencia')) for row in ReportStream(html_file))
+    for p in normalizer.normalize_stream(rows):
+        row = price_row(p, normalizer)
+        if row:
+            yield row
+
+
+def sync_prices(rows: Iterator[PriceRow], cache: PriceCache, dry_run: bool = True,
+                batch_size: int = WRITE_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Escribe {price, original_price, stock} de los productos que cambiaron
+
+    La caché se actualiza lote por lote sólo si el lote se escribió sin
+    errores, así que un lote fallido se vuelve a intentar en la siguiente
+    corrida.
+    """
+    stats = {'seen': 0, 'changed': 0, 'price': 0, 'stock': 0, 'unchanged': 0, 'unknown': 0,
+             'duplicates': 0, 'errors': 0}
+    seen = set()
+    batch: Dict[str, Dict] = {}
+
+    with BulkProductWriter(supabase, batch_size=batch_size, dry_run=dry_run, verbose=False) as writer:
+        def flush():
+            if not batch:
+                return
+            errors = writer.stats['errors']
+            for code, fields in batch.items():
+                writer.add(cache.product_id(code), fields)
+            writer.flush()
+            if writer.stats['errors'] == errors:
+                if not dry_run:
+                    for code, fields in batch.items():
+                        cache.commit(code, fields)
+            else:
+                stats['errors'] += writer.stats['errors'] - errors
+            batch.clear()
+
+        for code, price, original_price, stock, currency in rows:
+            stats['seen'] += 1
+            if code in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(code)
+            fields = cache.diff(code, price, original_price, stock)
+            if fields is None:
+                stats['unknown'] += 1
+            elif not fields:
+                stats['unchanged'] += 1
+            else:
+                stats['changed'] += 1
+                stats['price'] += 'price' in fields
+                stats['stock'] += 'stock' in fields
+                if 'price' in fields:
+                    fields.update(currency)  # La moneda va junto con el precio que se escribe
+                batch[code] = fields
+                if stats['changed'] <= 5:
+                    print(f"   ~ {code}: {fields}")
+                if len(batch) >= batch_size:
+                    flush()
+        flush()
+
+    metrics.inc('price_sync_changes_total', stats['price'], field='price')
+    metrics.inc('price_sync_changes_total', stats['stock'], field='stock')
+    return stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Sincronizar sólo precios y existencias de Syscom')
+    parser.add_argument('--execute', action='store_true', help='Escribir en la BD (por defecto es dry-run)')
+    parser.add_argument('--from-report', nargs='?', const='', metavar='HTML',
+                        help='Usar el reporte por hora (descarga uno nuevo si no se indica archivo)')
+    parser.add_argument('--category', type=str, help='Sólo una categoría de Syscom (modo API)')
+    parser.add_argument('--workers', type=int, default=4, help='Subcategorías descargándose a la vez (modo API)')
+    parser.add_argument('--max-pages', type=int, help='Máximo de páginas por subcategoría (modo API)')
+    parser.add_argument('--refresh-cache', action='store_true', help='Volver a leer los precios actuales de la BD')
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE)
+    args = parser.parse_args()
+    metrics.export_at_exit('syscom_price_sync')
+    metrics.describe('price_sync_changes_total', 'Productos con precio o existencia distintos al último valor conocido')
+
+    print("=" * 60)
+    print("💲 SINCRONIZACIÓN DE PRECIOS Y EXISTENCIAS SYSCOM")
+    print("=" * 60)
+    print(f"Modo: {'PRODUCCIÓN' if args.execute else 'DRY RUN (no se guardarán cambios)'}")
+
+    syscom_map = SYSCOM_MAP
+    if args.category:
+        if args.category not in SYSCOM_MAP:
+            print(f"❌ Categoría {args.category} no encontrada en el mapeo")
+            sys.exit(1)
+        syscom_map = {args.category: SYSCOM_MAP[args.category]}
+
+    cache = PriceCache()
+    cache.load()
+    if args.refresh_cache or cache.stale:
+        sistemas_uuid = get_sistemas_uuid()
+        if not sistemas_uuid:
+            print("❌ 'sistemas' category not found in Supabase. Run migrations first.")
+            sys.exit(1)
+        print("🔍 Leyendo precios actuales de la BD...")
+        with phase('load_cache'):
+            count = cache.seed(sistemas_uuid)
+        cache.save()
+        print(f"✅ Caché con {count} productos: {cache.path}")
+    else:
+        age = (time.time() - cache.loaded_at) / 3600
+        print(f"📦 Caché con {len(cache.entries)} productos (leída de la BD hace {age:.1f} h)")
+
+    normalizer = CurrencyNormalizer()
+    normalizer.prepare(supabase)
+    if args.from_report is not None:
+        rows = report_price_rows(args.from_report or None, normalizer)
+    else:
+        rows = api_price_rows(syscom_map, args.workers, args.max_pages, normalizer)
+
+    print("\n🔄 Comparando precios...")
+    try:
+        with phase('sync_prices'):
+            stats = sync_prices(rows, cache, dry_run=not args.execute, batch_size=args.batch_size)
+    finally:
+        if args.execute:
+            cache.save()
+
+    print(f"\n✅ Revisados: {stats['seen']} productos de Syscom")
+    print(f"   🔄 Con cambios: {stats['changed']} (precio: {stats['price']}, existencia: {stats['stock']})")
+    print(f"   ⏭️  Sin cambios: {stats['unchanged']}")
+    print(f"   🆕 No están en el catálogo: {stats['unknown']} (usar sync_syscom_products_improved.py)")
+    if stats['errors']:
+        print(f"   ❌ Errores: {stats['errors']} (se reintentan en la siguiente corrida)")
+    normalizer.report()
+    if not args.execute and stats['changed']:
+        print("\n💡 Para aplicar los cambios, ejecuta:")
+        print("   python3 scripts/syscom_price_sync.py --execute")
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Parser en streaming del reporte de artículos de Syscom (reporte_art_hora)
+
+Lee el HTML por bloques con html.parser.HTMLParser (sin construir el árbol
+completo del documento) y va emitiendo cada fila de la tabla del reporte ya
+normalizada: ID de producto, modelo, marca, título, categorías, precio,
+existencias por almacén, imagen y link. La memoria usada no depende del tamaño
+del reporte, así que el catálogo completo se puede convertir en un solo paso.
+
+Si la respuesta es la página de espera ("Intente mas tarde"), no hay filas y
+se expone el tiempo de espera indicado por el servidor.
+
+Uso:
+    from syscom_report_parser import iter_report_rows, convert_report
+
+    for row in iter_report_rows('data/syscom_reports/syscom_report_X.html'):
+        print(row['modelo'], row['existencia'])
+
+    python3 scripts/syscom_report_parser.py data/syscom_reports/syscom_report_X.html
+    python3 scripts/syscom_report_parser.py reporte.html --format parquet
+    python3 scripts/syscom_report_parser.py --check
+"""
+
+import re
+import csv
+import sys
+import json
+import unicodedata
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+CHUNK_SIZE = 64 * 1024
+PARQUET_BATCH_ROWS = 5000
+
+# Columnas del archivo normalizado
+REPORT_FIELDS = [
+    'producto_id', 'modelo', 'marca', 'titulo', 'categorias',
+    'precio', 'precio_lista', 'moneda', 'tipo_cambio', 'existencia', 'existencia_almacenes',
+    'imagen', 'link', 'observaciones',
+]
+
+# Encabezado normalizado (sin acentos, minúsculas) -> campo
+HEADER_ALIASES = {
+    'id': 'producto_id',
+    'id producto': 'producto_id',
+    'producto id': 'producto_id',
+    'idp': 'producto_id',
+    'modelo': 'modelo',
+    'marca': 'marca',
+    'titulo': 'titulo',
+    'descripcion': 'titulo',
+    'nombre': 'titulo',
+    'precio': 'precio',
+    'precio especial': 'precio',
+    'precio descuento': 'precio',
+    'precio lista': 'precio_lista',
+    'precio de lista': 'precio_lista',
+    'moneda': 'moneda',
+    'tipo de cambio': 'tipo_cambio',
+    'imagen': 'imagen',
+    'img': 'imagen',
+    'link': 'link',
+    'liga': 'link',
+    'url': 'link',
+    'observaciones': 'observaciones',
+    'obs': 'observaciones',
+}
+
+WAIT_MARKERS = ('intente mas tarde', 'tiempo de espera')
+WAIT_RE = re.compile(r'(\d+)\s*Horas?\D+?(\d+)\s*Minutos?\D+?(\d+)\s*Segundos?', re.I)
+NUMBER_RE = re.compile(r'-?\d[\d,]*(?:\.\d+)?')
+CURRENCY_RE = re.compile(r'\b(USD|MXN|DLLS?|M\.?N\.?|PESOS)(?![\w.])', re.I)
+NUMBER_FIELDS = ('precio', 'precio_lista', 'tipo_cambio', 'existencia')
+
+
+def normalize_header(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', re.sub(r'[^a-z0-9]+', ' ', text.lower())).strip()
+
+
+def classify_header(header: str) -> Tuple[str, Optional[str]]:
+    """
+    Campo destino de una columna del reporte
+
+    Retorna (campo, detalle): las columnas de existencias por almacén se
+    clasifican como ('existencia', nombre_almacen) y las de categorías
+    (ctg=N niveles) como ('categorias', nivel).
+    """
+    key = normalize_header(header)
+    if key in HEADER_ALIASES:
+        return HEADER_ALIASES[key], None
+    if key.startswith(('existencia', 'stock', 'almacen', 'inventario')):
+        warehouse = re.sub(r'^(existencias?|stock|almacen|inventario)\s*', '', key)
+        return 'existencia', warehouse or 'total'
+    if key.startswith(('categoria', 'subcategoria', 'ctg', 'nivel')):
+        return 'categorias', key
+    if key.startswith('precio'):
+        return 'precio', None
+    if key.startswith(('imagen', 'foto')):
+        return 'imagen', None
+    return key.replace(' ', '_') or '', None
+
+
+def parse_number(text: str) -> Optional[float]:
+    """'$1,234.50 USD' -> 1234.5; '+100' -> 100.0"""
+    match = NUMBER_RE.search(text or '')
+    if not match:
+        return None
+    try:
+        return float(match.group(0).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def parse_currency(text: str) -> Optional[str]:
+    """'$1,000.00 MXN' -> 'MXN'; 'Dlls' -> 'USD'; None si no trae una moneda"""
+    match = CURRENCY_RE.search(text or '')
+    if not match:
+        return None
+    code = match.group(1).upper().replace('.', '')
+    return 'MXN' if code in ('MXN', 'MN', 'PESOS') else 'USD'
+
+
+def parse_wait_seconds(text: str) -> Optional[int]:
+    """Segundos de espera indicados en la página 'Intente mas tarde' (None si no hay)"""
+    match = WAIT_RE.search(re.sub(r'<[^>]+>', ' ', text or ''))
+    if not match:
+        return None
+    hours, minutes, seconds = (int(g) for g in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class ReportTableParser(HTMLParser):
+    """
+    Recorre el HTML una sola vez acumulando sólo la fila actual
+
+    Cada celda guarda su texto y, si los tiene, el primer href y src que
+    contiene. La primera fila con al menos dos encabezados reconocidos se toma
+    como encabezado de la tabla; las siguientes filas con datos se emiten a
+    self.rows (que el llamador vacía después de cada bloque).
+    """
+
+    SKIP_TAGS = {'script', 'style', 'noscript'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.headers: Optional[List[Tuple[str, Optional[str]]]] = None
+        self.raw_headers: List[str] = []
+        self.rows: List[Dict] = []
+        self.wait_text: Optional[str] = None
+        self._skip_depth = 0
+        self._row: Optional[List[Dict]] = None
+        self._cell: Optional[Dict] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == 'tr':
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._close_cell()
+            self._cell = {'text': [], 'href': None, 'src': None}
+        elif self._cell is not None:
+            attrs = dict(attrs)
+            if tag == 'a' and not self._cell['href'] and attrs.get('href'):
+                self._cell['href'] = attrs['href']
+            elif tag == 'img' and not self._cell['src'] and attrs.get('src'):
+                self._cell['src'] = attrs['src']
+            elif tag == 'br':
+                self._cell['text'].append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in ('td', 'th'):
+            self._close_cell()
+        elif tag == 'tr' and self._row is not None:
+            self._close_cell()
+            self._emit_row(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._cell is not None:
+            self._cell['text'].append(data)
+        elif self.wait_text is None and any(m in data.lower() for m in WAIT_MARKERS):
+            self.wait_text = data.strip()
+
+    def _close_cell(self):
+        if self._cell is not None and self._row is not None:
+            self._cell['text'] = re.sub(r'\s+', ' ', ''.join(self._cell['text'])).strip()
+            self._row.append(self._cell)
+        self._cell = None
+
+    def _emit_row(self, cells: List[Dict]):
+        if not cells:
+            return
+        if self.headers is None:
+            texts = [c['text'] for c in cells]
+            headers = [classify_header(t) for t in texts]
+            if sum(field in REPORT_FIELDS for field, _ in headers) >= 2:
+                self.raw_headers = texts
+                self.headers = headers
+            return
+        if len(cells) != len(self.headers) or not any(c['text'] or c['src'] for c in cells):
+            return
+        self.rows.append(normalize_row(self.headers, cells))
+
+
+def normalize_row(headers: List[Tuple[str, Optional[str]]], cells: List[Dict]) -> Dict:
+    """Convierte las celdas de una fila en un registro con REPORT_FIELDS"""
+    row: Dict = {field: None for field in REPORT_FIELDS}
+    categories: List[str] = []
+    warehouses: Dict[str, float] = {}
+
+    for (field, detail), cell in zip(headers, cells):
+        text = cell['text']
+        if field == 'existencia':
+            qty = parse_number(text)
+            if qty is not None:
+                warehouses[detail or 'total'] = qty
+        elif field == 'categorias':
+            if text:
+                categories.append(text)
+        elif field == 'imagen':
+            row['imagen'] = cell['src'] or cell['href'] or text or None
+        elif field == 'link':
+            row['link'] = cell['href'] or text or None
+        elif field in ('precio', 'precio_lista'):
+            if row[field] is None:
+                row[field] = parse_number(text)
+            if row['moneda'] is None:
+                row['moneda'] = parse_currency(text)
+        elif field == 'moneda':
+            # Sólo un código de moneda; si la columna trae otra cosa se detecta por el precio
+            if row['moneda'] is None:
+                row['moneda'] = parse_currency(text)
+        elif field == 'tipo_cambio':
+            if row['tipo_cambio'] is None:
+                row['tipo_cambio'] = parse_number(text)
+        elif field in row:
+            if row[field] is None:
+                row[field] = text or None
+            if field == 'titulo' and not row['link'] and cell['href']:
+                row['link'] = cell['href']
+
+    row['categorias'] = ' > '.join(categories) or None
+    if warehouses:
+        row['existencia'] = warehouses.get('total', sum(v for k, v in warehouses.items() if k != 'total'))
+        row['existencia_almacenes'] = json.dumps(warehouses, ensure_ascii=False)
+    return row
+
+
+class ReportStream:
+    """Iterador de filas de un reporte; expone headers y wait_text al terminar"""
+
+    def __init__(self, source: Union[str, Path], chunk_size: int = CHUNK_SIZE):
+        self.source = Path(source)
+        self.chunk_size = chunk_size
+        self.parser = ReportTableParser()
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.source, 'r', encoding='utf-8', errors='replace') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                self.parser.feed(chunk)
+                if self.parser.rows:
+                    yield from self.parser.rows
+                    self.parser.rows = []
+        self.parser.close()
+        yield from self.parser.rows
+        self.parser.rows = []
+
+    @property
+    def wait_text(self) -> Optional[str]:
+        return self.parser.wait_text
+
+    @property
+    def headers(self) -> List[str]:
+        return self.parser.raw_headers
+
+
+def iter_report_rows(source: Union[str, Path], chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """Filas normalizadas del reporte, leyendo el archivo por bloques"""
+    return iter(ReportStream(source, chunk_size))
+
+
+class _ParquetSink:
+    def __init__(self, path: Path):
+        self.path = path
+        self.schema = pa.schema([
+            (field, pa.float64() if field in NUMBER_FIELDS else pa.string())
+            for field in REPORT_FIELDS
+        ])
+        self.writer = pq.ParquetWriter(str(path), self.schema)
+        self.batch: List[Dict] = []
+
+    def write(self, row: Dict):
+        self.batch.append(row)
+        if len(self.batch) >= PARQUET_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.writer.write_table(pa.Table.from_pylist(self.batch, schema=self.schema))
+            self.batch = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def convert_report(html_file: Union[str, Path], output: Optional[Union[str, Path]] = None,
+                   fmt: str = 'csv') -> Dict:
+    """
+    Convierte el reporte HTML a CSV (o Parquet si pyarrow está instalado)
+
+    Retorna estadísticas: filas, con existencia, con imagen, categorías
+    distintas, encabezados detectados, archivo generado y mensaje de espera.
+    """
+    html_file = Path(html_file)
+    if fmt == 'parquet' and pq is None:
+        print("⚠️  pyarrow no está instalado (pip install pyarrow), se genera CSV")
+        fmt = 'csv'
+    output = Path(output) if output else html_file.with_suffix(f'.{fmt}')
+
+    stream = ReportStream(html_file)
+    stats = {'rows': 0, 'with_stock': 0, 'with_image': 0, 'categories': 0}
+    categories = set()
+
+    if fmt == 'parquet':
+        sink = _ParquetSink(output)
+        write, close = sink.write, sink.close
+        f = None
+    else:
+        f = open(output, 'w', newline='', encoding='utf-8')
+        csv_writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        csv_writer.writeheader()
+        write, close = csv_writer.writerow, f.close
+
+    try:
+        for row in stream:
+            write(row)
+            stats['rows'] += 1
+            if row['existencia']:
+                stats['with_stock'] += 1
+            if row['imagen']:
+                stats['with_image'] += 1
+            if row['categorias']:
+                categories.add(row['categorias'])
+    finally:
+        close()
+
+    stats['categories'] = len(categories)
+    stats['headers'] = stream.headers
+    stats['output'] = str(output) if stats['rows'] else None
+    stats['wait_text'] = stream.wait_text
+    if not stats['rows']:
+        output.unlink(missing_ok=True)
+    return stats
+
+
+# Encabezados/celdas de ejemplo -> campos esperados (python3 syscom_report_parser.py --check)
+CHECK_CASES = [
+    (['Modelo', 'Precio', 'Moneda'], ['DS-2CD1023', '$45.10', 'Dlls'],
+     {'modelo': 'DS-2CD1023', 'precio': 45.1, 'moneda': 'USD'}),
+    (['Modelo', 'Precio', 'Tipo de cambio'], ['DS-2CD1023', '$1,000.00 MXN', '17.25'],
+     {'precio': 1000.0, 'moneda': 'MXN', 'tipo_cambio': 17.25}),
+    (['Modelo', 'Precio lista', 'Existencia Guadalajara', 'Existencia Chihuahua'], ['X1', '12.50 USD', '3', '+2'],
+     {'precio_lista': 12.5, 'moneda': 'USD', 'existencia': 5.0}),
+]
+
+
+def check_parser() -> bool:
+    """Corre CHECK_CASES por el parser; True si todos los campos coinciden"""
+    ok = True
+    for headers, cells, expected in CHECK_CASES:
+        html = '<table><tr>{}</tr><tr>{}</tr></table>'.format(
+            ''.join(f'<th>{h}</th>' for h in headers), ''.join(f'<td>{c}</td>' for c in cells))
+        parser = ReportTableParser()
+        parser.feed(html)
+        parser.close()
+        row = parser.rows[0] if parser.rows else {}
+        wrong = {field: row.get(field) for field, value in expected.items() if row.get(field) != value}
+        if wrong:
+            ok = False
+            print(f"❌ {headers}: esperado {expected}, obtenido {wrong}")
+        else:
+            print(f"✅ {headers}")
+    return ok
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convertir el reporte HTML de Syscom a CSV/Parquet')
+    parser.add_argument('html_file', nargs='?', help='Reporte descargado (data/syscom_reports/*.html)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output', help='Archivo de salida (por defecto junto al HTML)')
+    parser.add_argument('--check', action='store_true', help='Verificar el parser con los casos de ejemplo')
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_parser() else 1)
+    if not args.html_file:
+        parser.error('falta html_file (o usa --check)')
+
+    result = convert_report(args.html_file, args.output, args.format)
+    if result['rows']:
+        print(f"✅ {result['rows']} filas -> {result['output']}")
+        print(f"   Con existencia: {result['with_stock']}  Con imagen: {result['with_image']}  Categorías: {result['categories']}")
+    elif result['wait_text']:
+        wait = parse_wait_seconds(Path(args.html_file).read_text(encoding='utf-8', errors='replace'))
+        print(f"⏳ El archivo es la página de espera: {result['wait_text']}")
+        if wait is not None:
+            print(f"   Espera indicada por el servidor: {wait // 60} min {wait % 60} s")
+    else:
+        print("⚠️  No se encontró la tabla del reporte en el HTML")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Poller asíncrono del reporte de artículos de Syscom (reporte_art_hora)
+
+Syscom sólo entrega el reporte una vez por hora; antes responde con la
+página "Intente mas tarde" que indica cuánto falta ("0 Horas 59 Minutos 0
+Segundos"). En lugar de dormir 60 s fijos, el poller:
+
+- reutiliza las cookies de la sesión HTTP (se guardan en disco entre corridas,
+  así que la visita a la página principal sólo se hace la primera vez);
+- espera exactamente lo que pide el servidor (más un margen) con
+  asyncio.sleep, por lo que puede correr como tarea junto a otros pasos del
+  ETL sin bloquearlos;
+- ante errores HTTP / timeouts reintenta con espera exponencial;
+- guarda la respuesta en disco por bloques, sin cargarla en memoria.
+
+Uso:
+    from syscom_report_poller import fetch_report, fetch_report_sync
+
+    html_file = await fetch_report()          # dentro de un event loop
+    html_file = fetch_report_sync()           # desde código síncrono
+
+    python3 scripts/syscom_report_poller.py --max-wait 7200
+"""
+
+import sys
+import random
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from syscom_report_parser import WAIT_MARKERS, parse_wait_seconds
+
+# Configuración
+REPORT_URL = "https://www.syscom.mx/principal/reporte_art_hora"
+REPORT_PARAMS = {
+    "cadena1": "104560873",
+    "cadena2": "872f3291e35cff2fe2933f1c7a85e29f",
+    "all": "1",
+    "cadena3": "1",
+    "alm": "1",
+    "img": "1",
+    "obs": "1",
+    "tc": "1",
+    "ctg": "8",
+    "lnk": "1",
+    "idc": "1",
+    "idp": "1",
+    "clear": "1",
+    "sel": "0"
+}
+
+# Headers para simular un navegador
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "es-MX,es;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+# Directorio de salida
+OUTPUT_DIR = Path(__file__).parent.parent / "data" / "syscom_reports"
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+COOKIE_FILE = OUTPUT_DIR / ".syscom_cookies"
+
+DEFAULT_MAX_WAIT = 2 * 3600      # Tiempo total máximo esperando el reporte
+WAIT_MARGIN = 5                  # Segundos extra sobre lo que pide el servidor
+ERROR_BACKOFF_BASE = 15
+ERROR_BACKOFF_MAX = 600
+# La página de espera pesa ~120 KB; un reporte real es mucho mayor
+WAIT_PAGE_MAX_BYTES = 1024 * 1024
+READ_CHUNK = 256 * 1024
+
+
+def _is_wait_page(path: Path) -> Optional[int]:
+    """Segundos de espera si el archivo es la página 'Intente mas tarde', si no None"""
+    if path.stat().st_size > WAIT_PAGE_MAX_BYTES:
+        return None
+    text = path.read_text(encoding='utf-8', errors='replace')
+    if not any(marker in text.lower() for marker in WAIT_MARKERS):
+        return None
+    seconds = parse_wait_seconds(text)
+    return seconds if seconds is not None else 60
+
+
+async def _warm_cookies(session: "aiohttp.ClientSession", jar: "aiohttp.CookieJar") -> None:
+    """Visita la página principal sólo si no hay cookies guardadas"""
+    if len(jar):
+        print(f"🍪 Reutilizando {len(jar)} cookies de sesión")
+        return
+    print("🍪 Obteniendo cookies de sesión...")
+    try:
+        async with session.get("https://www.syscom.mx", ssl=False) as response:
+            await response.read()
+            print(f"   Status: {response.status}")
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        print("   ⚠️ No se pudo obtener cookies, continuando sin ellas...")
+
+
+async def _download_once(session: "aiohttp.ClientSession", target: Path) -> int:
+    """Descarga el reporte a target por bloques; retorna el status HTTP"""
+    async with session.get(REPORT_URL, params=REPORT_PARAMS, ssl=False) as response:
+        if response.status != 200:
+            return response.status
+        with open(target, "wb") as f:
+            async for chunk in response.content.iter_chunked(READ_CHUNK):
+                f.write(chunk)
+        return 200
+
+
+async def fetch_report(max_wait: float = DEFAULT_MAX_WAIT, output_dir: Path = OUTPUT_DIR) -> Optional[Path]:
+    """
+    Obtiene el reporte esperando (sin bloquear el event loop) lo que indique Syscom
+
+    Retorna la ruta del HTML guardado o None si se agotó max_wait. Si al final
+    sólo se obtuvo la página de espera, esa página no se conserva.
+    """
+    if aiohttp is None:
+        raise ImportError("aiohttp no está instalado (pip install aiohttp)")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait
+    jar = aiohttp.CookieJar(unsafe=True)
+    if COOKIE_FILE.exists():
+        try:
+            jar.load(COOKIE_FILE)
+        except Exception:
+            pass
+
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=120)
+    attempt = 0
+    errors = 0
+    async with aiohttp.ClientSession(headers=HEADERS, cookie_jar=jar, timeout=timeout) as session:
+        await _warm_cookies(session, jar)
+
+        while True:
+            attempt += 1
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            target = output_dir / f"syscom_report_{timestamp}.html"
+            print(f"📥 Intento {attempt} - Descargando reporte...")
+
+            try:
+                status = await _download_once(session, target)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = None
+                print(f"   ⚠️ Error de conexión: {str(e)[:100] or type(e).__name__}")
+
+            if status == 200:
+                jar.save(COOKIE_FILE)
+                wait = _is_wait_page(target)
+                if wait is None:
+                    print(f"✅ HTML guardado en: {target} ({target.stat().st_size} bytes)")
+                    return target
+                target.unlink()
+                errors = 0
+                delay = wait + WAIT_MARGIN
+                print(f"⏳ Syscom pide esperar {wait // 60} min {wait % 60} s")
+            else:
+                if status is not None:
+                    print(f"   ❌ Status code {status}")
+                target.unlink(missing_ok=True)
+                errors += 1
+                delay = min(ERROR_BACKOFF_MAX, ERROR_BACKOFF_BASE * 2 ** (errors - 1))
+                delay *= random.uniform(0.8, 1.2)
+
+            remaining = deadline - loop.time()
+            if delay > remaining:
+                print(f"⚠️ El reporte no estará listo dentro del tiempo máximo ({max_wait / 60:.0f} min)")
+                return None
+            print(f"💤 Próximo intento en {delay:.0f} s (sin bloquear otras tareas)")
+            await asyncio.sleep(delay)
+
+
+def fetch_report_sync(max_wait: float = DEFAULT_MAX_WAIT, output_dir: Path = OUTPUT_DIR) -> Optional[Path]:
+    """Versión síncrona de fetch_report para los scripts existentes"""
+    return asyncio.run(fetch_report(max_wait, output_dir))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Esperar y descargar el reporte por hora de Syscom')
+    parser.add_argument('--max-wait', type=float, default=DEFAULT_MAX_WAIT, help='Segundos máximos de espera')
+    args = parser.parse_args()
+
+    try:
+        html_file = fetch_report_sync(args.max_wait)
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    sys.exit(0 if html_file else 1)
@@ -5,19 +5,10 @@ Script de prueba para verificar conexión con API Syscom y Supabase
 import os
 import sys
 import requests
-from pathlib import Path
 
-# Cargar variables de entorno manualmente
-env_file = Path(__file__).parent.parent / '.env.local'
-if env_file.exists():
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip().strip('"').strip("'")
-                os.environ[key] = value
+from catalog_config import load_env
+
+load_env()
 
 SYSCOM_CLIENT_ID = os.environ.get('SYSCOM_CLIENT_ID')
 SYSCOM_CLIENT_SECRET = os.environ.get('SYSCOM_CLIENT_SECRET')
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Índice difuso de títulos de productos (trigramas de caracteres)
+
+Se construye una sola vez al inicio sobre los títulos de marketplace_products y
+permite encontrar candidatos aunque el título del CSV o de Cyberpuerta tenga
+pequeñas diferencias de redacción (acentos, orden de palabras, abreviaturas).
+
+Los candidatos salen de un índice MinHash-LSH (ver minhash_lsh.py), por lo que
+cada consulta sólo compara contra unas decenas de títulos en lugar de todo el
+catálogo. Con los parámetros por defecto (64 permutaciones, 16 bandas) un
+título con similitud >= 0.7 se recupera con probabilidad > 99%.
+
+Uso:
+    from title_matcher import TitleIndex, fetch_title_index
+
+    index = fetch_title_index(supabase)
+    matches = index.search("Taladro percutor 1/2 pulg 600W", k=5)
+    best = index.best_match("Taladro percutor 1/2 pulg 600W", threshold=0.85)
+
+    python3 scripts/title_matcher.py "titulo a buscar" --k 5
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from minhash_lsh import MinHashLSH
+
+# Umbral por defecto para aceptar automáticamente una coincidencia difusa
+DEFAULT_AUTO_ACCEPT = 0.85
+# Similitud mínima para considerar a un producto como candidato
+DEFAULT_MIN_SIMILARITY = 0.5
+# Parámetros LSH: 16 bandas de 4 filas -> umbral aproximado de 0.5
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+
+def normalize_title(title: str) -> str:
+    """Normaliza un título: sin acentos, mayúsculas y sólo alfanuméricos"""
+    if not title:
+        return ''
+    text = unicodedata.normalize('NFKD', str(title))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(' ', text.upper()).strip()
+
+
+def title_trigrams(title: str) -> frozenset:
+    """Conjunto de trigramas de caracteres de un título normalizado"""
+    normalized = normalize_title(title)
+    if not normalized:
+        return frozenset()
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Similitud de Jaccard entre dos conjuntos de trigramas"""
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def title_similarity(title_a: str, title_b: str) -> float:
+    """Similitud (0-1) entre dos títulos sin necesidad de construir un índice"""
+    return jaccard(title_trigrams(title_a), title_trigrams(title_b))
+
+
+class TitleIndex:
+    """
+    Índice MinHash-LSH sobre los trigramas de cada título
+
+    El LSH sólo propone candidatos; la similitud devuelta es el Jaccard exacto
+    entre trigramas, calculado con intersección de frozensets. Los productos se
+    guardan tal cual (dict de PostgREST) para que el llamador pueda usar
+    directamente id, price, sku, etc. del candidato devuelto.
+    """
+
+    def __init__(self, products: List[Dict], title_field: str = 'title',
+                 num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS):
+        self.products: List[Dict] = []
+        self._grams: List[frozenset] = []
+        self._lsh = MinHashLSH(num_perm=num_perm, bands=bands)
+
+        for product in products:
+            grams = title_trigrams(product.get(title_field) or '')
+            if not grams:
+                continue
+            self._lsh.add(len(self.products), grams)
+            self.products.append(product)
+            self._grams.append(grams)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def search(self, title: str, k: int = 5,
+               min_similarity: float = DEFAULT_MIN_SIMILARITY) -> List[Tuple[Dict, float]]:
+        """
+        Retorna hasta k candidatos (producto, similitud) ordenados de mejor a peor
+        """
+        query = title_trigrams(title)
+        if not query:
+            return []
+
+        # Filtro por longitud: Jaccard >= t implica t·|A| <= |B| <= |A|/t
+        min_size = min_similarity * len(query)
+        max_size = len(query) / min_similarity if min_similarity > 0 else float('inf')
+
+        scored = []
+        for pos in self._lsh.query(query):
+            grams = self._grams[pos]
+            if not (min_size <= len(grams) <= max_size):
+                continue
+            score = jaccard(query, grams)
+            if score >= min_similarity:
+                scored.append((score, pos))
+
+        scored.sort(reverse=True)
+        return [(self.products[pos], score) for score, pos in scored[:k]]
+
+    def best_match(self, title: str,
+                   threshold: float = DEFAULT_AUTO_ACCEPT) -> Optional[Tuple[Dict, float]]:
+        """Retorna el mejor candidato sólo si supera el umbral de aceptación automática"""
+        matches = self.search(title, k=1, min_similarity=threshold)
+        return matches[0] if matches else None
+
+
+def fetch_title_index(supabase, columns: str = 'id,sku,price,title,external_code',
+                      page_size: int = 1000) -> TitleIndex:
+    """Descarga (paginado) los títulos de los productos activos y construye el índice"""
+    products: List[Dict] = []
+    offset = 0
+    while True:
+        response = supabase.table('marketplace_products').select(columns).eq(
+            'status', 'active'
+        ).order('id').range(offset, offset + page_size - 1).execute()
+        page = response.data or []
+        products.extend(page)
+        if len(page) < page_size:
+            break
+        offset += page_size
+    return TitleIndex(products)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from catalog_config import get_supabase
+
+    parser = argparse.ArgumentParser(description='Buscar productos por título aproximado')
+    parser.add_argument('title', type=str, help='Título a buscar')
+    parser.add_argument('--k', type=int, default=5, help='Número de candidatos a mostrar')
+    parser.add_argument('--min-similarity', type=float, default=DEFAULT_MIN_SIMILARITY,
+                        help='Similitud mínima de los candidatos (0-1)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = fetch_title_index(get_supabase())
+    print(f"✅ Índice construido: {len(index)} títulos en {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    results = index.search(args.title, k=args.k, min_similarity=args.min_similarity)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"🔍 {len(results)} candidatos en {elapsed_ms:.2f} ms")
+    for product, score in results:
+        print(f"   {score:.2f}  {product.get('id')}  {str(product.get('title', ''))[:70]}")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Pool de navegadores Playwright para el Banco de Contenido Digital TRUPER
+
+Lanza un solo Chromium con N contextos aislados (cookies/sesión propias) y una
+página reutilizable por contexto. Las búsquedas se reparten entre los
+contextos con una cola, así que N claves se buscan en paralelo.
+
+- Fuentes, CSS, media e imágenes se bloquean con intercepción de requests
+  (las imágenes se leen del atributo src y se descargan con page.request,
+  que no pasa por las rutas interceptadas).
+- Analytics (Google, Facebook, Hotjar...) se bloquea por host.
+- En lugar de time.sleep() fijos se espera la respuesta de cada búsqueda
+  (documento o AJAX) y después a la red inactiva; los resultados que no
+  mencionan el término buscado se descartan.
+
+Uso:
+    from truper_bank_pool import run_pool, search_bank
+
+    async def worker(page, clave):
+        return await search_bank(page, clave)
+
+    run_pool(claves, worker, workers=4, on_result=lambda clave, res: print(clave, res))
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+except ImportError:
+    async_playwright = None
+    PlaywrightTimeout = TimeoutError
+
+TRUPER_BANK_URL = "https://www.truper.com/BancoContenidoDigital/index.php?r=site/index"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT_MS = 30000
+
+SEARCH_INPUT = "#buscador, input[name='search'], input[type='text']"
+SEARCH_BUTTON = "button.btn-primary, button[type='submit'], input[type='submit']"
+RESULT_CHECKBOX = "input[type='checkbox'][id]"
+
+BLOCKED_RESOURCE_TYPES = {'font', 'stylesheet', 'media', 'image'}
+BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+    'facebook.com',
+    'hotjar.com',
+    'clarity.ms',
+)
+
+
+async def _block_unneeded(route):
+    """Aborta requests que no hacen falta para leer los resultados"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def absolute_url(src: str) -> str:
+    """Convierte un src relativo del banco en URL absoluta"""
+    if src.startswith("//"):
+        return "https:" + src
+    if src.startswith("/"):
+        return "https://www.truper.com" + src
+    if not src.startswith("http"):
+        return f"{TRUPER_BANK_URL.rsplit('/', 1)[0]}/{src}"
+    return src
+
+
+def _is_search_response(response) -> bool:
+    """Respuesta de la búsqueda (documento o AJAX); fuentes, imágenes y analytics se abortan"""
+    return response.request.resource_type in ('document', 'xhr', 'fetch')
+
+
+# Texto del renglón de resultado de una casilla (para saber a qué clave corresponde)
+RESULT_TEXT_JS = """el => {
+    const label = el.id ? document.querySelector(`label[for="${CSS.escape(el.id)}"]`) : null;
+    const row = el.closest('tr, li, .card, .item, .producto') || el.parentElement;
+    return [label && label.innerText, row && row.innerText].filter(Boolean).join(' ');
+}"""
+
+
+async def search_bank(page, term: str, timeout_ms: int = DEFAULT_TIMEOUT_MS) -> Dict[str, Any]:
+    """
+    Busca una clave/código en el banco reutilizando la página
+
+    Retorna {'term', 'found', 'product_ids', 'image_urls'}; product_ids e
+    image_urls sólo contienen resultados que mencionan el término buscado.
+    """
+    search_box = page.locator(SEARCH_INPUT).first
+    # Sólo se navega si la página aún no está en el buscador
+    if not page.url.startswith(TRUPER_BANK_URL.split('?')[0]) or await search_box.count() == 0:
+        await page.goto(TRUPER_BANK_URL, wait_until="domcontentloaded", timeout=timeout_ms)
+    await search_box.wait_for(state="visible", timeout=timeout_ms)
+
+    await search_box.fill(term)
+    search_button = page.locator(SEARCH_BUTTON).first
+    # La página ya está cargada, así que wait_for_load_state regresaría en seguida con
+    # los resultados de la búsqueda anterior: se espera la respuesta de esta búsqueda
+    async with page.expect_response(_is_search_response, timeout=timeout_ms):
+        if await search_button.count() > 0:
+            await search_button.click()
+        else:
+            await search_box.press("Enter")
+
+    await page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+    try:
+        await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    except PlaywrightTimeout:
+        pass
+
+    term_lower = term.lower()
+    product_ids: List[str] = []
+    for checkbox in await page.locator(RESULT_CHECKBOX).all():
+        pid = await checkbox.get_attribute("id")
+        if not pid:
+            continue
+        text = await checkbox.evaluate(RESULT_TEXT_JS) or ""
+        if term_lower in pid.lower() or term_lower in text.lower():
+            product_ids.append(pid)
+
+    image_urls: List[str] = []
+    for img in await page.locator("img").all():
+        src = await img.get_attribute("src") or ""
+        alt = await img.get_attribute("alt") or ""
+        if src and (term_lower in src.lower() or term_lower in alt.lower()):
+            url = absolute_url(src)
+            if url not in image_urls:
+                image_urls.append(url)
+
+    return {
+        "term": term,
+        "found": bool(product_ids or image_urls),
+        "product_ids": product_ids,
+        "image_urls": image_urls,
+    }
+
+
+class TruperBankPool:
+    """N contextos aislados de Chromium, cada uno con una página reutilizable"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, headless: bool = True,
+                 timeout_ms: int = DEFAULT_TIMEOUT_MS):
+        if async_playwright is None:
+            raise ImportError("Playwright no está instalado (pip install playwright && playwright install chromium)")
+        self.workers = max(1, workers)
+        self.headless = headless
+        self.timeout_ms = timeout_ms
+        self._playwright = None
+        self._browser = None
+        self.pages: List[Any] = []
+
+    async def __aenter__(self) -> "TruperBankPool":
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        for _ in range(self.workers):
+            context = await self._browser.new_context(
+                viewport={"width": 1280, "height": 800},
+                user_agent=USER_AGENT,
+            )
+            context.set_default_timeout(self.timeout_ms)
+            await context.route("**/*", _block_unneeded)
+            self.pages.append(await context.new_page())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+    async def map(self, items: Iterable[Any],
+                  worker: Callable[[Any, Any], Awaitable[Any]],
+                  on_result: Optional[Callable[[Any, Any], None]] = None) -> None:
+        """
+        Ejecuta worker(page, item) para cada item repartiendo entre las páginas
+
+        on_result(item, resultado) se llama en el hilo del event loop, por lo
+        que puede escribir logs sin locks. Si el worker lanza una excepción el
+        resultado es {'status': 'error', 'reason': ...}.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        async def run(page):
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result = await worker(page, item)
+                except PlaywrightTimeout:
+                    result = {"status": "failed", "reason": "timeout"}
+                except Exception as e:
+                    result = {"status": "error", "reason": str(e)[:100]}
+                if on_result:
+                    on_result(item, result)
+
+        await asyncio.gather(*(run(page) for page in self.pages))
+
+
+def run_pool(items: Iterable[Any], worker: Callable[[Any, Any], Awaitable[Any]],
+             workers: int = DEFAULT_WORKERS,
+             on_result: Optional[Callable[[Any, Any], None]] = None,
+             headless: bool = True) -> None:
+    """Versión síncrona de TruperBankPool.map para los scripts existentes"""
+    async def main():
+        async with TruperBankPool(workers=workers, headless=headless) as pool:
+            await pool.map(items, worker, on_result)
+
+    asyncio.run(main())
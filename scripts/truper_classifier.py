@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Clasificador de categoría y power_type para productos TRUPER
+
+map_category recorría FAMILY_DESC_TO_CATEGORY con una búsqueda de subcadena
+por palabra en cada fila, y determine_power_type armaba el texto en
+minúsculas y revisaba tres listas de palabras. TruperClassifier compila cada
+tabla una sola vez en una alternancia de regex en forma de árbol y regresa
+(categoría, power_type) con un solo recorrido del texto de cada fila; la
+categoría sólo depende de la familia, así que se calcula una vez por familia
+y se memoriza.
+
+El resultado es el mismo que con los ciclos: gana la palabra que aparece
+primero en la tabla (no la que aparece primero en el texto), también cuando
+una palabra contiene a otra ("lija" dentro de "lijadora").
+
+Uso:
+    from truper_classifier import TruperClassifier
+
+    classifier = TruperClassifier()
+    category, power_type = classifier.classify(familia, desc_familia, descripcion, clave)
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+# Mapeo de familias TRUPER a categorías normalizadas
+FAMILY_TO_CATEGORY = {
+    "P085": "plomeria",
+    "P049": "varios",
+    "P129": "construccion",
+    "P216": "jardineria",
+    "P515": "construccion",
+    "P402": "jardineria",
+}
+
+# Mapeo de descripciones de familia a categorías (en orden de prioridad).
+# "sierra" aparecía dos veces (construccion y electricidad); en un dict gana el
+# último valor pero conserva la posición del primero, así que se deja una sola
+# entrada con ese comportamiento.
+FAMILY_DESC_TO_CATEGORY = {
+    "llaves": "plomeria",
+    "cutters": "varios",
+    "sierra": "electricidad",
+    "serrucho": "jardineria",
+    "lija": "construccion",
+    "cavador": "jardineria",
+    "electric": "electricidad",
+    "eléctrico": "electricidad",
+    "eléctrica": "electricidad",
+    "construccion": "construccion",
+    "construcción": "construccion",
+    "plomeria": "plomeria",
+    "plomería": "plomeria",
+    "mecanica": "mecanica",
+    "mecánica": "mecanica",
+    "pintura": "pintura",
+    "jardineria": "jardineria",
+    "jardinería": "jardineria",
+    "herramienta": "herramienta-manual",
+    "taladro": "electricidad",
+    "rotomartillo": "electricidad",
+    "esmeril": "electricidad",
+    "pulidora": "electricidad",
+    "lijadora": "electricidad",
+    "atornillador": "electricidad",
+    "destornillador": "electricidad",
+}
+
+DEFAULT_CATEGORY = "varios"
+
+# power_type por palabras en descripción y clave (en orden de prioridad)
+POWER_TYPE_KEYWORDS = {
+    "cordless": ["inalámbrico", "inalambrico", "bateria", "batería", "cordless", "battery"],
+    "electric": ["electric", "eléctrico", "eléctrica", "enchufe", "cable"],
+    "manual": ["manual", "mango", "mano"],
+}
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Alternancia en forma de árbol (inal(?:ámbrico|ambrico)|man(?:ual|go|o)|...) para no
+    probar cada palabra completa en cada posición del texto"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Palabras -> valor, compiladas en un solo patrón; gana la primera palabra de la tabla"""
+
+    def __init__(self, keywords: Iterable[Tuple[str, str]]):
+        self.values = []
+        priority: Dict[str, int] = {}
+        for word, value in keywords:
+            if word not in priority:
+                priority[word] = len(self.values)
+                self.values.append(value)
+
+        # El patrón regresa la palabra más larga en cada posición; si contiene otras
+        # palabras ("lijadora" contiene "lija") éstas también coinciden en el texto,
+        # así que cuenta con la mejor prioridad de todas ellas
+        self.priority = {
+            word: min(rank for other, rank in priority.items() if other in word)
+            for word in priority
+        }
+
+        # Si el final de una palabra es el inicio de otra, la segunda puede empezar
+        # dentro de la primera: en ese caso se busca en cada posición (lookahead)
+        overlapping = any(
+            other != word[i:] and other.startswith(word[i:])
+            for word in priority for other in priority for i in range(1, len(word))
+        )
+        alternation = _trie_pattern(priority)
+        self.pattern = re.compile(f"(?=({alternation}))" if overlapping else f"({alternation})")
+
+    def match(self, text: str) -> Optional[str]:
+        found = self.pattern.findall(text)
+        if not found:
+            return None
+        return self.values[min(map(self.priority.__getitem__, found))]
+
+
+class TruperClassifier:
+    """Categoría y power_type de una fila del CSV de TRUPER"""
+
+    def __init__(self, family_to_category: Dict[str, str] = FAMILY_TO_CATEGORY,
+                 desc_to_category: Dict[str, str] = FAMILY_DESC_TO_CATEGORY,
+                 power_keywords: Dict[str, list] = POWER_TYPE_KEYWORDS):
+        self.family_to_category = family_to_category
+        self.category_matcher = KeywordMatcher(desc_to_category.items())
+        self.power_matcher = KeywordMatcher(
+            (word, power_type) for power_type, words in power_keywords.items() for word in words
+        )
+        self._categories: Dict[Tuple[str, str], str] = {}
+
+    def category(self, familia: str, desc_familia: str) -> str:
+        """Categoría normalizada de la familia (memorizada por familia)"""
+        key = (familia or "", desc_familia or "")
+        category = self._categories.get(key)
+        if category is None:
+            category = self.family_to_category.get(key[0]) or \
+                self.category_matcher.match(key[1].lower()) or DEFAULT_CATEGORY
+            self._categories[key] = category
+        return category
+
+    def power_type(self, descripcion: str, clave: str) -> Optional[str]:
+        """Tipo de potencia según descripción y clave"""
+        return self.power_matcher.match(f"{(descripcion or '').lower()} {(clave or '').lower()}")
+
+    def classify(self, familia: str, desc_familia: str, descripcion: str, clave: str) -> Tuple[str, Optional[str]]:
+        """(categoría, power_type) de una fila"""
+        category = self._categories.get((familia, desc_familia)) or self.category(familia, desc_familia)
+        return category, self.power_matcher.match(f"{descripcion.lower()} {clave.lower()}")
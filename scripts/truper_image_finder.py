@@ -10,15 +10,15 @@ this script will help identify which products have images available.
 """
 
 import os
-import time
+import sys
 import json
 from pathlib import Path
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+
+from truper_bank_pool import run_pool, search_bank, DEFAULT_WORKERS
+from truper_negative_cache import BANK, load_negative_cache
 
 # Configuration
-TRUPER_BANK_URL = "https://www.truper.com/BancoContenidoDigital/index.php?r=site/index"
 LOG_FILE = Path("./truper_image_search_log.json")
-WAIT_TIME = 1  # Seconds between searches
 
 
 class TruperImageFinder:
@@ -38,84 +38,55 @@ class TruperImageFinder:
         with open(self.log_file, 'w') as f:
             json.dump(self.results, f, indent=2)
     
-    def search_product(self, page, sku):
+    async def search_product(self, page, sku):
         """Search for a product and check if it exists"""
-        try:
-            print(f"Searching: {sku}...", end=" ")
-            
-            # Navigate to search page
-            page.goto(TRUPER_BANK_URL, wait_until="domcontentloaded", timeout=30000)
-            time.sleep(1)
-            
-            # Search for the SKU
-            search_box = page.locator("#buscador")
-            search_box.fill(sku)
-            
-            # Click search button
-            search_button = page.locator("button.btn-primary")
-            search_button.click()
-            
-            # Wait for results
-            time.sleep(2)
-            
-            # Check if product found
-            checkboxes = page.locator("input[type='checkbox'][id]").all()
-            
-            if len(checkboxes) == 0:
-                print("❌ Not found")
-                self.results["not_found"].append(sku)
-                return False
-            
-            # Get product ID
-            product_id = checkboxes[0].get_attribute("id")
-            print(f"✓ Found (ID: {product_id})")
-            
+        result = await search_bank(page, sku)
+        if not result["product_ids"]:
+            return {"status": "not_found"}
+        return {"status": "found", "product_id": result["product_ids"][0]}
+
+    def record_result(self, sku, result):
+        """Store a search result and save the log"""
+        self.processed += 1
+        prefix = f"[{self.processed}/{self.total}] {sku}:"
+        if result["status"] == "found":
+            print(f"{prefix} ✓ Found (ID: {result['product_id']})")
             self.results["found"].append({
                 "sku": sku,
-                "product_id": product_id
+                "product_id": result["product_id"]
             })
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error: {str(e)[:50]}")
-            self.results["errors"].append({"sku": sku, "error": str(e)})
-            return False
-    
-    def process_batch(self, skus):
-        """Process a batch of SKUs"""
-        with sync_playwright() as p:
-            # Launch browser (headless for speed)
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080}
-            )
-            page = context.new_page()
-            
-            for i, sku in enumerate(skus):
-                # Skip if already processed
-                found_skus = [item["sku"] for item in self.results.get("found", [])]
-                if sku in found_skus or sku in self.results.get("not_found", []):
-                    print(f"[{i+1}/{len(skus)}] {sku} - Already processed")
-                    continue
-                
-                print(f"[{i+1}/{len(skus)}] ", end="")
-                self.search_product(page, sku)
-                
-                # Save log after each search
-                self.save_log()
-                
-                # Wait between searches
-                if i < len(skus) - 1:
-                    time.sleep(WAIT_TIME)
-            
-            browser.close()
-            
-            print(f"\n{'='*60}")
-            print(f"✅ Batch complete!")
-            print(f"Found: {len(self.results.get('found', []))}")
-            print(f"Not found: {len(self.results.get('not_found', []))}")
-            print(f"Errors: {len(self.results.get('errors', []))}")
-            print(f"{'='*60}")
+            load_negative_cache().clear_code(sku, BANK)
+        elif result["status"] == "not_found":
+            print(f"{prefix} ❌ Not found")
+            self.results["not_found"].append(sku)
+            load_negative_cache().mark_code_missing(sku, BANK, "bank_not_found", "truper_image_finder")
+        else:
+            print(f"{prefix} ❌ Error: {result.get('reason', 'unknown')[:50]}")
+            self.results["errors"].append({"sku": sku, "error": result.get("reason")})
+
+        # Save log every few results
+        if self.processed % 10 == 0:
+            self.save_log()
+
+    def process_batch(self, skus, workers=DEFAULT_WORKERS):
+        """Process a batch of SKUs in parallel browser contexts"""
+        found_skus = {item["sku"] for item in self.results.get("found", [])}
+        done = found_skus | set(self.results.get("not_found", []))
+        negative_cache = load_negative_cache()
+        pending = [sku for sku in skus if sku not in done and not negative_cache.is_missing_code(sku, BANK)]
+        print(f"Already processed: {len(skus) - len(pending)}, pending: {len(pending)} ({workers} workers)")
+
+        self.processed = 0
+        self.total = len(pending)
+        run_pool(pending, self.search_product, workers=workers, on_result=self.record_result)
+        self.save_log()
+
+        print(f"\n{'='*60}")
+        print(f"✅ Batch complete!")
+        print(f"Found: {len(self.results.get('found', []))}")
+        print(f"Not found: {len(self.results.get('not_found', []))}")
+        print(f"Errors: {len(self.results.get('errors', []))}")
+        print(f"{'='*60}")
 
 
 def main():
@@ -135,8 +106,9 @@ def main():
     # Create finder
     finder = TruperImageFinder()
     
-    # Process all SKUs
-    finder.process_batch(skus)
+    # Process all SKUs (optional first argument: number of parallel browser contexts)
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WORKERS
+    finder.process_batch(skus, workers=workers)
     
     # Print summary
     print(f"\n{'='*60}")
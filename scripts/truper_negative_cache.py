@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Caché negativa compartida para códigos e imágenes de Truper que no existen
+
+Los scripts de imágenes (descarga directa, solución híbrida, bancos de
+contenido) registran aquí cada URL que devolvió 404 y cada código para el que
+no se encontró imagen, con motivo, script de origen y fecha. En la siguiente
+corrida esos códigos/URLs se omiten mientras no haya pasado el horizonte de
+reintento (por defecto 30 días).
+
+Los códigos se guardan por tipo de búsqueda: DIRECT (URL directa
+truper.com/media/import/imagenes/<código>.jpg) y BANK (banco de contenido).
+Que la URL directa no exista no dice nada del banco, que es justamente el
+respaldo para esos códigos. Cuando se encuentra imagen se llama a clear_code
+para que una entrada vieja no sobreviva al éxito.
+
+El horizonte se configura con el argumento retry_days o con la variable de
+entorno TRUPER_NEGATIVE_RETRY_DAYS (0 = no omitir nada, volver a probar todo).
+
+Uso:
+    from truper_negative_cache import load_negative_cache
+
+    cache = load_negative_cache()
+    if cache.is_missing_code(clave, DIRECT):
+        ...
+    cache.mark_code_missing(clave, DIRECT, 'direct_url_404', 'hybrid_image_solution')
+    for url in cache.filter_urls(urls):
+        ...
+        cache.mark_url_missing(url, 'http_404', 'hybrid_image_solution')
+    cache.save()
+
+    python3 scripts/truper_negative_cache.py            # estadísticas
+    python3 scripts/truper_negative_cache.py --prune    # eliminar entradas vencidas
+"""
+
+import os
+import json
+import atexit
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+CACHE_FILE = Path(__file__).parent / "truper_negative_cache.json"
+DEFAULT_RETRY_DAYS = 30
+AUTOSAVE_EVERY = 100
+
+# Tipos de búsqueda de un código
+DIRECT = 'direct'
+BANK = 'bank'
+LOOKUP_KINDS = (DIRECT, BANK)
+
+
+def _key(code: str) -> str:
+    return str(code).strip().upper()
+
+
+class NegativeCache:
+    """Registro persistente (JSON) de códigos y URLs conocidos como inexistentes"""
+
+    def __init__(self, path: Path = CACHE_FILE, retry_days: Optional[float] = None):
+        if retry_days is None:
+            retry_days = float(os.environ.get('TRUPER_NEGATIVE_RETRY_DAYS', DEFAULT_RETRY_DAYS))
+        self.path = Path(path)
+        self.retry_horizon = timedelta(days=retry_days)
+        self.codes: Dict[str, Dict[str, Dict]] = {kind: {} for kind in LOOKUP_KINDS}
+        self.urls: Dict[str, Dict] = {}
+        self.hits = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._load_codes(data.get('codes', {}))
+                self.urls = data.get('urls', {})
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"⚠️  No se pudo leer la caché negativa ({e}), se empieza vacía")
+
+        atexit.register(self.save)
+
+    def _load_codes(self, codes: Dict) -> None:
+        for kind in LOOKUP_KINDS:
+            if isinstance(codes.get(kind), dict):
+                self.codes[kind].update(codes[kind])
+        # Formato anterior: una sola tabla; el motivo dice de qué búsqueda venía
+        for code, entry in codes.items():
+            if code not in LOOKUP_KINDS and isinstance(entry, dict) and 'reason' in entry:
+                kind = DIRECT if entry['reason'].startswith('direct') else BANK
+                self.codes[kind][code] = entry
+
+    def _is_fresh(self, entry: Optional[Dict]) -> bool:
+        if not entry or self.retry_horizon.total_seconds() <= 0:
+            return False
+        try:
+            checked_at = datetime.fromisoformat(entry['checked_at'])
+        except (KeyError, ValueError):
+            return False
+        return datetime.now() - checked_at < self.retry_horizon
+
+    def _mark(self, table: Dict[str, Dict], key: str, reason: str, source: str, **extra) -> None:
+        with self._lock:
+            previous = table.get(key, {})
+            table[key] = {
+                'reason': reason,
+                'source': source,
+                'checked_at': datetime.now().isoformat(timespec='seconds'),
+                'attempts': previous.get('attempts', 0) + 1,
+                **extra,
+            }
+            self._pending += 1
+            should_save = self._pending >= AUTOSAVE_EVERY
+        if should_save:
+            self.save()
+
+    def is_missing_code(self, code: str, kind: str) -> bool:
+        """True si la búsqueda kind (DIRECT o BANK) del código falló dentro del horizonte de reintento"""
+        if not code:
+            return False
+        missing = self._is_fresh(self.codes[kind].get(_key(code)))
+        if missing:
+            self.hits += 1
+        return missing
+
+    def is_missing_url(self, url: str) -> bool:
+        missing = self._is_fresh(self.urls.get(url))
+        if missing:
+            self.hits += 1
+        return missing
+
+    def filter_urls(self, urls: Iterable[str]) -> List[str]:
+        """URLs sin duplicados que no se sabe que fallen"""
+        result = []
+        for url in urls:
+            if url not in result and not self.is_missing_url(url):
+                result.append(url)
+        return result
+
+    def mark_code_missing(self, code: str, kind: str, reason: str, source: str) -> None:
+        if code:
+            self._mark(self.codes[kind], _key(code), reason, source)
+
+    def mark_url_missing(self, url: str, reason: str, source: str, status: Optional[int] = None) -> None:
+        extra = {'status': status} if status is not None else {}
+        self._mark(self.urls, url, reason, source, **extra)
+
+    def record_response(self, url: str, status: int, content_type: str, source: str) -> bool:
+        """
+        Registra la respuesta de una URL de imagen que no sirvió
+
+        Retorna True si el fallo es definitivo (404/403/410 o contenido que no
+        es imagen) y se cacheó; False si es temporal (5xx, 429...) y conviene
+        reintentar en la próxima corrida.
+        """
+        if status == 200 and 'image' not in (content_type or '').lower():
+            self.mark_url_missing(url, 'not_an_image', source, status)
+            return True
+        if status in (403, 404, 410):
+            self.mark_url_missing(url, f'http_{status}', source, status)
+            return True
+        return False
+
+    def clear_code(self, code: str, kind: Optional[str] = None) -> None:
+        """Se encontró imagen: el código deja de considerarse inexistente (en kind o en todas)"""
+        if not code:
+            return
+        with self._lock:
+            for table_kind in ((kind,) if kind else LOOKUP_KINDS):
+                if self.codes[table_kind].pop(_key(code), None) is not None:
+                    self._pending += 1
+
+    def clear_url(self, url: str) -> None:
+        with self._lock:
+            if self.urls.pop(url, None) is not None:
+                self._pending += 1
+
+    def prune(self) -> int:
+        """Elimina las entradas fuera del horizonte de reintento"""
+        with self._lock:
+            removed = 0
+            for table in (*self.codes.values(), self.urls):
+                for key in [k for k, entry in table.items() if not self._is_fresh(entry)]:
+                    del table[key]
+                    removed += 1
+            self._pending += removed
+        return removed
+
+    def save(self) -> None:
+        with self._lock:
+            if self._pending == 0:
+                return
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'updated_at': datetime.now().isoformat(timespec='seconds'),
+                    'codes': self.codes,
+                    'urls': self.urls,
+                }, f, indent=1, ensure_ascii=False)
+            # Reemplazo atómico para no dejar el archivo a medias si el script muere
+            os.replace(tmp_path, self.path)
+            self._pending = 0
+
+    def summary(self) -> str:
+        codes = ', '.join(f"{len(self.codes[kind])} {kind}" for kind in LOOKUP_KINDS)
+        return f"códigos ({codes}) y {len(self.urls)} URLs conocidos como inexistentes, {self.hits} omitidos en esta corrida"
+
+
+_shared: Optional[NegativeCache] = None
+
+
+def load_negative_cache(retry_days: Optional[float] = None) -> NegativeCache:
+    """Instancia compartida dentro del proceso (todos los módulos usan la misma)"""
+    global _shared
+    if _shared is None:
+        _shared = NegativeCache(retry_days=retry_days)
+    elif retry_days is not None:
+        _shared.retry_horizon = timedelta(days=retry_days)
+    return _shared
+
+
+if __name__ == "__main__":
+    import argparse
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description='Estadísticas de la caché negativa de Truper')
+    parser.add_argument('--retry-days', type=float, help='Horizonte de reintento en días')
+    parser.add_argument('--prune', action='store_true', help='Eliminar entradas vencidas')
+    args = parser.parse_args()
+
+    cache = load_negative_cache(args.retry_days)
+    print(f"📄 {cache.path}")
+    print(f"   {cache.summary()}")
+    tables = [(f"Códigos ({kind})", cache.codes[kind]) for kind in LOOKUP_KINDS] + [('URLs', cache.urls)]
+    for label, table in tables:
+        by_reason = Counter(f"{e.get('source')}: {e.get('reason')}" for e in table.values())
+        if by_reason:
+            print(f"\n{label} por origen/motivo:")
+            for reason, count in by_reason.most_common():
+                print(f"   {count:6d}  {reason}")
+    if args.prune:
+        print(f"\n🧹 Entradas vencidas eliminadas: {cache.prune()}")
+        cache.save()
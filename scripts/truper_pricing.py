@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Recalcular precios de venta TRUPER en bloque
+
+import_truper_fast.py decide el precio fila por fila al generar el SQL
+(precio público con IVA o, si falta, el de distribuidor), así que cambiar el
+margen implicaba regenerar y recargar todo el catálogo. Aquí las columnas de
+precio del CSV se convierten una sola vez a arreglos de NumPy, el margen y el
+redondeo se aplican a todo el catálogo en una sola pasada, se comparan con el
+precio actual de la BD y sólo los productos cuyo precio cambia se envían a
+BulkProductWriter.
+
+Los productos TRUPER en la BD no tienen external_code; se identifican por la
+imagen (/truper/<clave>.jpg o truper.com/.../imagenes/<código>.jpg), igual que
+en update_truper_images_from_csv.py.
+
+Reglas (por defecto reproducen el precio de la importación):
+- --base publico|distribuidor   columna base; si está vacía o en 0 se usa la otra
+- --margin 0.10                 margen sobre la base para todo el catálogo
+- --family-margin P085=0.15     margen de una familia TRUPER (se puede repetir)
+- --rounding centavo|peso|decena|nueve   (nueve: 149, 1,299, ...)
+- --min-price 10                precios menores se omiten
+
+Requiere numpy (pip install numpy).
+
+Uso:
+    python3 scripts/truper_pricing.py --margin 0.12 --rounding nueve            # dry-run
+    python3 scripts/truper_pricing.py --margin 0.12 --rounding nueve --execute
+"""
+
+import re
+import csv
+import sys
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from catalog_config import ROOT, supabase
+from catalog_writer import BulkProductWriter
+from etl_metrics import metrics
+from etl_profile import phase, run_main
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CSV_FILE = ROOT / "data" / "truper_catalog_full.csv"
+TRUPER_CONTACT_PHONE = '5636741156'
+PAGE_SIZE = 1000
+WRITE_BATCH_SIZE = 500
+
+PRICE_COLUMNS = {
+    'publico': "precio público con IVA",
+    'distribuidor': "precio distribuidor con IVA",
+}
+ROUNDING_MODES = ('centavo', 'peso', 'decena', 'nueve')
+PRICE_TOLERANCE = 0.005  # Diferencias menores a medio centavo no son cambio
+
+_IMAGE_KEY_RE = re.compile(r'/(?:truper|imagenes)/([^/?#]+)\.(?:jpg|webp|png)', re.IGNORECASE)
+
+
+def parse_price(value: Optional[str]) -> Optional[float]:
+    """'$1,234.50' -> 1234.5; None si está vacío o no es un número"""
+    text = (value or '').replace(',', '').replace('$', '').strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def truper_price(precio_publico: Optional[str], precio_distribuidor: Optional[str]) -> Optional[float]:
+    """Precio de una fila: público con IVA, o el de distribuidor si falta; None si no hay precio válido"""
+    price = parse_price(precio_publico) or parse_price(precio_distribuidor)
+    return price if price and price > 0 else None
+
+
+def read_truper_rows(path: Path = CSV_FILE) -> List[Dict[str, str]]:
+    """Filas del CSV de TRUPER (el encabezado no está en la primera línea)"""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    header_line_idx = None
+    for i, line in enumerate(lines):
+        if "código" in line.lower() and "clave" in line.lower():
+            header_line_idx = i
+            break
+    if header_line_idx is None:
+        raise ValueError("No se encontró la línea de headers en el CSV")
+
+    return [row for row in csv.DictReader(lines[header_line_idx:]) if any(row.values())]
+
+
+def image_key(images) -> Optional[str]:
+    """Clave o código TRUPER tomado de la primera imagen del producto"""
+    if not images:
+        return None
+    first = images[0] if isinstance(images, list) else images
+    match = _IMAGE_KEY_RE.search(first) if isinstance(first, str) else None
+    return match.group(1) if match else None
+
+
+def parse_price_array(values: List[str]) -> "np.ndarray":
+    """Columna de precios en texto -> float64 (NaN si está vacía o no es un número)"""
+    cleaned = np.char.strip(np.char.replace(np.char.replace(np.asarray(values, dtype=str), ',', ''), '$', ''))
+    cleaned = np.where(cleaned == '', 'nan', cleaned)
+    try:
+        return cleaned.astype(np.float64)
+    except ValueError:
+        # Algún valor no numérico ("Consultar"): sólo entonces se revisa uno por uno
+        parsed = (parse_price(value) for value in cleaned.tolist())
+        return np.array([np.nan if value is None else value for value in parsed], dtype=np.float64)
+
+
+class PriceColumns:
+    """Columnas del CSV que usa el cálculo de precios, como arreglos alineados por fila"""
+
+    def __init__(self, rows: List[Dict[str, str]]):
+        def column(name: str) -> List[str]:
+            return [(row.get(name) or '').strip() for row in rows]
+
+        self.codigo = np.array(column("código"), dtype=object)
+        self.clave = np.array(column("clave"), dtype=object)
+        self.familia = np.array(column("Familia"), dtype=object)
+        self.prices = {key: parse_price_array(column(name)) for key, name in PRICE_COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return len(self.codigo)
+
+    def index(self) -> Dict[str, int]:
+        """clave/código -> fila (la clave tiene prioridad, como en la importación)"""
+        by_key = {codigo: i for i, codigo in enumerate(self.codigo.tolist()) if codigo}
+        by_key.update({clave: i for i, clave in enumerate(self.clave.tolist()) if clave})
+        return by_key
+
+
+class PricingPolicy:
+    """Margen y redondeo aplicados a todo el catálogo"""
+
+    def __init__(self, margin: float = 0.0, family_margins: Optional[Dict[str, float]] = None,
+                 rounding: str = 'centavo', base: str = 'publico', min_price: float = 0.0):
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"Redondeo desconocido: {rounding}")
+        if base not in PRICE_COLUMNS:
+            raise ValueError(f"Columna base desconocida: {base}")
+        self.margin = margin
+        self.family_margins = family_margins or {}
+        self.rounding = rounding
+        self.base = base
+        self.min_price = min_price
+
+    def describe(self) -> str:
+        families = ', '.join(f"{fam}={m:+.0%}" for fam, m in self.family_margins.items())
+        return (f"base={self.base} margen={self.margin:+.0%}"
+                f"{f' ({families})' if families else ''} redondeo={self.rounding}"
+                f"{f' mínimo=${self.min_price:,.2f}' if self.min_price else ''}")
+
+    def apply(self, columns: PriceColumns) -> "np.ndarray":
+        """Precio de venta de cada fila (NaN si no tiene precio válido)"""
+        fallback = 'distribuidor' if self.base == 'publico' else 'publico'
+        base = columns.prices[self.base]
+        base = np.where(np.isnan(base) | (base <= 0), columns.prices[fallback], base)
+
+        margin = np.full(len(columns), self.margin)
+        for familia, family_margin in self.family_margins.items():
+            margin[columns.familia == familia] = family_margin
+        price = base * (1.0 + margin)
+
+        if self.rounding == 'centavo':
+            price = np.round(price, 2)
+        elif self.rounding == 'peso':
+            price = np.round(price)
+        elif self.rounding == 'decena':
+            price = np.ceil(price / 10.0) * 10.0
+        elif self.rounding == 'nueve':
+            price = np.ceil((price + 1.0) / 10.0) * 10.0 - 1.0
+
+        invalid = np.isnan(price) | (price <= 0) | (price < self.min_price)
+        price[invalid] = np.nan
+        return price
+
+
+def load_truper_products() -> List[Dict]:
+    """id, price e images de los productos TRUPER en la BD"""
+    products = []
+    offset = 0
+    while True:
+        res = supabase.table('marketplace_products').select('id,price,images').is_(
+            'seller_id', 'null'
+        ).eq('contact_phone', TRUPER_CONTACT_PHONE).is_('external_code', 'null').order('id').range(
+            offset, offset + PAGE_SIZE - 1
+        ).execute()
+        batch = res.data or []
+        products.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return products
+
+
+def price_changes(columns: PriceColumns, prices: "np.ndarray", products: List[Dict]) -> Dict:
+    """Compara los precios nuevos con los de la BD; retorna ids y precios que cambian"""
+    by_key = columns.index()
+    ids = np.array([p['id'] for p in products], dtype=object)
+    current = np.array([np.nan if p.get('price') is None else float(p['price']) for p in products],
+                       dtype=np.float64)
+    rows = np.array([by_key.get(image_key(p.get('images')), -1) for p in products], dtype=np.int64)
+
+    matched = rows >= 0
+    new = np.full(len(products), np.nan)
+    new[matched] = prices[rows[matched]]
+    priced = ~np.isnan(new)
+    changed = priced & (np.isnan(current) | (np.abs(new - current) >= PRICE_TOLERANCE))
+
+    delta = new[changed] - current[changed]
+    return {
+        'ids': ids[changed],
+        'old': current[changed],
+        'new': new[changed],
+        'matched': int(matched.sum()),
+        'unmatched': int((~matched).sum()),
+        'no_price': int((matched & ~priced).sum()),
+        'unchanged': int((priced & ~changed).sum()),
+        'up': int((delta > 0).sum()),
+        'down': int((delta < 0).sum()),
+    }
+
+
+def write_prices(changes: Dict, dry_run: bool = True, batch_size: int = WRITE_BATCH_SIZE) -> Dict[str, int]:
+    """Envía sólo los precios que cambiaron a BulkProductWriter"""
+    with BulkProductWriter(supabase, batch_size=batch_size, dry_run=dry_run, verbose=False) as writer:
+        for product_id, price in zip(changes['ids'].tolist(), changes['new'].tolist()):
+            writer.add(product_id, {'price': price})
+    metrics.inc('truper_price_changes_total', len(changes['ids']), mode='dry_run' if dry_run else 'execute')
+    return writer.stats
+
+
+def _family_margin(value: str):
+    familia, _, margin = value.partition('=')
+    try:
+        return familia.strip(), float(margin)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Formato esperado FAMILIA=MARGEN (p. ej. P085=0.15): {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recalcular precios de venta TRUPER en bloque')
+    parser.add_argument('--execute', action='store_true', help='Escribir en la BD (por defecto es dry-run)')
+    parser.add_argument('--csv', type=Path, default=CSV_FILE, help='CSV del catálogo TRUPER')
+    parser.add_argument('--base', choices=sorted(PRICE_COLUMNS), default='publico', help='Columna de precio base')
+    parser.add_argument('--margin', type=float, default=0.0, help='Margen sobre la base (0.10 = 10%%)')
+    parser.add_argument('--family-margin', type=_family_margin, action='append', default=[],
+                        metavar='FAMILIA=MARGEN', help='Margen para una familia TRUPER (se puede repetir)')
+    parser.add_argument('--rounding', choices=ROUNDING_MODES, default='centavo')
+    parser.add_argument('--min-price', type=float, default=0.0, help='Omitir precios menores a este valor')
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE)
+    args = parser.parse_args()
+    metrics.export_at_exit('truper_pricing')
+    metrics.describe('truper_price_changes_total', 'Productos TRUPER cuyo precio cambió con la política de precios')
+
+    if np is None:
+        print("❌ numpy no está instalado")
+        print("💡 Instalar con: pip install numpy")
+        sys.exit(1)
+
+    policy = PricingPolicy(args.margin, dict(args.family_margin), args.rounding, args.base, args.min_price)
+
+    print("=" * 60)
+    print("💲 RECÁLCULO DE PRECIOS TRUPER")
+    print("=" * 60)
+    print(f"Modo: {'PRODUCCIÓN' if args.execute else 'DRY RUN (no se guardarán cambios)'}")
+    print(f"Política: {policy.describe()}")
+
+    if not args.csv.exists():
+        print(f"❌ Error: No se encontró el archivo CSV: {args.csv}")
+        sys.exit(1)
+
+    with phase('read_csv'):
+        columns = PriceColumns(read_truper_rows(args.csv))
+    with phase('apply_policy'):
+        prices = policy.apply(columns)
+    print(f"📖 {len(columns)} filas en el CSV, {int((~np.isnan(prices)).sum())} con precio")
+
+    print("📥 Leyendo precios actuales de la BD...")
+    with phase('load_products'):
+        products = load_truper_products()
+    print(f"✅ {len(products)} productos TRUPER en la BD")
+
+    changes = price_changes(columns, prices, products)
+    for product_id, old, new in list(zip(changes['ids'], changes['old'], changes['new']))[:5]:
+        print(f"   ~ {product_id}: {old:,.2f} -> {new:,.2f}")
+
+    with phase('write_prices'):
+        stats = write_prices(changes, dry_run=not args.execute, batch_size=args.batch_size)
+
+    print(f"\n✅ Identificados en el CSV: {changes['matched']} (sin identificar: {changes['unmatched']})")
+    print(f"   🔄 Con cambio de precio: {len(changes['ids'])} (suben: {changes['up']}, bajan: {changes['down']})")
+    print(f"   ⏭️  Sin cambios: {changes['unchanged']}")
+    print(f"   ⚠️  Sin precio válido con esta política: {changes['no_price']}")
+    if stats['errors']:
+        print(f"   ❌ Errores: {stats['errors']}")
+    if not args.execute and len(changes['ids']):
+        print("\n💡 Para aplicar los cambios, ejecuta el mismo comando con --execute")
+
+
+if __name__ == "__main__":
+    run_main(main)
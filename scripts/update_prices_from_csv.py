@@ -7,34 +7,12 @@ Uso:
     python3 scripts/update_prices_from_csv.py --file productos.csv --execute
 """
 
-import os
 import sys
 import csv
 import argparse
 from typing import Dict, List, Optional
-from dotenv import load_dotenv
 
-try:
-    from supabase import create_client, Client
-    HAS_SUPABASE = True
-except ImportError:
-    print("❌ Error: Se requiere supabase-py")
-    print("   Instalar con: pip install supabase")
-    sys.exit(1)
-
-# Cargar variables de entorno
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno no configuradas")
-    print("   Requiere: NEXT_PUBLIC_SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY")
-    print("   Asegúrate de tener un archivo .env.local en la raíz del proyecto")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 def parse_csv(file_path: str) -> List[Dict]:
     """
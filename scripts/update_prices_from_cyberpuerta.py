@@ -4,13 +4,14 @@ Script para actualizar precios de productos desde Cyberpuerta.mx
 Busca productos por SKU y actualiza precios en la base de datos
 """
 
-import os
 import sys
 import time
 import re
 from typing import Optional, Dict, List
 from urllib.parse import quote, urljoin
-from dotenv import load_dotenv
+
+from catalog_config import supabase
+from title_matcher import title_similarity, DEFAULT_AUTO_ACCEPT
 
 try:
     import requests
@@ -21,29 +22,6 @@ except ImportError:
     print("   Instalar con: pip install beautifulsoup4 requests lxml")
     sys.exit(1)
 
-try:
-    from supabase import create_client, Client
-    HAS_SUPABASE = True
-except ImportError:
-    print("❌ Error: Se requiere supabase-py")
-    print("   Instalar con: pip install supabase")
-    sys.exit(1)
-
-# Cargar variables de entorno desde .env.local
-load_dotenv('.env.local')
-
-# Configuración
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno no configuradas")
-    print("   Requiere: NEXT_PUBLIC_SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY")
-    print("   Asegúrate de tener un archivo .env.local en la raíz del proyecto")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 # Headers para simular navegador
 BROWSER_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -61,12 +39,25 @@ BROWSER_HEADERS = {
 CYBERPUERTA_BASE = "https://www.cyberpuerta.mx"
 CYBERPUERTA_SEARCH = f"{CYBERPUERTA_BASE}/Buscar/"
 
-def search_product_by_sku(sku: str) -> Optional[Dict]:
+def _result_title(product) -> str:
+    """Extrae el nombre del producto de una tarjeta de resultados"""
+    for selector in ['.productTitle', '.product-title', '.emproduct_right_title', 'h2', 'h3', 'a[title]']:
+        elem = product.select_one(selector)
+        if elem:
+            return elem.get('title') or elem.get_text(strip=True)
+    return product.get_text(' ', strip=True)[:200]
+
+
+def search_product_by_sku(sku: str, title: Optional[str] = None,
+                          title_threshold: float = DEFAULT_AUTO_ACCEPT) -> Optional[Dict]:
     """
     Busca un producto en Cyberpuerta por SKU y retorna información del precio
     
     Args:
         sku: SKU del producto a buscar
+        title: Título del producto en la BD; si se da, también se aceptan
+            resultados cuyo nombre sea parecido aunque no contengan el SKU
+        title_threshold: Similitud mínima (0-1) para aceptar un resultado por título
         
     Returns:
         Dict con price, original_price (si hay descuento), y fuente, o None
@@ -155,6 +146,14 @@ def search_product_by_sku(sku: str) -> Optional[Dict]:
                 if sku_lower in link.get('href', '').lower():
                     score += 3
             
+            # Nombre parecido al título de la BD (coincidencia difusa)
+            if title:
+                similarity = title_similarity(title, _result_title(product))
+                if similarity >= title_threshold:
+                    score += 10
+                elif score > 0:
+                    score += similarity  # Sólo desempata entre coincidencias por SKU
+            
             if score > best_score:
                 best_score = score
                 best_match = product
@@ -163,7 +162,7 @@ def search_product_by_sku(sku: str) -> Optional[Dict]:
             print(f"  ⚠️  No se encontró un producto que coincida con el SKU")
             return None
         
-        print(f"  ✅ Producto encontrado con score: {best_score}")
+        print(f"  ✅ Producto encontrado con score: {best_score:.1f}")
         
         # Extraer precio del producto
         price_selectors = [
@@ -262,13 +261,15 @@ def search_product_by_sku(sku: str) -> Optional[Dict]:
         print(f"  ❌ Error inesperado: {str(e)[:100]}")
         return None
 
-def update_prices_from_cyberpuerta(limit: int = 100, execute: bool = False):
+def update_prices_from_cyberpuerta(limit: int = 100, execute: bool = False,
+                                   title_threshold: float = DEFAULT_AUTO_ACCEPT):
     """
     Actualiza precios de productos desde Cyberpuerta usando SKU
     
     Args:
         limit: Número máximo de productos a procesar
         execute: Si es True, actualiza la BD. Si es False, solo muestra resultados
+        title_threshold: Similitud mínima para aceptar un resultado por título
     """
     print("=" * 80)
     print("ACTUALIZACIÓN DE PRECIOS DESDE CYBERPUERTA.MX")
@@ -323,7 +324,7 @@ def update_prices_from_cyberpuerta(limit: int = 100, execute: bool = False):
         print(f"  SKU: {sku}")
         
         # Buscar precio en Cyberpuerta
-        price_info = search_product_by_sku(sku)
+        price_info = search_product_by_sku(sku, title=title, title_threshold=title_threshold)
         
         if price_info and price_info.get('price', 0) > 0:
             precio = price_info['price']
@@ -377,8 +378,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Actualizar precios desde Cyberpuerta.mx')
     parser.add_argument('--limit', type=int, default=100, help='Número máximo de productos a procesar')
     parser.add_argument('--execute', action='store_true', help='Aplicar cambios a la base de datos')
+    parser.add_argument('--title-threshold', type=float, default=DEFAULT_AUTO_ACCEPT,
+                        help=f'Similitud mínima para aceptar un resultado por título (default: {DEFAULT_AUTO_ACCEPT})')
     
     args = parser.parse_args()
     
-    update_prices_from_cyberpuerta(limit=args.limit, execute=args.execute)
+    update_prices_from_cyberpuerta(limit=args.limit, execute=args.execute, title_threshold=args.title_threshold)
 
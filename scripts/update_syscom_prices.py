@@ -4,81 +4,24 @@ Script avanzado para actualizar precios de productos Syscom
 Combina múltiples fuentes: API Syscom, Web Scraping, y comparación con otras tiendas
 """
 
-import os
 import sys
 import time
 import re
 import requests
-from pathlib import Path
-from supabase import create_client, Client
 from typing import Dict, Optional
 from datetime import datetime
 
-# Intentar importar BeautifulSoup (opcional)
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except ImportError:
-    HAS_BS4 = False
-    print("⚠️  BeautifulSoup4 no instalado. Web scraping deshabilitado.")
-    print("💡 Instalar con: pip3 install beautifulsoup4 lxml")
+from catalog_config import optional_import, supabase, syscom, syscom_api_base, syscom_rate_limit_delay
 
-# Cargar variables de entorno manualmente desde .env.local
-env_file = Path(__file__).parent.parent / '.env.local'
-if env_file.exists():
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip().strip('"').strip("'")
-                os.environ[key] = value
-else:
-    print(f"⚠️  Archivo .env.local no encontrado en: {env_file}")
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-SYSCOM_CLIENT_ID = os.environ.get('SYSCOM_CLIENT_ID')
-SYSCOM_CLIENT_SECRET = os.environ.get('SYSCOM_CLIENT_SECRET')
-
-if not all([SUPABASE_URL, SUPABASE_KEY, SYSCOM_CLIENT_ID, SYSCOM_CLIENT_SECRET]):
-    print("❌ Error: Variables de entorno no configuradas")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-SYSCOM_OAUTH_URL = "https://developers.syscom.mx/oauth/token"
-SYSCOM_API_BASE = "https://developers.syscom.mx/api/v1"
-RATE_LIMIT_DELAY = 1.1
-
-access_token = None
-token_expiry = 0
+SYSCOM_API_BASE = syscom_api_base()
+RATE_LIMIT_DELAY = syscom_rate_limit_delay()
+BS4_INSTALL_HINT = "pip3 install beautifulsoup4 lxml"
 
 def get_access_token() -> str:
-    global access_token, token_expiry
-    if access_token and token_expiry > (time.time() * 1000) - 3600000:
-        return access_token
-    
-    print("🔐 Obteniendo token de acceso...")
-    response = requests.post(
-        SYSCOM_OAUTH_URL,
-        data={
-            "grant_type": "client_credentials",
-            "client_id": SYSCOM_CLIENT_ID,
-            "client_secret": SYSCOM_CLIENT_SECRET,
-        },
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-    )
-    
-    if response.status_code != 200:
-        print(f"❌ Error obteniendo token: {response.status_code}")
+    token = syscom.token()
+    if not token:
         sys.exit(1)
-    
-    data = response.json()
-    access_token = data["access_token"]
-    token_expiry = (time.time() * 1000) + (data["expires_in"] * 1000)
-    return access_token
+    return token
 
 # Headers para simular navegador en web scraping
 BROWSER_HEADERS = {
@@ -142,7 +85,8 @@ def get_price_from_api(producto_id: str) -> Optional[Dict]:
 
 def get_price_from_syscom_web(producto_id: str) -> Optional[Dict]:
     """Obtiene precio desde la página web de Syscom (web scraping)"""
-    if not HAS_BS4:
+    bs4 = optional_import('bs4', BS4_INSTALL_HINT)
+    if not bs4:
         return None
         
     try:
@@ -150,7 +94,7 @@ def get_price_from_syscom_web(producto_id: str) -> Optional[Dict]:
         response = requests.get(url, headers=BROWSER_HEADERS, timeout=15)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = bs4.BeautifulSoup(response.text, 'html.parser')
             
             # Buscar precios usando múltiples patrones
             precio_patterns = [
@@ -200,7 +144,8 @@ def search_product_in_cyberpuerta(product_title: str, sku: str = None) -> Option
     Busca producto en Cyberpuerta y obtiene precio (comparación de mercado)
     Versión mejorada con búsqueda por SKU y múltiples selectores
     """
-    if not HAS_BS4:
+    bs4 = optional_import('bs4', BS4_INSTALL_HINT)
+    if not bs4:
         return None
     
     try:
@@ -217,7 +162,7 @@ def search_product_in_cyberpuerta(product_title: str, sku: str = None) -> Option
         if response.status_code != 200:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = bs4.BeautifulSoup(response.text, 'html.parser')
         
         # Múltiples selectores para encontrar productos
         product_selectors = [
@@ -7,21 +7,8 @@ Construye URLs directas usando el código del producto: https://www.truper.com/m
 import os
 import sys
 import csv
-from dotenv import load_dotenv
-from supabase import create_client
 
-# Cargar variables de entorno
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: Variables de entorno SUPABASE_URL y SUPABASE_KEY no encontradas")
-    sys.exit(1)
-
-# Inicializar cliente Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_config import supabase
 
 # Ruta del CSV
 CSV_PATH = 'data/truper_catalog_full.csv'
@@ -330,8 +317,6 @@ def update_product_images_by_key(codes):
 
 
 def main():
-    import sys
-    
     print("=" * 60)
     print("🖼️  ACTUALIZACIÓN DE IMÁGENES TRUPER DESDE CSV")
     print("=" * 60)
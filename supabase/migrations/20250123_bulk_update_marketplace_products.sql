@@ -0,0 +1,42 @@
+-- =====================================================
+-- Actualización masiva de productos del marketplace
+-- =====================================================
+-- Fecha: 2025-01-23
+-- Descripción: Función RPC que aplica en una sola llamada las actualizaciones
+-- de muchos productos (imágenes, precios, estado...). Los scripts de Python
+-- (scripts/catalog_writer.py) la usan en lugar de un UPDATE por fila.
+--
+-- Formato de entrada: arreglo JSON de objetos con "id" y sólo los campos a
+-- cambiar, p. ej.:
+--   [{"id": "…", "images": ["https://…"]}, {"id": "…", "price": 199.0}]
+-- Los campos ausentes conservan su valor actual.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.bulk_update_marketplace_products(updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    UPDATE public.marketplace_products mp
+    SET
+        title = CASE WHEN u.data ? 'title' THEN u.data->>'title' ELSE mp.title END,
+        description = CASE WHEN u.data ? 'description' THEN u.data->>'description' ELSE mp.description END,
+        price = CASE WHEN u.data ? 'price' THEN (u.data->>'price')::NUMERIC ELSE mp.price END,
+        original_price = CASE WHEN u.data ? 'original_price' THEN (u.data->>'original_price')::NUMERIC ELSE mp.original_price END,
+        images = CASE
+            WHEN u.data ? 'images' THEN ARRAY(SELECT jsonb_array_elements_text(u.data->'images'))
+            ELSE mp.images
+        END,
+        status = CASE WHEN u.data ? 'status' THEN u.data->>'status' ELSE mp.status END,
+        updated_at = timezone('utc'::text, now())
+    FROM jsonb_array_elements(updates) AS u(data)
+    WHERE mp.id = (u.data->>'id')::UUID;
+
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sólo el service role (scripts ETL) puede usarla
+REVOKE ALL ON FUNCTION public.bulk_update_marketplace_products(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.bulk_update_marketplace_products(JSONB) TO service_role;
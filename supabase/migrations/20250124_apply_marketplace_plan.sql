@@ -0,0 +1,42 @@
+-- =====================================================
+-- Aplicar planes de cambios con control optimista
+-- =====================================================
+-- Fecha: 2025-01-24
+-- Descripción: Igual que bulk_update_marketplace_products, pero cada objeto
+-- puede traer "expected_updated_at" (el updated_at que tenía el producto cuando
+-- se generó el plan). Si el producto cambió desde entonces, la fila no se toca.
+-- scripts/catalog_plan.py la usa para aplicar planes en lotes.
+--
+-- Formato de entrada:
+--   [{"id": "…", "expected_updated_at": "2025-01-24T10:00:00.123456+00:00",
+--     "images": ["https://…"]}]
+-- Retorna los ids que sí se actualizaron; los que faltan son conflictos.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.apply_marketplace_plan(updates JSONB)
+RETURNS SETOF UUID AS $$
+    UPDATE public.marketplace_products mp
+    SET
+        title = CASE WHEN u.data ? 'title' THEN u.data->>'title' ELSE mp.title END,
+        description = CASE WHEN u.data ? 'description' THEN u.data->>'description' ELSE mp.description END,
+        price = CASE WHEN u.data ? 'price' THEN (u.data->>'price')::NUMERIC ELSE mp.price END,
+        original_price = CASE WHEN u.data ? 'original_price' THEN (u.data->>'original_price')::NUMERIC ELSE mp.original_price END,
+        images = CASE
+            WHEN u.data ? 'images' THEN ARRAY(SELECT jsonb_array_elements_text(u.data->'images'))
+            ELSE mp.images
+        END,
+        status = CASE WHEN u.data ? 'status' THEN u.data->>'status' ELSE mp.status END,
+        seller_id = CASE WHEN u.data ? 'seller_id' THEN (u.data->>'seller_id')::UUID ELSE mp.seller_id END,
+        updated_at = timezone('utc'::text, now())
+    FROM jsonb_array_elements(updates) AS u(data)
+    WHERE mp.id = (u.data->>'id')::UUID
+      AND (
+          u.data->>'expected_updated_at' IS NULL
+          OR mp.updated_at = (u.data->>'expected_updated_at')::TIMESTAMPTZ
+      )
+    RETURNING mp.id;
+$$ LANGUAGE sql;
+
+-- Sólo el service role (scripts ETL) puede usarla
+REVOKE ALL ON FUNCTION public.apply_marketplace_plan(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.apply_marketplace_plan(JSONB) TO service_role;
@@ -0,0 +1,46 @@
+-- =====================================================
+-- Existencias de productos del marketplace
+-- =====================================================
+-- Fecha: 2025-01-25
+-- Descripción: Agrega la columna stock (existencias del proveedor, p. ej.
+-- total_existencia de Syscom; NULL = desconocido) y la acepta en
+-- bulk_update_marketplace_products para que scripts/syscom_price_sync.py
+-- escriba sólo {price, original_price, stock} de los productos que cambiaron.
+-- =====================================================
+
+ALTER TABLE public.marketplace_products
+    ADD COLUMN IF NOT EXISTS stock INTEGER;
+
+COMMENT ON COLUMN public.marketplace_products.stock IS
+    'Existencias reportadas por el proveedor en la última sincronización (NULL = desconocido)';
+
+CREATE OR REPLACE FUNCTION public.bulk_update_marketplace_products(updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    UPDATE public.marketplace_products mp
+    SET
+        title = CASE WHEN u.data ? 'title' THEN u.data->>'title' ELSE mp.title END,
+        description = CASE WHEN u.data ? 'description' THEN u.data->>'description' ELSE mp.description END,
+        price = CASE WHEN u.data ? 'price' THEN (u.data->>'price')::NUMERIC ELSE mp.price END,
+        original_price = CASE WHEN u.data ? 'original_price' THEN (u.data->>'original_price')::NUMERIC ELSE mp.original_price END,
+        images = CASE
+            WHEN u.data ? 'images' THEN ARRAY(SELECT jsonb_array_elements_text(u.data->'images'))
+            ELSE mp.images
+        END,
+        status = CASE WHEN u.data ? 'status' THEN u.data->>'status' ELSE mp.status END,
+        seller_id = CASE WHEN u.data ? 'seller_id' THEN (u.data->>'seller_id')::UUID ELSE mp.seller_id END,
+        stock = CASE WHEN u.data ? 'stock' THEN (u.data->>'stock')::INTEGER ELSE mp.stock END,
+        updated_at = timezone('utc'::text, now())
+    FROM jsonb_array_elements(updates) AS u(data)
+    WHERE mp.id = (u.data->>'id')::UUID;
+
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sólo el service role (scripts ETL) puede usarla
+REVOKE ALL ON FUNCTION public.bulk_update_marketplace_products(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.bulk_update_marketplace_products(JSONB) TO service_role;
@@ -0,0 +1,90 @@
+-- =====================================================
+-- Búsqueda de varias palabras clave en una sola llamada
+-- =====================================================
+-- Fecha: 2025-01-26
+-- Descripción: Los scripts de revisión (búsqueda de cámaras termográficas,
+-- videovigilancia en Sistemas...) hacían una consulta ILIKE por palabra, una
+-- tras otra. Esta función recibe el arreglo de palabras y regresa, por cada
+-- una, cuántos productos coinciden, cuántos tienen precio > 0 y hasta
+-- per_keyword_limit productos de muestra. scripts/catalog_search.py la usa.
+--
+-- Las condiciones usan las mismas expresiones que los índices GIN de pg_trgm
+-- de 20250120_marketplace_search_indexes.sql y
+-- 20250122_optimize_price_gt_zero_indexes.sql:
+--   título:              title ILIKE '%palabra%'
+--   título/descripción:  (title || ' ' || COALESCE(description, '')) ILIKE '%palabra%'
+--
+-- Cada palabra regresa al menos una fila; si no hay coincidencias, id es NULL
+-- y match_count es 0.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.search_marketplace_keywords(
+    keywords TEXT[],
+    p_category_id UUID DEFAULT NULL,
+    title_only BOOLEAN DEFAULT FALSE,
+    only_priced BOOLEAN DEFAULT FALSE,
+    per_keyword_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+    keyword TEXT,
+    match_count BIGINT,
+    priced_count BIGINT,
+    id UUID,
+    title TEXT,
+    description TEXT,
+    price NUMERIC,
+    category_id UUID,
+    images TEXT[],
+    external_code TEXT
+) AS $$
+    WITH terms AS (
+        -- % y _ en la palabra se buscan literalmente
+        SELECT DISTINCT ON (k.keyword)
+            k.keyword,
+            k.ord,
+            '%' || replace(replace(replace(k.keyword, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+        FROM unnest(keywords) WITH ORDINALITY AS k(keyword, ord)
+        WHERE btrim(k.keyword) <> ''
+        ORDER BY k.keyword, k.ord
+    ),
+    matches AS (
+        -- Una rama por modo (title_only se evalúa una sola vez) para que cada una
+        -- use su índice de trigramas con el patrón de cada palabra
+        SELECT t.keyword, t.ord, mp.*
+        FROM terms t
+        CROSS JOIN LATERAL (
+            SELECT p.id, p.title, p.description, p.price, p.category_id, p.images, p.external_code, p.created_at
+            FROM public.marketplace_products p
+            WHERE title_only
+              AND p.title ILIKE t.pattern
+              AND p.status = 'active'
+              AND (p_category_id IS NULL OR p.category_id = p_category_id)
+              AND (NOT only_priced OR p.price > 0)
+            UNION ALL
+            SELECT p.id, p.title, p.description, p.price, p.category_id, p.images, p.external_code, p.created_at
+            FROM public.marketplace_products p
+            WHERE NOT title_only
+              AND (p.title || ' ' || COALESCE(p.description, '')) ILIKE t.pattern
+              AND p.status = 'active'
+              AND (p_category_id IS NULL OR p.category_id = p_category_id)
+              AND (NOT only_priced OR p.price > 0)
+        ) mp
+    ),
+    counts AS (
+        SELECT t.keyword, t.ord,
+               COUNT(m.id) AS match_count,
+               COUNT(m.id) FILTER (WHERE m.price > 0) AS priced_count
+        FROM terms t
+        LEFT JOIN matches m ON m.keyword = t.keyword
+        GROUP BY t.keyword, t.ord
+    ),
+    samples AS (
+        SELECT m.*, row_number() OVER (PARTITION BY m.keyword ORDER BY m.created_at DESC, m.id) AS rn
+        FROM matches m
+    )
+    SELECT c.keyword, c.match_count, c.priced_count,
+           s.id, s.title, s.description, s.price, s.category_id, s.images, s.external_code
+    FROM counts c
+    LEFT JOIN samples s ON s.keyword = c.keyword AND s.rn <= per_keyword_limit
+    ORDER BY c.ord, s.rn;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,54 @@
+-- =====================================================
+-- Moneda de origen de los precios de Syscom
+-- =====================================================
+-- Fecha: 2025-01-28
+-- Descripción: El precio de los productos de Syscom se guarda tal como lo da
+-- Syscom (ProductPrice.tsx lo muestra con la etiqueta USD y
+-- /api/marketplace/price/sync escribe ese mismo valor). Estas columnas
+-- registran junto al precio la moneda que se detectó para él y, si es USD, el
+-- tipo de cambio USD/MXN del día en que se escribió (scripts/syscom_currency.py).
+-- bulk_update_marketplace_products las acepta para que
+-- scripts/syscom_price_sync.py las escriba junto con price.
+-- =====================================================
+
+ALTER TABLE public.marketplace_products
+    ADD COLUMN IF NOT EXISTS price_currency TEXT,
+    ADD COLUMN IF NOT EXISTS exchange_rate NUMERIC;
+
+COMMENT ON COLUMN public.marketplace_products.price_currency IS
+    'Moneda de origen detectada para price/original_price (USD, MXN; NULL = desconocida)';
+COMMENT ON COLUMN public.marketplace_products.exchange_rate IS
+    'Tipo de cambio USD/MXN del día en que se escribió el precio (NULL si no aplica)';
+
+CREATE OR REPLACE FUNCTION public.bulk_update_marketplace_products(updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    UPDATE public.marketplace_products mp
+    SET
+        title = CASE WHEN u.data ? 'title' THEN u.data->>'title' ELSE mp.title END,
+        description = CASE WHEN u.data ? 'description' THEN u.data->>'description' ELSE mp.description END,
+        price = CASE WHEN u.data ? 'price' THEN (u.data->>'price')::NUMERIC ELSE mp.price END,
+        original_price = CASE WHEN u.data ? 'original_price' THEN (u.data->>'original_price')::NUMERIC ELSE mp.original_price END,
+        images = CASE
+            WHEN u.data ? 'images' THEN ARRAY(SELECT jsonb_array_elements_text(u.data->'images'))
+            ELSE mp.images
+        END,
+        status = CASE WHEN u.data ? 'status' THEN u.data->>'status' ELSE mp.status END,
+        seller_id = CASE WHEN u.data ? 'seller_id' THEN (u.data->>'seller_id')::UUID ELSE mp.seller_id END,
+        stock = CASE WHEN u.data ? 'stock' THEN (u.data->>'stock')::INTEGER ELSE mp.stock END,
+        price_currency = CASE WHEN u.data ? 'price_currency' THEN u.data->>'price_currency' ELSE mp.price_currency END,
+        exchange_rate = CASE WHEN u.data ? 'exchange_rate' THEN (u.data->>'exchange_rate')::NUMERIC ELSE mp.exchange_rate END,
+        updated_at = timezone('utc'::text, now())
+    FROM jsonb_array_elements(updates) AS u(data)
+    WHERE mp.id = (u.data->>'id')::UUID;
+
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sólo el service role (scripts ETL) puede usarla
+REVOKE ALL ON FUNCTION public.bulk_update_marketplace_products(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.bulk_update_marketplace_products(JSONB) TO service_role;
@@ -0,0 +1,26 @@
+-- =====================================================
+-- updated_at automático en marketplace_products
+-- =====================================================
+-- Fecha: 2025-01-29
+-- Descripción: apply_marketplace_plan (20250124) y el respaldo fila por fila
+-- de scripts/catalog_plan.py sólo escriben un producto si su updated_at sigue
+-- siendo el que tenía al generar el plan. Eso sólo detecta conflictos si
+-- todas las escrituras mueven updated_at; hasta ahora lo hacían las funciones
+-- RPC pero no los .update() de los scripts ni las rutas de la app. Este
+-- trigger lo actualiza en cualquier UPDATE de la tabla.
+-- =====================================================
+
+DROP TRIGGER IF EXISTS update_marketplace_products_updated_at ON public.marketplace_products;
+
+CREATE OR REPLACE FUNCTION public.update_marketplace_products_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = timezone('utc'::text, now());
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_marketplace_products_updated_at
+  BEFORE UPDATE ON public.marketplace_products
+  FOR EACH ROW
+  EXECUTE FUNCTION public.update_marketplace_products_updated_at();